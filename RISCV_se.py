@@ -3,20 +3,31 @@
 
 import argparse
 
+import m5
+
 from gem5.utils.requires import requires
 from gem5.isas import ISA
 from gem5.components.boards.simple_board import SimpleBoard
 from gem5.components.processors.simple_processor import SimpleProcessor
+from gem5.components.processors.simple_switchable_processor import (
+    SimpleSwitchableProcessor,
+)
 from gem5.components.processors.cpu_types import CPUTypes
-from gem5.components.memory import SingleChannelDDR3_1600
 from gem5.components.cachehierarchies.classic.private_l1_cache_hierarchy import (
     PrivateL1CacheHierarchy,
 )
 from gem5.resources.resource import BinaryResource
 from gem5.simulate.simulator import Simulator
+from gem5.simulate.exit_event import ExitEvent
+
+from se_common import memory, roi
 
 parser = argparse.ArgumentParser()
 parser.add_argument("-b", "--binary", required=True, help="Path to RISC-V user ELF")
+# --roi : ATOMIC hors ROI, O3 entre m5_work_begin et m5_work_end ;
+# --roi-after ff : fin du programme en ATOMIC, dump "post" separe
+roi.add_roi_args(parser)
+memory.add_memory_args(parser)
 args = parser.parse_args()
 
 requires(isa_required=ISA.RISCV)
@@ -27,22 +38,81 @@ cache_hierarchy = PrivateL1CacheHierarchy(
     l1d_size="32kB",
 )
 
-memory = SingleChannelDDR3_1600(size="8GB")
+# defaut (ddr3, 1 canal) : equivalent de SingleChannelDDR3_1600
+mem = memory.make_stdlib_memory(args, size="8GB")
 
-processor = SimpleProcessor(
-    cpu_type=CPUTypes.O3,   # Rich op_class stats
-    isa=ISA.RISCV,
-    num_cores=1,
-)
+if args.roi:
+    processor = SimpleSwitchableProcessor(
+        starting_core_type=CPUTypes.ATOMIC,
+        switch_core_type=CPUTypes.O3,
+        isa=ISA.RISCV,
+        num_cores=1,
+    )
+else:
+    processor = SimpleProcessor(
+        cpu_type=CPUTypes.O3,   # Rich op_class stats
+        isa=ISA.RISCV,
+        num_cores=1,
+    )
 
 board = SimpleBoard(
     clk_freq="1GHz",
     processor=processor,
-    memory=memory,
+    memory=mem,
     cache_hierarchy=cache_hierarchy,
 )
 
 board.set_se_binary_workload(BinaryResource(args.binary))
 
-sim = Simulator(board=board)
-sim.run()
+if not args.roi:
+    sim = Simulator(board=board)
+    sim.run()
+else:
+    board.exit_on_work_items = True
+    label = {}
+
+    def on_work_begin():
+        # Bascule ATOMIC -> O3 et remise a zero des stats en entree de ROI
+        processor.switch()
+        m5.stats.reset()
+        label["begin_tick"] = m5.curTick()
+        label["dumps_before"] = roi.count_dumps()
+        yield False
+
+    def on_work_end():
+        if roi.count_dumps() == label.pop("dumps_before", -1):
+            m5.stats.dump()
+        label["end_tick"] = m5.curTick()
+        label["roi_dump"] = roi.count_dumps() - 1
+        label["after"] = args.roi_after
+        label["complete"] = True
+        if args.roi_after == "exit":
+            roi.write_label(label)
+            yield True
+        else:
+            # Retour en ATOMIC jusqu'a la fin du programme
+            processor.switch()
+            m5.stats.reset()
+            yield False
+
+    sim = Simulator(
+        board=board,
+        on_exit_event={
+            ExitEvent.WORKBEGIN: on_work_begin(),
+            ExitEvent.WORKEND: on_work_end(),
+        },
+    )
+    sim.run()
+    if "begin_tick" in label and not label.get("complete"):
+        # Programme termine sans m5_work_end : ROI partielle, comme roi.simulate
+        if roi.count_dumps() == label.pop("dumps_before", -1):
+            m5.stats.dump()
+        label["end_tick"] = m5.curTick()
+        label["roi_dump"] = roi.count_dumps() - 1
+        label["after"] = args.roi_after
+        label["complete"] = False
+        roi.write_label(label)
+    elif args.roi_after == "ff" and label.get("complete"):
+        m5.stats.dump()
+        label["post_dump"] = roi.count_dumps() - 1
+        roi.write_label(label)
@@ -5,11 +5,13 @@
 int main(void){
     volatile int a[N], b[N], c[N];
 
+    m5_work_begin(0, 0);   // debut ROI (bascule CPU en mode --roi)
     m5_reset_stats(0, 0);
 
     for(int i=0;i<N;i++)
         c[i]=a[i]+b[i];
 
     m5_dump_stats(0, 0);
+    m5_work_end(0, 0);     // fin ROI
     return 0;
 }
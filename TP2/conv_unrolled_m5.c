@@ -56,9 +56,11 @@ void convolution2D(void) {
 int main(int argc, char **argv) {
     init_data(argc);          // hors ROI
 
-    m5_reset_stats(0, 0);     // début ROI
+    m5_work_begin(0, 0);      // début ROI (bascule CPU en mode --roi)
+    m5_reset_stats(0, 0);
     convolution2D();          // code mesuré
-    m5_dump_stats(0, 0);      // fin ROI
+    m5_dump_stats(0, 0);
+    m5_work_end(0, 0);        // fin ROI
 
     volatile float sink = output[0][0];
     return (int)sink;
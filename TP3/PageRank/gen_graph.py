@@ -0,0 +1,176 @@
+# gen_graph.py
+# Synthetic graphs for pagerank.riscv (graph file given at runtime).
+#
+# A graph is named <model>_n<nodes>_d<degree>[_s<seed>][_g<gamma>]:
+#   powerlaw  <nodes>*<degree> links, sources uniform, destinations drawn
+#             with a power-law in-degree (Chung-Lu weights, --gamma), as in
+#             web graphs
+#   erdos     <nodes>*<degree> links drawn uniformly (Erdos-Renyi G(n, m))
+#   mesh      2D grid, links to the 4 (degree 4) or 8 (degree 8) neighbours
+# No self-links nor duplicate links. Same name (and seed) = same file: a
+# powerlaw graph drawn with another --gamma than 2.1 gets a _g<gamma> suffix.
+#
+# File format (read by main.c): "nodes links" header, then "src dst" lines.
+#
+# Usage:
+#   python3 TP3/PageRank/gen_graph.py powerlaw_n256_d8 mesh_n1024_d4
+#   python3 TP3/PageRank/gen_graph.py --model erdos --nodes 64 128 256 --degree 4 16
+#   python3 TP3/PageRank/gen_graph.py --study TP3_fu_size   # graphs of a study of experiments.toml
+
+import argparse
+import math
+import os
+import random
+import re
+import sys
+from typing import List, Set, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GRAPHS_DIR = os.path.join(HERE, "graphs")
+MODELS = ["powerlaw", "erdos", "mesh"]
+
+DEFAULT_GAMMA = 2.1
+
+NAME_RE = re.compile(r"^(powerlaw|erdos|mesh)_n(\d+)_d(\d+)(?:_s(\d+))?(?:_g(\d+(?:\.\d+)?))?$")
+
+Edge = Tuple[int, int]
+
+
+def graph_name(model: str, nodes: int, degree: int, seed: int = 0, gamma: float = DEFAULT_GAMMA) -> str:
+    name = f"{model}_n{nodes}_d{degree}" + (f"_s{seed}" if seed else "")
+    if model == "powerlaw" and gamma != DEFAULT_GAMMA:
+        name += f"_g{gamma:g}"
+    return name
+
+
+def _draw(nodes: int, links: int, rng: random.Random, dst_weights=None) -> List[Edge]:
+    if links > nodes * (nodes - 1):
+        raise ValueError(f"{links} links do not fit in {nodes} nodes")
+    cum = None
+    if dst_weights is not None:
+        cum, acc = [], 0.0
+        for w in dst_weights:
+            acc += w
+            cum.append(acc)
+    seen: Set[Edge] = set()
+    edges: List[Edge] = []
+    # dense requests on heavy-tailed weights can stall: fall back to uniform
+    budget = 50 * links
+    while len(edges) < links:
+        src = rng.randrange(nodes)
+        if cum is not None and budget > 0:
+            dst = rng.choices(range(nodes), cum_weights=cum)[0]
+            budget -= 1
+        else:
+            dst = rng.randrange(nodes)
+        if src == dst or (src, dst) in seen:
+            continue
+        seen.add((src, dst))
+        edges.append((src, dst))
+    return edges
+
+
+def powerlaw(nodes: int, degree: int, rng: random.Random, gamma: float) -> List[Edge]:
+    # Chung-Lu: weight of node i ~ (i + 1)^(-1 / (gamma - 1)), hubs shuffled
+    weights = [(i + 1) ** (-1.0 / (gamma - 1.0)) for i in range(nodes)]
+    rng.shuffle(weights)
+    return _draw(nodes, nodes * degree, rng, weights)
+
+
+def erdos(nodes: int, degree: int, rng: random.Random, gamma: float) -> List[Edge]:
+    return _draw(nodes, nodes * degree, rng)
+
+
+def mesh(nodes: int, degree: int, rng: random.Random, gamma: float) -> List[Edge]:
+    if degree not in (4, 8):
+        raise ValueError("mesh: degree 4 (von Neumann) or 8 (Moore)")
+    cols = math.isqrt(nodes - 1) + 1 if nodes > 1 else 1
+    steps = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    if degree == 8:
+        steps += [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+    edges = []
+    for v in range(nodes):
+        r, c = divmod(v, cols)
+        for dr, dc in steps:
+            rr, cc = r + dr, c + dc
+            if 0 <= cc < cols and rr >= 0:
+                u = rr * cols + cc
+                if u < nodes:
+                    edges.append((v, u))
+    return edges
+
+
+GENERATORS = {"powerlaw": powerlaw, "erdos": erdos, "mesh": mesh}
+
+
+def generate(name: str, outdir: str, gamma: float, force: bool = False) -> str:
+    """Path of the graph file, written unless it exists. A _g<gamma> in the name overrides gamma."""
+    m = NAME_RE.match(name)
+    if not m:
+        raise ValueError(f"bad graph name '{name}' (expected <model>_n<nodes>_d<degree>[_s<seed>][_g<gamma>])")
+    model, nodes, degree = m.group(1), int(m.group(2)), int(m.group(3))
+    if m.group(5):
+        gamma = float(m.group(5))
+    base = graph_name(model, nodes, degree, int(m.group(4) or 0))
+    path = os.path.join(outdir, graph_name(model, nodes, degree, int(m.group(4) or 0), gamma) + ".txt")
+    if os.path.isfile(path) and not force:
+        return path
+    rng = random.Random(f"{base}:{gamma}")
+    edges = GENERATORS[model](nodes, degree, rng, gamma)
+    os.makedirs(outdir, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(f"{nodes} {len(edges)}\n")
+        f.writelines(f"{s} {d}\n" for s, d in edges)
+    os.replace(tmp, path)
+    return path
+
+
+def study_graphs(study: str) -> List[str]:
+    sys.path.insert(0, os.path.join(HERE, "..", "..", "TP4", "Projet"))
+    from expspec import load_points
+
+    names = []
+    for p in load_points(study):
+        name = graph_name(p["model"], int(p["nodes"]), int(p["degree"]), int(p.get("seed", 0)))
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Synthetic graphs (power-law, Erdos-Renyi, mesh) for PageRank")
+    ap.add_argument("names", nargs="*", help="Graph names, <model>_n<nodes>_d<degree>[_s<seed>][_g<gamma>]")
+    ap.add_argument("--model", choices=MODELS, action="append", default=[], help="Model of a sweep (repeatable)")
+    ap.add_argument("--nodes", type=int, nargs="+", default=[], help="Node counts of the sweep")
+    ap.add_argument("--degree", type=int, nargs="+", default=[8], help="Mean links per node of the sweep")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--study", default=None, help="Graphs of this study of experiments.toml (model/nodes/degree)")
+    ap.add_argument("--gamma", type=float, default=DEFAULT_GAMMA,
+                    help=f"Power-law exponent of the in-degrees (default {DEFAULT_GAMMA})")
+    ap.add_argument("--outdir", default=GRAPHS_DIR)
+    ap.add_argument("--force", action="store_true", help="Rewrite existing files")
+    args = ap.parse_args()
+
+    names = list(args.names)
+    for model in args.model:
+        for nodes in args.nodes:
+            for degree in args.degree:
+                names.append(graph_name(model, nodes, degree, args.seed))
+    if args.study:
+        names += study_graphs(args.study)
+    if not names:
+        ap.error("no graph: give names, --model/--nodes or --study")
+    if args.gamma <= 1.0:
+        ap.error("--gamma must be > 1")
+
+    for name in names:
+        path = generate(name, args.outdir, args.gamma, args.force)
+        with open(path) as f:
+            nodes, links = f.readline().split()
+        name = os.path.splitext(os.path.basename(path))[0]
+        print(f"{name:<28} {nodes:>7} nodes {links:>9} links  {os.path.relpath(path)}")
+
+
+if __name__ == "__main__":
+    main()
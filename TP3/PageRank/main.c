@@ -11,6 +11,7 @@
 
 #include <errno.h>
 #include <stdio.h>
+#include <stdlib.h>
 #include <string.h>
 #include "examples.h"
 
@@ -20,6 +21,7 @@
 #define _LIMIT		50		// iteration limit 
 #define EPSILON		0.001		// steady state precision 
 #define DAMP_FACTOR	0.85
+#define _PRINT_MAX	16		// larger matrices are not printed
 
 /*
 * The PageRank paper uses manhattan geomtery for distance. However
@@ -199,34 +201,54 @@ void init_uniform( int n, int m, float A[n][m] )
 }
 
 
-int main( int argc, char* argv[] ){
-	// I know this is horrible, but it makes it easy to switch examples so screw it! 
-	#define INPUT_MATRIX( m )	\
-		const int n = m ## _N;	\
-		float A[ m ## _N ][ m ## _N ] = m;	\
-		float r[ m ## _N ] = { [ 0 ... ( ( m ## _N ) - 1 ) ] = 1.0 }
-
-//#undef _VERBOSE		// trust me you don't want to print that matrix out :)
-//#undef _VVERBOSE
+/*
+* Graph loaded at runtime (see gen_graph.py): a "nodes edges" header, then
+* one "src dst" line per link, nodes numbered from 0. Links get weight 1,
+* normalised per row by init_uniform like the compiled-in examples.
+*/
+float *load_graph( const char *path, int *pn ){
+	FILE *f = fopen( path, "r" );
+	float *A;
+	int n, m, i, s, d;
+
+	if( !f ){
+		fprintf( stderr, "%s: %s\n", path, strerror( errno ) );
+		exit( 1 );
+	}
+	if( fscanf( f, "%d %d", &n, &m ) != 2 || n <= 0 || m < 0 ){
+		fprintf( stderr, "%s: expected a \"nodes edges\" header\n", path );
+		exit( 1 );
+	}
+	A = calloc( (size_t)n * n, sizeof( float ) );
+	if( !A ){
+		fprintf( stderr, "%s: %d nodes, out of memory\n", path, n );
+		exit( 1 );
+	}
+	for( i = 0; i < m; i++ ){
+		if( fscanf( f, "%d %d", &s, &d ) != 2 || s < 0 || s >= n || d < 0 || d >= n ){
+			fprintf( stderr, "%s: bad link %d\n", path, i );
+			exit( 1 );
+		}
+		A[ (size_t)s * n + d ] = 1.0;
+	}
+	fclose( f );
+	*pn = n;
+	return A;
+}
 
-	// TODO: Changthis to one of the examples
-#if defined _MAT_TWITTER
-	INPUT_MATRIX( TWITTER );
-#elif defined _MAT_EXAMPLE3
-	INPUT_MATRIX( EXAMPLE3 );
-#else
-	INPUT_MATRIX( SIMPLE );
-#endif
 
+void rank_graph( int n, float A[n][n], float r[n] ){
 	// init rows to be uniform distribution ( even if already so this will work ).
 	init_uniform(n, n, A);	
 	vec_init_uniform(n, r);
 
 
 #ifdef _VERBOSE
-	printf("T1:\n");	
-	mat_print( n, n, A );
-	printf("\n");
+	if( n <= _PRINT_MAX ){
+		printf("T1:\n");	
+		mat_print( n, n, A );
+		printf("\n");
+	}
 #endif
 
 #ifdef _GOOGLEMATRIX	 
@@ -237,9 +259,11 @@ int main( int argc, char* argv[] ){
 
 //#undef _VERBOSE 	
 #ifdef _VERBOSE
-	printf("T:\n");	
-	mat_print( n, n, A );
-	printf("\n");
+	if( n <= _PRINT_MAX ){
+		printf("T:\n");	
+		mat_print( n, n, A );
+		printf("\n");
+	}
 #endif
 
 #ifdef _GOOGLEMATRIX	// incoporate teleportation into intial matrix
@@ -250,6 +274,41 @@ int main( int argc, char* argv[] ){
 	
 	printf("r:\n");
 	vec_print(n, r);
+}
+
+
+int main( int argc, char* argv[] ){
+	// pagerank <graph file>: graph size chosen at runtime, on the heap
+	if( argc > 1 ){
+		int n;
+		float *A = load_graph( argv[1], &n );
+		float *r = malloc( n * sizeof( float ) );
+
+		rank_graph( n, (float (*)[n])A, r );
+		free( r );
+		free( A );
+		return 0;
+	}
+
+	// I know this is horrible, but it makes it easy to switch examples so screw it! 
+	#define INPUT_MATRIX( m )	\
+		const int n = m ## _N;	\
+		float A[ m ## _N ][ m ## _N ] = m;	\
+		float r[ m ## _N ] = { [ 0 ... ( ( m ## _N ) - 1 ) ] = 1.0 }
+
+//#undef _VERBOSE		// trust me you don't want to print that matrix out :)
+//#undef _VVERBOSE
+
+	// TODO: Changthis to one of the examples
+#if defined _MAT_TWITTER
+	INPUT_MATRIX( TWITTER );
+#elif defined _MAT_EXAMPLE3
+	INPUT_MATRIX( EXAMPLE3 );
+#else
+	INPUT_MATRIX( SIMPLE );
+#endif
+
+	rank_graph( n, A, r );
 
 	return 0;
 }
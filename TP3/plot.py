@@ -1,11 +1,20 @@
 # plot_from_results.py
 # Parse results.txt (format: RUN  numCycles  CPI) and generate bar graphs.
 
+import argparse
+import os
 import re
+import sys
 from collections import defaultdict
 import numpy as np
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
+# Rendu incremental partage avec TP4/Projet/plot_q*.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "TP4", "Projet"))
+from render import RenderJob, add_render_args, print_results, render_all
+
 RESULTS_FILE = "results.txt"
 
 # Expected RUN format: m5out_<dataset>_M<M>
@@ -38,7 +47,7 @@ def parse_results(path: str):
 
     return data_cycles, data_cpi
 
-def make_grouped_bar(x_labels, series_dict, ylabel, out_png):
+def make_grouped_bar(out_png, x_labels, series_dict, ylabel):
     datasets = ["min", "med", "max"]
     x = np.arange(len(x_labels))
     width = 0.25
@@ -54,20 +63,31 @@ def make_grouped_bar(x_labels, series_dict, ylabel, out_png):
     ax.set_xticklabels([str(m) for m in x_labels])
     ax.legend(title="Dataset")
 
-    plt.tight_layout()
-    plt.savefig(out_png, dpi=200)
-    plt.show()
+    fig.tight_layout()
+    fig.savefig(out_png, dpi=200)
+    plt.close(fig)
 
 def main():
-    cycles, cpi = parse_results(RESULTS_FILE)
+    ap = argparse.ArgumentParser(description="Bar graphs (cycles, CPI) from results.txt")
+    ap.add_argument("--results", default=RESULTS_FILE)
+    ap.add_argument("--outdir", default=".")
+    add_render_args(ap)
+    args = ap.parse_args()
+
+    cycles, cpi = parse_results(args.results)
 
     # collect Ms present across datasets
     Ms = sorted({M for d in cycles for M in cycles[d]} | {M for d in cpi for M in cpi[d]})
     if not Ms:
-        raise RuntimeError(f"No data parsed from {RESULTS_FILE}. Check file format/paths.")
-
-    make_grouped_bar(Ms, cycles, "Nombre de cycles", "cycles_bargraph.png")
-    make_grouped_bar(Ms, cpi, "CPI", "cpi_bargraph.png")
+        raise RuntimeError(f"No data parsed from {args.results}. Check file format/paths.")
+
+    jobs = [
+        RenderJob(os.path.join(args.outdir, "cycles_bargraph.png"), make_grouped_bar,
+                  (Ms, cycles, "Nombre de cycles")),
+        RenderJob(os.path.join(args.outdir, "cpi_bargraph.png"), make_grouped_bar,
+                  (Ms, cpi, "CPI")),
+    ]
+    print_results(render_all(jobs, workers=args.jobs, force=args.force))
 
 if __name__ == "__main__":
     main()
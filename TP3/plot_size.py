@@ -0,0 +1,118 @@
+# plot_size.py
+# TP3 exo 3 as a function of the data size: cycles and CPI of pagerank.riscv
+# on the synthetic graphs of the TP3_fu_size study (experiments.toml), one
+# curve per number of functional units M, one panel per graph model.
+#
+# Runs:
+#   python3 TP3/PageRank/gen_graph.py --study TP3_fu_size
+#   python3 TP4/Projet/expspec.py --run --build --study TP3_fu_size --gem5 ~/gem5/build/RISCV/gem5.opt --parallel 4
+# Plots:
+#   python3 TP3/plot_size.py --outdir TP3 --csv TP3/size_results.csv
+
+import argparse
+import csv
+import os
+import sys
+from collections import defaultdict
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "TP4", "Projet"))
+import expspec
+from render import RenderJob, add_render_args, print_results, render_all
+from stats_index import read_outdir_dump, to_float
+
+STUDY = "TP3_fu_size"
+FIELDNAMES = ["model", "nodes", "degree", "M", "numCycles", "cpi", "run"]
+
+
+def collect(spec_path, runs_dir):
+    """One row per finished point of the study."""
+    jobs, points = expspec.compile_spec(expspec.load_spec(spec_path), [STUDY])
+    by_id = {j.id: j for j in jobs}
+    rows = []
+    for p in points:
+        outdir = by_id[p.job_id].outdir(runs_dir)
+        stats = read_outdir_dump(outdir)
+        if stats is None:
+            continue
+        cycles = to_float(stats.get("system.cpu.numCycles"))
+        insts = to_float(stats.get("system.cpu.committedInsts"))
+        cpi = cycles / insts if cycles is not None and insts else None
+        rows.append({"model": p.params["model"], "nodes": int(p.params["nodes"]), "degree": int(p.params["degree"]),
+                     "M": int(p.params["M"]), "numCycles": cycles, "cpi": cpi, "run": outdir})
+    return rows
+
+
+def make_size_plot(out_png, series, ylabel, logy):
+    """series: model -> M -> [(nodes, value)]"""
+    models = sorted(series)
+    fig, axes = plt.subplots(1, len(models), figsize=(4.5 * len(models), 4), squeeze=False, sharey=logy)
+    for ax, model in zip(axes[0], models):
+        for M in sorted(series[model]):
+            pts = sorted(series[model][M])
+            ax.plot([n for n, _ in pts], [v for _, v in pts], marker="o", label=f"M={M}")
+        ax.set_xscale("log", base=2)
+        if logy:
+            ax.set_yscale("log")
+        ax.set_title(model)
+        ax.set_xlabel("Nombre de noeuds du graphe")
+        ax.set_ylabel(ylabel)
+        ax.grid(True, which="both", alpha=0.3)
+        ax.legend(title="Unites fonctionnelles")
+    fig.tight_layout()
+    fig.savefig(out_png, dpi=200)
+    plt.close(fig)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Cycles and CPI of PageRank vs graph size (study TP3_fu_size)")
+    ap.add_argument("--spec", default=expspec.DEFAULT_SPEC)
+    ap.add_argument("--runs-dir", default=expspec.DEFAULT_RUNS)
+    ap.add_argument("--degree", type=int, default=None, help="Only the graphs of this mean degree")
+    ap.add_argument("--csv", default=None, help="Also write the results to this CSV")
+    ap.add_argument("--outdir", default=".")
+    add_render_args(ap)
+    args = ap.parse_args()
+
+    rows = collect(args.spec, args.runs_dir)
+    if args.degree is not None:
+        rows = [r for r in rows if r["degree"] == args.degree]
+    if not rows:
+        raise RuntimeError(f"No finished run of {STUDY} in {args.runs_dir}")
+
+    cycles = defaultdict(lambda: defaultdict(list))
+    cpi = defaultdict(lambda: defaultdict(list))
+    for r in rows:
+        key = r["model"] if args.degree is not None else f"{r['model']} d{r['degree']}"
+        if r["numCycles"] is not None:
+            cycles[key][r["M"]].append((r["nodes"], r["numCycles"]))
+        if r["cpi"] is not None:
+            cpi[key][r["M"]].append((r["nodes"], r["cpi"]))
+
+    print(f"{'model':<10} {'nodes':>6} {'deg':>4} {'M':>3} {'numCycles':>14} {'CPI':>8}")
+    for r in sorted(rows, key=lambda r: (r["model"], r["degree"], r["nodes"], r["M"])):
+        c = f"{r['numCycles']:.0f}" if r["numCycles"] is not None else "NA"
+        p = f"{r['cpi']:.4f}" if r["cpi"] is not None else "NA"
+        print(f"{r['model']:<10} {r['nodes']:>6} {r['degree']:>4} {r['M']:>3} {c:>14} {p:>8}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            w.writeheader()
+            w.writerows(sorted(rows, key=lambda r: (r["model"], r["degree"], r["nodes"], r["M"])))
+        print(f"Wrote {args.csv}")
+
+    jobs = [
+        RenderJob(os.path.join(args.outdir, "cycles_vs_size.png"), make_size_plot,
+                  (dict(cycles), "Nombre de cycles", True)),
+        RenderJob(os.path.join(args.outdir, "cpi_vs_size.png"), make_size_plot,
+                  (dict(cpi), "CPI", False)),
+    ]
+    print_results(render_all(jobs, workers=args.jobs, force=args.force))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Throughput and energy of se_bigLITTLE.py runs, one line per run/policy.
+
+Each gem5 output directory must hold the biglittle.json written by
+se_bigLITTLE.py (residency segments of every slot on each cluster) and
+its stats.txt. Energy integrates the cluster power over the residency
+segments, with the 28 nm figures of the project statement scaled by the
+cluster clock (a slot only draws power on the cluster it runs on).
+
+Usage:
+  python3 TP4/Projet/bl_report.py m5out_bl_static m5out_bl_periodic m5out_bl_ipc
+  python3 TP4/Projet/bl_report.py --glob 'm5out_bl_*' --csv bl.csv
+"""
+import argparse
+import csv
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from stats_index import add_outdir_args, outdirs_from_args, read_outdir_dump, to_float
+
+# From statement (28 nm): A7 0.10 mW/MHz, A15 0.20 mW/MHz
+MW_PER_MHZ = {"a7": 0.10, "a15": 0.20}
+
+_INSTS = re.compile(r"^system\.(?:cpu|shadow_cpu)\d*\.committedInsts$")
+_UNITS = {"thz": 1e12, "ghz": 1e9, "mhz": 1e6, "khz": 1e3, "hz": 1.0}
+
+FIELDNAMES = ["run", "policy", "interval", "migrations", "insts", "sim_s", "mips",
+              "big_pct", "energy_mJ", "nJ_per_inst", "edp_mJs"]
+
+
+@dataclass
+class BLRun:
+    path: str
+    policy: str
+    interval: int
+    migrations: int
+    insts: float
+    sim_seconds: float
+    big_seconds: float
+    little_seconds: float
+    energy_j: float
+
+    @property
+    def mips(self) -> float:
+        return self.insts / self.sim_seconds / 1e6 if self.sim_seconds else 0.0
+
+    @property
+    def big_share(self) -> float:
+        total = self.big_seconds + self.little_seconds
+        return self.big_seconds / total if total else 0.0
+
+    @property
+    def nj_per_inst(self) -> float:
+        return 1e9 * self.energy_j / self.insts if self.insts else 0.0
+
+
+def parse_frequency(text: str) -> float:
+    t = text.strip().lower()
+    for unit, scale in _UNITS.items():
+        if t.endswith(unit):
+            return float(t[: -len(unit)]) * scale
+    return float(t)
+
+
+def cluster_power_w(profile: str, clock: str) -> float:
+    return MW_PER_MHZ[profile] * parse_frequency(clock) / 1e6 / 1e3
+
+
+def read_run(outdir: str, ticks_per_second: float) -> Optional[BLRun]:
+    label = os.path.join(outdir, "biglittle.json")
+    if not os.path.isfile(label):
+        return None
+    stats = read_outdir_dump(outdir)
+    if stats is None:
+        return None
+    with open(label) as f:
+        info = json.load(f)
+
+    insts = sum(to_float(raw) or 0.0 for name, raw in stats.items() if _INSTS.match(name))
+    sim_seconds = to_float(stats.get("simSeconds", stats.get("sim_seconds"))) or 0.0
+
+    seconds = {"big": 0.0, "little": 0.0}
+    for slot in info.get("slots", []):
+        for begin, end, cluster in slot.get("segments", []):
+            seconds[cluster] += (end - begin) / ticks_per_second
+
+    power = {c: cluster_power_w(info["profiles"][c], info["clocks"][c]) for c in seconds}
+    return BLRun(
+        path=outdir,
+        policy=info.get("policy", "?"),
+        interval=int(info.get("interval", 0)),
+        migrations=int(info.get("migrations", 0)),
+        insts=insts,
+        sim_seconds=sim_seconds,
+        big_seconds=seconds["big"],
+        little_seconds=seconds["little"],
+        energy_j=sum(seconds[c] * power[c] for c in seconds),
+    )
+
+
+def build_rows(runs: List[BLRun]) -> List[Dict[str, str]]:
+    return [
+        {
+            "run": r.path,
+            "policy": r.policy,
+            "interval": str(r.interval),
+            "migrations": str(r.migrations),
+            "insts": f"{r.insts:.0f}",
+            "sim_s": f"{r.sim_seconds:.6f}",
+            "mips": f"{r.mips:.2f}",
+            "big_pct": f"{100.0 * r.big_share:.1f}",
+            "energy_mJ": f"{1e3 * r.energy_j:.4f}",
+            "nJ_per_inst": f"{r.nj_per_inst:.4f}",
+            "edp_mJs": f"{1e3 * r.energy_j * r.sim_seconds:.6f}",
+        }
+        for r in runs
+    ]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Throughput/energy per migration policy of se_bigLITTLE.py runs")
+    add_outdir_args(ap)
+    ap.add_argument("--ticks-per-second", type=float, default=1e12, help="gem5 tick rate (default: 1e12)")
+    ap.add_argument("--csv", default=None, help="Also write the table to this CSV")
+    args = ap.parse_args()
+
+    dirs = outdirs_from_args(args)
+    runs = [r for r in (read_run(d, args.ticks_per_second) for d in dirs) if r is not None]
+    if not runs:
+        print("Error: no directory with biglittle.json and stats.txt")
+        return 1
+    runs.sort(key=lambda r: (r.policy, r.interval, r.path))
+
+    rows = build_rows(runs)
+    print(f"{'policy':<9} {'interval':>9} {'migr':>5} {'MIPS':>9} {'big %':>6} {'mJ':>10} {'nJ/inst':>8}  run")
+    for row in rows:
+        print(f"{row['policy']:<9} {row['interval']:>9} {row['migrations']:>5} {row['mips']:>9} "
+              f"{row['big_pct']:>6} {row['energy_mJ']:>10} {row['nJ_per_inst']:>8}  {row['run']}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            w.writeheader()
+            w.writerows(rows)
+        print(f"Wrote {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
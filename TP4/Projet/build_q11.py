@@ -3,7 +3,10 @@ import argparse
 import csv
 import os
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import expspec
+import power_report
 
 
 @dataclass(frozen=True)
@@ -13,63 +16,73 @@ class Row:
     workload: str
     l1_kb: int
     ipc: float
+    outdir: str = ""
 
 
-def read_q45(path: str) -> List[Row]:
+def parse_q45(records: Iterable[Dict[str, str]]) -> List[Row]:
     rows: List[Row] = []
-    with open(path, newline="") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            try:
-                rows.append(
-                    Row(
-                        arch=row.get("arch", "").strip(),
-                        question=row.get("question", "").strip(),
-                        workload=row.get("workload", "").strip(),
-                        l1_kb=int(row.get("l1_kB", "0")),
-                        ipc=float(row.get("ipc", "nan")),
-                    )
+    for row in records:
+        try:
+            rows.append(
+                Row(
+                    arch=row.get("arch", "").strip(),
+                    question=row.get("question", "").strip(),
+                    workload=row.get("workload", "").strip(),
+                    l1_kb=int(row.get("l1_kB", "0")),
+                    ipc=float(row.get("ipc", "nan")),
+                    outdir=row.get("outdir", "").strip(),
                 )
-            except Exception:
-                continue
+            )
+        except Exception:
+            continue
     return rows
 
 
-def main() -> int:
-    ap = argparse.ArgumentParser(description="Build Q11 energy efficiency CSV (IPC / mW)")
-    ap.add_argument(
-        "--q45",
-        default="TP4/Projet/q45_m5out/q45_summary.csv",
-        help="Input q45_summary.csv (IPC)",
-    )
-    ap.add_argument(
-        "--outdir",
-        default="TP4/Projet/q11_eff",
-        help="Output directory",
-    )
-    args = ap.parse_args()
+def read_q45(path: str) -> List[Row]:
+    with open(path, newline="") as f:
+        return parse_q45(csv.DictReader(f))
 
-    rows = read_q45(args.q45)
-    if not rows:
-        raise SystemExit(f"No rows found in {args.q45}")
 
-    # From statement (28 nm):
-    # A7: 0.10 mW/MHz, fmax=1.0 GHz -> 100 mW
-    # A15: 0.20 mW/MHz, fmax=2.5 GHz -> 500 mW
-    power_mw = {"a7": 100.0, "a15": 500.0}
+# From statement (28 nm):
+# A7: 0.10 mW/MHz, fmax=1.0 GHz -> 100 mW
+# A15: 0.20 mW/MHz, fmax=2.5 GHz -> 500 mW
+POWER_MW = {"a7": 100.0, "a15": 500.0}
+
+FIELDNAMES = ["arch", "workload", "l1_kB", "ipc", "power_mW", "eff_ipc_per_mW", "power_source"]
+
+
+def measured_power_mw(outdir: str) -> Optional[float]:
+    # Average power from the gem5 power model stats of a --power-model run
+    if not outdir or not os.path.isdir(outdir):
+        return None
+    run = power_report.read_run(outdir)
+    return 1e3 * run.power_w if run is not None and run.power_w else None
+
+
+Selection = Set[Tuple[str, str, int]]
+
+
+def load_selection(spec_path: str = expspec.DEFAULT_SPEC) -> Selection:
+    # (arch, question, L1 kB) points of the Q4/Q5 sweep, as declared in the spec
+    return {(p["arch"], p["question"], int(p["l1"])) for p in expspec.load_points("Q45", spec_path)}
+
 
-    def keep(r: Row) -> bool:
-        if r.arch == "a7":
-            return r.question == "Q4" and r.l1_kb in {1, 2, 4, 8, 16}
-        if r.arch == "a15":
-            return r.question == "Q5" and r.l1_kb in {2, 4, 8, 16, 32}
-        return False
+def keep(r: Row, selection: Selection) -> bool:
+    return (r.arch, r.question, r.l1_kb) in selection
 
+
+def build_rows(rows: List[Row], selection: Optional[Selection] = None,
+               measured: bool = False) -> List[Dict[str, str]]:
+    if selection is None:
+        selection = load_selection()
     out_rows = []
     for r in rows:
-        if not keep(r):
+        if not keep(r, selection):
             continue
-        p = power_mw.get(r.arch)
+        p = measured_power_mw(r.outdir) if measured else None
+        source = "model" if p is not None else "statement"
+        if p is None:
+            p = POWER_MW.get(r.arch)
         if p is None:
             continue
         eff = r.ipc / p
@@ -81,20 +94,52 @@ def main() -> int:
                 "ipc": f"{r.ipc:.6f}",
                 "power_mW": f"{p:.1f}",
                 "eff_ipc_per_mW": f"{eff:.8f}",
+                "power_source": source,
             }
         )
 
     out_rows.sort(key=lambda x: (x["arch"], x["workload"], int(x["l1_kB"])))
+    return out_rows
+
+
+def write_csv(path: str, rows: List[Dict[str, str]]) -> None:
+    with open(path, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        w.writeheader()
+        w.writerows(rows)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Build Q11 energy efficiency CSV (IPC / mW)")
+    ap.add_argument(
+        "--q45",
+        default="TP4/Projet/q45_m5out/q45_summary.csv",
+        help="Input q45_summary.csv (IPC)",
+    )
+    ap.add_argument(
+        "--outdir",
+        default="TP4/Projet/q11_eff",
+        help="Output directory",
+    )
+    ap.add_argument(
+        "--spec",
+        default=expspec.DEFAULT_SPEC,
+        help="Experiment spec selecting the Q4/Q5 points (study Q45)",
+    )
+    ap.add_argument(
+        "--measured-power",
+        action="store_true",
+        help="Use the power model stats of each run (--power-model) instead of the statement mW/MHz",
+    )
+    args = ap.parse_args()
+
+    rows = read_q45(args.q45)
+    if not rows:
+        raise SystemExit(f"No rows found in {args.q45}")
 
     os.makedirs(args.outdir, exist_ok=True)
     out_csv = os.path.join(args.outdir, "q11_summary.csv")
-    with open(out_csv, "w", newline="") as f:
-        w = csv.DictWriter(
-            f,
-            fieldnames=["arch", "workload", "l1_kB", "ipc", "power_mW", "eff_ipc_per_mW"],
-        )
-        w.writeheader()
-        w.writerows(out_rows)
+    write_csv(out_csv, build_rows(rows, load_selection(args.spec), measured=args.measured_power))
 
     print("Wrote:")
     print(" ", out_csv)
@@ -3,7 +3,9 @@ import argparse
 import csv
 import os
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import expspec
 
 
 @dataclass(frozen=True)
@@ -22,41 +24,99 @@ class Q8Row:
     total_area_mm2: float
 
 
-def read_q45(path: str) -> List[Q45Row]:
+def parse_q45(records: Iterable[Dict[str, str]]) -> List[Q45Row]:
     rows: List[Q45Row] = []
-    with open(path, newline="") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            try:
-                rows.append(
-                    Q45Row(
-                        arch=row.get("arch", "").strip(),
-                        question=row.get("question", "").strip(),
-                        workload=row.get("workload", "").strip(),
-                        l1_kb=int(row.get("l1_kB", "0")),
-                        ipc=float(row.get("ipc", "nan")),
-                    )
+    for row in records:
+        try:
+            rows.append(
+                Q45Row(
+                    arch=row.get("arch", "").strip(),
+                    question=row.get("question", "").strip(),
+                    workload=row.get("workload", "").strip(),
+                    l1_kb=int(row.get("l1_kB", "0")),
+                    ipc=float(row.get("ipc", "nan")),
                 )
-            except Exception:
-                continue
+            )
+        except Exception:
+            continue
     return rows
 
 
-def read_q8(path: str) -> Dict[Tuple[str, int], Q8Row]:
-    out: Dict[Tuple[str, int], Q8Row] = {}
+def read_q45(path: str) -> List[Q45Row]:
     with open(path, newline="") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            try:
-                arch = row.get("arch", "").strip()
-                l1_kb = int(row.get("l1_kB", "0"))
-                total_area = float(row.get("total_core_l1_l2_mm2", "nan"))
-                out[(arch, l1_kb)] = Q8Row(arch=arch, l1_kb=l1_kb, total_area_mm2=total_area)
-            except Exception:
-                continue
+        return parse_q45(csv.DictReader(f))
+
+
+def parse_q8(records: Iterable[Dict[str, str]]) -> Dict[Tuple[str, int], Q8Row]:
+    out: Dict[Tuple[str, int], Q8Row] = {}
+    for row in records:
+        try:
+            arch = row.get("arch", "").strip()
+            l1_kb = int(row.get("l1_kB", "0"))
+            total_area = float(row.get("total_core_l1_l2_mm2", "nan"))
+            out[(arch, l1_kb)] = Q8Row(arch=arch, l1_kb=l1_kb, total_area_mm2=total_area)
+        except Exception:
+            continue
     return out
 
 
+def read_q8(path: str) -> Dict[Tuple[str, int], Q8Row]:
+    with open(path, newline="") as f:
+        return parse_q8(csv.DictReader(f))
+
+
+FIELDNAMES = ["arch", "workload", "l1_kB", "ipc", "surface_mm2", "eff_ipc_per_mm2"]
+
+
+Selection = Set[Tuple[str, str, int]]
+
+
+def load_selection(spec_path: str = expspec.DEFAULT_SPEC) -> Selection:
+    # (arch, question, L1 kB) points of the Q4/Q5 sweep, as declared in the spec
+    return {(p["arch"], p["question"], int(p["l1"])) for p in expspec.load_points("Q45", spec_path)}
+
+
+def keep(row: Q45Row, selection: Selection) -> bool:
+    return (row.arch, row.question, row.l1_kb) in selection
+
+
+def build_rows(
+    q45_rows: List[Q45Row],
+    q8_map: Dict[Tuple[str, int], Q8Row],
+    selection: Optional[Selection] = None,
+) -> List[Dict[str, str]]:
+    if selection is None:
+        selection = load_selection()
+    out_rows = []
+    for r in q45_rows:
+        if not keep(r, selection):
+            continue
+        area = q8_map.get((r.arch, r.l1_kb))
+        if area is None:
+            continue
+        eff = r.ipc / area.total_area_mm2 if area.total_area_mm2 else float("nan")
+        out_rows.append(
+            {
+                "arch": r.arch,
+                "workload": r.workload,
+                "l1_kB": str(r.l1_kb),
+                "ipc": f"{r.ipc:.6f}",
+                "surface_mm2": f"{area.total_area_mm2:.7f}",
+                "eff_ipc_per_mm2": f"{eff:.7f}",
+            }
+        )
+
+    out_rows.sort(key=lambda x: (x["arch"], x["workload"], int(x["l1_kB"])))
+    return out_rows
+
+
+def write_csv(path: str, rows: List[Dict[str, str]]) -> None:
+    with open(path, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        w.writeheader()
+        w.writerows(rows)
+
+
 def main() -> int:
     ap = argparse.ArgumentParser(description="Build Q9 surface efficiency CSV (IPC / mm^2)")
     ap.add_argument(
@@ -74,6 +134,11 @@ def main() -> int:
         default="TP4/Projet/q9_eff",
         help="Output directory",
     )
+    ap.add_argument(
+        "--spec",
+        default=expspec.DEFAULT_SPEC,
+        help="Experiment spec selecting the Q4/Q5 points (study Q45)",
+    )
     args = ap.parse_args()
 
     q45_rows = read_q45(args.q45)
@@ -87,41 +152,7 @@ def main() -> int:
     os.makedirs(args.outdir, exist_ok=True)
     out_csv = os.path.join(args.outdir, "q9_summary.csv")
 
-    def keep(row: Q45Row) -> bool:
-        if row.arch == "a7":
-            return row.question == "Q4" and row.l1_kb in {1, 2, 4, 8, 16}
-        if row.arch == "a15":
-            return row.question == "Q5" and row.l1_kb in {2, 4, 8, 16, 32}
-        return False
-
-    out_rows = []
-    for r in q45_rows:
-        if not keep(r):
-            continue
-        area = q8_map.get((r.arch, r.l1_kb))
-        if area is None:
-            continue
-        eff = r.ipc / area.total_area_mm2 if area.total_area_mm2 else float("nan")
-        out_rows.append(
-            {
-                "arch": r.arch,
-                "workload": r.workload,
-                "l1_kB": str(r.l1_kb),
-                "ipc": f"{r.ipc:.6f}",
-                "surface_mm2": f"{area.total_area_mm2:.7f}",
-                "eff_ipc_per_mm2": f"{eff:.7f}",
-            }
-        )
-
-    out_rows.sort(key=lambda x: (x["arch"], x["workload"], int(x["l1_kB"])))
-
-    with open(out_csv, "w", newline="") as f:
-        w = csv.DictWriter(
-            f,
-            fieldnames=["arch", "workload", "l1_kB", "ipc", "surface_mm2", "eff_ipc_per_mm2"],
-        )
-        w.writeheader()
-        w.writerows(out_rows)
+    write_csv(out_csv, build_rows(q45_rows, q8_map, load_selection(args.spec)))
 
     print("Wrote:")
     print(" ", out_csv)
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Top-down CPI stack of O3 runs: where the cycles of each run went.
+
+From the O3 pipeline stats of one dump, every run's CPI is split into:
+  base      insts / commitWidth (the CPI of a pipeline that never stalls)
+  icache    fetch.icacheStallCycles
+  itlb      fetch.tlbCycles
+  squash    branch/trap squash cycles (longest of the fetch, decode,
+            rename and IEW squash cycles)
+  rob_full  rename.ROBFullEvents
+  iq_full   rename.IQFullEvents
+  lsq_full  rename.LQFullEvents + rename.SQFullEvents
+  regs_full rename.fullRegistersEvents + rename.serializeStallCycles
+  dcache    dcache.blockedCycles (no MSHR / no target left)
+  fu_busy   fuBusy / issueWidth (issue slots refused by a busy FU, in cycles)
+  other     cycles none of the above explains
+
+The stall counters overlap (a full ROB is often caused by a blocked
+dcache), so they do not add up to the measured cycles. The stack is
+normalised: when the raw stalls exceed (cycles - base) they are scaled
+down proportionally (the factor is the "overlap" column), otherwise the
+remainder is "other". The components then add up to the measured CPI.
+
+Every stats.txt is read once (StatsIndex, one pass; the ROI dump when the
+directory holds a roi.json, otherwise every dump added up) and the runs
+are parsed in parallel. Sweep dimensions come from q45_summary.csv
+(arch/question/workload/l1_kB) or from an expspec study (its parameters);
+--by then averages the stacks per value of one dimension. Plots:
+plot_cpi.py.
+
+Usage:
+  python3 TP4/Projet/cpi_stack.py --summary TP4/Projet/q45_m5out/q45_summary.csv --csv cpi.csv
+  python3 TP4/Projet/cpi_stack.py --study DVFS --by freq
+  python3 TP4/Projet/cpi_stack.py --glob 'm5out_*' --by l1_kB
+"""
+import argparse
+import csv
+import os
+import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from stats_index import add_outdir_args, outdirs_from_args, read_config, read_outdir_dump, to_float
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+
+# Stack order, bottom to top
+COMPONENTS = ["base", "icache", "itlb", "squash", "rob_full", "iq_full", "lsq_full",
+              "regs_full", "dcache", "fu_busy", "other"]
+STALLS = COMPONENTS[1:-1]
+
+DIMENSIONS = ["arch", "question", "workload", "l1_kB"]
+
+_CPU_STAT = re.compile(r"^(system\.cpu\d*)\.(.+)$")
+_CPU_SECTION = re.compile(r"^system\.cpu\d*$")
+
+# Stat names (relative to the CPU) per counter, first one found wins:
+# gem5 >= 21 names, then the older ones.
+_INSTS = ("committedInsts", "commitStats0.numInsts", "commit.committedInsts")
+_FU_BUSY = ("fuBusy", "iq.fuBusy", "iq.fu_busy_cnt")
+_SQUASH = ("fetch.squashCycles", "decode.squashCycles", "rename.squashCycles", "iew.squashCycles")
+_RAW = {
+    "icache": (("fetch.icacheStallCycles", "fetch.IcacheStallCycles"),),
+    "itlb": (("fetch.tlbCycles", "fetch.TlbCycles"),),
+    "rob_full": (("rename.ROBFullEvents",),),
+    "iq_full": (("rename.IQFullEvents",),),
+    "lsq_full": (("rename.LQFullEvents",), ("rename.SQFullEvents",)),
+    "regs_full": (("rename.fullRegistersEvents",), ("rename.serializeStallCycles",)),
+    "dcache": (("dcache.blockedCycles::no_mshrs", "dcache.blocked_cycles::no_mshrs"),
+               ("dcache.blockedCycles::no_targets", "dcache.blocked_cycles::no_targets")),
+}
+
+
+@dataclass
+class CPIStack:
+    run: str
+    dims: Dict[str, str]
+    insts: float
+    cycles: float
+    # component -> cycles (normalised, sums to `cycles`)
+    cycles_by: Dict[str, float] = field(default_factory=dict)
+    overlap: float = 1.0
+
+    @property
+    def cpi(self) -> float:
+        return self.cycles / self.insts if self.insts else 0.0
+
+    def component_cpi(self, name: str) -> float:
+        return self.cycles_by.get(name, 0.0) / self.insts if self.insts else 0.0
+
+
+def _first(stats: Dict[str, float], names: Iterable[str]) -> float:
+    for name in names:
+        if name in stats:
+            return stats[name]
+    return 0.0
+
+
+def _widths(outdir: str) -> Dict[str, Tuple[int, int]]:
+    """(commitWidth, issueWidth) of every CPU in config.ini."""
+    cfg = read_config(outdir)
+    widths: Dict[str, Tuple[int, int]] = {}
+    for section in cfg.sections():
+        if _CPU_SECTION.match(section) and cfg.has_option(section, "commitWidth"):
+            widths[section] = (cfg.getint(section, "commitWidth"), cfg.getint(section, "issueWidth", fallback=8))
+    return widths
+
+
+def raw_stalls(stats: Dict[str, float], issue_width: int) -> Dict[str, float]:
+    """Raw stall cycles of one CPU (stats relative to the CPU, as floats)."""
+    raw = {name: sum(_first(stats, alts) for alts in parts) for name, parts in _RAW.items()}
+    raw["squash"] = max(stats.get(name, 0.0) for name in _SQUASH)
+    raw["fu_busy"] = _first(stats, _FU_BUSY) / max(1, issue_width)
+    return raw
+
+
+def normalise(cycles: float, base: float, raw: Dict[str, float]) -> Dict[str, float]:
+    """Scale the overlapping stalls so that base + stalls + other == cycles."""
+    base = min(base, cycles)
+    budget = cycles - base
+    total = sum(raw.values())
+    scale = budget / total if total > budget else 1.0
+    out = {"base": base}
+    for name in STALLS:
+        out[name] = raw.get(name, 0.0) * scale
+    out["other"] = max(0.0, budget - total * scale)
+    return out
+
+
+def read_stack(outdir: str, dims: Optional[Dict[str, str]] = None) -> Optional[CPIStack]:
+    dump = read_outdir_dump(outdir)
+    if dump is None:
+        return None
+
+    per_cpu: Dict[str, Dict[str, float]] = defaultdict(dict)
+    for name, raw in dump.items():
+        m = _CPU_STAT.match(name)
+        if not m:
+            continue
+        value = to_float(raw)
+        if value is not None:
+            per_cpu[m.group(1)][m.group(2)] = value
+
+    widths = _widths(outdir)
+    total: Dict[str, float] = defaultdict(float)
+    insts = cycles = raw_total = 0.0
+    for cpu, stats in per_cpu.items():
+        # Only the O3 cores have a rename stage
+        if not any(k.startswith("rename.") for k in stats) or not stats.get("numCycles"):
+            continue
+        commit_width, issue_width = widths.get(cpu, (8, 8))
+        n = _first(stats, _INSTS)
+        c = stats["numCycles"]
+        raw = raw_stalls(stats, issue_width)
+        for k, v in normalise(c, n / max(1, commit_width), raw).items():
+            total[k] += v
+        raw_total += sum(raw.values())
+        insts += n
+        cycles += c
+    if not cycles:
+        return None
+
+    budget = cycles - total["base"]
+    return CPIStack(run=outdir, dims=dict(dims or {}), insts=insts, cycles=cycles, cycles_by=dict(total),
+                    overlap=max(1.0, raw_total / budget) if budget else 1.0)
+
+
+def _read_one(item: Tuple[str, Dict[str, str]]) -> Optional[CPIStack]:
+    return read_stack(*item)
+
+
+def read_all(items: List[Tuple[str, Dict[str, str]]], jobs: Optional[int] = None) -> List[CPIStack]:
+    """Stacks of many runs, parsed in parallel (missing runs are skipped)."""
+    if jobs is None:
+        jobs = min(len(items), os.cpu_count() or 1)
+    if jobs <= 1 or len(items) <= 1:
+        stacks = [_read_one(i) for i in items]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            stacks = list(pool.map(_read_one, items, chunksize=4))
+    return [s for s in stacks if s is not None]
+
+
+def _locate(outdir: str, summary_dir: str) -> str:
+    # q45_summary.csv holds the absolute paths of the machine that ran the sweep
+    if os.path.isdir(outdir):
+        return outdir
+    moved = os.path.join(summary_dir, os.path.basename(outdir.rstrip("/")))
+    return moved if os.path.isdir(moved) else outdir
+
+
+def items_from_summary(records: Iterable[Dict[str, str]], summary_dir: str) -> List[Tuple[str, Dict[str, str]]]:
+    items = []
+    for r in records:
+        outdir = r.get("outdir", "").strip()
+        if outdir:
+            dims = {d: r.get(d, "").strip() for d in DIMENSIONS}
+            items.append((_locate(outdir, summary_dir), dims))
+    return items
+
+
+def items_from_study(study: str, spec_path: str, runs_dir: str) -> List[Tuple[str, Dict[str, str]]]:
+    import expspec
+
+    jobs, points = expspec.compile_spec(expspec.load_spec(spec_path), [study])
+    by_id = {j.id: j for j in jobs}
+    return [(by_id[p.job_id].outdir(runs_dir), {k: str(v) for k, v in p.params.items()}) for p in points]
+
+
+def _row(stack: CPIStack, dims: List[str]) -> Dict[str, str]:
+    row = {d: stack.dims.get(d, "") for d in dims}
+    row.update({
+        "run": stack.run,
+        "insts": f"{stack.insts:.0f}",
+        "cycles": f"{stack.cycles:.0f}",
+        "cpi": f"{stack.cpi:.4f}",
+        "overlap": f"{stack.overlap:.3f}",
+    })
+    for name in COMPONENTS:
+        row[name] = f"{stack.component_cpi(name):.4f}"
+    return row
+
+
+def fieldnames(dims: List[str]) -> List[str]:
+    return dims + ["run", "insts", "cycles", "cpi", "overlap"] + COMPONENTS
+
+
+def build_rows(stacks: List[CPIStack], by: Optional[str] = None) -> Tuple[List[str], List[Dict[str, str]]]:
+    """One row per run, then (with by) one averaged row per value of that dimension."""
+    dims: List[str] = []
+    for s in stacks:
+        dims += [d for d in s.dims if d not in dims]
+    rows = [_row(s, dims) for s in stacks]
+    if by:
+        groups: Dict[str, List[CPIStack]] = defaultdict(list)
+        for s in stacks:
+            groups[s.dims.get(by, "")].append(s)
+        for value in sorted(groups, key=sort_key):
+            group = groups[value]
+            n = len(group)
+            row = {d: "" for d in dims}
+            row.update({
+                by: value,
+                "run": f"mean of {n}",
+                "insts": f"{sum(s.insts for s in group) / n:.0f}",
+                "cycles": f"{sum(s.cycles for s in group) / n:.0f}",
+                "cpi": f"{sum(s.cpi for s in group) / n:.4f}",
+                "overlap": f"{sum(s.overlap for s in group) / n:.3f}",
+            })
+            for name in COMPONENTS:
+                row[name] = f"{sum(s.component_cpi(name) for s in group) / n:.4f}"
+            rows.append(row)
+    return dims, rows
+
+
+def sort_key(value: str):
+    try:
+        return (0, float(value), value)
+    except ValueError:
+        return (1, 0.0, value)
+
+
+def write_csv(path: str, dims: List[str], rows: List[Dict[str, str]]) -> None:
+    with open(path, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=fieldnames(dims))
+        w.writeheader()
+        w.writerows(rows)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Top-down CPI stack of O3 gem5 runs")
+    add_outdir_args(ap)
+    ap.add_argument("--summary", default=None, help="q45_summary.csv: its runs, with arch/question/workload/l1_kB")
+    ap.add_argument("--study", default=None, help="expspec study: its runs, with the study parameters")
+    ap.add_argument("--spec", default=os.path.join(BASE, "experiments.toml"), help="Experiment spec for --study")
+    ap.add_argument("--runs-dir", default=os.path.join(BASE, "runs"), help="Runs directory for --study")
+    ap.add_argument("--by", default=None, help="Also average the stacks per value of this dimension")
+    ap.add_argument("--jobs", type=int, default=None, help="Parallel stats parsers (default: #CPUs)")
+    ap.add_argument("--csv", default=None, help="Also write the table to this CSV")
+    args = ap.parse_args()
+
+    items: List[Tuple[str, Dict[str, str]]] = [(d, {}) for d in outdirs_from_args(args)]
+    if args.summary:
+        with open(args.summary, newline="") as f:
+            items += items_from_summary(csv.DictReader(f), os.path.dirname(os.path.abspath(args.summary)))
+    if args.study:
+        items += items_from_study(args.study, args.spec, args.runs_dir)
+
+    stacks = read_all(items, args.jobs)
+    if not stacks:
+        print("Error: no stats.txt with O3 pipeline stats found")
+        return 1
+
+    dims, rows = build_rows(stacks, args.by)
+    head = " ".join(f"{d[:10]:>10}" for d in dims)
+    print(f"{head} {'CPI':>7} " + " ".join(f"{c[:8]:>8}" for c in COMPONENTS) + f" {'overlap':>7}")
+    for r in rows:
+        line = " ".join(f"{r[d][:10]:>10}" for d in dims)
+        print(f"{line} {r['cpi']:>7} " + " ".join(f"{r[c]:>8}" for c in COMPONENTS) + f" {r['overlap']:>7}")
+
+    if args.csv:
+        write_csv(args.csv, dims, rows)
+        print(f"Wrote {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
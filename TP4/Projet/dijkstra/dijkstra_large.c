@@ -1,7 +1,12 @@
 #include <stdio.h>
 #include <stdlib.h>
 
+#ifndef NUM_NODES
 #define NUM_NODES                          100
+#endif
+#ifndef NUM_PAIRS
+#define NUM_PAIRS                          100
+#endif
 #define NONE                               9999
 
 struct _NODE
@@ -164,8 +169,8 @@ int main(int argc, char *argv[]) {
     }
   }
 
-  /* finds 10 shortest paths between nodes */
-  for (i=0,j=NUM_NODES/2;i<100;i++,j++) {
+  /* finds NUM_PAIRS shortest paths between nodes */
+  for (i=0,j=NUM_NODES/2;i<NUM_PAIRS;i++,j++) {
 			j=j%NUM_NODES;
       dijkstra(i,j);
   }
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+DVFS sweep report: runtime, IPC and estimated power/energy per CPU
+operating point (frequency, voltage), and the energy-optimal point of each
+workload.
+
+Each gem5 output directory must hold the clocks.json written by
+se_common/clocks.py (one run per operating point, e.g. the "DVFS" study of
+experiments.toml). CPU power scales the 28 nm figures of the project
+statement (A7 0.10 mW/MHz, A15 0.20 mW/MHz, taken at --v-nom) with the
+clock and the square of the voltage, plus an optional leakage term that
+scales with the voltage:
+
+  P = mW/MHz * f_MHz * (V / Vnom)^2 + static_mW * (V / Vnom)
+
+Only the CPU domain is costed; caches and memory keep their own clocks,
+which is why memory-bound workloads lose little time at low frequency.
+Runs are grouped by profile and workload (binary name from config.ini);
+--roi runs are measured on their ROI dump.
+
+Usage:
+  python3 TP4/Projet/dvfs_report.py --glob 'TP4/Projet/runs/DVFS/m5out_dvfs_*'
+  python3 TP4/Projet/dvfs_report.py m5out_dvfs_a7_* --static-mw 10 --csv dvfs.csv
+"""
+import argparse
+import csv
+import json
+import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from bl_report import MW_PER_MHZ, parse_frequency
+from stats_index import add_outdir_args, outdirs_from_args, read_outdir_dump, to_float, workload_name
+
+_CPU_STAT = re.compile(r"^system\.cpu\d*\.(committedInsts|numCycles)$")
+
+FIELDNAMES = ["profile", "workload", "cpu_clock", "cpu_voltage", "sim_s", "ipc", "power_mW",
+              "energy_mJ", "edp_mJs", "best", "run"]
+
+
+@dataclass
+class DVFSPoint:
+    path: str
+    profile: str
+    workload: str
+    clock: str
+    voltage: float
+    sim_seconds: float
+    ipc: float
+    power_w: float = 0.0
+
+    @property
+    def freq_hz(self) -> float:
+        return parse_frequency(self.clock)
+
+    @property
+    def energy_j(self) -> float:
+        return self.power_w * self.sim_seconds
+
+
+def parse_voltage(text: str) -> float:
+    t = text.strip().lower()
+    if t.endswith("mv"):
+        return float(t[:-2]) / 1e3
+    return float(t.rstrip("v"))
+
+
+def read_point(outdir: str) -> Optional[DVFSPoint]:
+    label = os.path.join(outdir, "clocks.json")
+    if not os.path.isfile(label):
+        return None
+    with open(label) as f:
+        info = json.load(f)
+
+    stats = read_outdir_dump(outdir)
+    if stats is None:
+        return None
+
+    insts: Dict[str, float] = {}
+    cycles: Dict[str, float] = {}
+    for name, raw in stats.items():
+        m = _CPU_STAT.match(name)
+        value = to_float(raw) if m else None
+        if value is None:
+            continue
+        cpu = name.rsplit(".", 1)[0]
+        (insts if m.group(1) == "committedInsts" else cycles)[cpu] = value
+
+    return DVFSPoint(
+        path=outdir,
+        profile=info.get("profile") or "?",
+        workload=workload_name(outdir),
+        clock=info["clocks"]["cpu"],
+        voltage=parse_voltage(info["voltages"]["cpu"]),
+        sim_seconds=to_float(stats.get("simSeconds", stats.get("sim_seconds", "0"))) or 0.0,
+        ipc=sum(insts[c] / cycles[c] for c in insts if cycles.get(c)),
+    )
+
+
+def estimate_power(p: DVFSPoint, mw_per_mhz: float, v_nom: float, static_mw: float) -> float:
+    scale = p.voltage / v_nom
+    return (mw_per_mhz * p.freq_hz / 1e6 * scale * scale + static_mw * scale) / 1e3
+
+
+def build_rows(points: List[DVFSPoint]) -> List[Dict[str, str]]:
+    groups: Dict[tuple, List[DVFSPoint]] = defaultdict(list)
+    for p in points:
+        groups[(p.profile, p.workload)].append(p)
+
+    rows: List[Dict[str, str]] = []
+    for key in sorted(groups):
+        group = sorted(groups[key], key=lambda p: p.freq_hz)
+        best_e = min(group, key=lambda p: p.energy_j)
+        best_edp = min(group, key=lambda p: p.energy_j * p.sim_seconds)
+        for p in group:
+            marks = [m for m, b in (("energy", best_e), ("edp", best_edp)) if p is b]
+            rows.append({
+                "profile": p.profile,
+                "workload": p.workload,
+                "cpu_clock": p.clock,
+                "cpu_voltage": f"{p.voltage:.3f}",
+                "sim_s": f"{p.sim_seconds:.6f}",
+                "ipc": f"{p.ipc:.4f}",
+                "power_mW": f"{1e3 * p.power_w:.2f}",
+                "energy_mJ": f"{1e3 * p.energy_j:.4f}",
+                "edp_mJs": f"{1e3 * p.energy_j * p.sim_seconds:.6f}",
+                "best": "+".join(marks),
+                "run": p.path,
+            })
+    return rows
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Runtime/IPC/power/energy per DVFS operating point")
+    add_outdir_args(ap, "gem5 output directories (clocks.json + stats.txt)")
+    ap.add_argument("--mw-per-mhz", type=float, default=None,
+                    help="Dynamic power at Vnom (default: from the profile, A7 0.10 / A15 0.20)")
+    ap.add_argument("--v-nom", type=float, default=1.0, help="Voltage of the mW/MHz figures (default: 1.0)")
+    ap.add_argument("--static-mw", type=float, default=0.0, help="Leakage at Vnom in mW (default: 0)")
+    ap.add_argument("--csv", default=None, help="Also write the table to this CSV")
+    args = ap.parse_args()
+
+    dirs = outdirs_from_args(args)
+    points = [p for p in (read_point(d) for d in dirs) if p is not None]
+    if not points:
+        print("Error: no directory with clocks.json and stats.txt")
+        return 1
+
+    for p in points:
+        k = args.mw_per_mhz if args.mw_per_mhz is not None else MW_PER_MHZ.get(p.profile)
+        if k is None:
+            print(f"Error: unknown profile '{p.profile}' for {p.path}, pass --mw-per-mhz")
+            return 1
+        p.power_w = estimate_power(p, k, args.v_nom, args.static_mw)
+
+    rows = build_rows(points)
+    print(f"{'profile':<7} {'workload':<18} {'clock':>8} {'V':>6} {'sim s':>10} {'IPC':>7} {'mW':>8} {'mJ':>10}  best")
+    for r in rows:
+        print(f"{r['profile']:<7} {r['workload']:<18} {r['cpu_clock']:>8} {r['cpu_voltage']:>6} {r['sim_s']:>10} "
+              f"{r['ipc']:>7} {r['power_mW']:>8} {r['energy_mJ']:>10}  {r['best']}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            w.writeheader()
+            w.writerows(rows)
+        print(f"Wrote {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
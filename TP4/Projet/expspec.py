@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Experiment spec compiler (TOML, or YAML when PyYAML is installed).
+
+A spec declares gem5 config scripts, workloads and studies. Each study
+expands its parameters into points:
+  - product : cartesian product of the listed axes
+  - zip     : axes advanced together (equal lengths)
+  - when    : conditional blocks; for every point matching `match`, the
+              block's params/options are merged and its own product/zip
+              axes are expanded
+  - exclude : list of partial matches to drop
+Templates "{name}" are filled from the point parameters; "{outdir}" (job
+output directory) and "{root}" (repo root) are filled per job.
+
+Workloads come from the registry named by `registry` (workloads.toml,
+see workloads.py), plus any [workloads] table of the spec itself. With
+--build, the binaries of the selected jobs are (re)built first when
+their sources or the toolchain changed.
+
+Every point renders to one gem5 job (config script, script options
+merged with the script defaults, binary, binary args). Identical jobs
+requested by different studies compile to a single job with a shared
+output directory, keyed by a hash of the job.
+
+Usage:
+  python3 TP4/Projet/expspec.py TP4/Projet/experiments.toml --summary
+  python3 TP4/Projet/expspec.py TP4/Projet/experiments.toml --json jobs.json --sh jobs.sh
+  python3 TP4/Projet/expspec.py TP4/Projet/experiments.toml --run --build --study Q45 --gem5 /path/to/gem5.opt
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import shlex
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib  # type: ignore[no-redef]
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+import workloads as registry
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(BASE, "..", ".."))
+
+DEFAULT_SPEC = os.path.join(BASE, "experiments.toml")
+DEFAULT_RUNS = os.path.join(BASE, "runs")
+
+
+@dataclass
+class Point:
+    study: str
+    label: str
+    params: Dict[str, Any]
+    job_id: str = ""
+
+
+@dataclass
+class Job:
+    id: str
+    config: str
+    script: str
+    options: Dict[str, Any]
+    cmd: str
+    args: List[str]
+    args_flag: str = "--options"
+    build: str = ""
+    labels: List[Tuple[str, str]] = field(default_factory=list)
+
+    def outdir(self, runs_dir: str) -> str:
+        return os.path.join(runs_dir, self.id)
+
+    def command(self, gem5: str, runs_dir: str) -> List[str]:
+        outdir = self.outdir(runs_dir)
+        cmd = [gem5, "-d", outdir, _abs(self.script), "--cmd", _abs(self.cmd)]
+        for key, value in sorted(self.options.items()):
+            if value is True:
+                cmd.append(f"--{key}")
+            elif value is False or value is None:
+                continue
+            else:
+                cmd += [f"--{key}", str(value)]
+        args = [a.replace("{outdir}", outdir).replace("{root}", ROOT) for a in self.args]
+        if args:
+            if self.args_flag == "--options":
+                cmd += ["--options"] + args
+            else:
+                cmd += [self.args_flag, " ".join(args)]
+        return cmd
+
+
+def _abs(path: str) -> str:
+    return path if os.path.isabs(path) else os.path.join(ROOT, path)
+
+
+# ------------------ Loading ------------------
+
+def load_spec(path: str) -> Dict[str, Any]:
+    if path.endswith((".yaml", ".yml")):
+        if yaml is None:
+            raise SystemExit("PyYAML is required for YAML specs (pip install pyyaml)")
+        with open(path) as f:
+            spec = yaml.safe_load(f) or {}
+    else:
+        with open(path, "rb") as f:
+            spec = tomllib.load(f)
+    if "registry" in spec:
+        reg_path = os.path.join(os.path.dirname(os.path.abspath(path)), spec["registry"])
+        spec["workloads"] = {**registry.spec_workloads(registry.load_registry(reg_path)),
+                             **spec.get("workloads", {})}
+    return spec
+
+
+# ------------------ Expansion ------------------
+
+def _product(axes: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    if not axes:
+        return [{}]
+    keys = list(axes)
+    return [dict(zip(keys, values)) for values in itertools.product(*(axes[k] for k in keys))]
+
+
+def _zip(axes: Dict[str, List[Any]], where: str) -> List[Dict[str, Any]]:
+    if not axes:
+        return [{}]
+    lengths = {len(v) for v in axes.values()}
+    if len(lengths) != 1:
+        raise ValueError(f"{where}: zip axes must have the same length ({ {k: len(v) for k, v in axes.items()} })")
+    keys = list(axes)
+    return [dict(zip(keys, values)) for values in zip(*(axes[k] for k in keys))]
+
+
+def _expand(block: Dict[str, Any], where: str) -> List[Dict[str, Any]]:
+    out = []
+    for a in _product(block.get("product", {})):
+        for b in _zip(block.get("zip", {}), where):
+            out.append({**a, **b})
+    return out
+
+
+def _matches(point: Dict[str, Any], match: Dict[str, Any]) -> bool:
+    for key, want in match.items():
+        have = point.get(key)
+        if isinstance(want, list):
+            if have not in want:
+                return False
+        elif have != want:
+            return False
+    return True
+
+
+def _render(value: Any, params: Dict[str, Any]) -> Any:
+    if isinstance(value, str):
+        # {outdir} and {root} are resolved when the command is built, so that
+        # job ids do not depend on where the runs or the repo live.
+        value = value.replace("{outdir}", "\0o").replace("{root}", "\0r")
+        value = value.format(**params)
+        return value.replace("\0o", "{outdir}").replace("\0r", "{root}")
+    return value
+
+
+def study_points(study: Dict[str, Any]) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """(params, options templates) for every point of one study."""
+    name = study.get("name", "?")
+    base_params = dict(study.get("params", {}))
+    base_opts = dict(study.get("options", {}))
+
+    points = [({**base_params, **p}, dict(base_opts)) for p in _expand(study, name)]
+
+    for i, cond in enumerate(study.get("when", [])):
+        where = f"{name}.when[{i}]"
+        expanded = []
+        for params, opts in points:
+            if not _matches(params, cond.get("match", {})):
+                expanded.append((params, opts))
+                continue
+            extra_params = cond.get("params", {})
+            extra_opts = cond.get("options", {})
+            for p in _expand(cond, where):
+                expanded.append(({**params, **extra_params, **p}, {**opts, **extra_opts}))
+        points = expanded
+
+    excludes = study.get("exclude", [])
+    return [(p, o) for p, o in points if not any(_matches(p, e) for e in excludes)]
+
+
+def _job_key(script: str, options: Dict[str, Any], cmd: str, args: List[str]) -> str:
+    blob = json.dumps(
+        {"script": script, "options": options, "cmd": cmd, "args": args},
+        sort_keys=True,
+    ).encode()
+    return hashlib.sha256(blob).hexdigest()[:12]
+
+
+def compile_spec(spec: Dict[str, Any], studies: Optional[Iterable[str]] = None) -> Tuple[List[Job], List[Point]]:
+    configs = spec.get("configs", {})
+    workloads = spec.get("workloads", {})
+    wanted = set(studies) if studies else None
+
+    jobs: Dict[str, Job] = {}
+    points: List[Point] = []
+
+    for study in spec.get("study", []):
+        name = study["name"]
+        if wanted is not None and name not in wanted:
+            continue
+
+        for params, opt_templates in study_points(study):
+            cfg_name = _render(study["config"], params)
+            if cfg_name not in configs:
+                raise ValueError(f"{name}: unknown config '{cfg_name}'")
+            cfg = configs[cfg_name]
+
+            wl_name = _render(study.get("workload", "{workload}"), params)
+            if wl_name not in workloads:
+                raise ValueError(f"{name}: unknown workload '{wl_name}'")
+            wl = workloads[wl_name]
+
+            options = {k: str(v) if not isinstance(v, bool) else v for k, v in cfg.get("defaults", {}).items()}
+            for key, tmpl in opt_templates.items():
+                value = _render(tmpl, params)
+                options[key] = value if isinstance(value, bool) else str(value)
+
+            cmd = _render(wl["cmd"], params)
+            args = [str(_render(a, params)) for a in wl.get("args", [])]
+            script = cfg["script"]
+
+            job_id = _job_key(script, options, cmd, args)
+            label = _render(study.get("label", name + "_" + "_".join(f"{k}{v}" for k, v in params.items())), params)
+
+            if job_id not in jobs:
+                jobs[job_id] = Job(
+                    id=job_id,
+                    config=cfg_name,
+                    script=script,
+                    options=options,
+                    cmd=cmd,
+                    args=args,
+                    args_flag=cfg.get("args_flag", "--options"),
+                    build=wl.get("build", ""),
+                )
+            jobs[job_id].labels.append((name, label))
+            points.append(Point(study=name, label=label, params=params, job_id=job_id))
+
+    return list(jobs.values()), points
+
+
+def load_points(study: str, spec_path: str = DEFAULT_SPEC) -> List[Dict[str, Any]]:
+    """Parameter dicts of one study (used by the build_q* scripts to select rows)."""
+    spec = load_spec(spec_path)
+    for s in spec.get("study", []):
+        if s["name"] == study:
+            return [p for p, _ in study_points(s)]
+    raise KeyError(f"Study '{study}' not found in {spec_path}")
+
+
+# ------------------ Outputs ------------------
+
+def link_labels(jobs: List[Job], runs_dir: str) -> None:
+    """runs/<study>/<label> -> runs/<job id>, so studies keep their usual names."""
+    for job in jobs:
+        for study, label in job.labels:
+            d = os.path.join(runs_dir, study)
+            os.makedirs(d, exist_ok=True)
+            link = os.path.join(d, label)
+            target = os.path.relpath(job.outdir(runs_dir), d)
+            if os.path.islink(link):
+                if os.readlink(link) == target:
+                    continue
+                os.remove(link)
+            elif os.path.exists(link):
+                continue
+            os.symlink(target, link)
+
+
+def write_json(path: str, jobs: List[Job], points: List[Point], runs_dir: str) -> None:
+    data = {
+        "jobs": [
+            {
+                "id": j.id,
+                "config": j.config,
+                "script": j.script,
+                "options": j.options,
+                "cmd": j.cmd,
+                "args": j.args,
+                "args_flag": j.args_flag,
+                "build": j.build,
+                "outdir": j.outdir(runs_dir),
+                "labels": [list(l) for l in j.labels],
+            }
+            for j in jobs
+        ],
+        "points": [
+            {"study": p.study, "label": p.label, "params": p.params, "job": p.job_id}
+            for p in points
+        ],
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=1)
+
+
+def write_sh(path: str, jobs: List[Job], gem5: str, runs_dir: str) -> None:
+    with open(path, "w") as f:
+        f.write("#!/bin/bash\nset -e\n")
+        for j in jobs:
+            f.write("# " + ", ".join(f"{s}:{l}" for s, l in j.labels) + "\n")
+            f.write(" ".join(shlex.quote(a) for a in j.command(gem5, runs_dir)) + "\n")
+    os.chmod(path, 0o755)
+
+
+def run_jobs(jobs: List[Job], gem5: str, runs_dir: str, parallel: int, force: bool) -> int:
+    def one(job: Job) -> int:
+        outdir = job.outdir(runs_dir)
+        if not force and os.path.isfile(os.path.join(outdir, "stats.txt")):
+            print(f"== Skip {job.id} (done) ==")
+            return 0
+        os.makedirs(outdir, exist_ok=True)
+        names = ", ".join(l for _, l in job.labels)
+        print(f"== Running {job.id} | {names} ==")
+        with open(os.path.join(outdir, "gem5.log"), "w") as log:
+            return subprocess.run(job.command(gem5, runs_dir), stdout=log, stderr=subprocess.STDOUT).returncode
+
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+        codes = list(pool.map(one, jobs))
+    failed = [j.id for j, c in zip(jobs, codes) if c != 0]
+    for job_id in failed:
+        print(f"Warning: job {job_id} failed (see gem5.log)", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Compile an experiment spec into a deduplicated gem5 job list")
+    ap.add_argument("spec", nargs="?", default=DEFAULT_SPEC, help="Spec file (.toml, .yaml)")
+    ap.add_argument("--study", action="append", default=[], help="Only these studies (repeatable)")
+    ap.add_argument("--runs-dir", default=DEFAULT_RUNS, help="Shared output root (one dir per job)")
+    ap.add_argument("--gem5", default=os.environ.get("GEM5", "gem5.opt"))
+    ap.add_argument("--summary", action="store_true", help="Print points/jobs per study")
+    ap.add_argument("--json", default=None, help="Write compiled jobs and points as JSON")
+    ap.add_argument("--sh", default=None, help="Write the gem5 command lines as a shell script")
+    ap.add_argument("--run", action="store_true", help="Run the jobs (skips jobs with a stats.txt)")
+    ap.add_argument("--parallel", type=int, default=1, help="gem5 processes in parallel with --run")
+    ap.add_argument("--force", action="store_true", help="With --run, rerun finished jobs")
+    ap.add_argument("--build", action="store_true", help="With --run, build the changed workload binaries first")
+    args = ap.parse_args()
+
+    spec = load_spec(args.spec)
+    jobs, points = compile_spec(spec, args.study or None)
+    if not jobs:
+        raise SystemExit("No jobs: check --study names")
+
+    if args.summary or not (args.json or args.sh or args.run):
+        per_study: Dict[str, List[Point]] = {}
+        for p in points:
+            per_study.setdefault(p.study, []).append(p)
+        for study, pts in per_study.items():
+            print(f"{study:10s} {len(pts):4d} points")
+        shared = [j for j in jobs if len({s for s, _ in j.labels}) > 1]
+        print(f"{len(points)} points -> {len(jobs)} unique jobs ({len(points) - len(jobs)} deduplicated)")
+        for j in shared:
+            print(f"  shared {j.id}: " + ", ".join(f"{s}:{l}" for s, l in j.labels))
+
+    if args.json:
+        write_json(args.json, jobs, points, args.runs_dir)
+        print("Wrote:", args.json)
+    if args.sh:
+        write_sh(args.sh, jobs, args.gem5, args.runs_dir)
+        print("Wrote:", args.sh)
+    if args.run:
+        builds = {j.build for j in jobs if j.build}
+        if args.build and builds:
+            spec_dir = os.path.dirname(os.path.abspath(args.spec))
+            reg = registry.load_registry(os.path.join(spec_dir, spec.get("registry", "workloads.toml")))
+            if registry.Builder(reg).build(builds, args.parallel):
+                return 1
+        os.makedirs(args.runs_dir, exist_ok=True)
+        link_labels(jobs, args.runs_dir)
+        return run_jobs(jobs, args.gem5, args.runs_dir, args.parallel, args.force)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Ranked per-PC hot spots (cache misses, branch mispredicts) of gem5 runs
+made with --pc-profile, mapped back to functions and source lines.
+
+The PcProfiler of each detailed core (se_common/pcprof.py) writes one
+pcprof_cpu<N>.<dump>.csv per stats dump; the ROI dump is used when the
+directory holds a roi.json, otherwise the last one. PCs are symbolized
+against the workload ELF (from config.ini, or --elf): function symbols,
+and file:line when the binary has DWARF line tables (build with -g).
+pyelftools is used when installed, otherwise the (riscv64-*-)nm and
+addr2line binutils.
+
+One ranking per run (workload + configuration), sorted by --sort;
+--by-function sums the PCs of each function first.
+
+Usage:
+  python3 TP4/Projet/hotspots.py m5out_dij_l1_1kB m5out_dij_l1_16kB
+  python3 TP4/Projet/hotspots.py --glob 'm5out_*_pc' --sort l2_miss --top 15 --csv hot.csv
+  python3 TP4/Projet/hotspots.py m5out_bf --sort mispred --by-function
+"""
+import argparse
+import bisect
+import csv
+import glob
+import os
+import re
+import shutil
+import subprocess
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from stats_index import add_outdir_args, outdirs_from_args, read_config, roi_dump, workload_name, workload_section
+
+try:
+    from elftools.elf.elffile import ELFFile
+except ImportError:  # optional, binutils are used instead
+    ELFFile = None
+
+COUNTERS = ["l1i_acc", "l1i_miss", "l1d_acc", "l1d_miss", "l2_acc", "l2_miss", "branches", "mispred"]
+SORT_KEYS = ["l1i_miss", "l1d_miss", "l2_miss", "mispred"]
+
+FIELDNAMES = ["run", "workload", "config", "cpu", "rank", "pc", "function", "line", "l1i_miss", "l1d_miss",
+              "l1d_miss_rate", "l2_miss", "mispred", "mispred_rate", "share_pct", "cum_pct"]
+
+_TOOL_PREFIXES = ("riscv64-unknown-elf-", "riscv64-linux-gnu-", "riscv64-unknown-linux-gnu-", "")
+_OUTPUT = re.compile(r"^(pcprof_cpu\d+)\.(\d+)\.csv$")
+
+
+@dataclass
+class Profile:
+    path: str
+    workload: str
+    config: str
+    elf: str
+    cpu: str
+    counts: Dict[int, List[int]] = field(default_factory=dict)
+
+
+def _tool(name: str) -> Optional[str]:
+    for prefix in _TOOL_PREFIXES:
+        path = shutil.which(prefix + name)
+        if path:
+            return path
+    return None
+
+
+class Symbolizer:
+    """PC -> (function+offset, file:line) for one ELF."""
+
+    def __init__(self, elf: str):
+        self.elf = elf
+        self.funcs: List[Tuple[int, int, str]] = []
+        self.lines: List[Tuple[int, str]] = []
+        self._addr2line: Dict[int, str] = {}
+        if not elf or not os.path.isfile(elf):
+            return
+        if ELFFile is not None:
+            self._load_elftools()
+        else:
+            self._load_nm()
+        self.funcs.sort()
+        self.lines.sort()
+        self._starts = [f[0] for f in self.funcs]
+        self._line_addrs = [a for a, _ in self.lines]
+
+    def _load_elftools(self) -> None:
+        with open(self.elf, "rb") as f:
+            elf = ELFFile(f)
+            symtab = elf.get_section_by_name(".symtab")
+            if symtab is not None:
+                for sym in symtab.iter_symbols():
+                    if sym["st_info"]["type"] == "STT_FUNC" and sym["st_value"]:
+                        self.funcs.append((sym["st_value"], sym["st_size"], sym.name))
+            if not elf.has_dwarf_info():
+                return
+            dwarf = elf.get_dwarf_info()
+            for cu in dwarf.iter_CUs():
+                prog = dwarf.line_program_for_CU(cu)
+                if prog is None:
+                    continue
+                files = prog["file_entry"]
+                base = 0 if prog.header["version"] >= 5 else 1
+                for entry in prog.get_entries():
+                    st = entry.state
+                    if st is None or st.end_sequence:
+                        continue
+                    idx = st.file - base
+                    name = files[idx].name.decode(errors="replace") if 0 <= idx < len(files) else "?"
+                    self.lines.append((st.address, f"{name}:{st.line}"))
+
+    def _load_nm(self) -> None:
+        nm = _tool("nm")
+        if nm is None:
+            return
+        out = subprocess.run([nm, "-S", "--defined-only", self.elf], capture_output=True, text=True).stdout
+        for line in out.splitlines():
+            parts = line.split()
+            # "00010074 0000002c T main" (no size column for some symbols)
+            if len(parts) == 4 and parts[2] in "TtWw":
+                self.funcs.append((int(parts[0], 16), int(parts[1], 16), parts[3]))
+
+    def prefetch_lines(self, pcs: List[int]) -> None:
+        """Batch addr2line for these PCs (only when no line table was loaded)."""
+        if self.lines or not pcs or not os.path.isfile(self.elf):
+            return
+        tool = _tool("addr2line")
+        if tool is None:
+            return
+        out = subprocess.run([tool, "-e", self.elf] + [hex(pc) for pc in pcs],
+                             capture_output=True, text=True).stdout.splitlines()
+        for pc, loc in zip(pcs, out):
+            if not loc.startswith("??"):
+                self._addr2line[pc] = os.path.basename(loc.split(" ")[0])
+
+    def function(self, pc: int) -> str:
+        i = bisect.bisect_right(self._starts, pc) - 1 if self.funcs else -1
+        if i < 0:
+            return "?"
+        start, size, name = self.funcs[i]
+        if size and pc >= start + size:
+            return "?"
+        return name if pc == start else f"{name}+{pc - start:#x}"
+
+    def line(self, pc: int) -> str:
+        if pc in self._addr2line:
+            return self._addr2line[pc]
+        i = bisect.bisect_right(self._line_addrs, pc) - 1 if self.lines else -1
+        return os.path.basename(self.lines[i][1]) if i >= 0 else ""
+
+
+def _describe(outdir: str) -> Tuple[str, str, str]:
+    """(workload, configuration, ELF path) from config.ini."""
+    cfg = read_config(outdir)
+    workload, elf = workload_name(outdir, cfg), ""
+    section = workload_section(cfg)
+    if section is not None:
+        elf = cfg.get(section, "executable", fallback="") or cfg.get(section, "cmd").split()[0]
+    parts = []
+    for name, sections in (("L1I", ("system.cpu.icache", "system.cpu0.icache")),
+                           ("L1D", ("system.cpu.dcache", "system.cpu0.dcache")),
+                           ("L2", ("system.l2cache", "system.cpu.l2cache", "system.cpu0.l2cache"))):
+        for sec in sections:
+            if cfg.has_option(sec, "size"):
+                parts.append(f"{name}={cfg.getint(sec, 'size') // 1024}kB")
+                break
+    return workload, " ".join(parts) or os.path.basename(outdir.rstrip("/")), elf
+
+
+def read_profiles(outdir: str, elf: Optional[str] = None) -> List[Profile]:
+    files: Dict[str, Dict[int, str]] = defaultdict(dict)
+    for path in glob.glob(os.path.join(outdir, "pcprof_cpu*.csv")):
+        m = _OUTPUT.match(os.path.basename(path))
+        if m:
+            files[m.group(1)][int(m.group(2))] = path
+    if not files:
+        return []
+
+    workload, config, default_elf = _describe(outdir)
+    wanted = roi_dump(outdir)
+    if wanted is None:
+        wanted = -1
+    profiles = []
+    for cpu in sorted(files):
+        dumps = files[cpu]
+        dump = sorted(dumps)[wanted] if wanted < 0 else wanted
+        if dump not in dumps:
+            continue
+        prof = Profile(path=outdir, workload=workload, config=config, elf=elf or default_elf,
+                       cpu=cpu.replace("pcprof_", ""))
+        with open(dumps[dump], newline="") as f:
+            for row in csv.DictReader(f):
+                prof.counts[int(row["pc"], 16)] = [int(row.get(c) or 0) for c in COUNTERS]
+        profiles.append(prof)
+    return profiles
+
+
+def _rate(num: int, den: int) -> str:
+    return f"{num / den:.4f}" if den else "n/a"
+
+
+def build_rows(profiles: List[Profile], sort: str, top: int, by_function: bool) -> List[Dict[str, str]]:
+    key = COUNTERS.index(sort)
+    symbolizers: Dict[str, Symbolizer] = {}
+    rows: List[Dict[str, str]] = []
+    for prof in profiles:
+        sym = symbolizers.setdefault(prof.elf, Symbolizer(prof.elf))
+        total = sum(c[key] for c in prof.counts.values())
+        if by_function:
+            merged: Dict[str, List[int]] = defaultdict(lambda: [0] * len(COUNTERS))
+            for pc, c in prof.counts.items():
+                name = sym.function(pc).split("+", 1)[0]
+                merged[name] = [a + b for a, b in zip(merged[name], c)]
+            ranked = sorted(merged.items(), key=lambda kv: -kv[1][key])[:top]
+            entries = [("", name, "", c) for name, c in ranked]
+        else:
+            ranked_pcs = sorted(prof.counts, key=lambda pc: -prof.counts[pc][key])[:top]
+            sym.prefetch_lines(ranked_pcs)
+            entries = [(f"{pc:#x}", sym.function(pc), sym.line(pc), prof.counts[pc]) for pc in ranked_pcs]
+
+        cum = 0
+        for rank, (pc, func, line, c) in enumerate(entries, 1):
+            if not c[key]:
+                break
+            cum += c[key]
+            v = dict(zip(COUNTERS, c))
+            rows.append({
+                "run": prof.path,
+                "workload": prof.workload,
+                "config": prof.config,
+                "cpu": prof.cpu,
+                "rank": str(rank),
+                "pc": pc,
+                "function": func,
+                "line": line,
+                "l1i_miss": str(v["l1i_miss"]),
+                "l1d_miss": str(v["l1d_miss"]),
+                "l1d_miss_rate": _rate(v["l1d_miss"], v["l1d_acc"]),
+                "l2_miss": str(v["l2_miss"]),
+                "mispred": str(v["mispred"]),
+                "mispred_rate": _rate(v["mispred"], v["branches"]),
+                "share_pct": f"{100.0 * c[key] / total:.1f}" if total else "n/a",
+                "cum_pct": f"{100.0 * cum / total:.1f}" if total else "n/a",
+            })
+    return rows
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Per-PC miss/mispredict hot spots of --pc-profile runs")
+    add_outdir_args(ap)
+    ap.add_argument("--elf", default=None, help="Workload ELF (default: the binary in config.ini)")
+    ap.add_argument("--sort", choices=SORT_KEYS, default="l1d_miss", help="Ranking counter (default: l1d_miss)")
+    ap.add_argument("--top", type=int, default=20, help="Entries per run (default: 20)")
+    ap.add_argument("--by-function", action="store_true", help="Rank functions instead of PCs")
+    ap.add_argument("--csv", default=None, help="Also write the table to this CSV")
+    args = ap.parse_args()
+
+    dirs = outdirs_from_args(args)
+    profiles = [p for d in dirs for p in read_profiles(d, args.elf)]
+    if not profiles:
+        print("Error: no pcprof_cpu*.csv found (run with --pc-profile)")
+        return 1
+
+    rows = build_rows(profiles, args.sort, args.top, args.by_function)
+    current = None
+    for r in rows:
+        if (r["run"], r["cpu"]) != current:
+            current = (r["run"], r["cpu"])
+            print(f"\n== {r['workload']} [{r['config']}] {r['cpu']} - by {args.sort}  ({r['run']})")
+            print(f"{'#':>3} {'pc':>10} {'function':<28} {'line':<22} {'L1I miss':>9} {'L1D miss':>9} "
+                  f"{'L1D rate':>8} {'L2 miss':>8} {'mispred':>8} {'share %':>7} {'cum %':>6}")
+        print(f"{r['rank']:>3} {r['pc']:>10} {r['function'][:28]:<28} {r['line'][:22]:<22} {r['l1i_miss']:>9} "
+              f"{r['l1d_miss']:>9} {r['l1d_miss_rate']:>8} {r['l2_miss']:>8} {r['mispred']:>8} "
+              f"{r['share_pct']:>7} {r['cum_pct']:>6}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            w.writeheader()
+            w.writerows(rows)
+        print(f"Wrote {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Multi-core scaling report for --num-cpus runs (se_cache.py, se_A7.py, se_A15.py).
+
+Reads the stats of a sweep of gem5 output directories (same workload,
+different core counts) and prints, per run:
+  - per-core and aggregate IPC, speedup over the smallest run
+  - per-core L2 MPKI and its inflation over the smallest run, i.e. the
+    extra L2 misses caused by sharing the L2 (interference)
+  - DRAM bandwidth
+The saturation point is the first core count whose marginal gain drops
+below --threshold cores' worth of aggregate IPC per added core.
+
+Per-core figures come from the ROI dump of --roi runs, from the last
+dump otherwise.
+
+Usage:
+  python3 TP4/Projet/mc_report.py m5out_pr_1c m5out_pr_2c m5out_pr_4c m5out_pr_8c
+  python3 TP4/Projet/mc_report.py --glob 'runs/pagerank_*c' --csv scaling.csv
+"""
+import argparse
+import csv
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from mem_report import dram_bandwidth
+from stats_index import add_outdir_args, outdirs_from_args, read_outdir_dump, to_float
+
+# system.cpu.*, system.cpu0.*, system.cpu1.* ...
+_CPU_STAT = re.compile(r"^system\.cpu(\d*)\.(committedInsts|numCycles|ipc)$")
+# Per-requestor L2 counters: "::cpu0.data", "::system.cpu0.data", "::cpu.inst"...
+_L2_MISSES = re.compile(r"^system\.l2cache\.(?:overall|demand)Misses::(?:system\.)?cpu(\d*)\.(?:data|inst)$")
+_L2_TOTAL = ("system.l2cache.overallMisses::total", "system.l2cache.demandMisses::total")
+_DRAM_BW = ("system.mem_ctrl.dram.bwTotal::total", "system.mem_ctrl.bwTotal::total")
+
+
+@dataclass
+class CoreStats:
+    insts: float = 0.0
+    cycles: float = 0.0
+    l2_misses: float = 0.0
+
+    @property
+    def ipc(self) -> float:
+        return self.insts / self.cycles if self.cycles else 0.0
+
+    @property
+    def l2_mpki(self) -> float:
+        return 1000.0 * self.l2_misses / self.insts if self.insts else 0.0
+
+
+@dataclass
+class RunStats:
+    path: str
+    sim_seconds: float
+    dram_bw: Optional[float]
+    cores: Dict[int, CoreStats] = field(default_factory=dict)
+    l2_misses: float = 0.0
+
+    @property
+    def num_cpus(self) -> int:
+        return len(self.cores)
+
+    @property
+    def ipc(self) -> float:
+        return sum(c.ipc for c in self.cores.values())
+
+    @property
+    def l2_mpki(self) -> float:
+        insts = sum(c.insts for c in self.cores.values())
+        return 1000.0 * self.l2_misses / insts if insts else 0.0
+
+
+def _core_id(text: str) -> int:
+    return int(text) if text else 0
+
+
+def read_run(outdir: str) -> Optional[RunStats]:
+    stats = read_outdir_dump(outdir)
+    if stats is None:
+        return None
+
+    sim_seconds = to_float(stats.get("simSeconds", stats.get("sim_seconds", "0"))) or 0.0
+    run = RunStats(path=outdir, sim_seconds=sim_seconds, dram_bw=None)
+
+    ipc_stat: Dict[int, float] = {}
+    for name, raw in stats.items():
+        value = to_float(raw)
+        if value is None:
+            continue
+        m = _CPU_STAT.match(name)
+        if m:
+            core = run.cores.setdefault(_core_id(m.group(1)), CoreStats())
+            if m.group(2) == "committedInsts":
+                core.insts = value
+            elif m.group(2) == "numCycles":
+                core.cycles = value
+            else:
+                ipc_stat[_core_id(m.group(1))] = value
+            continue
+        m = _L2_MISSES.match(name)
+        if m:
+            run.cores.setdefault(_core_id(m.group(1)), CoreStats()).l2_misses += value
+
+    # Cores with neither cycles nor instructions in this dump are dropped.
+    run.cores = {i: c for i, c in run.cores.items() if c.cycles or c.insts}
+    for i, ipc in ipc_stat.items():
+        if i in run.cores and not run.cores[i].cycles and ipc:
+            run.cores[i].cycles = run.cores[i].insts / ipc
+
+    for name in _L2_TOTAL:
+        if name in stats:
+            run.l2_misses = to_float(stats[name]) or 0.0
+            break
+    else:
+        run.l2_misses = sum(c.l2_misses for c in run.cores.values())
+
+    # Summed over all memory channels (--mem-channels)
+    run.dram_bw = dram_bandwidth(stats, sim_seconds)
+    if run.dram_bw is None:
+        for name in _DRAM_BW:
+            if name in stats:
+                run.dram_bw = to_float(stats[name])
+                break
+    return run
+
+
+def saturation_point(runs: List[RunStats], threshold: float) -> Optional[int]:
+    """First core count where each added core brings < threshold x (1-core IPC)."""
+    if len(runs) < 2:
+        return None
+    base = runs[0].ipc / max(1, runs[0].num_cpus)
+    if base <= 0:
+        return None
+    for prev, cur in zip(runs, runs[1:]):
+        added = cur.num_cpus - prev.num_cpus
+        if added <= 0:
+            continue
+        if (cur.ipc - prev.ipc) / (added * base) < threshold:
+            return cur.num_cpus
+    return None
+
+
+def print_report(runs: List[RunStats], threshold: float) -> None:
+    base = runs[0]
+    print(f"{'cpus':>4} {'agg IPC':>8} {'speedup':>8} {'L2 MPKI':>8} {'x base':>7} {'DRAM GB/s':>10}  run")
+    for run in runs:
+        speedup = run.ipc / base.ipc if base.ipc else float("nan")
+        inflation = run.l2_mpki / base.l2_mpki if base.l2_mpki else float("nan")
+        bw = f"{run.dram_bw / 1e9:10.3f}" if run.dram_bw is not None else f"{'n/a':>10}"
+        print(f"{run.num_cpus:>4} {run.ipc:8.3f} {speedup:8.2f} {run.l2_mpki:8.2f} {inflation:7.2f} {bw}  {run.path}")
+        base_mpki = base.cores[min(base.cores)].l2_mpki if base.cores else 0.0
+        for i in sorted(run.cores):
+            c = run.cores[i]
+            infl = c.l2_mpki / base_mpki if base_mpki else float("nan")
+            print(f"{'':>4}   cpu{i}: IPC {c.ipc:.3f}  L2 MPKI {c.l2_mpki:.2f} (x{infl:.2f})")
+
+    sat = saturation_point(runs, threshold)
+    if sat is None:
+        print(f"No saturation below {threshold:.2f} core/added core in this sweep")
+    else:
+        print(f"Scaling saturates at {sat} cores (marginal gain < {threshold:.2f} core/added core)")
+
+
+def write_csv(path: str, runs: List[RunStats]) -> None:
+    base = runs[0]
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["num_cpus", "cpu", "ipc", "l2_mpki", "l2_mpki_inflation", "dram_bw_Bps", "run"])
+        for run in runs:
+            infl = f"{run.l2_mpki / base.l2_mpki:.4f}" if base.l2_mpki else ""
+            w.writerow([run.num_cpus, "all", f"{run.ipc:.6f}", f"{run.l2_mpki:.4f}", infl,
+                        "" if run.dram_bw is None else f"{run.dram_bw:.0f}", run.path])
+            for i in sorted(run.cores):
+                c = run.cores[i]
+                w.writerow([run.num_cpus, i, f"{c.ipc:.6f}", f"{c.l2_mpki:.4f}", "", "", run.path])
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Per-core/aggregate IPC, L2 interference and DRAM bandwidth of a --num-cpus sweep")
+    add_outdir_args(ap, "gem5 output directories of the sweep")
+    ap.add_argument("--threshold", type=float, default=0.5,
+                    help="Saturation when an added core brings less than this fraction of a 1-core IPC (default: 0.5)")
+    ap.add_argument("--csv", default=None, help="Also write the table to this CSV")
+    args = ap.parse_args()
+
+    dirs = outdirs_from_args(args)
+    runs = [r for r in (read_run(d) for d in dirs) if r is not None and r.cores]
+    if not runs:
+        print("Error: no stats.txt with CPU stats found")
+        return 1
+    runs.sort(key=lambda r: (r.num_cpus, r.path))
+
+    print_report(runs, args.threshold)
+    if args.csv:
+        write_csv(args.csv, runs)
+        print(f"Wrote {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
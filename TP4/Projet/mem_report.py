@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+DRAM behaviour of gem5 runs made with --mem-type / --mem-channels.
+
+For every memory controller (system.mem_ctrl, system.mem_ctrls0..N-1 or
+board.memory.mem_ctrl*), from its controller and DRAM interface stats:
+  - achieved bandwidth = bytes read + written / simulated seconds
+  - bus utilisation    = dram.busUtil
+  - row-buffer hit rate = (read + write row hits) / (read + write bursts)
+  - average read latency = dram.avgMemAccLat (queueing + bus + device),
+                           else totMemAccLat / readBursts
+and the same figures aggregated over the channels. Memory type and
+controller policy come from the memory.json written by se_common/memory.py.
+
+Bandwidth and latencies are those of the ROI dump for --roi runs.
+
+Usage:
+  python3 TP4/Projet/mem_report.py m5out_dij_ddr3 m5out_dij_ddr4 m5out_dij_hbm
+  python3 TP4/Projet/mem_report.py --glob 'm5out_dij_*' --per-channel --csv mem.csv
+"""
+import argparse
+import csv
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from stats_index import add_outdir_args, outdirs_from_args, read_outdir_dump, to_float
+
+# "system.mem_ctrl.readReqs", "system.mem_ctrls1.dram.readRowHits", "board.memory.mem_ctrl0.dram.bytesRead::total"
+_CTRL_STAT = re.compile(r"^(\S*mem_ctrls?\d*)\.(dram\.)?([A-Za-z]+)(?:::total)?$")
+
+FIELDNAMES = ["run", "mem_type", "channels", "controller", "bw_GBps", "bus_util_pct",
+              "row_hit_pct", "avg_rd_lat_ns", "rd_bursts", "wr_bursts", "page_policy", "mem_sched"]
+
+
+@dataclass
+class CtrlStats:
+    name: str
+    ctrl: Dict[str, float] = field(default_factory=dict)
+    dram: Dict[str, float] = field(default_factory=dict)
+
+    def _get(self, name: str) -> Optional[float]:
+        if name in self.dram:
+            return self.dram[name]
+        return self.ctrl.get(name)
+
+    @property
+    def bytes(self) -> float:
+        for rd, wr in (("bytesReadSys", "bytesWrittenSys"), ("bytesRead", "bytesWritten"),
+                       ("bytesReadDRAM", "bytesWritten")):
+            if rd in self.ctrl:
+                return self.ctrl[rd] + self.ctrl.get(wr, 0.0)
+            if rd in self.dram:
+                return self.dram[rd] + self.dram.get(wr, 0.0)
+        return 0.0
+
+    @property
+    def rd_bursts(self) -> float:
+        return self._get("readBursts") or 0.0
+
+    @property
+    def wr_bursts(self) -> float:
+        return self._get("writeBursts") or 0.0
+
+    @property
+    def row_hits(self) -> float:
+        return (self._get("readRowHits") or 0.0) + (self._get("writeRowHits") or 0.0)
+
+    @property
+    def bus_util(self) -> Optional[float]:
+        return self._get("busUtil")
+
+    def avg_rd_lat_ticks(self) -> Optional[float]:
+        lat = self._get("avgMemAccLat")
+        if lat is not None:
+            return lat
+        total = self._get("totMemAccLat")
+        return total / self.rd_bursts if total is not None and self.rd_bursts else None
+
+
+@dataclass
+class MemRun:
+    path: str
+    config: Dict[str, object]
+    sim_seconds: float
+    ctrls: List[CtrlStats]
+
+
+def controllers(stats: Dict[str, str]) -> List[CtrlStats]:
+    """Controller/DRAM counters of one dump, one entry per memory controller."""
+    ctrls: Dict[str, CtrlStats] = {}
+    for name, raw in stats.items():
+        m = _CTRL_STAT.match(name)
+        if not m:
+            continue
+        value = to_float(raw)
+        if value is None:
+            continue
+        c = ctrls.setdefault(m.group(1), CtrlStats(m.group(1)))
+        (c.dram if m.group(2) else c.ctrl)[m.group(3)] = value
+    return [ctrls[k] for k in sorted(ctrls)]
+
+
+def dram_bandwidth(stats: Dict[str, str], sim_seconds: float) -> Optional[float]:
+    """Achieved DRAM bandwidth (bytes/s) summed over all controllers."""
+    ctrls = controllers(stats)
+    if not ctrls or not sim_seconds:
+        return None
+    return sum(c.bytes for c in ctrls) / sim_seconds
+
+
+def read_run(outdir: str) -> Optional[MemRun]:
+    config: Dict[str, object] = {}
+    cfg_path = os.path.join(outdir, "memory.json")
+    if os.path.isfile(cfg_path):
+        with open(cfg_path) as f:
+            config = json.load(f)
+
+    stats = read_outdir_dump(outdir)
+    if stats is None:
+        return None
+    sim_seconds = to_float(stats.get("simSeconds", stats.get("sim_seconds", "0"))) or 0.0
+    return MemRun(path=outdir, config=config, sim_seconds=sim_seconds, ctrls=controllers(stats))
+
+
+def _row(run: MemRun, name: str, ctrls: List[CtrlStats], ticks_per_ns: float) -> Dict[str, str]:
+    rd = sum(c.rd_bursts for c in ctrls)
+    wr = sum(c.wr_bursts for c in ctrls)
+    hits = sum(c.row_hits for c in ctrls)
+    utils = [c.bus_util for c in ctrls if c.bus_util is not None]
+    # Read latency weighted by the read bursts of each channel
+    lat_num = sum((c.avg_rd_lat_ticks() or 0.0) * c.rd_bursts for c in ctrls)
+    bw = sum(c.bytes for c in ctrls) / run.sim_seconds if run.sim_seconds else 0.0
+    return {
+        "run": run.path,
+        "mem_type": str(run.config.get("mem_type", "?")),
+        "channels": str(run.config.get("channels", len(run.ctrls))),
+        "controller": name,
+        "bw_GBps": f"{bw / 1e9:.3f}",
+        "bus_util_pct": f"{sum(utils) / len(utils):.2f}" if utils else "n/a",
+        "row_hit_pct": f"{100.0 * hits / (rd + wr):.2f}" if rd + wr else "n/a",
+        "avg_rd_lat_ns": f"{lat_num / rd / ticks_per_ns:.2f}" if rd else "n/a",
+        "rd_bursts": f"{rd:.0f}",
+        "wr_bursts": f"{wr:.0f}",
+        "page_policy": str(run.config.get("page_policy", "?")),
+        "mem_sched": str(run.config.get("mem_sched", "?")),
+    }
+
+
+def build_rows(runs: List[MemRun], per_channel: bool, ticks_per_second: float) -> List[Dict[str, str]]:
+    ticks_per_ns = ticks_per_second / 1e9
+    rows: List[Dict[str, str]] = []
+    for run in runs:
+        if per_channel and len(run.ctrls) > 1:
+            for c in run.ctrls:
+                rows.append(_row(run, c.name, [c], ticks_per_ns))
+        rows.append(_row(run, "all", run.ctrls, ticks_per_ns))
+    return rows
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="DRAM bandwidth, row-buffer hit rate and read latency of gem5 runs")
+    add_outdir_args(ap)
+    ap.add_argument("--per-channel", action="store_true", help="One line per memory controller as well")
+    ap.add_argument("--ticks-per-second", type=float, default=1e12, help="gem5 tick rate (default: 1e12)")
+    ap.add_argument("--csv", default=None, help="Also write the table to this CSV")
+    args = ap.parse_args()
+
+    dirs = outdirs_from_args(args)
+    runs = [r for r in (read_run(d) for d in dirs) if r is not None and r.ctrls]
+    if not runs:
+        print("Error: no stats.txt with memory controller stats found")
+        return 1
+
+    rows = build_rows(runs, args.per_channel, args.ticks_per_second)
+    print(f"{'mem type':<22} {'ch':>3} {'ctrl':<20} {'GB/s':>8} {'util %':>7} {'row hit %':>9} {'rd lat ns':>9}  run")
+    for r in rows:
+        print(f"{r['mem_type']:<22} {r['channels']:>3} {r['controller']:<20} {r['bw_GBps']:>8} {r['bus_util_pct']:>7} "
+              f"{r['row_hit_pct']:>9} {r['avg_rd_lat_ns']:>9}  {r['run']}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            w.writeheader()
+            w.writerows(rows)
+        print(f"Wrote {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
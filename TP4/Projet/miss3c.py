@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Compulsory / capacity / conflict breakdown of the cache misses of a gem5 run.
+
+The run must be made with the Cache debug flag, e.g.:
+  gem5.opt --debug-flags=Cache --debug-file=cache.trace.gz -d m5out_x se_cache.py ... --l1d-replacement plru
+
+Every demand access of each traced cache is replayed through:
+  - an infinite cache    -> first touch of a line = compulsory miss
+  - a fully associative LRU cache of the same capacity (shadow model)
+A real miss (as reported by gem5, with the configured replacement policy)
+is compulsory if the line was never touched, capacity if the shadow model
+misses too, conflict otherwise. Misses on a line whose fill is still
+outstanding (merged into the pending MSHR) are counted apart as
+"mshr_merged" and stay out of the 3C split; a line is outstanding from
+its first miss until the trace shows its fill (or a hit on it). Real hits
+that the shadow model misses are counted as "policy gain" (the policy did
+better than fully associative LRU). Geometry and replacement policy are
+read from config.ini.
+
+Many conflict misses point at associativity/placement; many capacity
+misses at the cache size; comparing runs that only differ by
+--*-replacement isolates the policy.
+
+Usage:
+  python3 TP4/Projet/miss3c.py m5out_x
+  python3 TP4/Projet/miss3c.py m5out_lru m5out_plru m5out_brrip --cache system.cpu.dcache --csv 3c.csv
+"""
+import argparse
+import configparser
+import csv
+import gzip
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, IO, List, Optional
+
+# "  1234: system.cpu.dcache: access for ReadReq [80bc0:80bc7] hit state: ..."
+_ACCESS = re.compile(r"^\s*\d+: (\S+): access for (\S+) \[([0-9a-fA-F]+):[0-9a-fA-F]+\].*?\b(hit|miss)\b")
+
+# Fill of a line: "system.cpu.dcache: Block addr 0x80bc0 (ns) moving from ..." or the response
+_FILL = re.compile(r"^\s*\d+: (\S+): (?:Block addr (?:0x)?([0-9a-fA-F]+)\b.*\bmoving from"
+                   r"|.*Handling response \S+ \[([0-9a-fA-F]+):)")
+
+# Commands that are not demand accesses (evictions, writebacks, prefetches)
+_NON_DEMAND = ("Writeback", "CleanEvict", "WriteClean", "HardPF", "SoftPF", "Flush", "Invalidate")
+
+FIELDNAMES = ["run", "cache", "replacement", "size", "assoc", "accesses", "misses", "miss_rate",
+              "mshr_merged", "compulsory", "capacity", "conflict", "policy_gain", "limited_by"]
+
+
+class FullyAssocLRU:
+    def __init__(self, num_lines: int):
+        self.num_lines = max(1, num_lines)
+        self.lines: "OrderedDict[int, None]" = OrderedDict()
+
+    def access(self, line: int) -> bool:
+        if line in self.lines:
+            self.lines.move_to_end(line)
+            return True
+        self.lines[line] = None
+        if len(self.lines) > self.num_lines:
+            self.lines.popitem(last=False)
+        return False
+
+
+@dataclass
+class CacheModel:
+    name: str
+    size: int
+    assoc: int
+    line_size: int
+    replacement: str
+    shadow: FullyAssocLRU = field(init=False)
+    seen: set = field(default_factory=set)
+    # Lines missed and not filled yet
+    pending: set = field(default_factory=set)
+    accesses: int = 0
+    misses: int = 0
+    mshr_merged: int = 0
+    compulsory: int = 0
+    capacity: int = 0
+    conflict: int = 0
+    policy_gain: int = 0
+
+    def __post_init__(self) -> None:
+        self.shadow = FullyAssocLRU(self.size // self.line_size)
+        self.shift = self.line_size.bit_length() - 1
+
+    def access(self, addr: int, hit: bool) -> None:
+        line = addr >> self.shift
+        self.accesses += 1
+        first = line not in self.seen
+        if first:
+            self.seen.add(line)
+        fa_hit = self.shadow.access(line)
+        if hit:
+            self.pending.discard(line)
+            if not fa_hit and not first:
+                self.policy_gain += 1
+            return
+        self.misses += 1
+        if line in self.pending:
+            self.mshr_merged += 1
+            return
+        self.pending.add(line)
+        if first:
+            self.compulsory += 1
+        elif fa_hit:
+            self.conflict += 1
+        else:
+            self.capacity += 1
+
+    def fill(self, addr: int) -> None:
+        self.pending.discard(addr >> self.shift)
+
+    @property
+    def limited_by(self) -> str:
+        if self.conflict == 0 and self.capacity == 0:
+            return "compulsory"
+        return "conflict (assoc/policy)" if self.conflict > self.capacity else "capacity (size)"
+
+
+def _open(path: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", errors="replace")
+    return open(path, errors="replace")
+
+
+def find_trace(outdir: str) -> Optional[str]:
+    for name in ("cache.trace.gz", "cache.trace", "trace.out.gz", "trace.out"):
+        path = os.path.join(outdir, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def read_geometry(outdir: str) -> Dict[str, CacheModel]:
+    cfg = configparser.ConfigParser(interpolation=None, strict=False)
+    cfg.read(os.path.join(outdir, "config.ini"))
+    line_size = cfg.getint("system", "cache_line_size", fallback=64)
+    caches: Dict[str, CacheModel] = {}
+    for section in cfg.sections():
+        sec = cfg[section]
+        if "size" not in sec or "assoc" not in sec or "tag_latency" not in sec:
+            continue
+        repl = sec.get("replacement_policy", "")
+        repl_type = cfg.get(repl, "type", fallback=repl or "?") if repl else "?"
+        caches[section] = CacheModel(
+            name=section,
+            size=int(sec["size"]),
+            assoc=int(sec["assoc"]),
+            line_size=line_size,
+            replacement=repl_type,
+        )
+    return caches
+
+
+def classify(outdir: str, trace: Optional[str], only: List[str]) -> List[CacheModel]:
+    caches = read_geometry(outdir)
+    if not caches:
+        raise SystemExit(f"Error: no cache found in {outdir}/config.ini")
+    trace = trace or find_trace(outdir)
+    if trace is None:
+        raise SystemExit(f"Error: no Cache debug trace in {outdir} (run gem5 with --debug-flags=Cache --debug-file=cache.trace.gz)")
+
+    with _open(trace) as f:
+        for line in f:
+            m = _ACCESS.match(line)
+            if not m:
+                m = _FILL.match(line)
+                if m and m.group(1) in caches:
+                    caches[m.group(1)].fill(int(m.group(2) or m.group(3), 16))
+                continue
+            model = caches.get(m.group(1))
+            if model is None or (only and m.group(1) not in only):
+                continue
+            if m.group(2).startswith(_NON_DEMAND):
+                continue
+            model.access(int(m.group(3), 16), m.group(4) == "hit")
+    return [c for c in caches.values() if c.accesses]
+
+
+def build_rows(run: str, models: List[CacheModel]) -> List[Dict[str, str]]:
+    rows = []
+    for c in sorted(models, key=lambda c: c.name):
+        rows.append({
+            "run": run,
+            "cache": c.name,
+            "replacement": c.replacement,
+            "size": str(c.size),
+            "assoc": str(c.assoc),
+            "accesses": str(c.accesses),
+            "misses": str(c.misses),
+            "miss_rate": f"{c.misses / c.accesses:.6f}" if c.accesses else "",
+            "mshr_merged": str(c.mshr_merged),
+            "compulsory": str(c.compulsory),
+            "capacity": str(c.capacity),
+            "conflict": str(c.conflict),
+            "policy_gain": str(c.policy_gain),
+            "limited_by": c.limited_by,
+        })
+    return rows
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="3C miss breakdown (fully associative shadow model) from a gem5 Cache trace")
+    ap.add_argument("outdirs", nargs="+", help="gem5 output directories (config.ini + Cache debug trace)")
+    ap.add_argument("--trace", default=None, help="Trace file (default: cache.trace[.gz] in each outdir)")
+    ap.add_argument("--cache", action="append", default=[], help="Only this cache, e.g. system.cpu.dcache (repeatable)")
+    ap.add_argument("--csv", default=None, help="Also write the table to this CSV")
+    args = ap.parse_args()
+
+    rows: List[Dict[str, str]] = []
+    for outdir in args.outdirs:
+        rows += build_rows(outdir, classify(outdir, args.trace, args.cache))
+
+    print(f"{'cache':<22} {'policy':<12} {'miss rate':>9} {'merged':>9} {'compul.':>9} {'capacity':>9} {'conflict':>9} "
+          f"{'gain':>7}  limited by / run")
+    for r in rows:
+        print(f"{r['cache']:<22} {r['replacement']:<12} {r['miss_rate']:>9} {r['mshr_merged']:>9} {r['compulsory']:>9} "
+              f"{r['capacity']:>9} {r['conflict']:>9} {r['policy_gain']:>7}  {r['limited_by']} / {r['run']}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            w.writeheader()
+            w.writerows(rows)
+        print(f"Wrote {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
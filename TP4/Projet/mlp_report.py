@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Memory-level parallelism report: MSHR occupancy of every cache and, with
+--sweep, the smallest MSHR configuration that keeps a given fraction of the
+best IPC of each workload.
+
+Each gem5 output directory must hold the mshr.json written by
+se_common/mshr.py. With --mlp-profile runs (MshrProfiler, TP4/mlp_gem5),
+per cache:
+  busy_%      time with at least one MSHR in use
+  avg_occ     mean number of MSHRs in use over the whole run
+  mlp         mean number of MSHRs in use while at least one is (the
+              achieved memory-level parallelism)
+  full_%      time with every MSHR in use
+  sec_%       share of the misses merged into a pending MSHR
+  tgts        mean targets served per MSHR
+Without the profiler only the blocking stats are available: cycles the
+cache refused requests for lack of an MSHR, of a target slot or of a write
+buffer (blockedCycles), as a share of the CPU cycles. --hist also prints
+the occupancy distribution.
+
+--sweep groups the runs by profile and workload (binary name from
+config.ini), takes the best IPC of the group as peak and reports the run
+with the fewest MSHRs (summed over the levels, then fewest targets) whose
+IPC reaches --fraction of it, e.g. the "MSHR" study of experiments.toml.
+
+Occupancies of --roi runs are read from their ROI dump.
+
+Usage:
+  python3 TP4/Projet/mlp_report.py m5out_a15_dij --hist
+  python3 TP4/Projet/mlp_report.py --glob 'TP4/Projet/runs/MSHR/m5out_mshr_*' --sweep --fraction 0.95
+  python3 TP4/Projet/mlp_report.py --glob 'm5out_mshr_*' --csv mlp.csv --sweep-csv mshr_sweep.csv
+"""
+import argparse
+import csv
+import json
+import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from stats_index import add_outdir_args, outdirs_from_args, read_outdir_dump, to_float, workload_name
+
+_OCCUPANCY = re.compile(r"^(.+)\.mlp\.occupancy::(\d+)$")
+_TARGETS = re.compile(r"^(.+)\.mlp\.targets::(\d+)$")
+_BLOCKED = re.compile(r"^(.+)\.blockedCycles::(\w+)$")
+_CPU_STAT = re.compile(r"^system\.cpu\d*\.(committedInsts|numCycles)$")
+
+# Cause index of the write buffer in BaseCache::BlockedCause (no subname in gem5)
+_BLOCKED_CAUSES = {"no_mshrs": "mshrs", "no_targets": "targets", "1": "wbuffers", "no_wbuffers": "wbuffers"}
+
+FIELDNAMES = ["profile", "workload", "cache", "mshrs", "tgts_per_mshr", "write_buffers", "ipc", "busy_%",
+              "avg_occ", "mlp", "full_%", "sec_%", "tgts", "blk_mshr_%", "blk_tgt_%", "blk_wb_%", "run"]
+SWEEP_FIELDNAMES = ["profile", "workload", "peak_ipc", "peak_config", "fraction", "best_ipc", "best_config",
+                    "best_mshrs", "runs", "best_run"]
+
+
+@dataclass
+class CacheMLP:
+    name: str
+    level: str
+    # ticks spent with N MSHRs in use, N = 0..mshrs (empty without profiler)
+    occupancy: List[float] = field(default_factory=list)
+    targets: List[float] = field(default_factory=list)
+    primary: float = 0.0
+    secondary: float = 0.0
+    # cause (mshrs / targets / wbuffers) -> blocked cycles
+    blocked: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def profiled(self) -> bool:
+        return sum(self.occupancy) > 0
+
+    @property
+    def busy(self) -> float:
+        total = sum(self.occupancy)
+        return (total - self.occupancy[0]) / total if total else 0.0
+
+    @property
+    def avg_occupancy(self) -> float:
+        total = sum(self.occupancy)
+        return sum(k * t for k, t in enumerate(self.occupancy)) / total if total else 0.0
+
+    @property
+    def mlp(self) -> float:
+        busy = sum(self.occupancy[1:])
+        return sum(k * t for k, t in enumerate(self.occupancy)) / busy if busy else 0.0
+
+    @property
+    def full(self) -> float:
+        total = sum(self.occupancy)
+        return self.occupancy[-1] / total if total and len(self.occupancy) > 1 else 0.0
+
+    @property
+    def secondary_share(self) -> float:
+        n = self.primary + self.secondary
+        return self.secondary / n if n else 0.0
+
+    @property
+    def mean_targets(self) -> float:
+        n = sum(self.targets)
+        return sum(k * t for k, t in enumerate(self.targets)) / n if n else 0.0
+
+
+@dataclass
+class MLPRun:
+    path: str
+    profile: str
+    workload: str
+    # level -> {mshrs, tgts_per_mshr, write_buffers}, from mshr.json
+    levels: Dict[str, Dict[str, int]]
+    ipc: float
+    cycles: float
+    caches: List[CacheMLP] = field(default_factory=list)
+
+    @property
+    def total_mshrs(self) -> int:
+        return sum(v.get("mshrs", 0) for v in self.levels.values())
+
+    @property
+    def total_targets(self) -> int:
+        return sum(v.get("mshrs", 0) * v.get("tgts_per_mshr", 0) for v in self.levels.values())
+
+    def config(self) -> str:
+        return " ".join(f"{lvl}={v.get('mshrs', 0)}x{v.get('tgts_per_mshr', 0)}" for lvl, v in self.levels.items())
+
+
+def _profile(outdir: str) -> str:
+    label = os.path.join(outdir, "clocks.json")
+    if os.path.isfile(label):
+        with open(label) as f:
+            return json.load(f).get("profile") or "?"
+    return "?"
+
+
+def cache_level(name: str) -> str:
+    """system.cpu.dcache -> l1d, system.l2cache / system.cpu0.l2cache -> l2."""
+    last = name.rsplit(".", 1)[-1]
+    if last == "icache":
+        return "l1i"
+    if last == "dcache":
+        return "l1d"
+    return last[:-len("cache")] if last.endswith("cache") else last
+
+
+def _put(values: List[float], index: int, value: float) -> None:
+    if len(values) <= index:
+        values.extend([0.0] * (index + 1 - len(values)))
+    values[index] = value
+
+
+def read_run(outdir: str) -> Optional[MLPRun]:
+    label = os.path.join(outdir, "mshr.json")
+    if not os.path.isfile(label):
+        return None
+    with open(label) as f:
+        info = json.load(f)
+
+    stats = read_outdir_dump(outdir)
+    if stats is None:
+        return None
+
+    caches: Dict[str, CacheMLP] = {}
+    insts: Dict[str, float] = {}
+    cycles: Dict[str, float] = {}
+
+    def cache(name: str) -> CacheMLP:
+        return caches.setdefault(name, CacheMLP(name=name, level=cache_level(name)))
+
+    for name, raw in stats.items():
+        value = to_float(raw)
+        if value is None:
+            continue
+        m = _OCCUPANCY.match(name)
+        if m:
+            _put(cache(m.group(1)).occupancy, int(m.group(2)), value)
+            continue
+        m = _TARGETS.match(name)
+        if m:
+            _put(cache(m.group(1)).targets, int(m.group(2)), value)
+            continue
+        if name.endswith(".mlp.primaryMisses"):
+            cache(name[:-len(".mlp.primaryMisses")]).primary = value
+            continue
+        if name.endswith(".mlp.secondaryMisses"):
+            cache(name[:-len(".mlp.secondaryMisses")]).secondary = value
+            continue
+        m = _BLOCKED.match(name)
+        if m and m.group(2) in _BLOCKED_CAUSES:
+            cache(m.group(1)).blocked[_BLOCKED_CAUSES[m.group(2)]] = value
+            continue
+        m = _CPU_STAT.match(name)
+        if m:
+            cpu = name.rsplit(".", 1)[0]
+            (insts if m.group(1) == "committedInsts" else cycles)[cpu] = value
+
+    return MLPRun(
+        path=outdir,
+        profile=_profile(outdir),
+        workload=workload_name(outdir),
+        levels={lvl: {k: int(v) for k, v in knobs.items()} for lvl, knobs in info.get("levels", {}).items()},
+        ipc=sum(insts[c] / cycles[c] for c in insts if cycles.get(c)),
+        cycles=max(cycles.values(), default=0.0),
+        caches=[caches[n] for n in sorted(caches)],
+    )
+
+
+def _pct(value: float) -> str:
+    return f"{100 * value:.2f}"
+
+
+def build_rows(runs: List[MLPRun]) -> List[Dict[str, str]]:
+    rows: List[Dict[str, str]] = []
+    for r in sorted(runs, key=lambda r: (r.profile, r.workload, r.total_mshrs, r.path)):
+        for c in r.caches:
+            knobs = r.levels.get(c.level, {})
+            blocked = {k: c.blocked.get(k, 0.0) / r.cycles if r.cycles else 0.0
+                       for k in ("mshrs", "targets", "wbuffers")}
+            prof = c.profiled
+            rows.append({
+                "profile": r.profile,
+                "workload": r.workload,
+                "cache": c.name,
+                "mshrs": str(knobs.get("mshrs", "")),
+                "tgts_per_mshr": str(knobs.get("tgts_per_mshr", "")),
+                "write_buffers": str(knobs.get("write_buffers", "")),
+                "ipc": f"{r.ipc:.4f}",
+                "busy_%": _pct(c.busy) if prof else "",
+                "avg_occ": f"{c.avg_occupancy:.3f}" if prof else "",
+                "mlp": f"{c.mlp:.3f}" if prof else "",
+                "full_%": _pct(c.full) if prof else "",
+                "sec_%": _pct(c.secondary_share) if prof else "",
+                "tgts": f"{c.mean_targets:.2f}" if prof else "",
+                "blk_mshr_%": _pct(blocked["mshrs"]),
+                "blk_tgt_%": _pct(blocked["targets"]),
+                "blk_wb_%": _pct(blocked["wbuffers"]),
+                "run": r.path,
+            })
+    return rows
+
+
+def smallest_config(runs: List[MLPRun], fraction: float) -> Tuple[MLPRun, MLPRun]:
+    """(peak run, smallest run reaching fraction * peak IPC) of one workload."""
+    peak = max(runs, key=lambda r: r.ipc)
+    ok = [r for r in runs if r.ipc >= fraction * peak.ipc]
+    best = min(ok, key=lambda r: (r.total_mshrs, r.total_targets, -r.ipc))
+    return peak, best
+
+
+def build_sweep(runs: List[MLPRun], fraction: float) -> List[Dict[str, str]]:
+    groups: Dict[Tuple[str, str], List[MLPRun]] = defaultdict(list)
+    for r in runs:
+        groups[(r.profile, r.workload)].append(r)
+
+    rows: List[Dict[str, str]] = []
+    for (profile, workload) in sorted(groups):
+        group = groups[(profile, workload)]
+        peak, best = smallest_config(group, fraction)
+        rows.append({
+            "profile": profile,
+            "workload": workload,
+            "peak_ipc": f"{peak.ipc:.4f}",
+            "peak_config": peak.config(),
+            "fraction": f"{fraction:.3f}",
+            "best_ipc": f"{best.ipc:.4f}",
+            "best_config": best.config(),
+            "best_mshrs": str(best.total_mshrs),
+            "runs": str(len(group)),
+            "best_run": best.path,
+        })
+    return rows
+
+
+def _write(path: str, fieldnames: List[str], rows: List[Dict[str, str]]) -> None:
+    with open(path, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=fieldnames)
+        w.writeheader()
+        w.writerows(rows)
+    print(f"Wrote {path}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="MSHR occupancy / MLP per cache and MSHR sizing sweep")
+    add_outdir_args(ap, "gem5 output directories (mshr.json + stats.txt)")
+    ap.add_argument("--hist", action="store_true", help="Also print the MSHR occupancy distribution")
+    ap.add_argument("--sweep", action="store_true",
+                    help="Smallest MSHR configuration reaching --fraction of the peak IPC, per workload")
+    ap.add_argument("--fraction", type=float, default=0.95, help="Fraction of the peak IPC (default: 0.95)")
+    ap.add_argument("--csv", default=None, help="Also write the per-cache table to this CSV")
+    ap.add_argument("--sweep-csv", default=None, help="Also write the --sweep table to this CSV")
+    args = ap.parse_args()
+
+    if not 0 < args.fraction <= 1:
+        print("Error: --fraction must be in (0, 1]")
+        return 1
+
+    dirs = outdirs_from_args(args)
+    runs = [r for r in (read_run(d) for d in dirs) if r is not None]
+    if not runs:
+        print("Error: no directory with mshr.json and stats.txt")
+        return 1
+
+    rows = build_rows(runs)
+    print(f"{'profile':<7} {'workload':<16} {'cache':<22} {'mshr':>4} {'IPC':>7} {'busy%':>6} {'MLP':>6} "
+          f"{'full%':>6} {'sec%':>6} {'tgts':>5} {'blkM%':>6} {'blkT%':>6} {'blkW%':>6}")
+    for r in rows:
+        print(f"{r['profile']:<7} {r['workload'][:16]:<16} {r['cache'][:22]:<22} {r['mshrs']:>4} {r['ipc']:>7} "
+              f"{r['busy_%']:>6} {r['mlp']:>6} {r['full_%']:>6} {r['sec_%']:>6} {r['tgts']:>5} "
+              f"{r['blk_mshr_%']:>6} {r['blk_tgt_%']:>6} {r['blk_wb_%']:>6}")
+
+    if args.hist:
+        for run in runs:
+            for c in run.caches:
+                total = sum(c.occupancy)
+                if not total:
+                    continue
+                print(f"\n{run.path} {c.name}: % of time with N MSHRs in use")
+                for k, t in enumerate(c.occupancy):
+                    share = t / total
+                    print(f"  {k:>3} {100 * share:6.2f} {'#' * round(50 * share)}")
+
+    if args.csv:
+        _write(args.csv, FIELDNAMES, rows)
+
+    if args.sweep:
+        sweep = build_sweep(runs, args.fraction)
+        print(f"\nSmallest MSHR configuration reaching {100 * args.fraction:.0f}% of the peak IPC")
+        print(f"{'profile':<7} {'workload':<16} {'peak IPC':>8} {'IPC':>7} {'MSHRs':>5}  configuration")
+        for r in sweep:
+            print(f"{r['profile']:<7} {r['workload'][:16]:<16} {r['peak_ipc']:>8} {r['best_ipc']:>7} "
+                  f"{r['best_mshrs']:>5}  {r['best_config']}")
+        if args.sweep_csv:
+            _write(args.sweep_csv, SWEEP_FIELDNAMES, sweep)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Live monitor for gem5 sweeps: progress, host speed, ETA, failures.
+
+Two modes:
+  run   : launch the jobs (expspec.py --json output, or a commands file
+          such as q45_m5out/q45_commands.sh) with N in parallel, parse each
+          child's stdout (kept in <outdir>/gem5.log) and its stats.txt.
+  watch : follow output dirs filled by another runner (run_q45.sh), from
+          their stats.txt only.
+
+Progress comes from the periodic stats dumps (--stats-period on the
+A7/A15 configs): simInsts against the expected instruction count of the
+workload, hostInstRate for the host speed. Expected counts are taken
+from a previous summary CSV (--expected-csv, simInsts per workload) or
+given with --expected NAME=COUNT, NAME matching the job label.
+
+The same data is shown as a terminal dashboard and served in
+OpenMetrics text format on http://127.0.0.1:<port>/metrics.
+
+Usage:
+  python3 TP4/Projet/monitor.py --jobs-json jobs.json --gem5 ... --parallel 4 --port 9464
+  STATS_PERIOD=10ms ./TP4/Projet/run_q45.sh a7 &
+  python3 TP4/Projet/monitor.py --watch "TP4/Projet/q45_m5out/m5out_*"
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from stats_index import StatsIndex
+
+DEFAULT_EXPECTED_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "q45_m5out", "q45_summary.csv")
+
+STATES = ("queued", "starting", "running", "stalled", "done", "failed")
+
+EXIT_RE = re.compile(r"Exiting @ tick (\d+) because (.*)")
+ERROR_RE = re.compile(r"^(fatal|panic)[:(]")
+
+
+@dataclass
+class Job:
+    label: str
+    outdir: str
+    cmd: Optional[List[str]] = None
+    expected_insts: Optional[float] = None
+    state: str = "queued"
+    sim_insts: float = 0.0
+    host_inst_rate: float = 0.0
+    host_seconds: float = 0.0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    last_progress: Optional[float] = None
+    exit_cause: str = ""
+    error: str = ""
+    returncode: Optional[int] = None
+    _dumps: int = 0
+
+    @property
+    def progress(self) -> Optional[float]:
+        if self.state == "done":
+            return 1.0
+        if not self.expected_insts:
+            return None
+        return min(1.0, self.sim_insts / self.expected_insts)
+
+    @property
+    def eta(self) -> Optional[float]:
+        if self.state == "done":
+            return 0.0
+        if not self.expected_insts or self.host_inst_rate <= 0:
+            return None
+        return max(0.0, self.expected_insts - self.sim_insts) / self.host_inst_rate
+
+
+class Monitor:
+    def __init__(self, jobs: List[Job], stall_after: float):
+        self.jobs = jobs
+        self.stall_after = stall_after
+        self.lock = threading.Lock()
+        self.t0 = time.time()
+        self._indexes: Dict[str, StatsIndex] = {}
+
+    # ------------------ Stats polling ------------------
+
+    def poll_stats(self, job: Job) -> None:
+        path = os.path.join(job.outdir, "stats.txt")
+        if not os.path.isfile(path):
+            return
+        idx = self._indexes.get(path)
+        if idx is None:
+            idx = self._indexes[path] = StatsIndex(path)
+        try:
+            n = idx.num_dumps()
+        except (OSError, ValueError, RuntimeError):
+            return
+        if n == 0 or n == job._dumps:
+            return
+        job._dumps = n
+        insts = idx.get_float(-1, "simInsts")
+        rate = idx.get_float(-1, "hostInstRate")
+        host_s = idx.get_float(-1, "hostSeconds")
+        if insts is not None and insts > job.sim_insts:
+            job.sim_insts = insts
+            job.last_progress = time.time()
+        if rate is not None:
+            job.host_inst_rate = rate
+        if host_s is not None:
+            job.host_seconds = host_s
+
+    def refresh(self) -> None:
+        now = time.time()
+        with self.lock:
+            for job in self.jobs:
+                if job.state in ("queued", "failed"):
+                    continue
+                self.poll_stats(job)
+                if job.state in ("running", "stalled"):
+                    ref = job.last_progress or job.started or now
+                    job.state = "stalled" if now - ref > self.stall_after else "running"
+
+    # ------------------ Aggregates ------------------
+
+    def counts(self) -> Dict[str, int]:
+        out = {s: 0 for s in STATES}
+        for job in self.jobs:
+            out[job.state] += 1
+        return out
+
+    def sweep_eta(self, parallel: int) -> Optional[float]:
+        rates = [j.host_inst_rate for j in self.jobs if j.host_inst_rate > 0]
+        if not rates:
+            return None
+        mean_rate = sum(rates) / len(rates)
+        remaining = 0.0
+        active = 0
+        for job in self.jobs:
+            if job.state in ("done", "failed"):
+                continue
+            if not job.expected_insts:
+                return None
+            remaining += max(0.0, job.expected_insts - job.sim_insts)
+            active += 1
+        if active == 0:
+            return 0.0
+        return remaining / (mean_rate * max(1, min(parallel, active)))
+
+    # ------------------ Output ------------------
+
+    def openmetrics(self, parallel: int) -> str:
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_: str) -> None:
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"# HELP {name} {help_}")
+
+        def esc(v: str) -> str:
+            return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        with self.lock:
+            jobs = list(self.jobs)
+            counts = self.counts()
+            eta = self.sweep_eta(parallel)
+
+        family("gem5_job_state", "stateset", "Current state of each gem5 job")
+        for j in jobs:
+            for s in STATES:
+                lines.append(f'gem5_job_state{{job="{esc(j.label)}",gem5_job_state="{s}"}} {int(j.state == s)}')
+
+        family("gem5_job_sim_insts", "gauge", "Simulated instructions at the last stats dump")
+        for j in jobs:
+            lines.append(f'gem5_job_sim_insts{{job="{esc(j.label)}"}} {j.sim_insts:.0f}')
+
+        family("gem5_job_expected_insts", "gauge", "Expected simulated instructions for the job")
+        for j in jobs:
+            if j.expected_insts:
+                lines.append(f'gem5_job_expected_insts{{job="{esc(j.label)}"}} {j.expected_insts:.0f}')
+
+        family("gem5_job_host_inst_rate", "gauge", "Host simulation speed (instructions per host second)")
+        for j in jobs:
+            lines.append(f'gem5_job_host_inst_rate{{job="{esc(j.label)}"}} {j.host_inst_rate:.1f}')
+
+        family("gem5_job_eta_seconds", "gauge", "Estimated remaining host time for the job")
+        for j in jobs:
+            if j.eta is not None:
+                lines.append(f'gem5_job_eta_seconds{{job="{esc(j.label)}"}} {j.eta:.1f}')
+
+        family("gem5_sweep_jobs", "gauge", "Number of jobs per state")
+        for s, n in counts.items():
+            lines.append(f'gem5_sweep_jobs{{state="{s}"}} {n}')
+
+        if eta is not None:
+            family("gem5_sweep_eta_seconds", "gauge", "Estimated remaining host time for the whole sweep")
+            lines.append(f"gem5_sweep_eta_seconds {eta:.1f}")
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def dashboard(self, parallel: int) -> str:
+        def fmt_t(s: Optional[float]) -> str:
+            if s is None:
+                return "?"
+            s = int(s)
+            return f"{s // 3600:d}:{s % 3600 // 60:02d}:{s % 60:02d}"
+
+        with self.lock:
+            jobs = list(self.jobs)
+            counts = self.counts()
+            eta = self.sweep_eta(parallel)
+
+        width = max([len(j.label) for j in jobs] + [3])
+        out = [
+            f"gem5 sweep - {len(jobs)} jobs | "
+            + " ".join(f"{s}={n}" for s, n in counts.items() if n)
+            + f" | elapsed {fmt_t(time.time() - self.t0)} | ETA {fmt_t(eta)}",
+            "",
+            f"{'job':{width}s}  {'state':8s} {'progress':>8s}  {'Minsts':>10s} {'kinst/s':>9s} {'ETA':>9s}  note",
+        ]
+        for j in jobs:
+            prog = "-" if j.progress is None else f"{100 * j.progress:7.1f}%"
+            note = j.error or j.exit_cause
+            out.append(
+                f"{j.label:{width}s}  {j.state:8s} {prog:>8s}  {j.sim_insts / 1e6:10.2f} "
+                f"{j.host_inst_rate / 1e3:9.1f} {fmt_t(j.eta):>9s}  {note}"
+            )
+        return "\n".join(out)
+
+
+# ------------------ Job sources ------------------
+
+def jobs_from_json(path: str, gem5: str) -> List[Job]:
+    import expspec
+
+    with open(path) as f:
+        data = json.load(f)
+    jobs = []
+    for j in data["jobs"]:
+        runs_dir = os.path.dirname(j["outdir"])
+        spec_job = expspec.Job(
+            id=j["id"], config=j["config"], script=j["script"], options=j["options"],
+            cmd=j["cmd"], args=j["args"], args_flag=j.get("args_flag", "--options"),
+        )
+        label = ",".join(l for _, l in j["labels"]) or j["id"]
+        jobs.append(Job(label=label, outdir=j["outdir"], cmd=spec_job.command(gem5, runs_dir)))
+    return jobs
+
+
+def jobs_from_cmds(path: str) -> List[Job]:
+    jobs = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#") or line.startswith("set "):
+                continue
+            argv = shlex.split(line)
+            if "-d" not in argv:
+                continue
+            outdir = argv[argv.index("-d") + 1]
+            jobs.append(Job(label=os.path.basename(outdir.rstrip("/")), outdir=outdir, cmd=argv))
+    return jobs
+
+
+def jobs_from_watch(pattern: str) -> List[Job]:
+    jobs = []
+    for d in sorted(glob.glob(pattern)):
+        if os.path.isdir(d):
+            jobs.append(Job(label=os.path.basename(d), outdir=d, state="running", started=os.path.getmtime(d)))
+    return jobs
+
+
+def load_expected(csv_path: Optional[str], pairs: List[str]) -> Dict[str, float]:
+    expected: Dict[str, float] = {}
+    if csv_path and os.path.isfile(csv_path):
+        with open(csv_path, newline="") as f:
+            for row in csv.DictReader(f):
+                try:
+                    expected[row["workload"].strip()] = float(row["simInsts"])
+                except (KeyError, ValueError):
+                    continue
+    for pair in pairs:
+        name, _, count = pair.partition("=")
+        expected[name] = float(count)
+    return expected
+
+
+def assign_expected(jobs: List[Job], expected: Dict[str, float]) -> None:
+    # longest name first so that "dijkstra_large" wins over "dijkstra"
+    names = sorted(expected, key=len, reverse=True)
+    for job in jobs:
+        for name in names:
+            if name in job.label:
+                job.expected_insts = expected[name]
+                break
+
+
+# ------------------ Execution ------------------
+
+def run_job(mon: Monitor, job: Job) -> None:
+    os.makedirs(job.outdir, exist_ok=True)
+    with mon.lock:
+        job.state = "starting"
+        job.started = time.time()
+    log_path = os.path.join(job.outdir, "gem5.log")
+    with open(log_path, "w") as log:
+        proc = subprocess.Popen(
+            job.cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace"
+        )
+        for line in proc.stdout:
+            log.write(line)
+            log.flush()
+            line = line.rstrip()
+            with mon.lock:
+                if "REAL SIMULATION" in line or "simulating" in line.lower():
+                    job.state = "running"
+                m = EXIT_RE.search(line)
+                if m:
+                    job.exit_cause = m.group(2)
+                if ERROR_RE.match(line):
+                    job.error = line[:120]
+        proc.wait()
+    with mon.lock:
+        job.returncode = proc.returncode
+        job.finished = time.time()
+        mon.poll_stats(job)
+        if proc.returncode != 0 or job.error:
+            job.state = "failed"
+            if not job.error:
+                job.error = f"exit code {proc.returncode}"
+        else:
+            job.state = "done"
+
+
+def serve(mon: Monitor, port: int, parallel: int) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = mon.openmetrics(parallel).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/openmetrics-text; version=1.0.0; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Monitor gem5 sweeps (progress, ETA, OpenMetrics)")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--jobs-json", help="Jobs written by expspec.py --json (run mode)")
+    src.add_argument("--cmds", help="Shell file with one gem5 command per line (run mode)")
+    src.add_argument("--watch", help="Glob of gem5 output dirs filled by another runner (watch mode)")
+    ap.add_argument("--gem5", default=os.environ.get("GEM5", "gem5.opt"), help="gem5 binary for --jobs-json")
+    ap.add_argument("--parallel", type=int, default=1, help="gem5 processes in parallel (run mode)")
+    ap.add_argument("--expected-csv", default=DEFAULT_EXPECTED_CSV,
+                    help="CSV with workload,simInsts from a previous sweep")
+    ap.add_argument("--expected", action="append", default=[], help="NAME=COUNT expected simInsts")
+    ap.add_argument("--port", type=int, default=0, help="Serve OpenMetrics on this port (0 = off)")
+    ap.add_argument("--interval", type=float, default=2.0, help="Refresh period (s)")
+    ap.add_argument("--stall", type=float, default=300.0,
+                    help="Flag a job as stalled after this many seconds without progress")
+    args = ap.parse_args()
+
+    if args.jobs_json:
+        jobs = jobs_from_json(args.jobs_json, args.gem5)
+    elif args.cmds:
+        jobs = jobs_from_cmds(args.cmds)
+    else:
+        jobs = jobs_from_watch(args.watch)
+    if not jobs:
+        raise SystemExit("No jobs to monitor")
+
+    assign_expected(jobs, load_expected(args.expected_csv, args.expected))
+    mon = Monitor(jobs, args.stall)
+    parallel = args.parallel if not args.watch else len(jobs)
+
+    if args.port:
+        serve(mon, args.port, parallel)
+        print(f"OpenMetrics on http://127.0.0.1:{args.port}/metrics")
+
+    workers: List[threading.Thread] = []
+    if not args.watch:
+        queue = list(jobs)
+        qlock = threading.Lock()
+
+        def worker():
+            while True:
+                with qlock:
+                    if not queue:
+                        return
+                    job = queue.pop(0)
+                run_job(mon, job)
+
+        for _ in range(max(1, args.parallel)):
+            t = threading.Thread(target=worker, daemon=True)
+            t.start()
+            workers.append(t)
+
+    tty = sys.stdout.isatty()
+    last = ""
+    try:
+        while True:
+            mon.refresh()
+            text = mon.dashboard(parallel)
+            if tty:
+                sys.stdout.write("\033[H\033[2J" + text + "\n")
+                sys.stdout.flush()
+            elif text.split("\n", 1)[1] != last:
+                print(text + "\n", flush=True)
+                last = text.split("\n", 1)[1]
+
+            if workers and not any(t.is_alive() for t in workers):
+                break
+            if args.watch and all(j.progress is not None and j.progress >= 1.0 for j in jobs):
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+    mon.refresh()
+    print(mon.dashboard(parallel))
+    return 1 if any(j.state == "failed" for j in jobs) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
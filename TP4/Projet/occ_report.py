@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+O3 structure sizing report: how full the ROB, IQ, LQ and SQ get, how often
+rename stalls because one of them is full, and the size beyond which a
+bigger structure stops buying IPC.
+
+Each gem5 output directory must hold the occupancy.json written by
+se_common/occupancy.py (--occupancy-profile, O3OccupancyProfiler of
+TP4/occ_gem5). Per CPU and structure:
+  mean, p90, p99  occupancy over the sampled cycles
+  full_%          cycles with every entry in use
+  stall_%         cycles rename stalled on that structure being full
+                  (rename.<X>FullEvents / numCycles): the most a bigger
+                  structure can recover
+  needed          predicted useful size: the smallest K with
+                  P(occupancy >= K) <= --eps. Beyond K, more entries are
+                  used in less than --eps of the cycles, so IPC stops
+                  improving.
+
+When the structure is full more often than --eps the distribution is cut
+at its size and K lies above it: the tail is then extrapolated from the
+geometric decay of P(occupancy >= k) over the top of the histogram
+("~K", capped at --max-scale times the size; "saturated" if the tail
+does not decay at all). Verdicts: "shrink" (K well below the size),
+"ok", "grow" (full-stalls above --eps).
+
+--roi runs are sized on their ROI dump only.
+
+Usage:
+  python3 TP4/Projet/occ_report.py m5out_a15_dij_occ
+  python3 TP4/Projet/occ_report.py --glob 'm5out_*_occ' --eps 0.005 --csv occ.csv
+  python3 TP4/Projet/occ_report.py m5out_a15_dij_occ --hist rob
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from stats_index import add_outdir_args, outdirs_from_args, read_outdir_dump, to_float, workload_name
+
+STRUCTURES = ["rob", "iq", "lq", "sq"]
+# Rename stall counter of each structure (relative to the CPU)
+_STALLS = {"rob": "rename.ROBFullEvents", "iq": "rename.IQFullEvents",
+           "lq": "rename.LQFullEvents", "sq": "rename.SQFullEvents"}
+
+_OCC = re.compile(r"^(system\.cpu\d*)\.occupancy\.(rob|iq|lq|sq)::(\d+)$")
+_CPU_STAT = re.compile(r"^(system\.cpu\d*)\.(committedInsts|numCycles|rename\.\w+FullEvents)$")
+
+# Points of the tail used for the extrapolation
+_TAIL_POINTS = 4
+
+FIELDNAMES = ["workload", "cpu", "ipc", "structure", "size", "mean", "p90", "p99", "full_%", "stall_%",
+              "needed", "verdict", "run"]
+
+
+@dataclass
+class Occupancy:
+    structure: str
+    size: int
+    # samples with k entries in use, k = 0..size
+    hist: List[float] = field(default_factory=list)
+    stall_cycles: float = 0.0
+
+    @property
+    def samples(self) -> float:
+        return sum(self.hist)
+
+    def tail(self, k: int) -> float:
+        """P(occupancy >= k)."""
+        n = self.samples
+        return sum(self.hist[k:]) / n if n and k < len(self.hist) else 0.0
+
+    @property
+    def mean(self) -> float:
+        n = self.samples
+        return sum(k * c for k, c in enumerate(self.hist)) / n if n else 0.0
+
+    def percentile(self, q: float) -> int:
+        n = self.samples
+        acc = 0.0
+        for k, c in enumerate(self.hist):
+            acc += c
+            if n and acc >= q * n:
+                return k
+        return len(self.hist) - 1
+
+    @property
+    def full(self) -> float:
+        return self.tail(self.size) if self.size else 0.0
+
+
+@dataclass
+class CPUOccupancy:
+    path: str
+    workload: str
+    cpu: str
+    ipc: float
+    cycles: float
+    structures: Dict[str, Occupancy] = field(default_factory=dict)
+
+
+def predict_size(occ: Occupancy, eps: float, max_scale: float) -> Tuple[Optional[float], bool]:
+    """(needed size, extrapolated); None when the tail does not decay."""
+    for k in range(len(occ.hist)):
+        if occ.tail(k) <= eps:
+            return float(k), False
+    # Censored at the size: fit log P(occ >= k) = a + b k on the top of the histogram
+    top = [(k, occ.tail(k)) for k in range(max(1, occ.size - _TAIL_POINTS + 1), occ.size + 1)]
+    top = [(k, t) for k, t in top if t > 0]
+    if len(top) < 2:
+        return None, True
+    mk = sum(k for k, _ in top) / len(top)
+    mt = sum(math.log(t) for _, t in top) / len(top)
+    var = sum((k - mk) ** 2 for k, _ in top)
+    slope = sum((k - mk) * (math.log(t) - mt) for k, t in top) / var
+    if slope >= 0:
+        return None, True
+    needed = occ.size + (math.log(eps) - math.log(occ.full)) / slope
+    return min(needed, max_scale * occ.size), True
+
+
+def read_run(outdir: str) -> List[CPUOccupancy]:
+    label = os.path.join(outdir, "occupancy.json")
+    if not os.path.isfile(label):
+        return []
+    with open(label) as f:
+        info = json.load(f)
+
+    stats = read_outdir_dump(outdir)
+    if stats is None:
+        return []
+
+    workload = workload_name(outdir)
+    cpus: Dict[str, CPUOccupancy] = {}
+    for cpu, sizes in info.get("cpus", {}).items():
+        cpus[cpu] = CPUOccupancy(path=outdir, workload=workload, cpu=cpu, ipc=0.0, cycles=0.0, structures={
+            s: Occupancy(structure=s, size=int(sizes[s]), hist=[0.0] * (int(sizes[s]) + 1)) for s in STRUCTURES})
+
+    insts: Dict[str, float] = {}
+    for name, raw in stats.items():
+        value = to_float(raw)
+        if value is None:
+            continue
+        m = _OCC.match(name)
+        if m and m.group(1) in cpus:
+            hist = cpus[m.group(1)].structures[m.group(2)].hist
+            k = int(m.group(3))
+            if k < len(hist):
+                hist[k] = value
+            continue
+        m = _CPU_STAT.match(name)
+        if m and m.group(1) in cpus:
+            c = cpus[m.group(1)]
+            if m.group(2) == "committedInsts":
+                insts[m.group(1)] = value
+            elif m.group(2) == "numCycles":
+                c.cycles = value
+            else:
+                for s, stat in _STALLS.items():
+                    if stat == m.group(2):
+                        c.structures[s].stall_cycles = value
+    for cpu, c in cpus.items():
+        c.ipc = insts.get(cpu, 0.0) / c.cycles if c.cycles else 0.0
+    return [c for c in cpus.values() if any(o.samples for o in c.structures.values())]
+
+
+def verdict(occ: Occupancy, needed: Optional[float], stall: float, eps: float) -> str:
+    if needed is None or needed > occ.size or stall > eps:
+        return "grow"
+    if needed <= occ.size / 2:
+        return "shrink"
+    return "ok"
+
+
+def build_rows(cpus: List[CPUOccupancy], eps: float, max_scale: float) -> List[Dict[str, str]]:
+    rows: List[Dict[str, str]] = []
+    for c in sorted(cpus, key=lambda c: (c.workload, c.path, c.cpu)):
+        for s in STRUCTURES:
+            occ = c.structures[s]
+            needed, extrapolated = predict_size(occ, eps, max_scale)
+            stall = occ.stall_cycles / c.cycles if c.cycles else 0.0
+            if needed is None:
+                text = "saturated"
+            else:
+                text = f"~{math.ceil(needed)}" if extrapolated else str(int(needed))
+            rows.append({
+                "workload": c.workload,
+                "cpu": c.cpu,
+                "ipc": f"{c.ipc:.4f}",
+                "structure": s,
+                "size": str(occ.size),
+                "mean": f"{occ.mean:.2f}",
+                "p90": str(occ.percentile(0.90)),
+                "p99": str(occ.percentile(0.99)),
+                "full_%": f"{100 * occ.full:.2f}",
+                "stall_%": f"{100 * stall:.2f}",
+                "needed": text,
+                "verdict": verdict(occ, needed, stall, eps),
+                "run": c.path,
+            })
+    return rows
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="ROB/IQ/LQ/SQ occupancy and predicted useful sizes of O3 runs")
+    add_outdir_args(ap, "gem5 output directories (occupancy.json + stats.txt)")
+    ap.add_argument("--eps", type=float, default=0.01,
+                    help="Share of the cycles below which extra entries are not worth it (default: 0.01)")
+    ap.add_argument("--max-scale", type=float, default=4.0,
+                    help="Cap of the extrapolated size, times the current size (default: 4)")
+    ap.add_argument("--hist", choices=STRUCTURES, action="append", default=[],
+                    help="Also print the occupancy distribution of this structure (repeatable)")
+    ap.add_argument("--csv", default=None, help="Also write the table to this CSV")
+    args = ap.parse_args()
+
+    if not 0 < args.eps < 1:
+        print("Error: --eps must be in (0, 1)")
+        return 1
+
+    dirs = outdirs_from_args(args)
+    cpus = [c for d in dirs for c in read_run(d)]
+    if not cpus:
+        print("Error: no directory with occupancy.json and occupancy stats")
+        return 1
+
+    rows = build_rows(cpus, args.eps, args.max_scale)
+    print(f"{'workload':<16} {'cpu':<11} {'IPC':>7} {'struct':<6} {'size':>5} {'mean':>7} {'p90':>5} {'p99':>5} "
+          f"{'full%':>6} {'stall%':>6} {'needed':>9}  verdict")
+    for r in rows:
+        print(f"{r['workload'][:16]:<16} {r['cpu']:<11} {r['ipc']:>7} {r['structure']:<6} {r['size']:>5} "
+              f"{r['mean']:>7} {r['p90']:>5} {r['p99']:>5} {r['full_%']:>6} {r['stall_%']:>6} {r['needed']:>9}  "
+              f"{r['verdict']}")
+
+    for s in args.hist:
+        for c in cpus:
+            occ = c.structures[s]
+            n = occ.samples
+            print(f"\n{c.path} {c.cpu} {s.upper()} ({occ.size} entries): % of cycles with K entries in use")
+            for k, count in enumerate(occ.hist):
+                share = count / n if n else 0.0
+                print(f"  {k:>4} {100 * share:6.2f} {'#' * round(50 * share)}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            w.writeheader()
+            w.writerows(rows)
+        print(f"Wrote {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Prefetch effectiveness of gem5 runs made with --l1i/--l1d/--l2-prefetcher.
+
+For every cache that has a prefetcher, from its prefetcher stats:
+  - accuracy   = useful / issued
+  - coverage   = useful / (useful + remaining demand MSHR misses)
+  - timeliness = share of useful prefetches that arrived before the demand
+                 (1 - late / useful; late = pfLate, else pfUsefulButMiss)
+and per run the IPC delta against the no-prefetch baseline: --baseline,
+or the single run whose prefetch.json is empty.
+
+--roi runs are compared on their ROI dump.
+
+Usage:
+  python3 TP4/Projet/pf_report.py m5out_bf_nopf m5out_bf_stride m5out_bf_bop
+  python3 TP4/Projet/pf_report.py --baseline m5out_bf_nopf --glob 'm5out_bf_*' --csv pf.csv
+"""
+import argparse
+import csv
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from stats_index import add_outdir_args, outdirs_from_args, read_outdir_dump, to_float
+
+_PF_STAT = re.compile(r"^(system\..+)\.prefetcher\.([A-Za-z]+)$")
+_CPU_STAT = re.compile(r"^system\.cpu\d*\.(committedInsts|numCycles)$")
+
+FIELDNAMES = ["run", "cache", "prefetcher", "issued", "useful", "accuracy", "coverage", "timeliness", "ipc", "ipc_delta_pct"]
+
+
+@dataclass
+class CachePF:
+    cache: str
+    counters: Dict[str, float] = field(default_factory=dict)
+
+    def _get(self, *names: str) -> Optional[float]:
+        for n in names:
+            if n in self.counters:
+                return self.counters[n]
+        return None
+
+    @property
+    def issued(self) -> float:
+        return self._get("pfIssued") or 0.0
+
+    @property
+    def useful(self) -> float:
+        return self._get("pfUseful") or 0.0
+
+    @property
+    def accuracy(self) -> Optional[float]:
+        return self.useful / self.issued if self.issued else None
+
+    @property
+    def coverage(self) -> Optional[float]:
+        misses = self._get("demandMshrMisses")
+        if misses is None:
+            return self._get("coverage")
+        total = self.useful + misses
+        return self.useful / total if total else None
+
+    @property
+    def timeliness(self) -> Optional[float]:
+        late = self._get("pfLate", "pfUsefulButMiss")
+        if late is None or not self.useful:
+            return None
+        return max(0.0, 1.0 - late / self.useful)
+
+
+@dataclass
+class PFRun:
+    path: str
+    config: Dict[str, Dict[str, object]]
+    ipc: float
+    caches: List[CachePF]
+
+
+def read_run(outdir: str) -> Optional[PFRun]:
+    config: Dict[str, Dict[str, object]] = {}
+    cfg_path = os.path.join(outdir, "prefetch.json")
+    if os.path.isfile(cfg_path):
+        with open(cfg_path) as f:
+            config = json.load(f)
+
+    stats = read_outdir_dump(outdir)
+    if stats is None:
+        return None
+
+    caches: Dict[str, CachePF] = {}
+    insts: Dict[str, float] = {}
+    cycles: Dict[str, float] = {}
+    for name, raw in stats.items():
+        value = to_float(raw)
+        if value is None:
+            continue
+        m = _PF_STAT.match(name)
+        if m:
+            caches.setdefault(m.group(1), CachePF(m.group(1))).counters[m.group(2)] = value
+            continue
+        m = _CPU_STAT.match(name)
+        if m:
+            cpu = name.rsplit(".", 1)[0]
+            (insts if m.group(1) == "committedInsts" else cycles)[cpu] = value
+
+    ipc = sum(insts[c] / cycles[c] for c in insts if cycles.get(c))
+    return PFRun(path=outdir, config=config, ipc=ipc, caches=[caches[k] for k in sorted(caches)])
+
+
+def _level_of(cache: str) -> str:
+    if cache.endswith("icache"):
+        return "l1i"
+    if cache.endswith("dcache"):
+        return "l1d"
+    return "l2"
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "n/a" if value is None else f"{value:.3f}"
+
+
+def build_rows(runs: List[PFRun], baseline: Optional[PFRun]) -> List[Dict[str, str]]:
+    rows: List[Dict[str, str]] = []
+    for run in runs:
+        delta = ""
+        if baseline is not None and baseline.ipc:
+            delta = f"{100.0 * (run.ipc - baseline.ipc) / baseline.ipc:+.2f}"
+        entries = run.caches or [None]
+        for c in entries:
+            pf = ""
+            if c is not None:
+                pf = str(run.config.get(_level_of(c.cache), {}).get("prefetcher", "?"))
+            rows.append({
+                "run": run.path,
+                "cache": c.cache if c else "-",
+                "prefetcher": pf or "none",
+                "issued": f"{c.issued:.0f}" if c else "0",
+                "useful": f"{c.useful:.0f}" if c else "0",
+                "accuracy": _fmt(c.accuracy) if c else "n/a",
+                "coverage": _fmt(c.coverage) if c else "n/a",
+                "timeliness": _fmt(c.timeliness) if c else "n/a",
+                "ipc": f"{run.ipc:.4f}",
+                "ipc_delta_pct": delta,
+            })
+    return rows
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Prefetcher accuracy/coverage/timeliness and IPC delta vs no-prefetch")
+    add_outdir_args(ap)
+    ap.add_argument("--baseline", default=None, help="No-prefetch run (default: the run without prefetcher)")
+    ap.add_argument("--csv", default=None, help="Also write the table to this CSV")
+    args = ap.parse_args()
+
+    dirs = outdirs_from_args(args)
+    if args.baseline and args.baseline not in dirs:
+        dirs.insert(0, args.baseline)
+    runs = [r for r in (read_run(d) for d in dirs) if r is not None]
+    if not runs:
+        print("Error: no stats.txt found")
+        return 1
+
+    baseline: Optional[PFRun] = None
+    if args.baseline:
+        baseline = next((r for r in runs if os.path.samefile(r.path, args.baseline)), None)
+    else:
+        plain = [r for r in runs if not r.config and not r.caches]
+        if len(plain) == 1:
+            baseline = plain[0]
+        elif len(plain) > 1:
+            print("Warning: several runs without prefetcher, pass --baseline for IPC deltas")
+    if baseline is not None:
+        print(f"Baseline: {baseline.path} (IPC {baseline.ipc:.4f})")
+
+    rows = build_rows(runs, baseline)
+    print(f"{'prefetcher':<18} {'cache':<24} {'acc':>6} {'cov':>6} {'timely':>6} {'IPC':>7} {'dIPC %':>7}  run")
+    for r in rows:
+        print(f"{r['prefetcher']:<18} {r['cache']:<24} {r['accuracy']:>6} {r['coverage']:>6} {r['timeliness']:>6} "
+              f"{r['ipc']:>7} {r['ipc_delta_pct']:>7}  {r['run']}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            w.writeheader()
+            w.writerows(rows)
+        print(f"Wrote {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Make-like pipeline for the TP4 project, from sweeps to plots.
+
+  run_q45.sh -> q45_summary.csv --+--> build_q9  -> q9_summary.csv  -> plot_q9
+                                  +--> build_q11 -> q11_summary.csv -> plot_q11
+                                  +--> plot_q45
+                                  +--> cpi_stack -> cpi_stack.csv   -> plot_cpi
+  run_q8.sh  -> q8_summary.csv  --+--> build_q9
+                                  +--> plot_q8
+
+Every stage has a key: a hash of its code files, its input files and the
+content hashes of its upstream outputs. A stage is rerun only when its key
+changed or one of its outputs is missing/modified, so an upstream rerun
+that produces identical files does not invalidate anything downstream.
+Independent stages run concurrently, except the plot stages, which run one
+at a time on the main thread (pyplot is global state). Stages chained in one
+invocation pass their data in memory instead of re-reading the CSV they
+just wrote.
+
+The gem5/CACTI sweeps are only run with --sweeps; otherwise their CSVs
+are treated as source files.
+
+Usage:
+  python3 TP4/Projet/pipeline.py                 # everything downstream of the CSVs
+  python3 TP4/Projet/pipeline.py plot_q9 --dry-run
+  python3 TP4/Projet/pipeline.py --sweeps --gem5 /path/to/gem5.opt
+"""
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(BASE, "..", ".."))
+
+STATE_NAME = ".pipeline_state.json"
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[Dict[str, Any]], Any]
+    outputs: List[str] = field(default_factory=list)
+    deps: List[str] = field(default_factory=list)
+    inputs: List[str] = field(default_factory=list)
+    code: List[str] = field(default_factory=list)
+    load: Optional[Callable[[], Any]] = None
+    produced: Optional[Callable[[Any], List[str]]] = None
+    manual: bool = False
+    # Run on the main thread, alone (pyplot and render.py's process pool
+    # are not safe to use from the worker threads)
+    serial: bool = False
+
+
+def file_hash(path: str) -> Optional[str]:
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+class Pipeline:
+    def __init__(self, state_path: str):
+        self.stages: Dict[str, Stage] = {}
+        self.state_path = state_path
+        self.state: Dict[str, Dict[str, Any]] = {}
+        self._values: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._state_lock = threading.Lock()
+
+    def add(self, stage: Stage) -> None:
+        for d in stage.deps:
+            if d not in self.stages:
+                raise ValueError(f"{stage.name}: unknown dependency '{d}' (add stages in topological order)")
+        self.stages[stage.name] = stage
+        self._locks[stage.name] = threading.Lock()
+
+    # ------------------ State ------------------
+
+    def _load_state(self) -> None:
+        try:
+            with open(self.state_path) as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            self.state = {}
+
+    def _save_state(self) -> None:
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.state_path)
+
+    # ------------------ Graph helpers ------------------
+
+    def closure(self, targets: List[str]) -> List[str]:
+        """Targets and all their ancestors, in topological (insertion) order."""
+        needed: Set[str] = set()
+        todo = list(targets)
+        while todo:
+            name = todo.pop()
+            if name not in self.stages:
+                raise SystemExit(f"Unknown stage: {name}")
+            if name in needed:
+                continue
+            needed.add(name)
+            todo.extend(self.stages[name].deps)
+        return [n for n in self.stages if n in needed]
+
+    def _output_hashes(self, name: str) -> Dict[str, Optional[str]]:
+        stage = self.stages[name]
+        recorded = self.state.get(name, {}).get("outputs", {})
+        paths = sorted(set(stage.outputs) | set(recorded))
+        return {p: file_hash(p) for p in paths}
+
+    def _key(self, name: str, dep_outputs: Dict[str, Dict[str, Optional[str]]]) -> str:
+        stage = self.stages[name]
+        payload = {
+            "name": name,
+            "code": {p: file_hash(p) for p in stage.code},
+            "inputs": {p: file_hash(p) for p in stage.inputs},
+            "deps": {d: dep_outputs[d] for d in stage.deps},
+        }
+        blob = json.dumps(payload, sort_keys=True).encode()
+        return hashlib.sha256(blob).hexdigest()
+
+    def _up_to_date(self, name: str, key: str) -> bool:
+        rec = self.state.get(name)
+        if not rec or rec.get("key") != key:
+            return False
+        for path, h in rec.get("outputs", {}).items():
+            if h is None or file_hash(path) != h:
+                return False
+        return all(os.path.exists(p) for p in self.stages[name].outputs)
+
+    def value(self, name: str) -> Any:
+        """In-memory value of a stage, loading its artifact if it was not run."""
+        with self._locks[name]:
+            if name not in self._values:
+                stage = self.stages[name]
+                if stage.load is None:
+                    raise RuntimeError(f"Stage {name} has no loader and was not run in this process")
+                missing = [p for p in stage.outputs if not os.path.exists(p)]
+                if missing:
+                    raise SystemExit(f"Stage {name}: missing outputs {missing} (run it first)")
+                self._values[name] = stage.load()
+            return self._values[name]
+
+    # ------------------ Execution ------------------
+
+    def _execute(self, name: str) -> float:
+        stage = self.stages[name]
+        t0 = time.time()
+        ctx = {d: self.value(d) for d in stage.deps}
+        result = stage.run(ctx)
+        with self._locks[name]:
+            self._values[name] = result
+        return time.time() - t0
+
+    def _record(self, name: str, key: str) -> Dict[str, Optional[str]]:
+        stage = self.stages[name]
+        paths = list(stage.outputs)
+        if stage.produced is not None and name in self._values:
+            paths += stage.produced(self._values[name])
+        outputs = {p: file_hash(p) for p in sorted(set(paths))}
+        with self._state_lock:
+            self.state[name] = {"key": key, "outputs": outputs}
+            self._save_state()
+        return outputs
+
+    def run(
+        self,
+        targets: List[str],
+        jobs: int = 4,
+        force: bool = False,
+        include_manual: bool = False,
+        dry_run: bool = False,
+    ) -> int:
+        self._load_state()
+        order = self.closure(targets)
+        done: Dict[str, Dict[str, Optional[str]]] = {}
+        changed: Set[str] = set()
+        running: Dict[Future, str] = {}
+        serial: List[str] = []
+        keys: Dict[str, str] = {}
+        pending = list(order)
+        failed = False
+
+        def finish(name: str, result: Callable[[], float]) -> None:
+            nonlocal failed
+            try:
+                elapsed = result()
+            except BaseException as e:
+                print(f"[FAIL] {name}: {e}", file=sys.stderr)
+                failed = True
+                pending.clear()
+                serial.clear()
+                return
+            done[name] = self._record(name, keys[name])
+            changed.add(name)
+            print(f"[run ] {name} ({elapsed:.2f}s)")
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            while pending or running or serial:
+                progressed = False
+                for name in list(pending):
+                    stage = self.stages[name]
+                    if any(d not in done for d in stage.deps):
+                        continue
+                    pending.remove(name)
+                    progressed = True
+
+                    if stage.manual and not include_manual:
+                        done[name] = self._output_hashes(name)
+                        print(f"[src ] {name}")
+                        continue
+
+                    key = self._key(name, done)
+                    if not force and self._up_to_date(name, key):
+                        done[name] = self._output_hashes(name)
+                        print(f"[ ok ] {name}")
+                        continue
+
+                    if dry_run:
+                        # Assume the outputs would change: everything below is stale.
+                        done[name] = {"<dry-run>": key}
+                        changed.add(name)
+                        print(f"[todo] {name}")
+                        continue
+
+                    keys[name] = key
+                    if stage.serial:
+                        serial.append(name)
+                        continue
+                    fut = pool.submit(self._execute, name)
+                    running[fut] = name
+
+                if serial and not running:
+                    name = serial.pop(0)
+                    finish(name, lambda: self._execute(name))
+                    progressed = True
+                elif running and not progressed:
+                    finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                    for fut in finished:
+                        finish(running.pop(fut), fut.result)
+                elif not running and pending and not progressed:
+                    raise RuntimeError(f"Unresolvable stages: {pending}")
+
+        if failed:
+            return 1
+        if not changed:
+            print("Everything up to date.")
+        return 0
+
+
+# ------------------ TP4 project stages ------------------
+
+def _read_records(path: str) -> List[Dict[str, str]]:
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def _run_cmd(cmd: List[str], cwd: str) -> None:
+    print("  $", " ".join(cmd))
+    subprocess.run(cmd, cwd=cwd, check=True)
+
+
+def build_pipeline(gem5: Optional[str] = None) -> Pipeline:
+    import build_q9
+    import build_q11
+    import cpi_stack
+    import plot_cpi
+    import plot_q8
+    import plot_q9
+    import plot_q11
+    import plot_q45
+    from render import render_all
+
+    p = Pipeline(os.path.join(BASE, STATE_NAME))
+
+    q45_csv = os.path.join(BASE, "q45_m5out", "q45_summary.csv")
+    q8_csv = os.path.join(BASE, "q8_cacti", "q8_summary.csv")
+    q9_csv = os.path.join(BASE, "q9_eff", "q9_summary.csv")
+    q11_csv = os.path.join(BASE, "q11_eff", "q11_summary.csv")
+    cpi_csv = os.path.join(BASE, "q45_m5out", "cpi_stack.csv")
+    render_py = os.path.join(BASE, "render.py")
+    expspec_py = os.path.join(BASE, "expspec.py")
+    spec_toml = os.path.join(BASE, "experiments.toml")
+
+    def run_q45(ctx):
+        cmd = ["bash", os.path.join(BASE, "run_q45.sh"), "both"]
+        if gem5:
+            cmd.append(gem5)
+        _run_cmd(cmd, BASE)
+        return _read_records(q45_csv)
+
+    def run_q8(ctx):
+        _run_cmd(["bash", os.path.join(BASE, "run_q8.sh"), "both"], ROOT)
+        return _read_records(q8_csv)
+
+    def run_build_q9(ctx):
+        rows = build_q9.build_rows(build_q9.parse_q45(ctx["q45"]), build_q9.parse_q8(ctx["q8"]))
+        os.makedirs(os.path.dirname(q9_csv), exist_ok=True)
+        build_q9.write_csv(q9_csv, rows)
+        return rows
+
+    def run_build_q11(ctx):
+        rows = build_q11.build_rows(build_q11.parse_q45(ctx["q45"]))
+        os.makedirs(os.path.dirname(q11_csv), exist_ok=True)
+        build_q11.write_csv(q11_csv, rows)
+        return rows
+
+    def run_cpi_stack(ctx):
+        # Runs missing on this machine are skipped (header-only CSV if none).
+        # Read serially: a process pool must not be forked from this worker thread
+        items = cpi_stack.items_from_summary(ctx["q45"], os.path.dirname(q45_csv))
+        dims, rows = cpi_stack.build_rows(cpi_stack.read_all(items, jobs=1))
+        cpi_stack.write_csv(cpi_csv, dims or cpi_stack.DIMENSIONS, rows)
+        return _read_records(cpi_csv)
+
+    def plot_stage(module, dep, outdir):
+        def run(ctx):
+            rows = module.parse_rows(ctx[dep])
+            return render_all(module.build_jobs(rows, outdir))
+        return run
+
+    def rendered(results):
+        return [path for path, _ in results]
+
+    p.add(Stage(
+        name="q45",
+        run=run_q45,
+        outputs=[q45_csv],
+        inputs=[os.path.join(ROOT, "TP4", "se_A7.py"), os.path.join(ROOT, "TP4", "se_A15.py")]
+        + sorted(glob.glob(os.path.join(ROOT, "se_common", "*.py"))),
+        code=[os.path.join(BASE, "run_q45.sh")],
+        load=lambda: _read_records(q45_csv),
+        manual=True,
+    ))
+    p.add(Stage(
+        name="q8",
+        run=run_q8,
+        outputs=[q8_csv],
+        inputs=[os.path.join(BASE, "cacti65", "cache.cfg")],
+        code=[os.path.join(BASE, "run_q8.sh")],
+        load=lambda: _read_records(q8_csv),
+        manual=True,
+    ))
+    p.add(Stage(
+        name="q9",
+        run=run_build_q9,
+        outputs=[q9_csv],
+        deps=["q45", "q8"],
+        code=[build_q9.__file__, expspec_py],
+        inputs=[spec_toml],
+        load=lambda: _read_records(q9_csv),
+    ))
+    p.add(Stage(
+        name="q11",
+        run=run_build_q11,
+        outputs=[q11_csv],
+        deps=["q45"],
+        code=[build_q11.__file__, expspec_py],
+        inputs=[spec_toml],
+        load=lambda: _read_records(q11_csv),
+    ))
+    p.add(Stage(
+        name="cpi_stack",
+        run=run_cpi_stack,
+        outputs=[cpi_csv],
+        deps=["q45"],
+        code=[cpi_stack.__file__, os.path.join(BASE, "stats_index.py")],
+        load=lambda: _read_records(cpi_csv),
+    ))
+    for name, module, dep, outdir in (
+        ("plot_q45", plot_q45, "q45", os.path.join(BASE, "q45_m5out", "plots")),
+        ("plot_q8", plot_q8, "q8", os.path.join(BASE, "q8_cacti", "plots")),
+        ("plot_q9", plot_q9, "q9", os.path.join(BASE, "q9_eff", "plots")),
+        ("plot_q11", plot_q11, "q11", os.path.join(BASE, "q11_eff", "plots")),
+        ("plot_cpi", plot_cpi, "cpi_stack", os.path.join(BASE, "q45_m5out", "plots_cpi")),
+    ):
+        p.add(Stage(
+            name=name,
+            run=plot_stage(module, dep, outdir),
+            deps=[dep],
+            code=[module.__file__, render_py],
+            produced=rendered,
+            serial=True,
+        ))
+    return p
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Incremental TP4 pipeline (sweeps -> CSV -> plots)")
+    ap.add_argument("targets", nargs="*", help="Stages to bring up to date (default: all)")
+    ap.add_argument("--sweeps", action="store_true", help="Also (re)run the gem5/CACTI sweeps when stale")
+    ap.add_argument("--gem5", default=None, help="gem5.opt passed to run_q45.sh")
+    ap.add_argument("--force", action="store_true", help="Rerun every selected stage")
+    ap.add_argument("--jobs", type=int, default=4, help="Stages run concurrently")
+    ap.add_argument("--dry-run", action="store_true", help="Only print what would run")
+    ap.add_argument("--list", action="store_true", help="List stages and exit")
+    args = ap.parse_args()
+
+    sys.path.insert(0, BASE)
+    p = build_pipeline(args.gem5)
+
+    if args.list:
+        for s in p.stages.values():
+            deps = ", ".join(s.deps) if s.deps else "-"
+            print(f"{s.name:10s} <- {deps}{'  (sweep)' if s.manual else ''}")
+        return 0
+
+    targets = args.targets or list(p.stages)
+    return p.run(
+        targets,
+        jobs=args.jobs,
+        force=args.force,
+        include_manual=args.sweeps,
+        dry_run=args.dry_run,
+    )
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Compact storage and export of the windowed O3PipeView traces written by
+--trace-window / --trace-every / --trace-roi / --trace-pc (se_common/o3trace.py).
+
+  pack    o3trace.raw.gz (gem5 debug output) -> o3trace.bin: one
+          zlib-compressed chunk of fixed-size binary records per window
+          (stage ticks stored relative to fetch, disassembly interned),
+          indexed by offset/length in o3trace.json. The raw file is removed
+          unless --keep-raw.
+  list    the windows of a run (trigger, instructions, ticks, records)
+  export  O3PipeView text of the requested windows only, readable by
+          Konata and by gem5's util/o3-pipeview.py
+
+A record belongs to the window whose tick range holds its fetch tick (or,
+for an instruction fetched just before the window opened, its retire tick).
+
+Usage:
+  python3 TP4/Projet/pipeview.py pack m5out_a7_dij_trace
+  python3 TP4/Projet/pipeview.py list m5out_a7_dij_trace
+  python3 TP4/Projet/pipeview.py export m5out_a7_dij_trace --window 0 --window 3 -o a7_w0_w3.trace
+  python3 util/o3-pipeview.py -c 500 -o pipeview.out a7_w0_w3.trace
+"""
+import argparse
+import bisect
+import gzip
+import json
+import os
+import struct
+import sys
+import zlib
+from dataclasses import dataclass
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+MAGIC = b"O3PV\x01\x00\x00\x00"
+BIN_NAME = "o3trace.bin"
+MANIFEST = "o3trace.json"
+
+STAGES = ["decode", "rename", "dispatch", "issue", "complete", "retire"]
+
+# seq, pc, upc, fetch tick, 6 stage deltas, store delta, kind, disasm index
+_RECORD = struct.Struct("<QQHQ6QQBI")
+_KINDS = ["", "store", "load"]
+
+
+@dataclass
+class Record:
+    seq: int
+    pc: int
+    upc: int
+    fetch: int
+    stages: List[int]  # absolute ticks, 0 = stage not reached
+    kind: str
+    store: int
+    disasm: str
+
+    @property
+    def last_tick(self) -> int:
+        return max([self.fetch] + self.stages + [self.store])
+
+
+def _open_text(path: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", errors="replace")
+    return open(path, errors="replace")
+
+
+def parse_raw(f: IO[str]) -> Iterator[Record]:
+    """O3PipeView records of a gem5 debug output (other lines are ignored)."""
+    rec: Optional[Record] = None
+    for line in f:
+        i = line.find("O3PipeView:")
+        if i < 0:
+            continue
+        parts = line[i:].rstrip("\n").split(":", 6)
+        stage = parts[1]
+        if stage == "fetch" and len(parts) >= 6:
+            rec = Record(seq=int(parts[5]), pc=int(parts[3], 16), upc=int(parts[4]), fetch=int(parts[2]),
+                         stages=[0] * len(STAGES), kind="", store=0,
+                         disasm=parts[6] if len(parts) > 6 else "")
+        elif rec is not None and stage in STAGES:
+            rec.stages[STAGES.index(stage)] = int(parts[2])
+            if stage == "retire":
+                if len(parts) >= 5:
+                    rec.kind = parts[3]
+                    rec.store = int(parts[4] or 0)
+                yield rec
+                rec = None
+
+
+def _delta(tick: int, fetch: int) -> int:
+    # 0 stays "not reached"; reached stages are stored as tick - fetch + 1
+    return tick - fetch + 1 if tick else 0
+
+
+def encode_chunk(records: List[Record]) -> bytes:
+    strings: Dict[str, int] = {}
+    body = bytearray()
+    for r in records:
+        idx = strings.setdefault(r.disasm, len(strings))
+        kind = _KINDS.index(r.kind) if r.kind in _KINDS else 0
+        body += _RECORD.pack(r.seq, r.pc, r.upc, r.fetch, *[_delta(t, r.fetch) for t in r.stages],
+                             _delta(r.store, r.fetch), kind, idx)
+    table = bytearray(struct.pack("<I", len(strings)))
+    for s in strings:
+        b = s.encode()
+        table += struct.pack("<H", len(b)) + b
+    return zlib.compress(bytes(table) + struct.pack("<I", len(records)) + bytes(body), 9)
+
+
+def decode_chunk(data: bytes) -> List[Record]:
+    raw = zlib.decompress(data)
+    (n_strings,) = struct.unpack_from("<I", raw, 0)
+    pos = 4
+    strings = []
+    for _ in range(n_strings):
+        (length,) = struct.unpack_from("<H", raw, pos)
+        strings.append(raw[pos + 2:pos + 2 + length].decode())
+        pos += 2 + length
+    (n,) = struct.unpack_from("<I", raw, pos)
+    pos += 4
+    records = []
+    for _ in range(n):
+        v = _RECORD.unpack_from(raw, pos)
+        pos += _RECORD.size
+        seq, pc, upc, fetch = v[:4]
+        stages = [fetch + d - 1 if d else 0 for d in v[4:10]]
+        records.append(Record(seq=seq, pc=pc, upc=upc, fetch=fetch, stages=stages, kind=_KINDS[v[11]],
+                              store=fetch + v[10] - 1 if v[10] else 0, disasm=strings[v[12]]))
+    return records
+
+
+def format_record(r: Record) -> str:
+    lines = [f"O3PipeView:fetch:{r.fetch}:0x{r.pc:08x}:{r.upc}:{r.seq}:{r.disasm}"]
+    for stage, tick in zip(STAGES[:-1], r.stages[:-1]):
+        lines.append(f"O3PipeView:{stage}:{tick}")
+    lines.append(f"O3PipeView:retire:{r.stages[-1]}:{r.kind or 'store'}:{r.store}")
+    return "\n".join(lines) + "\n"
+
+
+def load_manifest(outdir: str) -> Dict:
+    path = os.path.join(outdir, MANIFEST)
+    if not os.path.isfile(path):
+        raise SystemExit(f"Error: no {MANIFEST} in {outdir} (run with --trace-*)")
+    with open(path) as f:
+        return json.load(f)
+
+
+def _window_of(record: Record, starts: List[int], windows: List[Dict]) -> Optional[int]:
+    for tick in (record.fetch, record.stages[-1] or record.last_tick):
+        i = bisect.bisect_right(starts, tick) - 1
+        if i >= 0 and tick <= windows[i].get("end_tick", tick):
+            return i
+    return None
+
+
+def pack(outdir: str, keep_raw: bool = False) -> Dict:
+    info = load_manifest(outdir)
+    raw = info.get("raw", "")
+    raw_path = raw if os.path.isabs(raw) else os.path.join(outdir, raw)
+    if not os.path.isfile(raw_path):
+        raise SystemExit(f"Error: raw trace {raw_path} not found")
+
+    windows = sorted(info["windows"], key=lambda w: w["start_tick"])
+    starts = [w["start_tick"] for w in windows]
+    per_window: List[List[Record]] = [[] for _ in windows]
+    dropped = 0
+    with _open_text(raw_path) as f:
+        for rec in parse_raw(f):
+            i = _window_of(rec, starts, windows)
+            if i is None:
+                dropped += 1
+            else:
+                per_window[i].append(rec)
+
+    with open(os.path.join(outdir, BIN_NAME), "wb") as out:
+        out.write(MAGIC)
+        for w, records in zip(windows, per_window):
+            records.sort(key=lambda r: r.seq)
+            chunk = encode_chunk(records)
+            w.update(offset=out.tell(), length=len(chunk), records=len(records))
+            out.write(chunk)
+
+    info["windows"] = windows
+    info["bin"] = BIN_NAME
+    info["dropped"] = dropped
+    # Only our own raw file is removed, never a user --debug-file elsewhere
+    if not keep_raw and os.path.dirname(os.path.abspath(raw_path)) == os.path.abspath(outdir):
+        os.remove(raw_path)
+        info["raw"] = ""
+    with open(os.path.join(outdir, MANIFEST), "w") as f:
+        json.dump(info, f, indent=1)
+    return info
+
+
+def read_windows(outdir: str, ids: Optional[List[int]] = None) -> Iterator[Tuple[Dict, List[Record]]]:
+    """(window, records) of the requested windows, reading only their chunks."""
+    info = load_manifest(outdir)
+    if not info.get("bin"):
+        raise SystemExit(f"Error: {outdir} is not packed yet (pipeview.py pack {outdir})")
+    by_id = {w["id"]: w for w in info["windows"]}
+    wanted = ids if ids else sorted(by_id)
+    with open(os.path.join(outdir, info["bin"]), "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise SystemExit(f"Error: {info['bin']} is not an o3trace binary")
+        for wid in wanted:
+            if wid not in by_id:
+                raise SystemExit(f"Error: no window {wid} (have {sorted(by_id)})")
+            w = by_id[wid]
+            f.seek(w["offset"])
+            yield w, decode_chunk(f.read(w["length"]))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Pack / list / export windowed O3PipeView traces")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("pack", help="Raw gem5 trace -> compressed binary chunks")
+    p.add_argument("outdir")
+    p.add_argument("--keep-raw", action="store_true", help="Keep o3trace.raw.gz")
+    p = sub.add_parser("list", help="List the windows of a run")
+    p.add_argument("outdir")
+    p = sub.add_parser("export", help="O3PipeView/Konata text of some windows")
+    p.add_argument("outdir")
+    p.add_argument("--window", type=int, action="append", default=[], help="Window id (repeatable, default: all)")
+    p.add_argument("-o", "--output", default="-", help="Output file (default: stdout)")
+    args = ap.parse_args()
+
+    if args.cmd == "pack":
+        info = pack(args.outdir, args.keep_raw)
+        total = sum(w["records"] for w in info["windows"])
+        size = os.path.getsize(os.path.join(args.outdir, BIN_NAME))
+        print(f"Packed {total} records in {len(info['windows'])} windows -> {BIN_NAME} ({size} bytes, "
+              f"{info['dropped']} outside any window)")
+        return 0
+
+    if args.cmd == "list":
+        info = load_manifest(args.outdir)
+        print(f"{'id':>3} {'trigger':<8} {'start inst':>12} {'end inst':>12} {'start tick':>16} {'end tick':>16} "
+              f"{'records':>8}")
+        for w in info["windows"]:
+            print(f"{w['id']:>3} {w['trigger']:<8} {w['start_inst']:>12} {w['end_inst']:>12} {w['start_tick']:>16} "
+                  f"{w.get('end_tick', '?'):>16} {w.get('records', '?'):>8}")
+        if not info.get("bin"):
+            print("(not packed yet)")
+        return 0
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        n = 0
+        for _, records in read_windows(args.outdir, args.window):
+            for r in records:
+                out.write(format_record(r))
+            n += len(records)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if out is not sys.stdout:
+        print(f"Wrote {n} records to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
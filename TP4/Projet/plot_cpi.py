@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Stacked CPI breakdown plots from the CSV written by cpi_stack.py: one
+figure per group of runs (every dimension but the swept one), one stacked
+bar per value of the swept dimension (default: the last dimension column,
+l1_kB for the Q4/Q5 sweep).
+
+Usage:
+  python3 TP4/Projet/plot_cpi.py --csv TP4/Projet/q45_m5out/cpi_stack.csv
+  python3 TP4/Projet/plot_cpi.py --csv cpi.csv --by freq --outdir plots_cpi
+"""
+import argparse
+import csv
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from cpi_stack import COMPONENTS, sort_key
+from render import RenderJob, add_render_args, print_results, render_all
+
+COLORS = {
+    "base": "#7f7f7f",
+    "icache": "#2ca02c",
+    "itlb": "#98df8a",
+    "squash": "#8c564b",
+    "rob_full": "#1f77b4",
+    "iq_full": "#aec7e8",
+    "lsq_full": "#9467bd",
+    "regs_full": "#c5b0d5",
+    "dcache": "#d62728",
+    "fu_busy": "#ff7f0e",
+    "other": "#e7e7e7",
+}
+
+_NON_DIMS = {"run", "insts", "cycles", "cpi", "overlap"} | set(COMPONENTS)
+
+
+@dataclass(frozen=True)
+class Row:
+    dims: Tuple[Tuple[str, str], ...]
+    cpi: float
+    parts: Tuple[float, ...]
+
+    def dim(self, name: str) -> str:
+        return dict(self.dims).get(name, "")
+
+
+def dimensions(fieldnames: Iterable[str]) -> List[str]:
+    return [f for f in fieldnames if f not in _NON_DIMS]
+
+
+def parse_rows(records: Iterable[Dict[str, str]]) -> List[Row]:
+    rows: List[Row] = []
+    for r in records:
+        # Skip the --by averages, the plots redo the grouping
+        if r.get("run", "").startswith("mean of"):
+            continue
+        try:
+            rows.append(Row(
+                dims=tuple((d, r[d]) for d in dimensions(r.keys())),
+                cpi=float(r["cpi"]),
+                parts=tuple(float(r.get(c) or 0.0) for c in COMPONENTS),
+            ))
+        except (KeyError, ValueError):
+            continue
+    return rows
+
+
+def read_rows(csv_path: str) -> List[Row]:
+    with open(csv_path, newline="") as f:
+        return parse_rows(csv.DictReader(f))
+
+
+def group_rows(rows: List[Row], by: str) -> Dict[Tuple[Tuple[str, str], ...], List[Row]]:
+    groups: Dict[Tuple[Tuple[str, str], ...], List[Row]] = {}
+    for r in rows:
+        key = tuple((d, v) for d, v in r.dims if d != by)
+        groups.setdefault(key, []).append(r)
+    for key in groups:
+        groups[key].sort(key=lambda r: sort_key(r.dim(by)))
+    return groups
+
+
+def group_png(outdir: str, key: Tuple[Tuple[str, str], ...]) -> str:
+    name = "_".join(v.lower() for _, v in key if v) or "all"
+    return os.path.join(outdir, f"cpi_{name}.png")
+
+
+def plot_group(out_path: str, key: Tuple[Tuple[str, str], ...], by: str, rows: List[Row]) -> str:
+    labels = [r.dim(by) or os.path.basename(out_path) for r in rows]
+    xs = list(range(len(rows)))
+
+    fig, ax = plt.subplots(figsize=(max(6, 0.9 * len(rows) + 3), 5), constrained_layout=True)
+    title = " ".join(v for _, v in key if v) or "CPI stack"
+    fig.suptitle(f"{title} - CPI breakdown", fontsize=12)
+
+    bottom = [0.0] * len(rows)
+    for i, name in enumerate(COMPONENTS):
+        heights = [r.parts[i] for r in rows]
+        if not any(heights):
+            continue
+        ax.bar(xs, heights, bottom=bottom, label=name, color=COLORS[name], edgecolor="white", linewidth=0.5)
+        bottom = [b + h for b, h in zip(bottom, heights)]
+
+    for x, r in zip(xs, rows):
+        ax.text(x, r.cpi, f"{r.cpi:.2f}", ha="center", va="bottom", fontsize=8)
+    ax.set_xticks(xs)
+    ax.set_xticklabels(labels)
+    ax.set_xlabel(by)
+    ax.set_ylabel("CPI")
+    ax.grid(True, axis="y", alpha=0.3)
+    # Top of the stack first, as in the bars
+    handles, names = ax.get_legend_handles_labels()
+    ax.legend(handles[::-1], names[::-1], fontsize=8, loc="center left", bbox_to_anchor=(1.0, 0.5))
+
+    fig.savefig(out_path, dpi=180)
+    plt.close(fig)
+    return out_path
+
+
+def build_jobs(rows: List[Row], outdir: str, by: Optional[str] = None) -> List[RenderJob]:
+    if not rows:
+        return []
+    if by is None:
+        by = rows[0].dims[-1][0] if rows[0].dims else ""
+    return [
+        RenderJob(group_png(outdir, key), plot_group, (key, by, g))
+        for key, g in sorted(group_rows(rows, by).items())
+    ]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Stacked CPI breakdown plots from cpi_stack.py output")
+    ap.add_argument("--csv", default="TP4/Projet/q45_m5out/cpi_stack.csv", help="CSV written by cpi_stack.py")
+    ap.add_argument("--outdir", default="TP4/Projet/q45_m5out/plots_cpi", help="Output directory for PNG plots")
+    ap.add_argument("--by", default=None, help="Swept dimension on the x axis (default: last dimension column)")
+    add_render_args(ap)
+    args = ap.parse_args()
+
+    rows = read_rows(args.csv)
+    if not rows:
+        raise SystemExit(f"No rows found in {args.csv}")
+
+    os.makedirs(args.outdir, exist_ok=True)
+    print_results(render_all(build_jobs(rows, args.outdir, args.by), workers=args.jobs, force=args.force))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
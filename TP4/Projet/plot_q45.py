@@ -4,10 +4,15 @@ import csv
 import math
 import os
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
+import matplotlib
+
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
+from render import RenderJob, add_render_args, print_results, render_all
+
 
 @dataclass(frozen=True)
 class Row:
@@ -48,33 +53,36 @@ def _to_float(value: str) -> Optional[float]:
         return None
 
 
-def read_rows(csv_path: str) -> List[Row]:
+def parse_rows(records: Iterable[Dict[str, str]]) -> List[Row]:
     rows: List[Row] = []
-    with open(csv_path, newline="") as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            rows.append(
-                Row(
-                    arch=r.get("arch", "").strip(),
-                    question=r.get("question", "").strip(),
-                    workload=r.get("workload", "").strip(),
-                    l1_kb=int(r.get("l1_kB", "0")),
-                    sim_seconds=_to_float(r.get("simSeconds", "NA")),
-                    sim_insts=_to_int(r.get("simInsts", "NA")),
-                    num_cycles=_to_int(r.get("numCycles", "NA")),
-                    ipc=_to_float(r.get("ipc", "NA")),
-                    cpi=_to_float(r.get("cpi", "NA")),
-                    icache_miss=_to_float(r.get("icache_miss", "NA")),
-                    dcache_miss=_to_float(r.get("dcache_miss", "NA")),
-                    l2_miss=_to_float(r.get("l2_miss", "NA")),
-                    bp_mispred_rate=_to_float(r.get("bp_condMispredRate", "NA")),
-                    branch_mispredicts=_to_int(r.get("commit_branchMispredicts", "NA")),
-                    outdir=r.get("outdir", "").strip(),
-                )
+    for r in records:
+        rows.append(
+            Row(
+                arch=r.get("arch", "").strip(),
+                question=r.get("question", "").strip(),
+                workload=r.get("workload", "").strip(),
+                l1_kb=int(r.get("l1_kB", "0")),
+                sim_seconds=_to_float(r.get("simSeconds", "NA")),
+                sim_insts=_to_int(r.get("simInsts", "NA")),
+                num_cycles=_to_int(r.get("numCycles", "NA")),
+                ipc=_to_float(r.get("ipc", "NA")),
+                cpi=_to_float(r.get("cpi", "NA")),
+                icache_miss=_to_float(r.get("icache_miss", "NA")),
+                dcache_miss=_to_float(r.get("dcache_miss", "NA")),
+                l2_miss=_to_float(r.get("l2_miss", "NA")),
+                bp_mispred_rate=_to_float(r.get("bp_condMispredRate", "NA")),
+                branch_mispredicts=_to_int(r.get("commit_branchMispredicts", "NA")),
+                outdir=r.get("outdir", "").strip(),
             )
+        )
     return rows
 
 
+def read_rows(csv_path: str) -> List[Row]:
+    with open(csv_path, newline="") as f:
+        return parse_rows(csv.DictReader(f))
+
+
 def group_rows(rows: List[Row]) -> Dict[Tuple[str, str, str], List[Row]]:
     groups: Dict[Tuple[str, str, str], List[Row]] = {}
     for r in rows:
@@ -112,7 +120,12 @@ def _plot_line(ax, x: List[int], y: List[Optional[float]], label: str, color: st
     ax.plot(xs, ys, marker="o", linewidth=1.5, label=label, color=color)
 
 
-def plot_group(outdir: str, key: Tuple[str, str, str], rows: List[Row]) -> str:
+def group_png(outdir: str, key: Tuple[str, str, str]) -> str:
+    arch, question, workload = key
+    return os.path.join(outdir, f"plot_{question.lower()}_{arch}_{workload}.png")
+
+
+def plot_group(out_path: str, key: Tuple[str, str, str], rows: List[Row]) -> str:
     arch, question, workload = key
     sizes = [r.l1_kb for r in rows]
 
@@ -164,12 +177,19 @@ def plot_group(outdir: str, key: Tuple[str, str, str], rows: List[Row]) -> str:
     ax.grid(True, alpha=0.3)
     ax.set_xticks(sizes)
 
-    out_path = os.path.join(outdir, f"plot_{question.lower()}_{arch}_{workload}.png")
     fig.savefig(out_path, dpi=180)
     plt.close(fig)
     return out_path
 
 
+def build_jobs(rows: List[Row], outdir: str) -> List[RenderJob]:
+    groups = group_rows(rows)
+    return [
+        RenderJob(group_png(outdir, key), plot_group, (key, g))
+        for key, g in sorted(groups.items())
+    ]
+
+
 def main() -> int:
     ap = argparse.ArgumentParser(description="Plot Q4/Q5 results from q45_summary.csv")
     ap.add_argument(
@@ -182,6 +202,7 @@ def main() -> int:
         default="TP4/Projet/q45_m5out/plots",
         help="Output directory for PNG plots",
     )
+    add_render_args(ap)
     args = ap.parse_args()
 
     rows = read_rows(args.csv)
@@ -190,14 +211,8 @@ def main() -> int:
 
     os.makedirs(args.outdir, exist_ok=True)
 
-    groups = group_rows(rows)
-    outputs: List[str] = []
-    for key, g in sorted(groups.items()):
-        outputs.append(plot_group(args.outdir, key, g))
-
-    print("Wrote plots:")
-    for p in outputs:
-        print("  ", p)
+    jobs = build_jobs(rows, args.outdir)
+    print_results(render_all(jobs, workers=args.jobs, force=args.force))
 
     return 0
 
@@ -4,30 +4,38 @@ import csv
 import os
 from collections import defaultdict
 
+import matplotlib
+
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
+from render import RenderJob, add_render_args, print_results, render_all
 
-def read_rows(path):
+
+def parse_rows(records):
     rows = []
-    with open(path, newline="") as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            try:
-                rows.append(
-                    {
-                        "arch": r["arch"].strip(),
-                        "l1_kB": int(r["l1_kB"]),
-                        "l1_total_mm2": float(r["l1_total_mm2"]),
-                        "l2_one_mm2": float(r["l2_one_mm2"]),
-                        "core_wo_l1_mm2": float(r["core_wo_l1_mm2"]),
-                        "total_core_l1_l2_mm2": float(r["total_core_l1_l2_mm2"]),
-                    }
-                )
-            except Exception:
-                continue
+    for r in records:
+        try:
+            rows.append(
+                {
+                    "arch": r["arch"].strip(),
+                    "l1_kB": int(r["l1_kB"]),
+                    "l1_total_mm2": float(r["l1_total_mm2"]),
+                    "l2_one_mm2": float(r["l2_one_mm2"]),
+                    "core_wo_l1_mm2": float(r["core_wo_l1_mm2"]),
+                    "total_core_l1_l2_mm2": float(r["total_core_l1_l2_mm2"]),
+                }
+            )
+        except Exception:
+            continue
     return rows
 
 
+def read_rows(path):
+    with open(path, newline="") as f:
+        return parse_rows(csv.DictReader(f))
+
+
 def split_by_arch(rows):
     data = defaultdict(list)
     for r in rows:
@@ -37,7 +45,7 @@ def split_by_arch(rows):
     return data
 
 
-def plot_l1_area(data, out_png):
+def plot_l1_area(out_png, data):
     plt.figure(figsize=(8, 5))
     for arch, rows in sorted(data.items()):
         x = [r["l1_kB"] for r in rows]
@@ -54,7 +62,7 @@ def plot_l1_area(data, out_png):
     plt.close()
 
 
-def plot_total_area(data, out_png):
+def plot_total_area(out_png, data):
     fig, axs = plt.subplots(1, 2, figsize=(11, 4.5), sharey=False)
 
     # Left: absolute total area vs L1 size
@@ -91,28 +99,28 @@ def plot_total_area(data, out_png):
     plt.close(fig)
 
 
+def build_jobs(rows, outdir):
+    data = dict(split_by_arch(rows))
+    return [
+        RenderJob(os.path.join(outdir, "q8_l1_area_vs_size.png"), plot_l1_area, (data,)),
+        RenderJob(os.path.join(outdir, "q8_total_area_vs_size.png"), plot_total_area, (data,)),
+    ]
+
+
 def main():
     ap = argparse.ArgumentParser(description="Plot Q8 CACTI surface results")
     ap.add_argument("--csv", default="TP4/Projet/q8_cacti/q8_summary.csv")
     ap.add_argument("--outdir", default="TP4/Projet/q8_cacti/plots")
+    add_render_args(ap)
     args = ap.parse_args()
 
     rows = read_rows(args.csv)
     if not rows:
         raise SystemExit(f"No rows found in {args.csv}")
 
-    data = split_by_arch(rows)
-
     os.makedirs(args.outdir, exist_ok=True)
-    out1 = os.path.join(args.outdir, "q8_l1_area_vs_size.png")
-    out2 = os.path.join(args.outdir, "q8_total_area_vs_size.png")
-
-    plot_l1_area(data, out1)
-    plot_total_area(data, out2)
-
-    print("Wrote plots:")
-    print(" ", out1)
-    print(" ", out2)
+    jobs = build_jobs(rows, args.outdir)
+    print_results(render_all(jobs, workers=args.jobs, force=args.force))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Energy of gem5 runs made with --power-model (se_A7.py / se_A15.py), from
+the power model stats (power_model.dynamicPower / staticPower) of the
+cores and caches instead of a constant mW/MHz.
+
+Every stats dump is one interval (with --stats-period, the periodic dumps
+reset the stats): its energy is the power of each component times the
+dump's simSeconds. A run's energy is the sum over its dumps, or only the
+ROI dump when the output directory holds a roi.json. --phases also prints
+the intervals, to see the power of each program phase.
+
+Usage:
+  python3 TP4/Projet/power_report.py m5out_a7_dij_pm m5out_a15_dij_pm
+  python3 TP4/Projet/power_report.py --glob 'm5out_*_pm' --phases --csv power.csv
+"""
+import argparse
+import csv
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from stats_index import StatsIndex, add_outdir_args, outdirs_from_args, read_config, roi_dump, to_float, workload_name
+
+_POWER = re.compile(r"^(system\..+)\.power_model\.(dynamicPower|staticPower)$")
+_CPU_STAT = re.compile(r"^system\.cpu\d*\.(committedInsts|numCycles)$")
+
+FIELDNAMES = ["run", "profile", "workload", "l1_kB", "interval", "sim_s", "ipc", "core_mW", "cache_mW",
+              "static_pct", "power_mW", "energy_mJ", "nJ_per_inst", "eff_ipc_per_mW"]
+
+
+@dataclass
+class Interval:
+    index: int
+    sim_seconds: float
+    insts: float = 0.0
+    ipc: float = 0.0
+    # component -> (dynamic W, static W)
+    power: Dict[str, List[float]] = field(default_factory=dict)
+
+    def _sum(self, core: Optional[bool], which: int) -> float:
+        return sum(p[which] for name, p in self.power.items()
+                   if core is None or _is_core(name) == core)
+
+    @property
+    def core_w(self) -> float:
+        return self._sum(True, 0) + self._sum(True, 1)
+
+    @property
+    def cache_w(self) -> float:
+        return self._sum(False, 0) + self._sum(False, 1)
+
+    @property
+    def static_w(self) -> float:
+        return self._sum(None, 1)
+
+    @property
+    def power_w(self) -> float:
+        return self.core_w + self.cache_w
+
+    @property
+    def energy_j(self) -> float:
+        return self.power_w * self.sim_seconds
+
+
+@dataclass
+class PowerRun:
+    path: str
+    profile: str
+    workload: str
+    l1_kb: int
+    intervals: List[Interval]
+
+    @property
+    def sim_seconds(self) -> float:
+        return sum(i.sim_seconds for i in self.intervals)
+
+    @property
+    def energy_j(self) -> float:
+        return sum(i.energy_j for i in self.intervals)
+
+    @property
+    def insts(self) -> float:
+        return sum(i.insts for i in self.intervals)
+
+    @property
+    def power_w(self) -> float:
+        return self.energy_j / self.sim_seconds if self.sim_seconds else 0.0
+
+    @property
+    def ipc(self) -> float:
+        # Time-weighted over the intervals
+        return sum(i.ipc * i.sim_seconds for i in self.intervals) / self.sim_seconds if self.sim_seconds else 0.0
+
+
+def _is_core(component: str) -> bool:
+    return not component.endswith("cache")
+
+
+def _describe(outdir: str) -> Dict[str, object]:
+    cfg = read_config(outdir)
+    workload = workload_name(outdir, cfg)
+    l1 = 0
+    for section in ("system.cpu.dcache", "system.cpu0.dcache"):
+        if cfg.has_option(section, "size"):
+            l1 = cfg.getint(section, "size") // 1024
+            break
+    profile = "?"
+    label = os.path.join(outdir, "clocks.json")
+    if os.path.isfile(label):
+        with open(label) as f:
+            profile = json.load(f).get("profile") or "?"
+    return {"workload": workload, "l1_kb": l1, "profile": profile}
+
+
+def read_interval(index: int, stats: Dict[str, str]) -> Interval:
+    interval = Interval(index=index,
+                        sim_seconds=to_float(stats.get("simSeconds", stats.get("sim_seconds", "0"))) or 0.0)
+    insts: Dict[str, float] = {}
+    cycles: Dict[str, float] = {}
+    for name, raw in stats.items():
+        value = to_float(raw)
+        if value is None:
+            continue
+        m = _POWER.match(name)
+        if m:
+            slot = interval.power.setdefault(m.group(1), [0.0, 0.0])
+            slot[0 if m.group(2) == "dynamicPower" else 1] = value
+            continue
+        m = _CPU_STAT.match(name)
+        if m:
+            cpu = name.rsplit(".", 1)[0]
+            (insts if m.group(1) == "committedInsts" else cycles)[cpu] = value
+    interval.insts = sum(insts.values())
+    interval.ipc = sum(insts[c] / cycles[c] for c in insts if cycles.get(c))
+    return interval
+
+
+def read_run(outdir: str) -> Optional[PowerRun]:
+    stats_path = os.path.join(outdir, "stats.txt")
+    if not os.path.isfile(stats_path):
+        return None
+    with StatsIndex(stats_path) as idx:
+        n = idx.num_dumps()
+        if n == 0:
+            return None
+        roi = roi_dump(outdir)
+        dumps = [roi % n] if roi is not None else list(range(n))
+        intervals = [read_interval(d, idx.dump(d)) for d in dumps]
+    intervals = [i for i in intervals if i.power]
+    if not intervals:
+        return None
+    info = _describe(outdir)
+    return PowerRun(path=outdir, profile=str(info["profile"]), workload=str(info["workload"]),
+                    l1_kb=int(info["l1_kb"]), intervals=intervals)
+
+
+def _row(run: PowerRun, label: str, sim_s: float, ipc: float, core_w: float, cache_w: float,
+         static_w: float, energy_j: float, insts: float) -> Dict[str, str]:
+    power_w = core_w + cache_w
+    return {
+        "run": run.path,
+        "profile": run.profile,
+        "workload": run.workload,
+        "l1_kB": str(run.l1_kb),
+        "interval": label,
+        "sim_s": f"{sim_s:.6f}",
+        "ipc": f"{ipc:.4f}",
+        "core_mW": f"{1e3 * core_w:.3f}",
+        "cache_mW": f"{1e3 * cache_w:.3f}",
+        "static_pct": f"{100.0 * static_w / power_w:.1f}" if power_w else "n/a",
+        "power_mW": f"{1e3 * power_w:.3f}",
+        "energy_mJ": f"{1e3 * energy_j:.4f}",
+        "nJ_per_inst": f"{1e9 * energy_j / insts:.4f}" if insts else "n/a",
+        "eff_ipc_per_mW": f"{ipc / (1e3 * power_w):.8f}" if power_w else "n/a",
+    }
+
+
+def build_rows(runs: List[PowerRun], phases: bool) -> List[Dict[str, str]]:
+    rows: List[Dict[str, str]] = []
+    for run in runs:
+        if phases and len(run.intervals) > 1:
+            for i in run.intervals:
+                rows.append(_row(run, str(i.index), i.sim_seconds, i.ipc, i.core_w, i.cache_w,
+                                 i.static_w, i.energy_j, i.insts))
+        t = run.sim_seconds
+
+        def avg(part) -> float:
+            # Time-weighted average power of one part over the run
+            return sum(part(i) * i.sim_seconds for i in run.intervals) / t if t else 0.0
+
+        rows.append(_row(run, "all", t, run.ipc, avg(lambda i: i.core_w), avg(lambda i: i.cache_w),
+                         avg(lambda i: i.static_w), run.energy_j, run.insts))
+    return rows
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Energy/power of --power-model runs from gem5 power stats")
+    add_outdir_args(ap)
+    ap.add_argument("--phases", action="store_true", help="Also one line per stats dump (interval)")
+    ap.add_argument("--csv", default=None, help="Also write the table to this CSV")
+    args = ap.parse_args()
+
+    dirs = outdirs_from_args(args)
+    runs = [r for r in (read_run(d) for d in dirs) if r is not None]
+    if not runs:
+        print("Error: no stats.txt with power_model stats found (run with --power-model)")
+        return 1
+
+    rows = build_rows(runs, args.phases)
+    print(f"{'profile':<7} {'workload':<18} {'L1':>4} {'intv':>5} {'IPC':>7} {'core mW':>9} {'cache mW':>9} "
+          f"{'stat %':>6} {'mJ':>10} {'IPC/mW':>10}  run")
+    for r in rows:
+        print(f"{r['profile']:<7} {r['workload']:<18} {r['l1_kB']:>4} {r['interval']:>5} {r['ipc']:>7} "
+              f"{r['core_mW']:>9} {r['cache_mW']:>9} {r['static_pct']:>6} {r['energy_mJ']:>10} "
+              f"{r['eff_ipc_per_mW']:>10}  {r['run']}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            w.writeheader()
+            w.writerows(rows)
+        print(f"Wrote {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Reduced inputs for fast design-space exploration, validated against the
+full input.
+
+`gen` derives scaled-down variants of the Q4/Q5 workloads, each aiming at
+`scale` times the work of the full input:
+  dijkstra_large_pP   same 100-node matrix, P shortest paths instead of 100
+                      (-DNUM_PAIRS=P build)
+  dijkstra_large_nN   top-left NxN block of input.dat, N paths
+                      (-DNUM_NODES=N -DNUM_PAIRS=N build)
+  blowfish_large_sS   first S% of input_large.asc
+Inputs and a generated registry (builds + workloads, included by
+workloads.toml) are written under TP4/Projet/reduced/.
+
+`run` makes one profiling pass (se_profile.py: WorkloadProfiler and a
+branch predictor on an atomic CPU) per full workload and variant; `report`
+compares every variant to its full input:
+  insts_%       instructions of the variant / full input
+  mix_%         total variation distance between the instruction mixes
+                (share of the instructions that would have to change class)
+  dmrc/imrc_pp  largest gap between the data / instruction miss-ratio
+                curves (fully associative LRU, from the reuse distances)
+                over --min-kb..--max-kb, in percentage points
+  mispred_pp    gap between the conditional mispredict rates
+A variant is representative when all gaps are within the --max-* bounds;
+the smallest representative variant of each workload is marked "use".
+
+Usage:
+  python3 TP4/Projet/reduce_inputs.py gen --scales 0.5 0.25 0.1
+  python3 TP4/Projet/reduce_inputs.py run --gem5 ~/gem5/build/RISCV/gem5.fast --parallel 4
+  python3 TP4/Projet/reduce_inputs.py report --csv reduced.csv
+"""
+import argparse
+import csv
+import json
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib  # type: ignore[no-redef]
+
+import expspec
+import workloads as registry
+from stats_index import read_outdir_dump, to_float
+from wlchar import miss_ratio
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+REDUCED_DIR = os.path.join(BASE, "reduced")
+STUDY = "REDUCE"
+
+FIELDNAMES = ["workload", "variant", "scale", "insts_%", "mix_%", "dmrc_pp", "imrc_pp", "mispred_pp", "verdict"]
+
+
+@dataclass
+class Variant:
+    name: str
+    workload: str
+    scale: float
+    what: str
+    build: Optional[Dict] = None
+    inputs: Dict[str, str] = field(default_factory=dict)
+
+
+def _rel(path: str) -> str:
+    return os.path.relpath(path, registry.ROOT)
+
+
+# ------------------ Generators ------------------
+
+def _read_matrix(path: str) -> List[List[int]]:
+    with open(path) as f:
+        values = [int(v) for v in f.read().split()]
+    n = math.isqrt(len(values))
+    if n * n != len(values):
+        raise ValueError(f"{path}: {len(values)} values, not a square matrix")
+    return [values[i * n:(i + 1) * n] for i in range(n)]
+
+
+def reduce_dijkstra(name: str, wl: registry.Workload, base_build: Dict, scale: float) -> List[Variant]:
+    matrix = _read_matrix(os.path.join(registry.ROOT, wl.inputs["graph"]))
+    full = len(matrix)
+    out = []
+
+    # Fewer shortest paths on the same matrix: work ~ pairs
+    pairs = max(1, round(full * scale))
+    build = dict(base_build)
+    build["cflags"] = list(base_build.get("cflags", [])) + [f"-DNUM_PAIRS={pairs}"]
+    out.append(Variant(name=f"{name}_p{pairs}", workload=name, scale=scale, what=f"{pairs} paths",
+                       build=build, inputs=dict(wl.inputs)))
+
+    # Smaller matrix, one path per node: work ~ nodes^3
+    nodes = max(2, round(full * scale ** (1 / 3)))
+    path = os.path.join(REDUCED_DIR, f"{name}_n{nodes}.dat")
+    with open(path, "w") as f:
+        for row in matrix[:nodes]:
+            f.write(" ".join(str(v) for v in row[:nodes]) + " \n")
+    build = dict(base_build)
+    build["cflags"] = list(base_build.get("cflags", [])) + [f"-DNUM_NODES={nodes}", f"-DNUM_PAIRS={nodes}"]
+    out.append(Variant(name=f"{name}_n{nodes}", workload=name, scale=scale, what=f"{nodes}x{nodes} matrix",
+                       build=build, inputs={**wl.inputs, "graph": _rel(path)}))
+    return out
+
+
+def reduce_blowfish(name: str, wl: registry.Workload, base_build: Dict, scale: float) -> List[Variant]:
+    with open(os.path.join(registry.ROOT, wl.inputs["plain"]), "rb") as f:
+        data = f.read()
+    # bf.c encrypts 40-byte blocks: keep whole blocks
+    size = max(40, int(len(data) * scale) // 40 * 40)
+    pct = round(100 * scale)
+    path = os.path.join(REDUCED_DIR, f"{name}_s{pct}.asc")
+    with open(path, "wb") as f:
+        f.write(data[:size])
+    return [Variant(name=f"{name}_s{pct}", workload=name, scale=scale, what=f"{size} bytes",
+                    inputs={**wl.inputs, "plain": _rel(path)})]
+
+
+REDUCERS: Dict[str, Callable[[str, registry.Workload, Dict, float], List[Variant]]] = {
+    "dijkstra_large": reduce_dijkstra,
+    "blowfish_large": reduce_blowfish,
+}
+
+
+def _toml(value) -> str:
+    if isinstance(value, dict):
+        return "{ " + ", ".join(f"{k} = {_toml(v)}" for k, v in value.items()) + " }"
+    return json.dumps(value)
+
+
+def write_registry(variants: List[Variant], reg: registry.Registry) -> str:
+    path = os.path.join(REDUCED_DIR, "workloads.toml")
+    lines = ["# Genere par reduce_inputs.py gen : ne pas editer.", ""]
+    for v in variants:
+        build = reg.workloads[v.workload].build
+        if v.build is not None:
+            build = v.name
+            lines.append(f"[builds.{v.name}]")
+            lines += [f"{k} = {_toml(val)}" for k, val in v.build.items()]
+            lines.append("")
+        lines.append(f"[workloads.{v.name}]")
+        lines.append(f"build = {_toml(build)}")
+        if v.inputs:
+            lines.append(f"inputs = {_toml(v.inputs)}")
+        lines.append(f"args = {_toml(reg.workloads[v.workload].args)}")
+        lines.append("")
+    with open(path, "w") as f:
+        f.write("\n".join(lines))
+    return path
+
+
+def generate(scales: List[float], names: List[str]) -> List[Variant]:
+    reg = registry.load_registry()
+    with open(registry.DEFAULT_REGISTRY, "rb") as f:
+        raw_builds = tomllib.load(f).get("builds", {})
+    os.makedirs(REDUCED_DIR, exist_ok=True)
+
+    variants: List[Variant] = []
+    for name in names:
+        wl = reg.workloads[name]
+        base = dict(raw_builds[wl.build])
+        base["out"] = _rel(os.path.join(REDUCED_DIR, "bin"))
+        for scale in scales:
+            for v in REDUCERS[name](name, wl, base, scale):
+                if v.build is not None:
+                    v.build["binary"] = f"{v.name}.riscv"
+                variants.append(v)
+
+    write_registry(variants, reg)
+    with open(os.path.join(REDUCED_DIR, "variants.json"), "w") as f:
+        json.dump([{"name": v.name, "workload": v.workload, "scale": v.scale, "what": v.what} for v in variants],
+                  f, indent=1)
+    return variants
+
+
+def load_variants() -> List[Dict]:
+    path = os.path.join(REDUCED_DIR, "variants.json")
+    if not os.path.isfile(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+# ------------------ Profiling passes ------------------
+
+def study_jobs(spec_path: str, variants: List[Dict]) -> Tuple[List[expspec.Job], Dict[str, expspec.Job]]:
+    """Profiling jobs of the full workloads and their variants, by workload name."""
+    spec = expspec.load_spec(spec_path)
+    names = sorted({v["workload"] for v in variants}) + [v["name"] for v in variants]
+    # bimod predictor for the mispredict gap (the WLCHAR profiles run without one)
+    spec["study"] = [{"name": STUDY, "config": "profile", "workload": "{workload}", "label": "m5out_red_{workload}",
+                      "options": {"bpred": "bimod"}, "product": {"workload": names}}]
+    jobs, points = expspec.compile_spec(spec, [STUDY])
+    by_id = {j.id: j for j in jobs}
+    return jobs, {str(p.params["workload"]): by_id[p.job_id] for p in points}
+
+
+@dataclass
+class Profile:
+    insts: float
+    mix: Dict[str, float]
+    reuse: Dict
+    line_bytes: int
+    mispred: Optional[float]
+
+
+def read_profile(outdir: str) -> Optional[Profile]:
+    path = os.path.join(outdir, "wlprof.json")
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        prof = json.load(f)
+    mispred = None
+    stats = read_outdir_dump(outdir)
+    if stats is not None:
+        pred = to_float(stats.get("system.cpu.branchPred.condPredicted"))
+        wrong = to_float(stats.get("system.cpu.branchPred.condIncorrect"))
+        if pred:
+            mispred = (wrong or 0.0) / pred
+    return Profile(insts=prof.get("insts", 0), mix=prof.get("mix", {}), reuse=prof.get("reuse", {}),
+                   line_bytes=prof.get("line_bytes", 64), mispred=mispred)
+
+
+# ------------------ Fidelity ------------------
+
+def mix_distance(a: Dict[str, float], b: Dict[str, float]) -> float:
+    ta, tb = sum(a.values()), sum(b.values())
+    if not ta or not tb:
+        return 1.0
+    return 0.5 * sum(abs(a.get(k, 0) / ta - b.get(k, 0) / tb) for k in set(a) | set(b))
+
+
+def mrc_gap(a: Dict, b: Dict, line_bytes: int, min_kb: float, max_kb: float) -> float:
+    gap = 0.0
+    kb = min_kb
+    while kb <= max_kb:
+        lines = kb * 1024 / line_bytes
+        gap = max(gap, abs(miss_ratio(a, lines) - miss_ratio(b, lines)))
+        kb *= 2
+    return gap
+
+
+def build_rows(variants: List[Dict], outdirs: Dict[str, str], args) -> List[Dict[str, str]]:
+    rows = []
+    full_cache: Dict[str, Optional[Profile]] = {}
+    best: Dict[str, Tuple[float, int]] = {}
+    for v in sorted(variants, key=lambda v: (v["workload"], -v["scale"], v["name"])):
+        wl = v["workload"]
+        if wl not in full_cache:
+            full_cache[wl] = read_profile(outdirs[wl])
+        full, red = full_cache[wl], read_profile(outdirs[v["name"]])
+        row = {"workload": wl, "variant": v["name"], "scale": f"{v['scale']:g}"}
+        if full is None or red is None:
+            row.update({k: "" for k in FIELDNAMES[3:]})
+            row["verdict"] = "not run"
+            rows.append(row)
+            continue
+
+        mix = 100 * mix_distance(full.mix, red.mix)
+        data = {"dmrc_pp": ("data", full.reuse.get("data", {}), red.reuse.get("data", {})),
+                "imrc_pp": ("inst", full.reuse.get("inst", {}), red.reuse.get("inst", {}))}
+        gaps = {k: 100 * mrc_gap(f, r, full.line_bytes, args.min_kb, args.max_kb) for k, (_, f, r) in data.items()}
+        mispred = None
+        if full.mispred is not None and red.mispred is not None:
+            mispred = 100 * abs(full.mispred - red.mispred)
+
+        failed = []
+        if mix > args.max_mix:
+            failed.append("mix")
+        if gaps["dmrc_pp"] > args.max_mrc:
+            failed.append("dmrc")
+        if gaps["imrc_pp"] > args.max_mrc:
+            failed.append("imrc")
+        if mispred is not None and mispred > args.max_mispred:
+            failed.append("mispred")
+
+        row.update({
+            "insts_%": f"{100 * red.insts / full.insts:.2f}" if full.insts else "",
+            "mix_%": f"{mix:.2f}",
+            "dmrc_pp": f"{gaps['dmrc_pp']:.2f}",
+            "imrc_pp": f"{gaps['imrc_pp']:.2f}",
+            "mispred_pp": f"{mispred:.2f}" if mispred is not None else "",
+            "verdict": "ok" if not failed else "off: " + ",".join(failed),
+        })
+        if not failed and (wl not in best or red.insts < best[wl][0]):
+            best[wl] = (red.insts, len(rows))
+        rows.append(row)
+
+    for _, i in best.values():
+        rows[i]["verdict"] = "use"
+    return rows
+
+
+# ------------------ CLI ------------------
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Reduced inputs and their fidelity to the full inputs")
+    ap.add_argument("--spec", default=expspec.DEFAULT_SPEC, help="Experiment spec (config 'profile')")
+    ap.add_argument("--runs-dir", default=expspec.DEFAULT_RUNS, help="Runs directory of the spec")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("gen", help="Generate the reduced inputs and their registry")
+    p.add_argument("--scales", type=float, nargs="+", default=[0.5, 0.25, 0.1],
+                   help="Target work of each variant, as a fraction of the full input")
+    p.add_argument("--workloads", nargs="+", default=sorted(REDUCERS), choices=sorted(REDUCERS))
+    p = sub.add_parser("run", help="Profile the full workloads and the variants (skips the done ones)")
+    p.add_argument("--gem5", default=os.environ.get("GEM5", "gem5.opt"), help="gem5 binary (gem5.fast is enough)")
+    p.add_argument("--parallel", type=int, default=1, help="gem5 processes in parallel")
+    p.add_argument("--force", action="store_true", help="Rerun finished passes")
+    p = sub.add_parser("report", help="Fidelity of each variant")
+    p.add_argument("--max-mix", type=float, default=2.0, help="Bound on the mix distance, %% (default: 2)")
+    p.add_argument("--max-mrc", type=float, default=2.0, help="Bound on the miss-ratio curve gaps, pp (default: 2)")
+    p.add_argument("--max-mispred", type=float, default=1.0, help="Bound on the mispredict rate gap, pp (default: 1)")
+    p.add_argument("--min-kb", type=float, default=1.0, help="Smallest cache size of the curves (default: 1)")
+    p.add_argument("--max-kb", type=float, default=1024.0, help="Largest cache size of the curves (default: 1024)")
+    p.add_argument("--csv", default=None, help="Also write the table to this CSV")
+    args = ap.parse_args()
+
+    if args.cmd == "gen":
+        if any(not 0 < s < 1 for s in args.scales):
+            print("Error: --scales must be in (0, 1)")
+            return 1
+        variants = generate(args.scales, args.workloads)
+        for v in variants:
+            print(f"{v.name:<24} {v.scale:>5g}  {v.what}")
+        print(f"Wrote {len(variants)} variants in {REDUCED_DIR}")
+        return 0
+
+    variants = load_variants()
+    if not variants:
+        print("Error: no reduced inputs (reduce_inputs.py gen)")
+        return 1
+    jobs, by_name = study_jobs(args.spec, variants)
+
+    if args.cmd == "run":
+        if registry.build_workloads(by_name, args.parallel):
+            return 1
+        os.makedirs(args.runs_dir, exist_ok=True)
+        expspec.link_labels(jobs, args.runs_dir)
+        return expspec.run_jobs(jobs, args.gem5, args.runs_dir, args.parallel, args.force)
+
+    outdirs = {name: job.outdir(args.runs_dir) for name, job in by_name.items()}
+    rows = build_rows(variants, outdirs, args)
+    print(f"{'workload':<16} {'variant':<24} {'scale':>5} {'insts%':>7} {'mix%':>6} {'dMRC':>6} {'iMRC':>6} "
+          f"{'mispred':>7}  verdict")
+    for r in rows:
+        print(f"{r['workload'][:16]:<16} {r['variant'][:24]:<24} {r['scale']:>5} {r['insts_%']:>7} {r['mix_%']:>6} "
+              f"{r['dmrc_pp']:>6} {r['imrc_pp']:>6} {r['mispred_pp']:>7}  {r['verdict']}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            w.writeheader()
+            w.writerows(rows)
+        print(f"Wrote {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Incremental, parallel figure rendering for the plot_q*.py scripts.
+
+Each figure is described by a RenderJob: an output PNG, a top-level plot
+function and the data it draws. The job fingerprint hashes that data
+together with the source of the plot function's module, of the local
+modules it imports (e.g. cpi_stack for plot_cpi), of render.py itself and
+the matplotlib version, and is stored in a .render_cache.json manifest
+next to the PNGs. Only figures whose fingerprint changed (or whose PNG is
+missing) are redrawn, across a process pool using the Agg backend. Each
+figure is recorded in the manifest as soon as it is drawn, so a failing
+figure does not force the others to be redrawn.
+
+A plot function is called as func(out_path, *args) and must save its
+figure to out_path.
+"""
+import ast
+import dataclasses
+import hashlib
+import importlib.util
+import inspect
+import json
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MANIFEST_NAME = ".render_cache.json"
+
+
+@dataclass
+class RenderJob:
+    out_path: str
+    func: Callable[..., Any]
+    args: Tuple[Any, ...] = ()
+
+
+def _canonical(obj: Any) -> Any:
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {f.name: _canonical(getattr(obj, f.name)) for f in dataclasses.fields(obj)}
+    if isinstance(obj, dict):
+        return {str(k): _canonical(v) for k, v in sorted(obj.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(v) for v in obj]
+    if isinstance(obj, (set, frozenset)):
+        return sorted((_canonical(v) for v in obj), key=repr)
+    if isinstance(obj, float) and (math.isnan(obj) or math.isinf(obj)):
+        return repr(obj)
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    return repr(obj)
+
+
+_source_hashes: Dict[str, str] = {}
+
+
+def _file_hash(path: str) -> str:
+    if path not in _source_hashes:
+        h = hashlib.sha256()
+        if path and os.path.isfile(path):
+            with open(path, "rb") as f:
+                h.update(f.read())
+        _source_hashes[path] = h.hexdigest()
+    return _source_hashes[path]
+
+
+def _local_imports(path: str) -> List[str]:
+    """Source files of the modules imported by `path` that sit next to it."""
+    try:
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), path)
+    except (OSError, SyntaxError):
+        return []
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(a.name.split(".")[0] for a in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split(".")[0])
+    here = os.path.dirname(os.path.abspath(path))
+    files = []
+    for name in sorted(names):
+        try:
+            spec = importlib.util.find_spec(name)
+        except (ImportError, ValueError):
+            continue
+        origin = spec.origin if spec else None
+        if origin and origin.endswith(".py") and os.path.dirname(os.path.abspath(origin)) == here:
+            files.append(os.path.abspath(origin))
+    return files
+
+
+def _source_hash(func: Callable[..., Any]) -> str:
+    """Hash of the plot module, its local imports and render.py."""
+    try:
+        path = inspect.getsourcefile(func) or ""
+    except TypeError:
+        path = ""
+    key = "module:" + path
+    if key not in _source_hashes:
+        files = [path] + _local_imports(path) if path else []
+        files.append(os.path.abspath(__file__))
+        h = hashlib.sha256()
+        for p in sorted(set(files)):
+            h.update(p.encode() + b"\0" + _file_hash(p).encode())
+        _source_hashes[key] = h.hexdigest()
+    return _source_hashes[key]
+
+
+def _matplotlib_version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return version("matplotlib")
+    except Exception:
+        return ""
+
+
+def fingerprint(job: RenderJob) -> str:
+    payload = {
+        "func": f"{job.func.__module__}.{job.func.__qualname__}",
+        "source": _source_hash(job.func),
+        "matplotlib": _matplotlib_version(),
+        "args": _canonical(job.args),
+    }
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha256(blob).hexdigest()
+
+
+def _load_manifest(outdir: str) -> Dict[str, str]:
+    path = os.path.join(outdir, MANIFEST_NAME)
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_manifest(outdir: str, manifest: Dict[str, str]) -> None:
+    path = os.path.join(outdir, MANIFEST_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _init_worker() -> None:
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def _run_job(job: RenderJob) -> str:
+    job.func(job.out_path, *job.args)
+    return job.out_path
+
+
+def render_all(
+    jobs: List[RenderJob],
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> List[Tuple[str, bool]]:
+    """
+    Render the stale jobs. Returns (out_path, rendered) for every job,
+    in input order; rendered=False means the PNG was up to date.
+    """
+    manifests: Dict[str, Dict[str, str]] = {}
+    stale: List[Tuple[RenderJob, str]] = []
+    for job in jobs:
+        outdir = os.path.dirname(job.out_path) or "."
+        os.makedirs(outdir, exist_ok=True)
+        manifest = manifests.setdefault(outdir, _load_manifest(outdir))
+        fp = fingerprint(job)
+        name = os.path.basename(job.out_path)
+        if force or manifest.get(name) != fp or not os.path.isfile(job.out_path):
+            stale.append((job, fp))
+
+    def done(job: RenderJob, fp: str) -> None:
+        outdir = os.path.dirname(job.out_path) or "."
+        manifests[outdir][os.path.basename(job.out_path)] = fp
+        _save_manifest(outdir, manifests[outdir])
+
+    error: Optional[BaseException] = None
+    if stale:
+        if workers is None:
+            workers = min(len(stale), os.cpu_count() or 1)
+        if workers <= 1 or len(stale) == 1:
+            _init_worker()
+            for job, fp in stale:
+                try:
+                    _run_job(job)
+                except Exception as e:
+                    error = error or e
+                    continue
+                done(job, fp)
+        else:
+            # Forking a multithreaded process (e.g. from the pipeline) can
+            # deadlock the children: start them from a fork server instead
+            mp_context = multiprocessing.get_context("forkserver") if threading.active_count() > 1 else None
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, mp_context=mp_context) as pool:
+                futures = {pool.submit(_run_job, job): (job, fp) for job, fp in stale}
+                for fut in as_completed(futures):
+                    try:
+                        fut.result()
+                    except Exception as e:
+                        error = error or e
+                        continue
+                    done(*futures[fut])
+    if error is not None:
+        raise error
+
+    rendered = {job.out_path for job, _ in stale}
+    return [(job.out_path, job.out_path in rendered) for job in jobs]
+
+
+def add_render_args(ap) -> None:
+    ap.add_argument("--force", action="store_true", help="Redraw every figure, ignoring the render cache")
+    ap.add_argument("--jobs", type=int, default=None, help="Number of render processes (default: #CPUs)")
+
+
+def print_results(results: List[Tuple[str, bool]]) -> None:
+    print("Wrote plots:")
+    for path, rendered in results:
+        print("  ", path, "" if rendered else "(up to date)")
@@ -11,7 +11,7 @@ set -e
 #   ./run_q1.sh both /path/to/gem5.opt
 
 ARCH="${1:-a7}"
-GEM5="${2:-/home/josedanielchg/Projects/architecture-microprocesseurs/gem5/build/RISCV/gem5.opt}"
+GEM5="${2:-${GEM5:-$HOME/Projects/architecture-microprocesseurs/gem5/build/RISCV/gem5.opt}}"
 
 if [ "$ARCH" != "a7" ] && [ "$ARCH" != "a15" ] && [ "$ARCH" != "both" ]; then
   echo "Error: use a7, a15 or both"
@@ -26,14 +26,14 @@ fi
 BASE="$(cd "$(dirname "$0")" && pwd)"
 ROOT="$(cd "$BASE/../.." && pwd)"
 
-DIJ_DIR="$BASE/dijkstra"
-BF_DIR="$BASE/blowfish"
 OUT="$BASE/q1_m5out"
 mkdir -p "$OUT"
 
-echo "== Building benchmarks =="
-make -C "$DIJ_DIR" clean all
-make -C "$BF_DIR" clean all
+# Binaries, inputs and command lines: workload registry (workloads.toml)
+REGISTRY=( python3 "$BASE/workloads.py" )
+
+echo "== Building benchmarks (only those whose sources or toolchain changed) =="
+"${REGISTRY[@]}" build dijkstra_large blowfish_large
 
 extract_mix() {
   STATS_FILE="$1"
@@ -45,6 +45,8 @@ extract_mix() {
   BEGIN {
     source = 0
   }
+  # Runs with --stats-period hold several dumps, each reset after the
+  # previous one: the counts are summed over all of them
   $1 ~ /^system\.cpu\./ {
     m = $1
     v = $2 + 0
@@ -80,6 +82,16 @@ extract_mix() {
   rm -f "$TMP_FILE"
 }
 
+run_workload() {
+  local workload="$1"
+  local outdir="$2"
+  local bin
+  local wl_args=()
+  bin="$("${REGISTRY[@]}" binary "$workload")"
+  mapfile -t wl_args < <("${REGISTRY[@]}" args "$workload" --outdir "$outdir")
+  "$GEM5" -d "$outdir" "$CFG" --cmd "$bin" --options "${wl_args[@]}"
+}
+
 run_arch() {
   A="$1"
 
@@ -91,19 +103,14 @@ run_arch() {
 
   DIJ_OUT="$OUT/m5out_q1_${A}_dijkstra"
   BF_OUT="$OUT/m5out_q1_${A}_blowfish"
-  BF_ENC="$OUT/output_q1_${A}.enc"
 
   echo "== Running Dijkstra ($A) =="
   rm -rf "$DIJ_OUT"
-  "$GEM5" -d "$DIJ_OUT" "$CFG" \
-    --cmd "$DIJ_DIR/dijkstra_large.riscv" \
-    --options "$DIJ_DIR/input.dat"
+  run_workload dijkstra_large "$DIJ_OUT"
 
   echo "== Running Blowfish ($A) =="
   rm -rf "$BF_OUT"
-  "$GEM5" -d "$BF_OUT" "$CFG" \
-    --cmd "$BF_DIR/bf.riscv" \
-    --options e "$BF_DIR/input_large.asc" "$BF_ENC" 0123456789ABCDEF
+  run_workload blowfish_large "$BF_OUT"
 
   DIJ_CSV="$OUT/q1_${A}_dijkstra.csv"
   BF_CSV="$OUT/q1_${A}_blowfish.csv"
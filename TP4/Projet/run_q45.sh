@@ -24,13 +24,9 @@ fi
 BASE="$(cd "$(dirname "$0")" && pwd)"
 ROOT="$(cd "$BASE/../.." && pwd)"
 
-DIJ_DIR="$BASE/dijkstra"
-BF_DIR="$BASE/blowfish"
-DIJ_LARGE_BIN="$DIJ_DIR/dijkstra_large.riscv"
-DIJ_INPUT="$DIJ_DIR/input.dat"
-BF_BIN="$BF_DIR/bf.riscv"
-BF_INPUT_LARGE="$BF_DIR/input_large.asc"
-BF_KEY="0123456789ABCDEF"
+# Binaries, inputs and command lines: workload registry (workloads.toml)
+WORKLOADS=( dijkstra_large blowfish_large )
+REGISTRY=( python3 "$BASE/workloads.py" )
 
 CFG_A7="$ROOT/TP4/se_A7.py"
 CFG_A15="$ROOT/TP4/se_A15.py"
@@ -48,12 +44,9 @@ echo "  - dijkstra_large (input.dat)"
 echo "  - blowfish (input_large.asc)"
 echo
 
-echo "== Building benchmarks =="
-make -C "$DIJ_DIR" clean all
-make -C "$BF_DIR" clean all
-
-if [ ! -f "$DIJ_LARGE_BIN" ] || [ ! -f "$BF_BIN" ] || [ ! -f "$BF_INPUT_LARGE" ]; then
-  echo "Error: missing binaries after build."
+echo "== Building benchmarks (only those whose sources or toolchain changed) =="
+if ! "${REGISTRY[@]}" build "${WORKLOADS[@]}"; then
+  echo "Error: benchmark build failed."
   exit 1
 fi
 
@@ -64,14 +57,26 @@ echo "arch,question,workload,l1_kB,simSeconds,simInsts,numCycles,ipc,cpi,icache_
 get_stat() {
   local stats_file="$1"
   local key="$2"
-  awk -v k="$key" '$1 == k {print $2; found=1; exit} END {if (!found) print "NA"}' "$stats_file"
+  # Runs with --stats-period hold several dumps, each reset after the
+  # previous one: counters are summed over the dumps (ratios: get_rate,
+  # stats gem5 never resets: get_last)
+  awk -v k="$key" '$1 == k {v += $2; raw = $2; n++}
+    END {if (n == 1) print raw; else if (n > 1) printf "%.15g\n", v; else print "NA"}' "$stats_file"
 }
 
-get_stat_any() {
+# get_last <stats> <key>: value in the last dump, for the stats that are
+# never reset and already cover the whole run (simInsts)
+get_last() {
+  local stats_file="$1"
+  local key="$2"
+  awk -v k="$key" '$1 == k {v = $2; found = 1} END {if (found) print v; else print "NA"}' "$stats_file"
+}
+
+# committed_insts <stats>: instructions committed by system.cpu, summed
+committed_insts() {
   local stats_file="$1"
-  shift
   local value
-  for key in "$@"; do
+  for key in system.cpu.committedInsts system.cpu.commitStats0.numInsts; do
     value="$(get_stat "$stats_file" "$key")"
     if [ "$value" != "NA" ]; then
       echo "$value"
@@ -81,6 +86,38 @@ get_stat_any() {
   echo "NA"
 }
 
+num_dumps() {
+  grep -c "Begin Simulation Statistics" "$1"
+}
+
+# get_rate <stats> <ratio stat> <numerator> <denominator>: the ratio gem5
+# reports when there is a single dump, else the ratio of the given
+# numerator and denominator (counters summed over the dumps)
+get_rate() {
+  local stats_file="$1"
+  if [ "$(num_dumps "$stats_file")" -le 1 ]; then
+    get_stat "$stats_file" "$2"
+  else
+    calc_ratio "$3" "$4"
+  fi
+}
+
+# miss_rate <stats> <cache>: overall miss rate, demand one as fallback
+miss_rate() {
+  local stats_file="$1"
+  local c="$2"
+  local value
+  for kind in overall demand; do
+    value="$(get_rate "$stats_file" "$c.${kind}MissRate::total" \
+      "$(get_stat "$stats_file" "$c.${kind}Misses::total")" "$(get_stat "$stats_file" "$c.${kind}Accesses::total")")"
+    if [ "$value" != "NA" ]; then
+      echo "$value"
+      return
+    fi
+  done
+  echo "NA"
+}
+
 calc_ratio() {
   local num="$1"
   local den="$2"
@@ -100,14 +137,20 @@ run_one() {
   local l1_size="${size_kb}kB"
   local outdir="$OUT/m5out_${question}_${arch}_${workload}_l1_${size_kb}kB"
   local cmd
+  local extra=()
 
-  if [ "$workload" = "dijkstra_large" ]; then
-    cmd=( "$GEM5" -d "$outdir" "$cfg" --cmd "$DIJ_LARGE_BIN" --l1i-size "$l1_size" --l1d-size "$l1_size" --options "$DIJ_INPUT" )
-  elif [ "$workload" = "blowfish_large" ]; then
-    cmd=( "$GEM5" -d "$outdir" "$cfg" --cmd "$BF_BIN" --l1i-size "$l1_size" --l1d-size "$l1_size" --options e "$BF_INPUT_LARGE" "$outdir/output.enc" "$BF_KEY" )
-  else
-    echo "Error: unknown workload '$workload'"
-    exit 1
+  # STATS_PERIOD=10ms ./run_q45.sh -> periodic dumps, followed by monitor.py --watch
+  if [ -n "${STATS_PERIOD:-}" ]; then
+    extra=( --stats-period "$STATS_PERIOD" )
+  fi
+
+  local bin
+  local wl_args=()
+  bin="$("${REGISTRY[@]}" binary "$workload")"
+  mapfile -t wl_args < <("${REGISTRY[@]}" args "$workload" --outdir "$outdir")
+  cmd=( "$GEM5" -d "$outdir" "$cfg" "${extra[@]}" --cmd "$bin" --l1i-size "$l1_size" --l1d-size "$l1_size" )
+  if [ "${#wl_args[@]}" -gt 0 ]; then
+    cmd+=( --options "${wl_args[@]}" )
   fi
 
   echo "== Running $question | $arch | $workload | L1=${size_kb}kB =="
@@ -124,18 +167,19 @@ run_one() {
     return
   fi
 
-  local simSeconds simInsts numCycles ipc cpi
+  local simSeconds simInsts insts numCycles ipc cpi
   local iMiss dMiss l2Miss bpPred bpIncorrect bpRate commitMisp
 
   simSeconds="$(get_stat "$stats" "simSeconds")"
-  simInsts="$(get_stat "$stats" "simInsts")"
+  simInsts="$(get_last "$stats" "simInsts")"
+  insts="$(committed_insts "$stats")"
   numCycles="$(get_stat "$stats" "system.cpu.numCycles")"
-  ipc="$(get_stat "$stats" "system.cpu.ipc")"
-  cpi="$(get_stat "$stats" "system.cpu.cpi")"
+  ipc="$(get_rate "$stats" "system.cpu.ipc" "$insts" "$numCycles")"
+  cpi="$(get_rate "$stats" "system.cpu.cpi" "$numCycles" "$insts")"
 
-  iMiss="$(get_stat_any "$stats" "system.cpu.icache.overallMissRate::total" "system.cpu.icache.demandMissRate::total")"
-  dMiss="$(get_stat_any "$stats" "system.cpu.dcache.overallMissRate::total" "system.cpu.dcache.demandMissRate::total")"
-  l2Miss="$(get_stat_any "$stats" "system.l2cache.overallMissRate::total" "system.l2cache.demandMissRate::total")"
+  iMiss="$(miss_rate "$stats" "system.cpu.icache")"
+  dMiss="$(miss_rate "$stats" "system.cpu.dcache")"
+  l2Miss="$(miss_rate "$stats" "system.l2cache")"
 
   bpPred="$(get_stat "$stats" "system.cpu.branchPred.condPredicted")"
   bpIncorrect="$(get_stat "$stats" "system.cpu.branchPred.condIncorrect")"
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Random-access index over gem5 stats.txt files holding several dumps.
+
+With periodic dumps, stats.txt is a sequence of
+"Begin/End Simulation Statistics" blocks. The index maps
+(dump number, stat name) to the byte offset of the stat line, so that one
+stat across all dumps, or all stats of one dump, can be read without
+scanning the whole file.
+
+The index lives next to the stats file (stats.txt.idx). It is built on
+first access and rebuilt whenever the stats file size or mtime changes;
+when it cannot be written (read-only results), it is kept in memory.
+
+The reports share the helpers at the end of this module to read a gem5
+output directory: the stats to analyse (the ROI dump of roi.json for --roi
+runs, otherwise the whole run with the periodic dumps added up), the
+workload name from config.ini and the "outdirs... --glob" arguments.
+
+Usage:
+  python3 stats_index.py m5out/stats.txt --info
+  python3 stats_index.py m5out/stats.txt --stat system.cpu.ipc
+  python3 stats_index.py m5out/stats.txt --dump 3
+"""
+import argparse
+import configparser
+import glob
+import json
+import mmap
+import os
+import re
+import sys
+import threading
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+BEGIN_MARK = b"---------- Begin Simulation Statistics"
+END_MARK = b"---------- End Simulation Statistics"
+
+INDEX_MAGIC = b"GEM5STATSIDX 1\n"
+INDEX_SUFFIX = ".idx"
+
+# Unit at the end of the description: "# Number of cpu cycles simulated (Cycle)"
+_UNIT = re.compile(rb"\(([A-Za-z]+)\)\s*$")
+
+
+def to_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _file_key(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _scan(mm: mmap.mmap) -> Tuple[List[Tuple[int, int]], Dict[bytes, List[Tuple[int, int]]]]:
+    """
+    Single pass over the stats file.
+    Returns the byte range of every dump and, per stat name, the list of
+    (dump, line offset) where it appears.
+    """
+    dumps: List[Tuple[int, int]] = []
+    postings: Dict[bytes, List[Tuple[int, int]]] = {}
+    size = len(mm)
+    pos = 0
+    begin = -1
+
+    while pos < size:
+        nl = mm.find(b"\n", pos)
+        if nl < 0:
+            nl = size
+        line = mm[pos:nl]
+
+        if line.startswith(BEGIN_MARK):
+            begin = pos
+        elif line.startswith(END_MARK):
+            if begin >= 0:
+                dumps.append((begin, nl + 1 if nl < size else size))
+            begin = -1
+        elif begin >= 0 and line and not line[:1].isspace():
+            name = line.split(None, 1)[0]
+            postings.setdefault(name, []).append((len(dumps), pos))
+
+        pos = nl + 1
+
+    return dumps, postings
+
+
+class StatsIndex:
+    """
+    Lazily built (dump, stat) -> offset index over one stats.txt.
+    """
+
+    def __init__(self, stats_path: str, index_path: Optional[str] = None):
+        self.stats_path = stats_path
+        self.index_path = index_path or stats_path + INDEX_SUFFIX
+        self._key: Optional[Tuple[int, int]] = None
+        self._dumps: List[Tuple[int, int]] = []
+        self._names: Dict[str, Tuple[int, int]] = {}
+        self._postings: Optional[memoryview] = None
+        self._stats_mm: Optional[mmap.mmap] = None
+        self._index_mm: Optional[mmap.mmap] = None
+        self._swapped: Optional[array] = None
+
+    # ------------------ Build / load ------------------
+
+    def _close_maps(self) -> None:
+        if self._postings is not None:
+            self._postings.release()
+            self._postings = None
+        for mm in (self._stats_mm, self._index_mm):
+            if mm is not None:
+                mm.close()
+        self._stats_mm = None
+        self._index_mm = None
+        self._swapped = None
+
+    def close(self) -> None:
+        self._close_maps()
+        self._key = None
+
+    def __enter__(self) -> "StatsIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _build(self, key: Tuple[int, int]) -> bytes:
+        """Index image of the stats file."""
+        with open(self.stats_path, "rb") as f:
+            if key[0] == 0:
+                dumps, postings = [], {}
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    dumps, postings = _scan(mm)
+
+        names: Dict[str, List[int]] = {}
+        payload = array("Q")
+        for name, hits in postings.items():
+            names[name.decode("utf-8", "replace")] = [len(payload) // 2, len(hits)]
+            for dump, off in hits:
+                payload.append(dump)
+                payload.append(off)
+        if sys.byteorder != "little":
+            payload.byteswap()
+
+        header = json.dumps(
+            {"size": key[0], "mtime_ns": key[1], "dumps": dumps, "names": names},
+            separators=(",", ":"),
+        ).encode()
+
+        # Payload starts on an 8-byte boundary so it can be cast to uint64.
+        head_len = len(INDEX_MAGIC) + len(header) + 1
+        pad = (-head_len) % 8
+
+        return INDEX_MAGIC + header + b"\n" + b" " * pad + payload.tobytes()
+
+    def _store(self, image: bytes) -> bool:
+        """Write the index next to the stats file; False when that is not possible."""
+        # Private temp file: several readers may rebuild the same index at once
+        tmp = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(image)
+            os.replace(tmp, self.index_path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return False
+        return True
+
+    def _parse(self, image, key: Tuple[int, int]) -> bool:
+        """Header and postings of an index image (mmap of the index file or bytes)."""
+        if image[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            return False
+        nl = image.find(b"\n", len(INDEX_MAGIC))
+        if nl < 0:
+            return False
+        try:
+            header = json.loads(image[len(INDEX_MAGIC):nl])
+        except ValueError:
+            return False
+        if (header.get("size"), header.get("mtime_ns")) != key:
+            return False
+        start = nl + 1
+        start += (-start) % 8
+
+        self._dumps = [tuple(d) for d in header["dumps"]]
+        self._names = {k: tuple(v) for k, v in header["names"].items()}
+        view = memoryview(image)[start:]
+        if sys.byteorder == "little":
+            self._postings = view.cast("Q")
+        else:
+            self._swapped = array("Q", view.tobytes())
+            self._swapped.byteswap()
+            view.release()
+            self._postings = memoryview(self._swapped)
+        return True
+
+    def _load(self, key: Tuple[int, int]) -> bool:
+        try:
+            f = open(self.index_path, "rb")
+        except OSError:
+            return False
+        with f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                return False
+        if not self._parse(mm, key):
+            mm.close()
+            return False
+        self._index_mm = mm
+        return True
+
+    def _ensure(self) -> None:
+        key = _file_key(self.stats_path)
+        if key == self._key:
+            return
+
+        self._close_maps()
+        if not self._load(key):
+            image = self._build(key)
+            # Read-only directory, or another reader replaced the file meanwhile
+            if not (self._store(image) and self._load(key)) and not self._parse(image, key):
+                raise RuntimeError(f"Cannot load index {self.index_path}")
+
+        if key[0] > 0:
+            with open(self.stats_path, "rb") as f:
+                self._stats_mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._key = key
+
+    # ------------------ Queries ------------------
+
+    def _value_at(self, offset: int) -> Optional[str]:
+        mm = self._stats_mm
+        nl = mm.find(b"\n", offset)
+        line = mm[offset:nl if nl >= 0 else len(mm)]
+        parts = line.split(None, 2)
+        if len(parts) < 2:
+            return None
+        return parts[1].decode("utf-8", "replace")
+
+    def num_dumps(self) -> int:
+        self._ensure()
+        return len(self._dumps)
+
+    def names(self) -> List[str]:
+        self._ensure()
+        return sorted(self._names)
+
+    def raw_series(self, name: str) -> List[Tuple[int, str]]:
+        """(dump, raw value) for every dump containing `name`."""
+        self._ensure()
+        entry = self._names.get(name)
+        if entry is None:
+            return []
+        first, count = entry
+        post = self._postings
+        out: List[Tuple[int, str]] = []
+        for i in range(first, first + count):
+            value = self._value_at(post[2 * i + 1])
+            if value is not None:
+                out.append((post[2 * i], value))
+        return out
+
+    def series(self, name: str) -> List[Tuple[int, Optional[float]]]:
+        return [(d, to_float(v)) for d, v in self.raw_series(name)]
+
+    def get(self, dump: int, name: str) -> Optional[str]:
+        """Raw value of `name` in dump number `dump` (0-based, negative allowed)."""
+        self._ensure()
+        if dump < 0:
+            dump += len(self._dumps)
+        entry = self._names.get(name)
+        if entry is None:
+            return None
+        first, count = entry
+        post = self._postings
+        # postings are sorted by dump: binary search
+        lo, hi = first, first + count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if post[2 * mid] < dump:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < first + count and post[2 * lo] == dump:
+            return self._value_at(post[2 * lo + 1])
+        return None
+
+    def get_float(self, dump: int, name: str) -> Optional[float]:
+        return to_float(self.get(dump, name))
+
+    def iter_dump_units(self, dump: int) -> Iterator[Tuple[str, str, str]]:
+        """(name, raw value, unit) for every stat of dump number `dump` ("" without unit)."""
+        self._ensure()
+        begin, end = self._dumps[dump]
+        block = self._stats_mm[begin:end]
+        for line in block.split(b"\n"):
+            if not line or line[:1].isspace() or line.startswith(b"----------"):
+                continue
+            parts = line.split(None, 2)
+            if len(parts) >= 2:
+                m = _UNIT.search(parts[2]) if len(parts) > 2 else None
+                yield (parts[0].decode("utf-8", "replace"), parts[1].decode("utf-8", "replace"),
+                       m.group(1).decode() if m else "")
+
+    def iter_dump(self, dump: int) -> Iterator[Tuple[str, str]]:
+        """(name, raw value) for every stat of dump number `dump`."""
+        for name, value, _ in self.iter_dump_units(dump):
+            yield name, value
+
+    def dump(self, dump: int) -> Dict[str, str]:
+        return dict(self.iter_dump(dump))
+
+
+# ------------------ Whole run ------------------
+
+# Stats gem5 never resets: the last dump holds their value for the whole run
+# (simSeconds/simTicks/hostSeconds restart at each reset and are summed)
+CUMULATIVE_STATS = frozenset(["simInsts", "simOps", "finalTick", "simFreq", "hostMemory"])
+# Units of the counters, which add up over the dumps
+COUNTER_UNITS = frozenset(["Count", "Cycle", "Tick", "Second", "Byte", "Joule"])
+# Distribution summaries that are not sums
+_DIST_SUMMARY = ("::mean", "::stdev", "::gmean", "::min_value", "::max_value")
+
+
+def _format_total(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def aggregate_dumps(idx: StatsIndex) -> Dict[str, str]:
+    """
+    Stats of the whole run from every dump of the index.
+
+    periodicStatDump (--stats-period) resets the stats after each dump:
+    counters are summed over the dumps and CUMULATIVE_STATS come from the
+    last one. Ratios, averages and rates cannot be rebuilt from their
+    per-dump values and are left out when there are several dumps; the
+    reports derive theirs from the summed counters.
+    """
+    n = idx.num_dumps()
+    if n == 1:
+        return idx.dump(0)
+    totals: Dict[str, float] = {}
+    for d in range(n):
+        for name, raw, unit in idx.iter_dump_units(d):
+            if unit not in COUNTER_UNITS or name in CUMULATIVE_STATS or name.endswith(_DIST_SUMMARY):
+                continue
+            value = to_float(raw)
+            if value is not None and value == value:
+                totals[name] = totals.get(name, 0.0) + value
+    out = {name: _format_total(v) for name, v in totals.items()}
+    for name in CUMULATIVE_STATS:
+        value = idx.get(-1, name)
+        if value is not None:
+            out[name] = value
+    return out
+
+
+# ------------------ Output directories ------------------
+
+def roi_dump(outdir: str) -> Optional[int]:
+    """Dump number of the ROI recorded in roi.json, None without one."""
+    label = os.path.join(outdir, "roi.json")
+    if not os.path.isfile(label):
+        return None
+    with open(label) as f:
+        info = json.load(f)
+    if not info.get("complete", True):
+        print(f"Warning: {outdir}: incomplete ROI (no m5_work_end), its dump runs from work_begin to the exit")
+    return int(info.get("roi_dump", -1))
+
+
+def read_outdir_dump(outdir: str) -> Optional[Dict[str, str]]:
+    """Stats of the ROI dump of an output directory, else of the whole run (aggregate_dumps)."""
+    stats_path = os.path.join(outdir, "stats.txt")
+    if not os.path.isfile(stats_path):
+        return None
+    with StatsIndex(stats_path) as idx:
+        if idx.num_dumps() == 0:
+            return None
+        roi = roi_dump(outdir)
+        return aggregate_dumps(idx) if roi is None else idx.dump(roi)
+
+
+def read_config(outdir: str) -> configparser.ConfigParser:
+    """config.ini of an output directory (empty when missing)."""
+    cfg = configparser.ConfigParser(interpolation=None, strict=False)
+    cfg.read(os.path.join(outdir, "config.ini"))
+    return cfg
+
+
+def workload_section(cfg: configparser.ConfigParser) -> Optional[str]:
+    """config.ini section of the (first) CPU's workload."""
+    for section in ("system.cpu.workload", "system.cpu0.workload"):
+        if cfg.get(section, "cmd", fallback="").split():
+            return section
+    return None
+
+
+def workload_name(outdir: str, cfg: Optional[configparser.ConfigParser] = None) -> str:
+    """Binary name of the workload, without extension ("?" if unknown)."""
+    cfg = read_config(outdir) if cfg is None else cfg
+    section = workload_section(cfg)
+    if section is None:
+        return "?"
+    return os.path.splitext(os.path.basename(cfg.get(section, "cmd").split()[0]))[0]
+
+
+def add_outdir_args(ap: argparse.ArgumentParser, help: str = "gem5 output directories") -> None:
+    ap.add_argument("outdirs", nargs="*", help=help)
+    ap.add_argument("--glob", action="append", default=[], help="Glob of output directories (repeatable)")
+
+
+def outdirs_from_args(args: argparse.Namespace) -> List[str]:
+    dirs = list(args.outdirs)
+    for pattern in args.glob:
+        dirs += sorted(glob.glob(pattern))
+    return dirs
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Query a multi-dump gem5 stats.txt through a sidecar index")
+    ap.add_argument("stats", help="Path to stats.txt")
+    ap.add_argument("--info", action="store_true", help="Print number of dumps and stats")
+    ap.add_argument("--stat", action="append", default=[], help="Stat name to print across all dumps")
+    ap.add_argument("--dump", type=int, default=None, help="Print all stats of dump k (0-based, -1 = last)")
+    ap.add_argument("--rebuild", action="store_true", help="Force index rebuild")
+    args = ap.parse_args()
+
+    if not os.path.isfile(args.stats):
+        raise SystemExit(f"Stats file not found: {args.stats}")
+
+    idx = StatsIndex(args.stats)
+    if args.rebuild and os.path.exists(idx.index_path):
+        os.remove(idx.index_path)
+
+    with idx:
+        if args.info or (not args.stat and args.dump is None):
+            print(f"{args.stats}: {idx.num_dumps()} dumps, {len(idx.names())} stats")
+            print(f"index: {idx.index_path}")
+
+        if args.stat:
+            print(",".join(["dump"] + args.stat))
+            cols = [dict(idx.raw_series(s)) for s in args.stat]
+            for d in range(idx.num_dumps()):
+                print(",".join([str(d)] + [c.get(d, "NA") for c in cols]))
+
+        if args.dump is not None:
+            for name, value in idx.iter_dump(args.dump):
+                print(f"{name},{value}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+TLB behaviour of gem5 runs made with the TLB options of se_common/tlb.py
+(--dtlb-entries ... or --tlb-profile).
+
+For every core with a TlbProfiler (<cpu>.tlb_model), from its stats:
+  - ITLB / DTLB / L2 TLB miss rates
+  - page walks per kilo-instruction (walk MPKI)
+  - walker cache hit rate (walks shortened by a cached non-leaf entry)
+  - average walk latency (estimated cycles per walk)
+  - walk share = walk cycles / core cycles: what translation would cost
+    at most if walks were not overlapped with other work
+
+The TLB model is functional (RISC-V SE mode never looks up the gem5 TLBs):
+the run's timing does not include these walks. Sizes come from the tlb.json
+written by se_common/tlb.py.
+
+Only the ROI dump of --roi runs is read.
+
+Usage:
+  python3 TP4/Projet/tlb_report.py m5out_a15_dij_tlb
+  python3 TP4/Projet/tlb_report.py --glob 'm5out_pr_*_tlb*' --csv tlb.csv
+"""
+import argparse
+import csv
+import json
+import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from stats_index import add_outdir_args, outdirs_from_args, read_outdir_dump, to_float, workload_name
+
+_MODEL_STAT = re.compile(r"^(system\.cpu\d*)\.tlb_model\.(\w+)$")
+_CPU_STAT = re.compile(r"^(system\.cpu\d*)\.(committedInsts|numCycles)$")
+
+FIELDNAMES = ["workload", "cpu", "itlb", "dtlb", "l2tlb", "walker_cache", "itlb_miss_%", "dtlb_miss_%",
+              "l2tlb_miss_%", "walk_mpki", "wc_hit_%", "walk_lat", "walk_share_%", "run"]
+
+
+@dataclass
+class CoreTLB:
+    path: str
+    workload: str
+    cpu: str
+    config: Dict
+    stats: Dict[str, float] = field(default_factory=dict)
+    insts: float = 0.0
+    cycles: float = 0.0
+
+    def ratio(self, num: str, den: str) -> float:
+        d = self.stats.get(den, 0.0)
+        return self.stats.get(num, 0.0) / d if d else 0.0
+
+
+def read_run(outdir: str) -> List[CoreTLB]:
+    label = os.path.join(outdir, "tlb.json")
+    if not os.path.isfile(label):
+        return []
+    with open(label) as f:
+        config = json.load(f)
+
+    stats = read_outdir_dump(outdir)
+    if stats is None:
+        return []
+
+    workload = workload_name(outdir)
+    cores: Dict[str, CoreTLB] = {}
+    counters: Dict[str, Dict[str, float]] = defaultdict(dict)
+    for name, raw in stats.items():
+        m = _MODEL_STAT.match(name)
+        value = to_float(raw)
+        if m and value is not None:
+            cpu = m.group(1)
+            core = cores.setdefault(cpu, CoreTLB(path=outdir, workload=workload, cpu=cpu, config=config))
+            core.stats[m.group(2)] = value
+            continue
+        m = _CPU_STAT.match(name)
+        if m and value is not None:
+            counters[m.group(1)][m.group(2)] = value
+
+    for cpu, core in cores.items():
+        core.insts = counters[cpu].get("committedInsts", 0.0)
+        core.cycles = counters[cpu].get("numCycles", 0.0)
+    return [cores[c] for c in sorted(cores)]
+
+
+def _size(config: Dict, name: str) -> str:
+    entries = config.get(f"{name}_entries", 0)
+    if not entries:
+        return "-"
+    assoc = config.get(f"{name}_assoc", 0)
+    return f"{entries}/{assoc}w" if assoc else f"{entries}/fa"
+
+
+def build_rows(cores: List[CoreTLB]) -> List[Dict[str, str]]:
+    rows: List[Dict[str, str]] = []
+    for c in sorted(cores, key=lambda c: (c.workload, c.path, c.cpu)):
+        has_l2 = c.config.get("l2tlb_entries", 0) > 0
+        has_wc = c.config.get("walker_cache_entries", 0) > 0
+        walks = c.stats.get("walks", 0.0)
+        rows.append({
+            "workload": c.workload,
+            "cpu": c.cpu,
+            "itlb": _size(c.config, "itlb"),
+            "dtlb": _size(c.config, "dtlb"),
+            "l2tlb": _size(c.config, "l2tlb"),
+            "walker_cache": str(c.config.get("walker_cache_entries", 0) or "-"),
+            "itlb_miss_%": f"{100 * c.ratio('itlbMisses', 'itlbAccesses'):.3f}",
+            "dtlb_miss_%": f"{100 * c.ratio('dtlbMisses', 'dtlbAccesses'):.3f}",
+            "l2tlb_miss_%": f"{100 * c.ratio('l2tlbMisses', 'l2tlbAccesses'):.3f}" if has_l2 else "",
+            "walk_mpki": f"{1000 * walks / c.insts:.3f}" if c.insts else "",
+            "wc_hit_%": f"{100 * c.ratio('walkerCacheHits', 'walks'):.2f}" if has_wc else "",
+            "walk_lat": f"{c.ratio('walkCycles', 'walks'):.1f}",
+            "walk_share_%": f"{100 * c.stats.get('walkCycles', 0.0) / c.cycles:.2f}" if c.cycles else "",
+            "run": c.path,
+        })
+    return rows
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="TLB miss rates and page walk latency of gem5 runs")
+    add_outdir_args(ap, "gem5 output directories (tlb.json + stats.txt)")
+    ap.add_argument("--csv", default=None, help="Also write the table to this CSV")
+    args = ap.parse_args()
+
+    dirs = outdirs_from_args(args)
+    cores = [c for d in dirs for c in read_run(d)]
+    if not cores:
+        print("Error: no directory with tlb.json and TlbProfiler stats (run with a TLB option or --tlb-profile)")
+        return 1
+
+    rows = build_rows(cores)
+    print(f"{'workload':<16} {'cpu':<11} {'ITLB':>7} {'DTLB':>7} {'L2TLB':>8} {'WC':>3} {'I miss%':>7} "
+          f"{'D miss%':>7} {'L2 miss%':>8} {'MPKI':>7} {'WC hit%':>7} {'walk':>6} {'share%':>6}")
+    for r in rows:
+        print(f"{r['workload'][:16]:<16} {r['cpu']:<11} {r['itlb']:>7} {r['dtlb']:>7} {r['l2tlb']:>8} "
+              f"{r['walker_cache']:>3} {r['itlb_miss_%']:>7} {r['dtlb_miss_%']:>7} {r['l2tlb_miss_%']:>8} "
+              f"{r['walk_mpki']:>7} {r['wc_hit_%']:>7} {r['walk_lat']:>6} {r['walk_share_%']:>6}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            w.writeheader()
+            w.writerows(rows)
+        print(f"Wrote {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
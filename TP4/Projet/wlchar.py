@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Microarchitecture-independent workload characterization.
+
+One atomic profiling pass per binary (se_profile.py with the
+WorkloadProfiler of TP4/wlprof_gem5, "WLCHAR" study of experiments.toml)
+gives the instruction mix, LRU reuse-distance histograms of data and
+instruction lines, the working set per window, the taken rate and
+transition entropy of the conditional branches and the ILP of an ideal
+machine. `collect` stores each profile under wlprof/<workload>.json with a
+summary that sweeps can be targeted from:
+
+  ld/st/br/fp/mul_%   instruction mix (share of the instructions)
+  dfoot/ifoot_kB      data / instruction footprint (distinct lines)
+  d_knee/i_knee_kB    smallest fully associative LRU cache removing 90% of
+                      the non-cold misses (from the reuse distances: a
+                      cache of S lines hits every reuse at distance < S)
+  ws_p50/ws_max_kB    data working set per window (median / max)
+  taken_%, trans_H    conditional branches taken, transition entropy
+                      H(outcome | previous outcome of the same branch):
+                      0 = perfectly predictable by a 1-bit history
+  ilp                 instructions / critical path of the ideal machine
+  sweep               parameters the workload is sensitive to, with the
+                      range worth sweeping
+
+Usage:
+  python3 TP4/Projet/wlchar.py run --gem5 ~/gem5/build/RISCV/gem5.fast --parallel 4
+  python3 TP4/Projet/wlchar.py collect
+  python3 TP4/Projet/wlchar.py report --csv wlchar.csv
+  python3 TP4/Projet/wlchar.py report --mrc dijkstra_large
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import statistics
+from typing import Dict, List, Optional, Tuple
+
+import expspec
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+STUDY = "WLCHAR"
+DB_DIR = os.path.join(BASE, "wlprof")
+
+# Cache sizes of the miss-ratio curves (kB)
+MRC_KB = [0.5, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096]
+# Share of the non-cold misses a "knee" cache removes
+KNEE_SHARE = 0.9
+
+FIELDNAMES = ["workload", "insts", "ld_%", "st_%", "br_%", "fp_%", "mul_%", "dfoot_kB", "ifoot_kB", "d_knee_kB",
+              "i_knee_kB", "ws_p50_kB", "ws_max_kB", "taken_%", "trans_H", "ilp", "sweep"]
+
+
+# ------------------ Reuse distances ------------------
+
+def miss_ratio(reuse: Dict, lines: float) -> float:
+    """Miss ratio of a fully associative LRU cache of `lines` lines."""
+    hist = reuse.get("hist", [])
+    cold = reuse.get("cold", 0)
+    total = cold + sum(hist)
+    if not total:
+        return 0.0
+    # bucket b >= 1 holds distances in [2^(b-1), 2^b): all hit when 2^b <= lines
+    k = int(math.floor(math.log2(lines))) if lines >= 1 else -1
+    return (cold + sum(hist[max(0, k + 1):])) / total
+
+
+def mrc(reuse: Dict, line_bytes: int) -> List[Tuple[float, float]]:
+    return [(kb, miss_ratio(reuse, kb * 1024 / line_bytes)) for kb in MRC_KB]
+
+
+def knee_kb(reuse: Dict, line_bytes: int) -> Optional[float]:
+    """Smallest MRC size removing KNEE_SHARE of the non-cold misses."""
+    curve = mrc(reuse, line_bytes)
+    total = reuse.get("cold", 0) + sum(reuse.get("hist", []))
+    if not total:
+        return None
+    floor = reuse.get("cold", 0) / total
+    top = curve[0][1]
+    if top - floor <= 0:
+        return curve[0][0]
+    for kb, ratio in curve:
+        if top - ratio >= KNEE_SHARE * (top - floor):
+            return kb
+    return None
+
+
+# ------------------ Summary ------------------
+
+def _share(part: float, total: float) -> float:
+    return 100.0 * part / total if total else 0.0
+
+
+def _kb(lines: float, line_bytes: int) -> float:
+    return lines * line_bytes / 1024
+
+
+def _fmt_kb(kb: Optional[float]) -> str:
+    if kb is None:
+        return f">{MRC_KB[-1]:g}"
+    return f"{kb:g}"
+
+
+def suggest(s: Dict) -> List[str]:
+    """Parameters worth sweeping, from the summary of one workload."""
+    out = []
+    d_knee = s["d_knee_kB"]
+    if d_knee is None or d_knee > 32:
+        out.append(f"l2 {_fmt_kb(min(d_knee or MRC_KB[-1], 4096) / 4)}-{_fmt_kb(d_knee)}kB")
+    elif d_knee >= 1:
+        out.append(f"l1d {d_knee / 4:g}-{d_knee * 2:g}kB")
+    i_knee = s["i_knee_kB"]
+    if i_knee is None or i_knee >= 4:
+        out.append(f"l1i {(i_knee or 64) / 4:g}-{(i_knee or 64) * 2:g}kB")
+    if s["br_%"] >= 8 and s["trans_H"] >= 0.1:
+        out.append("bpred")
+    if s["ilp"] >= 3:
+        out.append("width/rob")
+    if s["fp_%"] >= 10 or s["mul_%"] >= 5:
+        out.append("fu")
+    if s["dfoot_kB"] >= 1024:
+        out.append("tlb")
+    return out
+
+
+def summarize(profile: Dict) -> Dict:
+    insts = profile.get("insts", 0)
+    mix = profile.get("mix", {})
+    kinds = profile.get("kinds", {})
+    line = profile.get("line_bytes", 64)
+    data = profile.get("reuse", {}).get("data", {})
+    inst = profile.get("reuse", {}).get("inst", {})
+    ws = profile.get("working_set", {}).get("data_lines", []) or [0]
+    br = profile.get("branches", {})
+
+    fp = sum(v for k, v in mix.items() if k.startswith(("Float", "Simd")))
+    mul = sum(v for k, v in mix.items() if k in ("IntMult", "IntDiv"))
+    s = {
+        "insts": insts,
+        "ld_%": _share(kinds.get("loads", 0), insts),
+        "st_%": _share(kinds.get("stores", 0), insts),
+        "br_%": _share(kinds.get("branches", 0), insts),
+        "fp_%": _share(fp, insts),
+        "mul_%": _share(mul, insts),
+        "dfoot_kB": _kb(data.get("cold", 0), line),
+        "ifoot_kB": _kb(inst.get("cold", 0), line),
+        "d_knee_kB": knee_kb(data, line),
+        "i_knee_kB": knee_kb(inst, line),
+        "ws_p50_kB": _kb(statistics.median(ws), line),
+        "ws_max_kB": _kb(max(ws), line),
+        "taken_%": _share(br.get("taken", 0), br.get("cond", 0)),
+        "trans_H": br.get("transition_entropy", 0.0),
+        "ilp": profile.get("ilp", {}).get("ilp", 0.0),
+    }
+    s["sweep"] = suggest(s)
+    return s
+
+
+# ------------------ Store ------------------
+
+def study_runs(spec_path: str, runs_dir: str) -> List[Tuple[str, expspec.Job]]:
+    """(workload, job) of every point of the WLCHAR study."""
+    jobs, points = expspec.compile_spec(expspec.load_spec(spec_path), [STUDY])
+    by_id = {j.id: j for j in jobs}
+    return [(str(p.params["workload"]), by_id[p.job_id]) for p in points]
+
+
+def collect(spec_path: str, runs_dir: str, db_dir: str) -> List[str]:
+    os.makedirs(db_dir, exist_ok=True)
+    stored = []
+    for workload, job in study_runs(spec_path, runs_dir):
+        path = os.path.join(job.outdir(runs_dir), "wlprof.json")
+        if not os.path.isfile(path):
+            print(f"Warning: no profile for {workload} ({path})")
+            continue
+        with open(path) as f:
+            profile = json.load(f)
+        entry = {
+            "workload": workload,
+            "cmd": job.cmd,
+            "args": job.args,
+            "job": job.id,
+            "summary": summarize(profile),
+            "profile": profile,
+        }
+        with open(os.path.join(db_dir, f"{workload}.json"), "w") as f:
+            json.dump(entry, f, indent=1)
+        stored.append(workload)
+    return stored
+
+
+def load_db(db_dir: str, names: Optional[List[str]] = None) -> List[Dict]:
+    if not os.path.isdir(db_dir):
+        return []
+    entries = []
+    for fname in sorted(os.listdir(db_dir)):
+        if not fname.endswith(".json"):
+            continue
+        if names and fname[:-5] not in names:
+            continue
+        with open(os.path.join(db_dir, fname)) as f:
+            entries.append(json.load(f))
+    return entries
+
+
+def build_rows(entries: List[Dict]) -> List[Dict[str, str]]:
+    rows = []
+    for e in entries:
+        s = summarize(e["profile"])
+        row = {"workload": e["workload"], "insts": str(s["insts"])}
+        for key in FIELDNAMES[2:-1]:
+            value = s[key]
+            if key.endswith("knee_kB"):
+                row[key] = _fmt_kb(value)
+            elif key == "trans_H":
+                row[key] = f"{value:.3f}"
+            else:
+                row[key] = f"{value:.2f}" if key != "ilp" else f"{value:.1f}"
+        row["sweep"] = " ".join(s["sweep"])
+        rows.append(row)
+    return rows
+
+
+# ------------------ CLI ------------------
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Workload characterization profiles (one atomic pass per binary)")
+    ap.add_argument("--spec", default=expspec.DEFAULT_SPEC, help="Experiment spec (study WLCHAR)")
+    ap.add_argument("--runs-dir", default=expspec.DEFAULT_RUNS, help="Runs directory of the spec")
+    ap.add_argument("--db", default=DB_DIR, help="Per-workload profile store (default: TP4/Projet/wlprof)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("run", help="Run the profiling passes (skips the done ones), then collect")
+    p.add_argument("--gem5", default=os.environ.get("GEM5", "gem5.opt"), help="gem5 binary (gem5.fast is enough)")
+    p.add_argument("--parallel", type=int, default=1, help="gem5 processes in parallel")
+    p.add_argument("--force", action="store_true", help="Rerun finished passes")
+    sub.add_parser("collect", help="Store the finished passes per workload")
+    p = sub.add_parser("report", help="Summary table of the stored profiles")
+    p.add_argument("workloads", nargs="*", help="Only these workloads")
+    p.add_argument("--mrc", action="append", default=[], help="Also print the miss-ratio curves of a workload")
+    p.add_argument("--csv", default=None, help="Also write the table to this CSV")
+    args = ap.parse_args()
+
+    if args.cmd in ("run", "collect"):
+        if args.cmd == "run":
+            jobs = list({job.id: job for _, job in study_runs(args.spec, args.runs_dir)}.values())
+            os.makedirs(args.runs_dir, exist_ok=True)
+            expspec.link_labels(jobs, args.runs_dir)
+            code = expspec.run_jobs(jobs, args.gem5, args.runs_dir, args.parallel, args.force)
+            if code:
+                print("Warning: some passes failed, collecting the others")
+        stored = collect(args.spec, args.runs_dir, args.db)
+        print(f"Stored {len(stored)} profiles in {args.db}")
+        return 0
+
+    entries = load_db(args.db, args.workloads or None)
+    if not entries:
+        print(f"Error: no stored profile in {args.db} (wlchar.py run / collect)")
+        return 1
+
+    rows = build_rows(entries)
+    print(f"{'workload':<16} {'Minsts':>8} {'ld%':>5} {'st%':>5} {'br%':>5} {'fp%':>5} {'dfoot':>8} {'dknee':>6} "
+          f"{'iknee':>6} {'ws50':>7} {'taken%':>6} {'transH':>6} {'ILP':>5}  sweep")
+    for r in rows:
+        print(f"{r['workload'][:16]:<16} {int(r['insts']) / 1e6:>8.1f} {r['ld_%']:>5} {r['st_%']:>5} {r['br_%']:>5} "
+              f"{r['fp_%']:>5} {r['dfoot_kB']:>8} {r['d_knee_kB']:>6} {r['i_knee_kB']:>6} {r['ws_p50_kB']:>7} "
+              f"{r['taken_%']:>6} {r['trans_H']:>6} {r['ilp']:>5}  {r['sweep']}")
+
+    for name in args.mrc:
+        match = [e for e in entries if e["workload"] == name]
+        if not match:
+            print(f"\nNo stored profile for {name}")
+            continue
+        prof = match[0]["profile"]
+        line = prof.get("line_bytes", 64)
+        reuse = prof.get("reuse", {})
+        print(f"\n{name}: miss ratio of a fully associative LRU cache ({line} B lines)")
+        print(f"{'kB':>8} {'data':>8} {'inst':>8}")
+        for (kb, d), (_, i) in zip(mrc(reuse.get("data", {}), line), mrc(reuse.get("inst", {}), line)):
+            print(f"{kb:>8g} {100 * d:>7.2f}% {100 * i:>7.2f}%")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            w.writeheader()
+            w.writerows(rows)
+        print(f"Wrote {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
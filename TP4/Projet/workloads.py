@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Workload registry (workloads.toml): how each benchmark is built, which
+inputs it reads and its command line.
+
+Builds are incremental: a build is redone only when its key changed, the
+key being a hash of its source and header contents, its flags and the
+toolchain identity (`cc --version`). Keys and binary hashes are kept in
+.build_state.json; a binary missing or modified since it was built is
+rebuilt too. Independent builds run in parallel, each compiled to a
+temporary file and moved in place, so an interrupted build never leaves a
+truncated binary. Builds marked `tracked` (binaries committed with the TP
+results) are left alone unless named explicitly on `build`.
+
+Binaries and inputs are paths relative to the repo root, so the registry
+and the state file stay valid when the repo is moved. expspec.py reads the
+workloads of a spec with `registry = "workloads.toml"`; shell sweeps call
+`args` to get the command line of a workload.
+
+Usage:
+  python3 TP4/Projet/workloads.py list
+  python3 TP4/Projet/workloads.py build --parallel 4
+  python3 TP4/Projet/workloads.py build dijkstra_large blowfish_large --dry-run
+  python3 TP4/Projet/workloads.py binary blowfish_large
+  python3 TP4/Projet/workloads.py args blowfish_large --outdir m5out_bf
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib  # type: ignore[no-redef]
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(BASE, "..", ".."))
+
+DEFAULT_REGISTRY = os.path.join(BASE, "workloads.toml")
+STATE_NAME = ".build_state.json"
+
+
+@dataclass
+class Build:
+    name: str
+    dir: str
+    sources: List[str]
+    binary: str
+    cc: str
+    flags: List[str]
+    ldflags: List[str] = field(default_factory=list)
+    headers: List[str] = field(default_factory=list)
+    out: str = ""
+    tracked: bool = False
+
+    @property
+    def output(self) -> str:
+        """Binary path, relative to the repo root."""
+        return os.path.join(self.out or self.dir, self.binary)
+
+    def command(self, output: str) -> List[str]:
+        return [self.cc] + self.flags + self.sources + ["-o", output] + self.ldflags
+
+
+@dataclass
+class Workload:
+    name: str
+    build: str
+    cmd: str
+    inputs: Dict[str, str] = field(default_factory=dict)
+    args: List[str] = field(default_factory=list)
+
+    def arg_templates(self) -> List[str]:
+        """Args with inputs as "{root}/<path>" and "{outdir}" left as is."""
+        values = {k: "{root}/" + v for k, v in self.inputs.items()}
+        values["outdir"] = "{outdir}"
+        values["root"] = "{root}"
+        return [a.format(**values) for a in self.args]
+
+    def command_args(self, outdir: str) -> List[str]:
+        return [a.replace("{outdir}", outdir).replace("{root}", ROOT) for a in self.arg_templates()]
+
+
+@dataclass
+class Registry:
+    builds: Dict[str, Build]
+    workloads: Dict[str, Workload]
+
+
+def _abs(path: str) -> str:
+    return path if os.path.isabs(path) else os.path.join(ROOT, path)
+
+
+def file_hash(path: str) -> Optional[str]:
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+# ------------------ Loading ------------------
+
+def load_registry(path: str = DEFAULT_REGISTRY, cc: Optional[str] = None) -> Registry:
+    with open(path, "rb") as f:
+        data = tomllib.load(f)
+    tc = data.get("toolchain", {})
+    cc = cc or os.environ.get("RISCV_CC") or tc.get("cc", "riscv64-linux-gnu-gcc")
+
+    # Generated registries (e.g. reduced inputs), skipped until they exist
+    tables = [data]
+    for inc in data.get("include", []):
+        inc_path = os.path.join(os.path.dirname(os.path.abspath(path)), inc)
+        if os.path.isfile(inc_path):
+            with open(inc_path, "rb") as f:
+                tables.append(tomllib.load(f))
+
+    builds = {}
+    for name, b in ((n, b) for t in tables for n, b in t.get("builds", {}).items()):
+        flags = [b.get("opt", tc.get("opt", "-O2"))] + list(tc.get("cflags", [])) + list(b.get("cflags", []))
+        builds[name] = Build(name=name, dir=b["dir"], sources=list(b["sources"]), binary=b["binary"], cc=cc,
+                             flags=flags, ldflags=list(b.get("ldflags", [])), headers=list(b.get("headers", [])),
+                             out=b.get("out", ""), tracked=bool(b.get("tracked", False)))
+
+    workloads = {}
+    for name, w in ((n, w) for t in tables for n, w in t.get("workloads", {}).items()):
+        if w["build"] not in builds:
+            raise ValueError(f"workload {name}: unknown build '{w['build']}'")
+        workloads[name] = Workload(name=name, build=w["build"], cmd=builds[w["build"]].output,
+                                   inputs=dict(w.get("inputs", {})), args=list(w.get("args", [])))
+    return Registry(builds=builds, workloads=workloads)
+
+
+def spec_workloads(reg: Registry) -> Dict[str, Dict[str, Any]]:
+    """Workload tables in the expspec format (cmd + args templates)."""
+    return {name: {"cmd": w.cmd, "args": w.arg_templates(), "build": w.build} for name, w in reg.workloads.items()}
+
+
+# ------------------ Builds ------------------
+
+_toolchains: Dict[str, Optional[str]] = {}
+_toolchain_lock = threading.Lock()
+
+
+def toolchain_id(cc: str) -> Optional[str]:
+    """`cc --version` and target triple, None when the compiler is missing."""
+    with _toolchain_lock:
+        if cc not in _toolchains:
+            try:
+                version = subprocess.run([cc, "--version"], capture_output=True, text=True, check=True).stdout
+                target = subprocess.run([cc, "-dumpmachine"], capture_output=True, text=True, check=True).stdout
+                _toolchains[cc] = version.strip() + "\n" + target.strip()
+            except (OSError, subprocess.CalledProcessError):
+                _toolchains[cc] = None
+        return _toolchains[cc]
+
+
+def build_key(b: Build, toolchain: str) -> str:
+    src = os.path.join(ROOT, b.dir)
+    blob = json.dumps({
+        "toolchain": toolchain,
+        "command": b.command(b.binary),
+        "files": {p: file_hash(os.path.join(src, p)) for p in sorted(b.sources + b.headers)},
+    }, sort_keys=True).encode()
+    return hashlib.sha256(blob).hexdigest()
+
+
+class Builder:
+    def __init__(self, reg: Registry, state_path: str = os.path.join(BASE, STATE_NAME)):
+        self.reg = reg
+        self.state_path = state_path
+        self.state: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+        if os.path.isfile(state_path):
+            with open(state_path) as f:
+                self.state = json.load(f)
+
+    def _save(self) -> None:
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.state_path)
+
+    def up_to_date(self, b: Build, key: str) -> bool:
+        entry = self.state.get(b.name)
+        if not entry or entry.get("key") != key or entry.get("binary") != b.output:
+            return False
+        return file_hash(_abs(b.output)) == entry.get("hash")
+
+    def build_one(self, name: str, force: bool, dry_run: bool, explicit: bool = False) -> str:
+        """"built", "up to date", "tracked", "would build" or "failed"."""
+        b = self.reg.builds[name]
+        if b.tracked and not explicit and os.path.isfile(_abs(b.output)):
+            return "tracked"
+        toolchain = toolchain_id(b.cc)
+        if toolchain is None:
+            print(f"Error: {name}: compiler '{b.cc}' not found (toolchain cc in workloads.toml or RISCV_CC)",
+                  file=sys.stderr)
+            return "failed"
+        missing = [p for p in b.sources + b.headers if not os.path.isfile(os.path.join(ROOT, b.dir, p))]
+        if missing:
+            print(f"Error: {name}: missing {', '.join(missing)} in {b.dir}", file=sys.stderr)
+            return "failed"
+        key = build_key(b, toolchain)
+        if not force and self.up_to_date(b, key):
+            return "up to date"
+        if dry_run:
+            return "would build"
+
+        out = _abs(b.output)
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        tmp = f"{out}.tmp{os.getpid()}"
+        proc = subprocess.run(b.command(os.path.abspath(tmp)), cwd=os.path.join(ROOT, b.dir),
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            print(f"Error: {name}: compilation failed\n{proc.stderr.rstrip()}", file=sys.stderr)
+            return "failed"
+        os.replace(tmp, out)
+        with self._lock:
+            self.state[name] = {"key": key, "binary": b.output, "hash": file_hash(out)}
+            self._save()
+        return "built"
+
+    def build(self, names: Iterable[str], parallel: int = 1, force: bool = False, dry_run: bool = False,
+              explicit: Iterable[str] = ()) -> int:
+        """Builds these names; tracked builds only if they are in `explicit`."""
+        names = sorted(set(names))
+        explicit = set(explicit)
+        for name in names:
+            if name not in self.reg.builds:
+                raise ValueError(f"unknown build '{name}'")
+        with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+            results = list(pool.map(lambda n: self.build_one(n, force, dry_run, n in explicit), names))
+        for name, result in zip(names, results):
+            print(f"{name:<16} {result:<11} {self.reg.builds[name].output}")
+        return 1 if "failed" in results else 0
+
+
+def build_workloads(names: Iterable[str], parallel: int = 1, force: bool = False,
+                    registry: str = DEFAULT_REGISTRY) -> int:
+    """Builds the binaries of these workloads (used by the sweep runners)."""
+    reg = load_registry(registry)
+    builds = set()
+    for name in names:
+        if name not in reg.workloads:
+            raise ValueError(f"unknown workload '{name}'")
+        builds.add(reg.workloads[name].build)
+    return Builder(reg).build(builds, parallel, force)
+
+
+# ------------------ CLI ------------------
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Workload registry: incremental builds and command lines")
+    ap.add_argument("--registry", default=DEFAULT_REGISTRY, help="Registry file (default: workloads.toml)")
+    ap.add_argument("--cc", default=None, help="Cross compiler (default: RISCV_CC or the registry toolchain)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="Workloads, their binary and inputs")
+    p = sub.add_parser("build", help="Build the binaries that changed (all, or those of the named workloads); "
+                                     "tracked binaries only when their build is named")
+    p.add_argument("names", nargs="*", help="Workload or build names (default: all)")
+    p.add_argument("--parallel", type=int, default=os.cpu_count() or 1, help="Compilations in parallel")
+    p.add_argument("--force", action="store_true", help="Rebuild even if up to date")
+    p.add_argument("--dry-run", action="store_true", help="Only report what would be built")
+    p = sub.add_parser("binary", help="Print the binary path of a workload")
+    p.add_argument("workload")
+    p.add_argument("--relative", action="store_true", help="Relative to the repo root")
+    p = sub.add_parser("args", help="Print the program arguments of a workload, one per line")
+    p.add_argument("workload")
+    p.add_argument("--outdir", default=".", help="gem5 output directory of the run")
+    args = ap.parse_args()
+
+    reg = load_registry(args.registry, args.cc)
+
+    if args.cmd == "list":
+        print(f"{'workload':<16} {'build':<16} {'binary':<40} inputs")
+        for name, w in sorted(reg.workloads.items()):
+            inputs = " ".join(f"{k}={v}" for k, v in w.inputs.items())
+            print(f"{name:<16} {w.build:<16} {w.cmd:<40} {inputs}")
+        return 0
+
+    if args.cmd == "build":
+        builds = set()
+        for name in args.names or list(reg.builds):
+            if name in reg.workloads:
+                builds.add(reg.workloads[name].build)
+            elif name in reg.builds:
+                builds.add(name)
+            else:
+                print(f"Error: unknown workload or build '{name}'")
+                return 1
+        explicit = [n for n in args.names if n in reg.builds]
+        return Builder(reg).build(builds, args.parallel, args.force, args.dry_run, explicit)
+
+    if args.workload not in reg.workloads:
+        print(f"Error: unknown workload '{args.workload}'", file=sys.stderr)
+        return 1
+    w = reg.workloads[args.workload]
+    if args.cmd == "binary":
+        print(w.cmd if args.relative else _abs(w.cmd))
+    else:
+        for a in w.command_args(os.path.abspath(args.outdir)):
+            print(a)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,648 @@
+#!/usr/bin/env python3
+"""
+Loop-transformation autotuner for the exo3 matrix product (N=100, double).
+
+Kernel variants are generated from one C template and parameterized by:
+  - loop order  : any permutation of i, j, k
+  - tile size   : square tiling of the three loops (0 = no tiling)
+  - unroll      : unroll factor of the innermost loop (1 = none)
+The operand that is invariant in the innermost loop is kept in a register
+(what gcc -O3 does on normale.c/tempo.c). The baseline "normale" is
+TP4/exo3/normale.c itself, built with the exo3 Makefile flags; the model
+replays its loop nest (order ijk, no tiling, no unroll).
+
+Evaluation modes:
+  - model  : replays each variant's data-access trace through a Python
+             model of the se_cache.py D-L1/L2 hierarchies (LRU, demand
+             accesses only). No compiler, no gem5; unroll does not change
+             the trace, so variants differing only by unroll share a result.
+  - gem5   : cross-compiles each variant for RISC-V and runs it under
+             se_cache.py (--cpu-type timing --caches --conf C).
+  - hybrid : model first, then gem5 on the --top best modeled variants
+             of each hierarchy (plus the baseline).
+
+Gains are reported as reductions relative to normale (positive = better).
+
+With --m5-inc/--m5-lib the kernel is bracketed with m5 work markers and
+se_cache.py runs with --roi, so the stats only cover the multiplication.
+normale.c is left untouched: it is linked with a small shim that places
+the markers on the two getrusage() calls of the dtime() pair around
+normal().
+
+Usage:
+  python3 TP4/exo3/autotune.py --mode model
+  python3 TP4/exo3/autotune.py --mode hybrid --gem5 /path/to/gem5.opt --top 4
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(BASE, "..", ".."))
+sys.path.insert(0, os.path.join(ROOT, "TP4", "Projet"))
+
+N = 100
+ELEM = 8  # sizeof(double)
+
+DEFAULT_WORKDIR = os.path.join(BASE, "autotune")
+NORMALE_C = os.path.join(BASE, "normale.c")
+SE_CACHE = os.path.join(ROOT, "se_cache.py")
+
+
+# ------------------ Hierarchies (se_cache.py) ------------------
+
+@dataclass(frozen=True)
+class Level:
+    size: int
+    assoc: int
+    latency: int
+
+
+@dataclass(frozen=True)
+class Hierarchy:
+    name: str
+    line: int
+    l1d: Level
+    l2: Level
+
+
+# Sizes/associativities of se_cache.py --conf C1/C2, tag+data latencies
+# of its L1DCache/L2Cache classes.
+HIERARCHIES: Dict[str, Hierarchy] = {
+    "C1": Hierarchy("C1", 32, Level(4 * 1024, 1, 4), Level(32 * 1024, 1, 20)),
+    "C2": Hierarchy("C2", 32, Level(4 * 1024, 2, 4), Level(32 * 1024, 4, 20)),
+}
+
+# DDR3-1600 round trip at 2GHz, only used for the model's cycle estimate.
+MEM_LATENCY = 100
+
+
+# ------------------ Variants ------------------
+
+@dataclass(frozen=True)
+class Variant:
+    order: str
+    tile: int
+    unroll: int
+
+    @property
+    def name(self) -> str:
+        if self.is_baseline:
+            return "normale"
+        return f"{self.order}_t{self.tile}_u{self.unroll}"
+
+    @property
+    def is_baseline(self) -> bool:
+        return self.order == "ijk" and self.tile == 0 and self.unroll == 1
+
+    @property
+    def trace_key(self) -> Tuple[str, int]:
+        return (self.order, self.tile)
+
+
+BASELINE = Variant("ijk", 0, 1)
+
+
+def enumerate_variants(orders: Iterable[str], tiles: Iterable[int], unrolls: Iterable[int]) -> List[Variant]:
+    out = [BASELINE]
+    for order, tile, unroll in itertools.product(orders, tiles, unrolls):
+        v = Variant(order, tile, unroll)
+        if v not in out:
+            out.append(v)
+    return out
+
+
+def _parse_orders(text: str) -> List[str]:
+    if text == "all":
+        return ["".join(p) for p in itertools.permutations("ijk")]
+    orders = [o.strip() for o in text.split(",") if o.strip()]
+    for o in orders:
+        if sorted(o) != ["i", "j", "k"]:
+            raise SystemExit(f"Error: bad loop order {o!r} (permutation of ijk expected)")
+    return orders
+
+
+def _parse_ints(text: str) -> List[int]:
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+# ------------------ C template ------------------
+
+PROGRAM = """\
+/* {name}.c : genere par autotune.py (order={order} tile={tile} unroll={unroll}) */
+#include <stdio.h>
+#include <stdlib.h>
+#ifdef M5OPS
+#include <gem5/m5ops.h>
+#endif
+
+#define N {n}
+#define MIN(x, y) ((x) < (y) ? (x) : (y))
+
+double a[N][N], b[N][N], c[N][N];
+
+static void kernel(void)
+{{
+  int i, j, k;
+  int ii, jj, kk;
+  double r;
+
+  (void)ii; (void)jj; (void)kk;
+  for (i = 0; i < N; i++)
+    for (j = 0; j < N; j++)
+      c[i][j] = 0.0;
+
+{loops}
+}}
+
+int main(void)
+{{
+  int i, j;
+  double sum = 0.5 * ((double)(N * (N - 1)));
+
+  for (i = 0; i < N; i++)
+    for (j = 0; j < N; j++)
+      a[i][j] = b[i][j] = (double)i;
+
+#ifdef M5OPS
+  m5_work_begin(0, 0);
+  m5_reset_stats(0, 0);
+#endif
+  kernel();
+#ifdef M5OPS
+  m5_dump_stats(0, 0);
+  m5_work_end(0, 0);
+#endif
+
+  for (i = 0; i < N; i++)
+    for (j = 0; j < N; j++)
+      if (c[i][j] != (double)i * sum) {{
+        printf("error in result entry c[%d][%d]: %e != %e\\n", i, j, c[i][j], (double)i * sum);
+        exit(1);
+      }}
+  printf("{name}: ok\\n");
+  return 0;
+}}
+"""
+
+# Innermost-loop body per innermost variable: (before, body, after);
+# "{x}" is the innermost index expression.
+_BODIES = {
+    "k": ("r = c[i][j];", "r += a[i][{x}] * b[{x}][j];", "c[i][j] = r;"),
+    "j": ("r = a[i][k];", "c[i][{x}] += r * b[k][{x}];", ""),
+    "i": ("r = b[k][j];", "c[{x}][j] += a[{x}][k] * r;", ""),
+}
+
+
+def _bounds(var: str, tile: int) -> Tuple[str, str]:
+    if tile <= 0:
+        return "0", "N"
+    return f"{var}{var}", f"MIN({var}{var} + {tile}, N)"
+
+
+def kernel_loops(v: Variant) -> str:
+    lines: List[str] = []
+    depth = 1
+
+    def emit(text: str) -> None:
+        lines.append("  " * depth + text)
+
+    if v.tile > 0:
+        for var in v.order:
+            emit(f"for ({var}{var} = 0; {var}{var} < N; {var}{var} += {v.tile})")
+            depth += 1
+    for var in v.order[:2]:
+        lo, hi = _bounds(var, v.tile)
+        emit(f"for ({var} = {lo}; {var} < {hi}; {var}++)")
+        depth += 1
+
+    x = v.order[2]
+    lo, hi = _bounds(x, v.tile)
+    before, body, after = _BODIES[x]
+    emit("{")
+    depth += 1
+    emit(before)
+    if v.unroll > 1:
+        emit(f"for ({x} = {lo}; {x} + {v.unroll - 1} < {hi}; {x} += {v.unroll}) {{")
+        depth += 1
+        for u in range(v.unroll):
+            emit(body.format(x=f"{x} + {u}" if u else x))
+        depth -= 1
+        emit("}")
+        emit(f"for (; {x} < {hi}; {x}++)")
+    else:
+        emit(f"for ({x} = {lo}; {x} < {hi}; {x}++)")
+    emit("  " + body.format(x=x))
+    if after:
+        emit(after)
+    depth -= 1
+    emit("}")
+    return "\n".join(lines)
+
+
+def program_source(v: Variant) -> str:
+    return PROGRAM.format(name=v.name, order=v.order, tile=v.tile, unroll=v.unroll, n=N, loops=kernel_loops(v))
+
+
+# normale.c is compiled with -Dgetrusage=roi_getrusage: its only getrusage()
+# calls are dtime() just before and just after normal().
+ROI_SHIM = """\
+/* normale_roi.c : genere par autotune.py, marqueurs m5 autour de normal() */
+#undef getrusage
+#include <sys/resource.h>
+#include <gem5/m5ops.h>
+
+int roi_getrusage(int who, struct rusage *usage)
+{
+  static int calls;
+  int ret;
+
+  if (calls == 1) {
+    m5_dump_stats(0, 0);
+    m5_work_end(0, 0);
+  }
+  ret = getrusage(who, usage);
+  if (calls == 0) {
+    m5_work_begin(0, 0);
+    m5_reset_stats(0, 0);
+  }
+  calls++;
+  return ret;
+}
+"""
+
+
+# ------------------ Cache model ------------------
+
+class LRUCache:
+    def __init__(self, level: Level, line: int):
+        self.assoc = level.assoc
+        self.num_sets = level.size // (line * level.assoc)
+        self.sets: List[List[int]] = [[] for _ in range(self.num_sets)]
+        self.accesses = 0
+        self.misses = 0
+
+    def access(self, line_addr: int) -> bool:
+        self.accesses += 1
+        ways = self.sets[line_addr % self.num_sets]
+        if ways and ways[-1] == line_addr:
+            return True
+        if line_addr in ways:
+            ways.remove(line_addr)
+            ways.append(line_addr)
+            return True
+        self.misses += 1
+        if len(ways) >= self.assoc:
+            del ways[0]
+        ways.append(line_addr)
+        return False
+
+
+def access_trace(order: str, tile: int) -> Iterable[int]:
+    """Byte addresses of the kernel's data accesses, in program order."""
+    A, B, C = 0, N * N * ELEM, 2 * N * N * ELEM
+
+    def addr(base: int, r: int, col: int) -> int:
+        return base + (r * N + col) * ELEM
+
+    for i in range(N):
+        for j in range(N):
+            yield addr(C, i, j)
+
+    step = tile if tile > 0 else N
+    tiles = range(0, N, step)
+    x = order[2]
+    for t in itertools.product(tiles, tiles, tiles):
+        start = dict(zip(order, t))
+        rng = {var: range(start[var], min(start[var] + step, N)) for var in order}
+        for o0 in rng[order[0]]:
+            for o1 in rng[order[1]]:
+                idx = {order[0]: o0, order[1]: o1}
+                if x == "k":
+                    i, j = idx["i"], idx["j"]
+                    yield addr(C, i, j)
+                    for k in rng["k"]:
+                        yield addr(A, i, k)
+                        yield addr(B, k, j)
+                    yield addr(C, i, j)
+                elif x == "j":
+                    i, k = idx["i"], idx["k"]
+                    yield addr(A, i, k)
+                    for j in rng["j"]:
+                        yield addr(B, k, j)
+                        yield addr(C, i, j)
+                        yield addr(C, i, j)
+                else:
+                    k, j = idx["k"], idx["j"]
+                    yield addr(B, k, j)
+                    for i in rng["i"]:
+                        yield addr(A, i, k)
+                        yield addr(C, i, j)
+                        yield addr(C, i, j)
+
+
+def model_trace(key: Tuple[str, int], hier_names: List[str]) -> Dict[str, Dict[str, float]]:
+    order, tile = key
+    sims = []
+    for name in hier_names:
+        h = HIERARCHIES[name]
+        shift = h.line.bit_length() - 1
+        sims.append((name, h, shift, LRUCache(h.l1d, h.line), LRUCache(h.l2, h.line)))
+
+    for a in access_trace(order, tile):
+        for _, _, shift, l1, l2 in sims:
+            line = a >> shift
+            if not l1.access(line):
+                l2.access(line)
+
+    out: Dict[str, Dict[str, float]] = {}
+    for name, h, _, l1, l2 in sims:
+        cycles = l1.accesses * h.l1d.latency + l1.misses * h.l2.latency + l2.misses * MEM_LATENCY
+        out[name] = {
+            "accesses": l1.accesses,
+            "dmiss": l1.misses / l1.accesses if l1.accesses else 0.0,
+            "l2miss": l2.misses / l2.accesses if l2.accesses else 0.0,
+            "cycles": float(cycles),
+        }
+    return out
+
+
+def run_model(variants: List[Variant], hier_names: List[str], jobs: Optional[int]) -> Dict[Tuple[Variant, str], Dict[str, float]]:
+    keys = sorted({v.trace_key for v in variants})
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = dict(zip(keys, pool.map(model_trace, keys, itertools.repeat(hier_names))))
+    return {(v, h): results[v.trace_key][h] for v in variants for h in hier_names}
+
+
+# ------------------ Build + gem5 ------------------
+
+@dataclass
+class Toolchain:
+    cc: str
+    host_cc: Optional[str]
+    m5_inc: str
+    m5_lib: str
+
+    @property
+    def m5ops(self) -> bool:
+        return bool(self.m5_inc and self.m5_lib)
+
+
+def _write_if_changed(path: str, text: str) -> None:
+    old = None
+    if os.path.isfile(path):
+        with open(path) as f:
+            old = f.read()
+    if old != text:
+        with open(path, "w") as f:
+            f.write(text)
+
+
+def build_variant(v: Variant, tc: Toolchain, workdir: str) -> str:
+    src_dir = os.path.join(workdir, "src")
+    bin_dir = os.path.join(workdir, "bin")
+    os.makedirs(src_dir, exist_ok=True)
+    os.makedirs(bin_dir, exist_ok=True)
+
+    defines = []
+    if v.is_baseline:
+        # The exo3 program itself, plus the marker shim for --roi runs
+        src = NORMALE_C
+        sources = [src]
+        if tc.m5ops:
+            shim = os.path.join(src_dir, "normale_roi.c")
+            _write_if_changed(shim, ROI_SHIM)
+            sources.append(shim)
+            defines = ["-Dgetrusage=roi_getrusage"]
+    else:
+        src = os.path.join(src_dir, f"{v.name}.c")
+        _write_if_changed(src, program_source(v))
+        sources = [src]
+        if tc.m5ops:
+            defines = ["-DM5OPS"]
+
+    out = os.path.join(bin_dir, f"{v.name}.riscv")
+    if os.path.isfile(out) and all(os.path.getmtime(out) >= os.path.getmtime(p) for p in sources):
+        return out
+
+    # Same flags as the exo3 Makefile
+    cmd = [tc.cc, "-O3", "-Wall", "-std=c99", "-DLITTLE_ENDIAN", "-static", "-o", out] + sources
+    if tc.m5ops:
+        cmd[1:1] = defines + ["-I" + tc.m5_inc]
+        cmd.append(tc.m5_lib)
+    subprocess.run(cmd, check=True)
+
+    if tc.host_cc:
+        host = os.path.join(bin_dir, v.name)
+        subprocess.run([tc.host_cc, "-O3", "-std=c99", "-o", host, src], check=True)
+        subprocess.run([host], check=True, stdout=subprocess.DEVNULL)
+    return out
+
+
+_CYCLES = ("system.cpu.numCycles",)
+_DMISS = ("system.cpu.dcache.overallMissRate::total", "system.cpu.dcache.demandMissRate::total")
+_IMISS = ("system.cpu.icache.overallMissRate::total", "system.cpu.icache.demandMissRate::total")
+_L2MISS = ("system.l2cache.overallMissRate::total", "system.l2cache.demandMissRate::total")
+
+
+def read_gem5_stats(outdir: str) -> Dict[str, float]:
+    from stats_index import StatsIndex
+
+    dump = -1
+    label = os.path.join(outdir, "roi.json")
+    if os.path.isfile(label):
+        with open(label) as f:
+            dump = int(json.load(f).get("roi_dump", -1))
+
+    out: Dict[str, float] = {}
+    with StatsIndex(os.path.join(outdir, "stats.txt")) as idx:
+        for key, names in (("cycles", _CYCLES), ("dmiss", _DMISS), ("imiss", _IMISS), ("l2miss", _L2MISS)):
+            for name in names:
+                value = idx.get_float(dump, name)
+                if value is not None:
+                    out[key] = value
+                    break
+    return out
+
+
+def run_gem5(
+    variants: List[Variant],
+    hier_names: List[str],
+    tc: Toolchain,
+    gem5: str,
+    workdir: str,
+    parallel: int,
+    force: bool,
+) -> Dict[Tuple[Variant, str], Dict[str, float]]:
+    binaries = {v: build_variant(v, tc, workdir) for v in variants}
+
+    def one(item: Tuple[Variant, str]) -> Dict[str, float]:
+        v, h = item
+        outdir = os.path.join(workdir, "m5out", f"{v.name}_{h}")
+        stats = os.path.join(outdir, "stats.txt")
+        if force or not os.path.isfile(stats) or os.path.getmtime(stats) < os.path.getmtime(binaries[v]):
+            os.makedirs(outdir, exist_ok=True)
+            cmd = [gem5, "-d", outdir, SE_CACHE, "--cmd", binaries[v],
+                   "--cpu-type", "timing", "--caches", "--conf", h, "--line-size", str(HIERARCHIES[h].line)]
+            if tc.m5ops:
+                cmd.append("--roi")
+            print(f"== gem5 {v.name} / {h} ==")
+            with open(os.path.join(outdir, "gem5.log"), "w") as log:
+                code = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT).returncode
+            if code != 0:
+                print(f"Warning: gem5 failed for {v.name}/{h} (see {outdir}/gem5.log)", file=sys.stderr)
+                return {}
+        return read_gem5_stats(outdir)
+
+    items = [(v, h) for v in variants for h in hier_names]
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+        return dict(zip(items, pool.map(one, items)))
+
+
+# ------------------ Report ------------------
+
+FIELDNAMES = ["hierarchy", "source", "variant", "order", "tile", "unroll", "cycles", "dmiss", "imiss", "l2miss"]
+
+
+def best_per_hierarchy(
+    results: Dict[Tuple[Variant, str], Dict[str, float]], hier_names: List[str]
+) -> Dict[str, List[Variant]]:
+    ranked: Dict[str, List[Variant]] = {}
+    for h in hier_names:
+        cands = [(r["cycles"], v.name, v) for (v, hh), r in results.items() if hh == h and "cycles" in r]
+        ranked[h] = [v for _, _, v in sorted(cands)]
+    return ranked
+
+
+def _gain(base: Optional[float], value: Optional[float]) -> str:
+    if base is None or value is None or base == 0:
+        return "n/a"
+    return f"{100.0 * (base - value) / base:+.1f}%"
+
+
+def report(source: str, results: Dict[Tuple[Variant, str], Dict[str, float]], hier_names: List[str]) -> None:
+    ranked = best_per_hierarchy(results, hier_names)
+    cyc_label = "est. cycles" if source == "model" else "cycles"
+    for h in hier_names:
+        if not ranked[h]:
+            print(f"[{source}] {h}: no result")
+            continue
+        best = ranked[h][0]
+        r = results[(best, h)]
+        base = results.get((BASELINE, h), {})
+        print(
+            f"[{source}] {h}: best {best.name} | {cyc_label} {r['cycles']:.0f} ({_gain(base.get('cycles'), r['cycles'])} vs normale)"
+            f" | D-L1 miss {r.get('dmiss', float('nan')):.4f} (normale {base.get('dmiss', float('nan')):.4f},"
+            f" {_gain(base.get('dmiss'), r.get('dmiss'))})"
+            f" | L2 miss {r.get('l2miss', float('nan')):.4f} (normale {base.get('l2miss', float('nan')):.4f})"
+        )
+
+
+def write_csv(path: str, source: str, results: Dict[Tuple[Variant, str], Dict[str, float]], hier_names: List[str], append: bool) -> None:
+    ranked = best_per_hierarchy(results, hier_names)
+    with open(path, "a" if append else "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        if not append:
+            w.writeheader()
+        for h in hier_names:
+            for v in ranked[h]:
+                r = results[(v, h)]
+                w.writerow({
+                    "hierarchy": h,
+                    "source": source,
+                    "variant": v.name,
+                    "order": v.order,
+                    "tile": v.tile,
+                    "unroll": v.unroll,
+                    "cycles": f"{r['cycles']:.0f}",
+                    "dmiss": f"{r['dmiss']:.6f}" if "dmiss" in r else "",
+                    "imiss": f"{r['imiss']:.6f}" if "imiss" in r else "",
+                    "l2miss": f"{r['l2miss']:.6f}" if "l2miss" in r else "",
+                })
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Autotune the exo3 matrix product over loop order, tiling and unrolling")
+    ap.add_argument("--mode", choices=["model", "gem5", "hybrid"], default="model")
+    ap.add_argument("--conf", action="append", choices=sorted(HIERARCHIES), default=[],
+                    help="Target se_cache.py hierarchy (repeatable, default: all)")
+    ap.add_argument("--orders", default="all", help="Comma-separated loop orders, or 'all' (default)")
+    ap.add_argument("--tiles", default="0,8,16,32", help="Tile sizes, 0 = no tiling (default: 0,8,16,32)")
+    ap.add_argument("--unrolls", default="1,4,8", help="Innermost unroll factors (default: 1,4,8)")
+    ap.add_argument("--top", type=int, default=4, help="hybrid: variants per hierarchy sent to gem5")
+    ap.add_argument("--workdir", default=DEFAULT_WORKDIR)
+    ap.add_argument("--gem5", default=os.environ.get("GEM5", "gem5.opt"))
+    ap.add_argument("--cc", default="riscv64-linux-gnu-gcc")
+    ap.add_argument("--host-cc", default="gcc", help="Native compiler used to check each variant's result ('' to skip)")
+    ap.add_argument("--m5-inc", default="", help="gem5 include dir; with --m5-lib, measure the kernel only (--roi)")
+    ap.add_argument("--m5-lib", default="", help="libm5.a for the RISC-V target")
+    ap.add_argument("--jobs", type=int, default=None, help="Model processes (default: #CPUs)")
+    ap.add_argument("--parallel", type=int, default=1, help="gem5 processes in parallel")
+    ap.add_argument("--force", action="store_true", help="Rerun gem5 even if stats.txt is up to date")
+    ap.add_argument("--emit", action="store_true", help="Only write the generated C sources")
+    args = ap.parse_args()
+
+    hier_names = args.conf or sorted(HIERARCHIES)
+    variants = enumerate_variants(_parse_orders(args.orders), _parse_ints(args.tiles), _parse_ints(args.unrolls))
+    os.makedirs(args.workdir, exist_ok=True)
+    csv_path = os.path.join(args.workdir, "results.csv")
+
+    if args.emit:
+        src_dir = os.path.join(args.workdir, "src")
+        os.makedirs(src_dir, exist_ok=True)
+        for v in variants:
+            with open(os.path.join(src_dir, f"{v.name}.c"), "w") as f:
+                f.write(program_source(v))
+        print(f"Wrote {len(variants)} sources to {src_dir}")
+        return 0
+
+    if args.mode != "model" and not shutil.which(args.cc):
+        print(f"Error: cross compiler not found: {args.cc}", file=sys.stderr)
+        return 1
+    host_cc = args.host_cc if args.host_cc and shutil.which(args.host_cc) else None
+    tc = Toolchain(args.cc, host_cc, args.m5_inc, args.m5_lib)
+
+    append = False
+    gem5_variants = variants
+    if args.mode in ("model", "hybrid"):
+        print(f"Modeling {len({v.trace_key for v in variants})} access traces ({len(variants)} variants) on {', '.join(hier_names)}")
+        modeled = run_model(variants, hier_names, args.jobs)
+        report("model", modeled, hier_names)
+        write_csv(csv_path, "model", modeled, hier_names, append=False)
+        append = True
+        if args.mode == "model":
+            print(f"Wrote {csv_path}")
+            return 0
+
+        # Unroll is invisible to the model: keep the first of each trace
+        # in the ranking, then let gem5 sort out the unroll factors.
+        picked: List[Variant] = [BASELINE]
+        ranked = best_per_hierarchy(modeled, hier_names)
+        for h in hier_names:
+            keys = []
+            for v in ranked[h]:
+                if v.trace_key not in keys:
+                    keys.append(v.trace_key)
+                if len(keys) >= args.top:
+                    break
+            picked += [v for v in variants if v.trace_key in keys and v not in picked]
+        gem5_variants = picked
+
+    print(f"Simulating {len(gem5_variants)} variants x {len(hier_names)} hierarchies with gem5")
+    measured = run_gem5(gem5_variants, hier_names, tc, args.gem5, args.workdir, args.parallel, args.force)
+    report("gem5", measured, hier_names)
+    write_csv(csv_path, "gem5", measured, hier_names, append=append)
+    print(f"Wrote {csv_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,14 @@
+from m5.params import *
+from m5.proxy import *
+from m5.SimObject import SimObject
+
+
+class MshrProfiler(SimObject):
+    type = "MshrProfiler"
+    cxx_class = "gem5::MshrProfiler"
+    cxx_header = "mem/cache/mshr_profiler.hh"
+
+    cache = Param.BaseCache("Cache profiled (probe points Miss/Fill)")
+    block_size = Param.Unsigned(Parent.cache_line_size, "Cache line size in bytes")
+    mshrs = Param.Unsigned("MSHRs of the cache")
+    tgts_per_mshr = Param.Unsigned("Targets per MSHR of the cache")
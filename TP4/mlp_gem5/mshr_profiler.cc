@@ -0,0 +1,110 @@
+#include "mem/cache/mshr_profiler.hh"
+
+#include <algorithm>
+
+#include "mem/cache/base.hh"
+#include "sim/cur_tick.hh"
+
+namespace gem5
+{
+
+MshrProfiler::MshrProfiler(const MshrProfilerParams &p)
+    : SimObject(p), cache(p.cache), blkMask(~Addr(p.block_size - 1)),
+      numMshrs(p.mshrs), numTargets(p.tgts_per_mshr), stats(*this)
+{
+}
+
+void
+MshrProfiler::regProbeListeners()
+{
+    ProbeManager *pm = cache->getProbeManager();
+    listeners.emplace_back(new Listener(*this, pm, "Miss", false));
+    listeners.emplace_back(new Listener(*this, pm, "Fill", true));
+}
+
+void
+MshrProfiler::advance()
+{
+    const Tick now = curTick();
+    const size_t n = std::min<size_t>(pending.size(), numMshrs);
+    stats.occupancy[n] += now - lastTick;
+    lastTick = now;
+}
+
+void
+MshrProfiler::miss(const PacketPtr &pkt)
+{
+    // Writebacks, evictions and uncacheable accesses do not use an MSHR
+    if (pkt->isWriteback() || pkt->isCleanEviction() ||
+        pkt->req->isUncacheable())
+        return;
+
+    advance();
+    const Addr blk = pkt->getAddr() & blkMask;
+    auto it = pending.find(blk);
+    if (it != pending.end()) {
+        ++it->second.first;
+        ++stats.secondaryMisses;
+        return;
+    }
+    if (pending.size() >= numMshrs) {
+        // A fill we did not see (upgrade, invalidation): drop the oldest
+        auto oldest = std::min_element(pending.begin(), pending.end(),
+            [](const auto &a, const auto &b) {
+                return a.second.second < b.second.second;
+            });
+        pending.erase(oldest);
+        ++stats.lostFills;
+    }
+    pending.emplace(blk, std::make_pair(1u, curTick()));
+    ++stats.primaryMisses;
+}
+
+void
+MshrProfiler::fill(const PacketPtr &pkt)
+{
+    auto it = pending.find(pkt->getAddr() & blkMask);
+    // Prefetch fills have no demand miss behind them
+    if (it == pending.end())
+        return;
+    advance();
+    stats.targets[std::min(it->second.first, numTargets)]++;
+    pending.erase(it);
+}
+
+MshrProfiler::ProfilerStats::ProfilerStats(MshrProfiler &parent)
+    : statistics::Group(&parent), parent(parent),
+      ADD_STAT(occupancy, statistics::units::Tick::get(),
+               "Ticks spent with N MSHRs in use"),
+      ADD_STAT(targets, statistics::units::Count::get(),
+               "MSHRs freed after serving N targets"),
+      ADD_STAT(primaryMisses, statistics::units::Count::get(),
+               "Demand misses that allocated an MSHR"),
+      ADD_STAT(secondaryMisses, statistics::units::Count::get(),
+               "Demand misses merged into a pending MSHR"),
+      ADD_STAT(lostFills, statistics::units::Count::get(),
+               "MSHRs dropped without a fill being seen")
+{
+    occupancy.init(parent.numMshrs + 1);
+    targets.init(parent.numTargets + 1);
+    for (unsigned i = 0; i <= parent.numMshrs; ++i)
+        occupancy.subname(i, std::to_string(i));
+    for (unsigned i = 0; i <= parent.numTargets; ++i)
+        targets.subname(i, std::to_string(i));
+}
+
+void
+MshrProfiler::ProfilerStats::preDumpStats()
+{
+    statistics::Group::preDumpStats();
+    parent.advance();
+}
+
+void
+MshrProfiler::ProfilerStats::resetStats()
+{
+    statistics::Group::resetStats();
+    parent.lastTick = curTick();
+}
+
+} // namespace gem5
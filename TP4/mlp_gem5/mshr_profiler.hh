@@ -0,0 +1,89 @@
+#ifndef __MEM_CACHE_MSHR_PROFILER_HH__
+#define __MEM_CACHE_MSHR_PROFILER_HH__
+
+#include <memory>
+#include <string>
+#include <unordered_map>
+#include <vector>
+
+#include "base/statistics.hh"
+#include "mem/packet.hh"
+#include "sim/probe/probe.hh"
+#include "sim/sim_object.hh"
+
+// Generated from MshrProfiler.py:
+#include "params/MshrProfiler.hh"
+
+namespace gem5
+{
+
+/**
+ * MSHR occupancy of one cache, rebuilt from its "Miss" and "Fill" probe
+ * points: a demand miss to a block with no pending miss allocates an MSHR
+ * (primary miss), a miss to a pending block adds a target to it
+ * (secondary miss), and the fill of the block frees it.
+ *
+ * Stats (reset and dumped with the others):
+ *   occupancy::N   ticks spent with N MSHRs in use (N = 0..mshrs)
+ *   targets::N     MSHRs freed after serving N targets (N = 1..tgts)
+ *   primaryMisses, secondaryMisses, lostFills
+ */
+class MshrProfiler : public SimObject
+{
+  public:
+    explicit MshrProfiler(const MshrProfilerParams &p);
+
+    void regProbeListeners() override;
+
+    void miss(const PacketPtr &pkt);
+    void fill(const PacketPtr &pkt);
+
+  private:
+    class Listener : public ProbeListenerArgBase<PacketPtr>
+    {
+      public:
+        Listener(MshrProfiler &parent, ProbeManager *pm,
+                 const std::string &name, bool is_fill)
+            : ProbeListenerArgBase(pm, name),
+              parent(parent), isFill(is_fill)
+        {}
+        void notify(const PacketPtr &pkt) override
+        { isFill ? parent.fill(pkt) : parent.miss(pkt); }
+
+      private:
+        MshrProfiler &parent;
+        const bool isFill;
+    };
+
+    /** Account the time spent at the current occupancy up to now. */
+    void advance();
+
+    SimObject *cache;
+    const Addr blkMask;
+    const unsigned numMshrs;
+    const unsigned numTargets;
+
+    std::vector<std::unique_ptr<ProbeListener>> listeners;
+    /** Pending block -> (targets, allocation tick) */
+    std::unordered_map<Addr, std::pair<unsigned, Tick>> pending;
+    Tick lastTick = 0;
+
+    struct ProfilerStats : public statistics::Group
+    {
+        ProfilerStats(MshrProfiler &parent);
+
+        void preDumpStats() override;
+        void resetStats() override;
+
+        MshrProfiler &parent;
+        statistics::Vector occupancy;
+        statistics::Vector targets;
+        statistics::Scalar primaryMisses;
+        statistics::Scalar secondaryMisses;
+        statistics::Scalar lostFills;
+    } stats;
+};
+
+} // namespace gem5
+
+#endif // __MEM_CACHE_MSHR_PROFILER_HH__
@@ -0,0 +1,16 @@
+from m5.params import *
+from m5.proxy import *
+from m5.SimObject import SimObject
+
+
+class O3OccupancyProfiler(SimObject):
+    type = "O3OccupancyProfiler"
+    cxx_class = "gem5::o3::OccupancyProfiler"
+    cxx_header = "cpu/o3/probe/occupancy_profiler.hh"
+
+    cpu = Param.BaseCPU("O3 CPU profiled (probe point Commit)")
+    period = Param.Cycles(1, "Sampling period in CPU cycles")
+    rob_entries = Param.Unsigned(Parent.numROBEntries, "ROB size")
+    iq_entries = Param.Unsigned(Parent.numIQEntries, "IQ size")
+    lq_entries = Param.Unsigned(Parent.LQEntries, "LQ size")
+    sq_entries = Param.Unsigned(Parent.SQEntries, "SQ size")
@@ -0,0 +1,113 @@
+#include "cpu/o3/probe/occupancy_profiler.hh"
+
+#include <algorithm>
+#include <string>
+
+#include "base/logging.hh"
+#include "cpu/o3/cpu.hh"
+#include "cpu/o3/dyn_inst.hh"
+
+namespace gem5
+{
+namespace o3
+{
+
+OccupancyProfiler::OccupancyProfiler(const O3OccupancyProfilerParams &p)
+    : SimObject(p), cpu(dynamic_cast<CPU *>(p.cpu)), period(p.period),
+      robSize(p.rob_entries), iqSize(p.iq_entries),
+      lqSize(p.lq_entries), sqSize(p.sq_entries),
+      sampleEvent([this] { sample(); }, name() + ".sample"),
+      stats(*this)
+{
+    fatal_if(!cpu, "%s: %s is not an O3 CPU", name(), p.cpu->name());
+    fatal_if(period == 0, "%s: period must be at least 1 cycle", name());
+}
+
+void
+OccupancyProfiler::regProbeListeners()
+{
+    listeners.emplace_back(
+        new CommitListener(*this, cpu->getProbeManager()));
+}
+
+void
+OccupancyProfiler::startup()
+{
+    schedule(sampleEvent, cpu->clockEdge(period));
+}
+
+void
+OccupancyProfiler::committed(const DynInstPtr &inst)
+{
+    if (!inst->isStore())
+        return;
+    retiredStores.push_back(inst);
+    // Bound the error if a store is never released (e.g. squashed SC)
+    if (retiredStores.size() > sqSize)
+        retiredStores.pop_front();
+}
+
+void
+OccupancyProfiler::sample()
+{
+    // Same tick as the CPU tick but a higher priority: this sees the
+    // state at the end of the previous cycle
+    if (!cpu->switchedOut()) {
+        unsigned rob = 0, iq = 0, lq = 0, sq = 0;
+        for (const auto &inst : cpu->instList) {
+            if (inst->isSquashed())
+                continue;
+            if (inst->isInROB())
+                ++rob;
+            if (inst->isInIQ())
+                ++iq;
+            if (inst->isInLSQ() && !inst->isCommitted()) {
+                if (inst->isLoad())
+                    ++lq;
+                if (inst->isStore())
+                    ++sq;
+            }
+        }
+        // A committed store leaves the SQ when the LSQ drops its
+        // reference: only ours is left
+        retiredStores.erase(
+            std::remove_if(retiredStores.begin(), retiredStores.end(),
+                [](const DynInstPtr &s) { return s->getCount() <= 1; }),
+            retiredStores.end());
+        sq += retiredStores.size();
+
+        stats.rob[std::min(rob, robSize)]++;
+        stats.iq[std::min(iq, iqSize)]++;
+        stats.lq[std::min(lq, lqSize)]++;
+        stats.sq[std::min(sq, sqSize)]++;
+        ++stats.samples;
+    }
+    schedule(sampleEvent, cpu->clockEdge(period));
+}
+
+OccupancyProfiler::ProfilerStats::ProfilerStats(OccupancyProfiler &parent)
+    : statistics::Group(&parent),
+      ADD_STAT(rob, statistics::units::Count::get(),
+               "Samples with N ROB entries in use"),
+      ADD_STAT(iq, statistics::units::Count::get(),
+               "Samples with N IQ entries in use"),
+      ADD_STAT(lq, statistics::units::Count::get(),
+               "Samples with N LQ entries in use"),
+      ADD_STAT(sq, statistics::units::Count::get(),
+               "Samples with N SQ entries in use"),
+      ADD_STAT(samples, statistics::units::Count::get(),
+               "Occupancy samples taken")
+{
+    auto init = [](statistics::Vector &v, unsigned size) {
+        v.init(size + 1);
+        for (unsigned i = 0; i <= size; ++i)
+            v.subname(i, std::to_string(i));
+    };
+    init(rob, parent.robSize);
+    init(iq, parent.iqSize);
+    init(lq, parent.lqSize);
+    init(sq, parent.sqSize);
+}
+
+} // namespace o3
+} // namespace gem5
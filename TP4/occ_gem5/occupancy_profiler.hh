@@ -0,0 +1,88 @@
+#ifndef __CPU_O3_PROBE_OCCUPANCY_PROFILER_HH__
+#define __CPU_O3_PROBE_OCCUPANCY_PROFILER_HH__
+
+#include <deque>
+#include <memory>
+#include <vector>
+
+#include "base/statistics.hh"
+#include "cpu/o3/dyn_inst_ptr.hh"
+#include "sim/eventq.hh"
+#include "sim/probe/probe.hh"
+#include "sim/sim_object.hh"
+
+// Generated from O3OccupancyProfiler.py:
+#include "params/O3OccupancyProfiler.hh"
+
+namespace gem5
+{
+
+class BaseCPU;
+
+namespace o3
+{
+
+class CPU;
+
+/**
+ * Occupancy of the ROB, IQ, LQ and SQ of an O3 CPU, sampled every
+ * `period` cycles from the CPU's list of in-flight instructions:
+ *   ROB  non-squashed instructions in the ROB
+ *   IQ   instructions waiting in the IQ (memory ops stay until executed)
+ *   LQ   dispatched, uncommitted loads
+ *   SQ   dispatched stores, committed ones included until the LSQ
+ *        releases them (write to the cache done)
+ *
+ * Stats: <name>.rob::N (samples with N entries in use, N = 0..size),
+ * likewise iq, lq, sq, and samples. Reset and dumped with the others.
+ */
+class OccupancyProfiler : public SimObject
+{
+  public:
+    explicit OccupancyProfiler(const O3OccupancyProfilerParams &p);
+
+    void regProbeListeners() override;
+    void startup() override;
+
+  private:
+    class CommitListener : public ProbeListenerArgBase<DynInstPtr>
+    {
+      public:
+        CommitListener(OccupancyProfiler &parent, ProbeManager *pm)
+            : ProbeListenerArgBase(pm, "Commit"), parent(parent)
+        {}
+        void notify(const DynInstPtr &inst) override
+        { parent.committed(inst); }
+
+      private:
+        OccupancyProfiler &parent;
+    };
+
+    void committed(const DynInstPtr &inst);
+    void sample();
+
+    CPU *cpu;
+    const Cycles period;
+    const unsigned robSize, iqSize, lqSize, sqSize;
+
+    std::vector<std::unique_ptr<ProbeListener>> listeners;
+    /** Committed stores possibly still in the SQ, oldest first */
+    std::deque<DynInstPtr> retiredStores;
+    EventFunctionWrapper sampleEvent;
+
+    struct ProfilerStats : public statistics::Group
+    {
+        ProfilerStats(OccupancyProfiler &parent);
+
+        statistics::Vector rob;
+        statistics::Vector iq;
+        statistics::Vector lq;
+        statistics::Vector sq;
+        statistics::Scalar samples;
+    } stats;
+};
+
+} // namespace o3
+} // namespace gem5
+
+#endif // __CPU_O3_PROBE_OCCUPANCY_PROFILER_HH__
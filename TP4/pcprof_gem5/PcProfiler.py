@@ -0,0 +1,17 @@
+from m5.params import *
+from m5.SimObject import SimObject
+
+
+class PcProfiler(SimObject):
+    type = "PcProfiler"
+    cxx_class = "gem5::o3::PcProfiler"
+    cxx_header = "cpu/o3/probe/pc_profiler.hh"
+
+    cpu = Param.BaseCPU("CPU profiled (O3: probe points Mispredict/Commit)")
+    icache = Param.BaseCache(NULL, "L1I of the CPU")
+    dcache = Param.BaseCache(NULL, "L1D of the CPU")
+    l2cache = Param.BaseCache(NULL, "L2 (shared or private)")
+    count_branches = Param.Bool(
+        False, "Also count committed branches per PC (mispredict rate)"
+    )
+    output = Param.String("pcprof", "Output prefix: <outdir>/<output>.<dump>.csv")
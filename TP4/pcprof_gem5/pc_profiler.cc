@@ -0,0 +1,106 @@
+#include "cpu/o3/probe/pc_profiler.hh"
+
+#include <algorithm>
+#include <iomanip>
+
+#include "base/output.hh"
+#include "base/statistics.hh"
+#include "cpu/base.hh"
+#include "cpu/o3/dyn_inst.hh"
+#include "mem/cache/base.hh"
+
+namespace gem5
+{
+namespace o3
+{
+
+PcProfiler::PcProfiler(const PcProfilerParams &p)
+    : SimObject(p), cpu(p.cpu), icache(p.icache), dcache(p.dcache),
+      l2cache(p.l2cache), countBranches(p.count_branches), output(p.output)
+{
+    statistics::registerDumpCallback([this]() { dump(); });
+}
+
+void
+PcProfiler::addCache(SimObject *cache, int level)
+{
+    if (!cache)
+        return;
+    ProbeManager *pm = cache->getProbeManager();
+    listeners.emplace_back(new CacheListener(*this, pm, "Hit", level, false));
+    listeners.emplace_back(new CacheListener(*this, pm, "Miss", level, true));
+}
+
+void
+PcProfiler::regProbeListeners()
+{
+    addCache(icache, 0);
+    addCache(dcache, 1);
+    addCache(l2cache, 2);
+
+    ProbeManager *pm = cpu->getProbeManager();
+    listeners.emplace_back(new BranchListener(*this, pm, "Mispredict", true));
+    if (countBranches)
+        listeners.emplace_back(new BranchListener(*this, pm, "Commit", false));
+}
+
+void
+PcProfiler::resetStats()
+{
+    SimObject::resetStats();
+    counters.clear();
+}
+
+void
+PcProfiler::countAccess(int level, bool miss, const PacketPtr &pkt)
+{
+    const RequestPtr &req = pkt->req;
+    // Writebacks, prefetches and the other CPUs' requests carry no PC of ours
+    if (!req || !req->hasPC() || req->isPrefetch())
+        return;
+    if (req->requestorId() != cpu->dataRequestorId() &&
+        req->requestorId() != cpu->instRequestorId())
+        return;
+
+    auto &c = counters[req->getPC()];
+    ++c[2 * level];
+    if (miss)
+        ++c[2 * level + 1];
+}
+
+void
+PcProfiler::countBranch(const DynInstPtr &inst, bool mispredicted)
+{
+    if (mispredicted) {
+        ++counters[inst->pcState().instAddr()][Mispred];
+    } else if (inst->isControl()) {
+        ++counters[inst->pcState().instAddr()][Branches];
+    }
+}
+
+void
+PcProfiler::dump()
+{
+    const unsigned n = dumpCount++;
+    std::vector<Addr> pcs;
+    pcs.reserve(counters.size());
+    for (const auto &kv : counters)
+        pcs.push_back(kv.first);
+    std::sort(pcs.begin(), pcs.end());
+
+    OutputStream *os = simout.create(output + "." + std::to_string(n) + ".csv");
+    std::ostream &out = *os->stream();
+    out << "pc,l1i_acc,l1i_miss,l1d_acc,l1d_miss,l2_acc,l2_miss,"
+           "branches,mispred\n";
+    for (Addr pc : pcs) {
+        const auto &c = counters[pc];
+        out << "0x" << std::hex << pc << std::dec;
+        for (uint64_t v : c)
+            out << "," << v;
+        out << "\n";
+    }
+    simout.close(os);
+}
+
+} // namespace o3
+} // namespace gem5
@@ -0,0 +1,103 @@
+#ifndef __CPU_O3_PROBE_PC_PROFILER_HH__
+#define __CPU_O3_PROBE_PC_PROFILER_HH__
+
+#include <array>
+#include <memory>
+#include <string>
+#include <unordered_map>
+#include <vector>
+
+#include "cpu/o3/dyn_inst_ptr.hh"
+#include "mem/packet.hh"
+#include "sim/probe/probe.hh"
+#include "sim/sim_object.hh"
+
+// Generated from PcProfiler.py:
+#include "params/PcProfiler.hh"
+
+namespace gem5
+{
+
+class BaseCPU;
+
+namespace o3
+{
+
+/**
+ * Per-PC counters fed by probe listeners: accesses and misses of the
+ * L1I/L1D/L2 caches (probe points "Hit"/"Miss" of the caches) and
+ * mispredicted branches (probe point "Mispredict" of the O3 IEW stage).
+ * Only the requests of the profiled CPU are counted. The counters are
+ * cleared with the stats and written to <outdir>/<output>.<dump>.csv at
+ * every stats dump.
+ */
+class PcProfiler : public SimObject
+{
+  public:
+    enum Counter
+    {
+        L1IAcc, L1IMiss, L1DAcc, L1DMiss, L2Acc, L2Miss, Branches, Mispred,
+        NumCounters
+    };
+
+    explicit PcProfiler(const PcProfilerParams &p);
+
+    void regProbeListeners() override;
+    void resetStats() override;
+
+    void countAccess(int level, bool miss, const PacketPtr &pkt);
+    void countBranch(const DynInstPtr &inst, bool mispredicted);
+
+  private:
+    class CacheListener : public ProbeListenerArgBase<PacketPtr>
+    {
+      public:
+        CacheListener(PcProfiler &parent, ProbeManager *pm,
+                      const std::string &name, int level, bool miss)
+            : ProbeListenerArgBase(pm, name),
+              parent(parent), level(level), miss(miss)
+        {}
+        void notify(const PacketPtr &pkt) override
+        { parent.countAccess(level, miss, pkt); }
+
+      private:
+        PcProfiler &parent;
+        const int level;
+        const bool miss;
+    };
+
+    class BranchListener : public ProbeListenerArgBase<DynInstPtr>
+    {
+      public:
+        BranchListener(PcProfiler &parent, ProbeManager *pm,
+                       const std::string &name, bool mispredicted)
+            : ProbeListenerArgBase(pm, name),
+              parent(parent), mispredicted(mispredicted)
+        {}
+        void notify(const DynInstPtr &inst) override
+        { parent.countBranch(inst, mispredicted); }
+
+      private:
+        PcProfiler &parent;
+        const bool mispredicted;
+    };
+
+    void addCache(SimObject *cache, int level);
+    void dump();
+
+    BaseCPU *cpu;
+    SimObject *icache;
+    SimObject *dcache;
+    SimObject *l2cache;
+    const bool countBranches;
+    const std::string output;
+
+    std::vector<std::unique_ptr<ProbeListener>> listeners;
+    std::unordered_map<Addr, std::array<uint64_t, NumCounters>> counters;
+    unsigned dumpCount = 0;
+};
+
+} // namespace o3
+} // namespace gem5
+
+#endif // __CPU_O3_PROBE_PC_PROFILER_HH__
@@ -1,43 +1,14 @@
 # -*- coding: utf-8 -*-
 
 import argparse
+import os
+import sys
 import m5
+from m5.util import convert
 from m5.objects import *
 
-# ---------------- Caches ----------------
-class L1ICache(Cache):
-    tag_latency = 2
-    data_latency = 2
-    response_latency = 2
-    mshrs = 4
-    tgts_per_mshr = 8
-    is_read_only = True
-    writeback_clean = True
-
-    def connectCPU(self, cpu): self.cpu_side = cpu.icache_port
-    def connectBus(self, bus): self.mem_side = bus.cpu_side_ports
-
-class L1DCache(Cache):
-    tag_latency = 2
-    data_latency = 2
-    response_latency = 2
-    mshrs = 8
-    tgts_per_mshr = 8
-    writeback_clean = True
-
-    def connectCPU(self, cpu): self.cpu_side = cpu.dcache_port
-    def connectBus(self, bus): self.mem_side = bus.cpu_side_ports
-
-class L2Cache(Cache):
-    tag_latency = 10
-    data_latency = 10
-    response_latency = 10
-    mshrs = 16
-    tgts_per_mshr = 12
-    writeback_clean = True
-
-    def connectCPUSideBus(self, bus): self.cpu_side = bus.mem_side_ports
-    def connectMemSideBus(self, bus): self.mem_side = bus.cpu_side_ports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from se_common import clocks, cortex, hierarchy, memory, mshr, multicore, o3trace, occupancy, pcprof, power, prefetch, replacement, roi, tlb
 
 def parse_args():
     ap = argparse.ArgumentParser()
@@ -49,99 +20,92 @@ def parse_args():
     ap.add_argument("--maxinsts", type=int, default=0)
     ap.add_argument("--l1i-size", default="32kB")
     ap.add_argument("--l1d-size", default="32kB")
+    ap.add_argument("--stats-period", default="",
+                    help="Dump periodique des stats en temps simule (ex: 10ms), pour suivre un run en cours")
+    roi.add_roi_args(ap)
+    multicore.add_multicore_args(ap)
+    prefetch.add_prefetch_args(ap)
+    replacement.add_replacement_args(ap)
+    mshr.add_mshr_args(ap)
+    memory.add_memory_args(ap)
+    clocks.add_clock_args(ap)
+    power.add_power_args(ap)
+    pcprof.add_pcprof_args(ap)
+    occupancy.add_occupancy_args(ap)
+    tlb.add_tlb_args(ap)
+    o3trace.add_trace_args(ap)
+    hierarchy.add_hierarchy_args(ap)
     return ap.parse_args()
 
+def make_cpu(args):
+    return cortex.make_a15_cpu(caches=False)
+
 def build_system(args):
     system = System()
-    system.clk_domain = SrcClockDomain(clock=args.clock, voltage_domain=VoltageDomain())
     system.mem_mode = "timing"
     system.mem_ranges = [AddrRange(args.mem_size)]
 
-    # Cortex A15: blocs 64B
-    system.cache_line_size = 64
-
     # CPU (O3)
-    system.cpu = DerivO3CPU()
-
-    # Fetch queue
-    system.cpu.fetchQueueSize = 15
-    
-    # Decode / Issue / Commit : 4 / 8 / 4
-    system.cpu.decodeWidth  = 4
-    system.cpu.issueWidth   = 8
-    system.cpu.commitWidth  = 4
-
-    # Pour coherence des autres largeurs O3
-    system.cpu.fetchWidth    = 4
-    system.cpu.renameWidth   = 8
-    system.cpu.dispatchWidth = 8
-    system.cpu.wbWidth       = 4
-
-    # RUU/LSQ : 16 / 16  (gem5: ROB=16, LQ=16, SQ=16)
-    system.cpu.numROBEntries = 16
-    system.cpu.LQEntries = 16
-    system.cpu.SQEntries = 16
-
-    # Branch predictor : "2 level", BTB=256
-    # En gem5 classic, LocalBP correspond a un 2-level local predictor.
-    system.cpu.branchPred = LocalBP()
-    system.cpu.branchPred.BTBEntries = 256
-
-    # -------- Caches C-A15 --------
-    # I-L1: 32KB / 64 / 2
-    system.cpu.icache = L1ICache()
-    system.cpu.icache.size = args.l1i_size
-    system.cpu.icache.assoc = 2
-
-    # D-L1: 32KB / 64 / 2
-    system.cpu.dcache = L1DCache()
-    system.cpu.dcache.size = args.l1d_size
-    system.cpu.dcache.assoc = 2
-
-    # L2: 512KB / 64 / 16
-    system.l2bus = L2XBar()
-    system.l2cache = L2Cache()
-    system.l2cache.size = "512kB"
-    system.l2cache.assoc = 16
-
-    system.cpu.icache.connectCPU(system.cpu)
-    system.cpu.dcache.connectCPU(system.cpu)
-    system.cpu.icache.connectBus(system.l2bus)
-    system.cpu.dcache.connectBus(system.l2bus)
-    system.l2cache.connectCPUSideBus(system.l2bus)
-
-    system.membus = SystemXBar()
-    system.l2cache.connectMemSideBus(system.membus)
-    system.system_port = system.membus.cpu_side_ports
+    cpus = [make_cpu(args) for _ in range(args.num_cpus)]
+    multicore.attach_cpus(system, cpus)
+
+    # Cortex A15: blocs 64B, L1 {I,D} privees (--l1i-size / --l1d-size), L2: 512KB / 64 / 16
+    spec = hierarchy.load_spec("a15")
+    spec["levels"][0]["i"]["size"] = args.l1i_size
+    spec["levels"][0]["d"]["size"] = args.l1d_size
+    caches = hierarchy.build(system, cpus, hierarchy.resolve(args, spec))
+    prefetch.configure(args, caches)
+    replacement.configure(args, caches)
+    mshr.configure(args, caches)
+    pcprof.configure(args, system, caches)
+    occupancy.configure(args, system)
+    tlb.configure(args, system, caches, profile="a15")
+
+    # Domaines d'horloge CPU / caches / memoire (--cpu-clock, --cpu-voltage...)
+    clocks.configure(args, system, cpus, caches, args.clock, profile="a15")
 
     # DRAM
-    system.mem_ctrl = MemCtrl()
-    system.mem_ctrl.dram = DDR3_1600_8x8()
-    system.mem_ctrl.dram.range = system.mem_ranges[0]
-    system.mem_ctrl.port = system.membus.mem_side_ports
+    memory.configure(args, system)
 
     # Workload SE
-    process = Process()
-    process.cmd = [args.cmd] + args.options
-    system.workload = SEWorkload.init_compatible(args.cmd)
-    system.cpu.workload = process
-    system.cpu.createThreads()
-    system.cpu.createInterruptController()
+    multicore.bind_workloads(system, args)
 
     return system
 
 def main():
     args = parse_args()
     system = build_system(args)
+    if args.roi:
+        roi.attach_fast_cpu(system)
+    # fenetres de trace O3PipeView (--trace-window, --trace-roi, --trace-pc...)
+    tracer = o3trace.configure(args, system)
     root = Root(full_system=False, system=system)
+    if args.power_model:
+        # puissance dynamique/statique par dump (par intervalle avec --stats-period)
+        power.attach(args, system, "a15")
     m5.instantiate()
 
-    if args.maxinsts > 0:
-        ev = m5.simulate(args.maxinsts)
+    if args.stats_period:
+        period = m5.ticks.fromSeconds(convert.anyToLatency(args.stats_period))
+        m5.stats.periodicStatDump(period)
+
+    run = m5.simulate
+    if tracer and not args.roi:
+        tracer.start()
+        run = tracer.simulate
+
+    if args.roi:
+        ev = roi.simulate(system, args.roi_after, tracer)
+    elif args.maxinsts > 0:
+        ev = run(args.maxinsts)
     else:
-        ev = m5.simulate()
+        ev = run()
+    if tracer:
+        tracer.finish()
 
-    m5.stats.dump()
+    # en mode --roi, roi.simulate a deja ecrit ses dumps
+    if not args.roi:
+        m5.stats.dump()
     print(f"Exiting @ tick {m5.curTick()} because {ev.getCause()}")
 
 
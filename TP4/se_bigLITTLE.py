@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+#
+# se_bigLITTLE.py : systeme heterogene A15 (big) + A7 (LITTLE), L2 partage.
+#
+# Chaque programme (--cmd, plusieurs separes par ';') occupe un "slot" :
+# un coeur maison dans son cluster de depart (--map), avec ses L1, et pour
+# les politiques de migration un coeur fantome de l'autre profil (eteint,
+# sans cache). Migrer = m5.switchCpus entre les deux : l'etat architectural
+# passe sur le pipeline de l'autre cluster (largeurs, ROB/LSQ, predicteur,
+# BTB, horloge). Limite gem5 SE : le coeur qui prend la main recupere les
+# ports du coeur remplace, donc les L1 (tailles du cluster de depart)
+# restent attachees au slot.
+#
+# Politiques (--policy) :
+#   static   : pas de migration, placement fixe par --map
+#   periodic : bascule de cluster toutes les --interval instructions
+#   ipc      : toutes les --interval instructions, monte sur big si l'IPC
+#              mesure sur LITTLE >= --up-ipc, descend sur LITTLE si l'IPC
+#              sur big <= --down-ipc (programme limite par la memoire)
+#
+# Sortie : <outdir>/biglittle.json (segments de residence par slot et
+# cluster, migrations) ; bilan debit / energie : TP4/Projet/bl_report.py
+#
+# Exemple :
+#   gem5.opt -d m5out_bl_ipc TP4/se_bigLITTLE.py --policy ipc --interval 1000000 \
+#     --cmd "TP4/Projet/dijkstra/dijkstra_large.riscv" --options TP4/Projet/dijkstra/input.dat
+
+import argparse
+import json
+import os
+import sys
+import m5
+from m5.util import convert
+from m5.objects import *
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from se_common import cortex, memory, replacement
+from se_common.cortex import L2Cache
+
+CLUSTERS = {"big": "a15", "little": "a7"}
+
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cmd", required=True, help="binaire(s) a executer, separes par ';' (un slot chacun)")
+    ap.add_argument("--options", nargs=argparse.REMAINDER, default=[],
+                    help="args des binaires ('{cpu}' = numero du slot)")
+    ap.add_argument("--map", default="big",
+                    help="cluster de depart par slot, ex: big,little (le dernier est repete)")
+    ap.add_argument("--policy", choices=["static", "periodic", "ipc"], default="static")
+    ap.add_argument("--interval", type=int, default=1000000, help="instructions entre deux decisions")
+    ap.add_argument("--up-ipc", type=float, default=0.8, help="politique ipc : LITTLE -> big si IPC >= seuil")
+    ap.add_argument("--down-ipc", type=float, default=0.5, help="politique ipc : big -> LITTLE si IPC <= seuil")
+    ap.add_argument("--big-clock", default="2GHz")
+    ap.add_argument("--little-clock", default="1GHz")
+    ap.add_argument("--big-l1i-size", default="32kB")
+    ap.add_argument("--big-l1d-size", default="32kB")
+    ap.add_argument("--little-l1i-size", default="32kB")
+    ap.add_argument("--little-l1d-size", default="32kB")
+    ap.add_argument("--line-size", type=int, default=64, help="unique pour tout le systeme (A15: 64, A7: 32)")
+    ap.add_argument("--l2-size", default="512kB")
+    ap.add_argument("--l2-assoc", type=int, default=16)
+    ap.add_argument("--mem-size", default="2GB")
+    replacement.add_replacement_args(ap)
+    memory.add_memory_args(ap)
+    return ap.parse_args()
+
+
+def make_core(args, cluster, with_caches):
+    profile = CLUSTERS[cluster]
+    l1i = getattr(args, f"{cluster}_l1i_size")
+    l1d = getattr(args, f"{cluster}_l1d_size")
+    cpu = cortex.MAKE_CPU[profile](l1i, l1d, caches=with_caches)
+    if not with_caches:
+        cpu.switched_out = True
+    return cpu
+
+
+def build_system(args):
+    system = System()
+    system.clk_domain = SrcClockDomain(clock=args.big_clock, voltage_domain=VoltageDomain())
+    system.mem_mode = "timing"
+    system.mem_ranges = [AddrRange(args.mem_size)]
+    system.cache_line_size = args.line_size
+
+    # Un domaine d'horloge par cluster
+    system.big_clk_domain = SrcClockDomain(clock=args.big_clock, voltage_domain=VoltageDomain())
+    system.little_clk_domain = SrcClockDomain(clock=args.little_clock, voltage_domain=VoltageDomain())
+
+    cmds = [c for c in args.cmd.split(";") if c]
+    names = [m.strip() for m in args.map.split(",") if m.strip()]
+    for n in names:
+        if n not in CLUSTERS:
+            raise ValueError(f"--map: cluster inconnu '{n}' (big ou little)")
+    homes = [names[min(i, len(names) - 1)] for i in range(len(cmds))]
+
+    cpus, shadows = [], []
+    for i, home in enumerate(homes):
+        cpu = make_core(args, home, with_caches=True)
+        cpu.cpu_id = i
+        cpu.clk_domain = getattr(system, f"{home}_clk_domain")
+        cpus.append(cpu)
+        if args.policy != "static":
+            other = "little" if home == "big" else "big"
+            shadow = make_core(args, other, with_caches=False)
+            shadow.cpu_id = i
+            shadow.clk_domain = getattr(system, f"{other}_clk_domain")
+            shadows.append(shadow)
+    system.cpu = cpus
+    if shadows:
+        system.shadow_cpu = shadows
+
+    # L2 partage par les deux clusters
+    system.l2bus = L2XBar()
+    system.l2cache = L2Cache()
+    system.l2cache.size = args.l2_size
+    system.l2cache.assoc = args.l2_assoc
+
+    for cpu in cpus:
+        cpu.icache.connectCPU(cpu)
+        cpu.dcache.connectCPU(cpu)
+        cpu.icache.connectBus(system.l2bus)
+        cpu.dcache.connectBus(system.l2bus)
+    system.l2cache.connectCPUSideBus(system.l2bus)
+
+    replacement.configure(args, {
+        "l1i": [cpu.icache for cpu in cpus],
+        "l1d": [cpu.dcache for cpu in cpus],
+        "l2": [system.l2cache],
+    })
+
+    system.membus = SystemXBar()
+    system.l2cache.connectMemSideBus(system.membus)
+    system.system_port = system.membus.cpu_side_ports
+
+    # DRAM
+    memory.configure(args, system)
+
+    # Workload SE : un Process par slot, partage par le coeur maison et son fantome
+    system.workload = SEWorkload.init_compatible(cmds[0])
+    for i, cmd in enumerate(cmds):
+        process = Process(pid=100 + i)
+        process.cmd = [cmd] + [o.replace("{cpu}", str(i)) for o in args.options]
+        cores = [cpus[i]] + ([shadows[i]] if shadows else [])
+        for cpu in cores:
+            cpu.workload = process
+            cpu.createThreads()
+            cpu.createInterruptController()
+
+    return system, homes
+
+
+class Slot:
+    def __init__(self, index, home, cpu, shadow):
+        self.index = index
+        self.cores = {home: cpu}
+        if shadow is not None:
+            self.cores["little" if home == "big" else "big"] = shadow
+        self.cluster = home
+        self.since = 0
+        self.last_tick = 0
+        self.segments = []
+
+    @property
+    def active(self):
+        return self.cores[self.cluster]
+
+    def close_segment(self, tick):
+        if tick > self.since:
+            self.segments.append([self.since, tick, self.cluster])
+        self.since = tick
+
+
+def interval_ipc(slot, freqs, interval, now):
+    # IPC du dernier intervalle, en cycles de l'horloge du cluster courant
+    cycles = (now - slot.last_tick) / m5.ticks.fromSeconds(1) * freqs[slot.cluster]
+    return interval / cycles if cycles > 0 else 0.0
+
+
+def decide(policy, slot, ipc, args):
+    if policy == "periodic":
+        return "little" if slot.cluster == "big" else "big"
+    if policy == "ipc":
+        if slot.cluster == "little" and ipc >= args.up_ipc:
+            return "big"
+        if slot.cluster == "big" and ipc <= args.down_ipc:
+            return "little"
+    return slot.cluster
+
+
+def main():
+    args = parse_args()
+    system, homes = build_system(args)
+    root = Root(full_system=False, system=system)
+    m5.instantiate()
+
+    cpus = list(system.cpu)
+    shadows = list(system.shadow_cpu) if args.policy != "static" else [None] * len(cpus)
+    slots = [Slot(i, home, cpus[i], shadows[i]) for i, home in enumerate(homes)]
+    freqs = {"big": convert.anyToFrequency(args.big_clock), "little": convert.anyToFrequency(args.little_clock)}
+    causes = {f"biglittle slot {s.index}": s for s in slots}
+
+    if args.policy != "static":
+        for s in slots:
+            s.active.scheduleInstStop(0, args.interval, f"biglittle slot {s.index}")
+
+    migrations = 0
+    while True:
+        ev = m5.simulate()
+        now = m5.curTick()
+        slot = causes.get(ev.getCause())
+        if slot is None:
+            break
+
+        ipc = interval_ipc(slot, freqs, args.interval, now)
+        target = decide(args.policy, slot, ipc, args)
+        if target != slot.cluster:
+            m5.switchCpus(system, [(slot.active, slot.cores[target])])
+            slot.close_segment(m5.curTick())
+            slot.cluster = target
+            migrations += 1
+            print(f"bigLITTLE: slot {slot.index} -> {target} @ tick {m5.curTick()} (IPC {ipc:.3f})")
+        slot.last_tick = m5.curTick()
+        slot.active.scheduleInstStop(0, args.interval, f"biglittle slot {slot.index}")
+
+    end = m5.curTick()
+    for s in slots:
+        s.close_segment(end)
+    m5.stats.dump()
+
+    report = {
+        "policy": args.policy,
+        "interval": args.interval,
+        "clocks": {"big": args.big_clock, "little": args.little_clock},
+        "profiles": CLUSTERS,
+        "migrations": migrations,
+        "end_tick": end,
+        "slots": [{"slot": s.index, "home": homes[s.index], "segments": s.segments} for s in slots],
+    }
+    with open(os.path.join(m5.options.outdir, "biglittle.json"), "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"Exiting @ tick {end} because {ev.getCause()}")
+
+
+main()
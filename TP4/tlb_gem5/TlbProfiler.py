@@ -0,0 +1,27 @@
+from m5.params import *
+from m5.SimObject import SimObject
+
+
+class TlbProfiler(SimObject):
+    type = "TlbProfiler"
+    cxx_class = "gem5::TlbProfiler"
+    cxx_header = "mem/cache/tlb_profiler.hh"
+
+    icache = Param.BaseCache(NULL, "L1I of the CPU (ITLB lookups)")
+    dcache = Param.BaseCache(NULL, "L1D of the CPU (DTLB lookups)")
+    page_bytes = Param.Unsigned(4096, "Page size")
+    itlb_entries = Param.Unsigned(64, "ITLB entries")
+    itlb_assoc = Param.Unsigned(0, "ITLB associativity (0 = fully)")
+    dtlb_entries = Param.Unsigned(64, "DTLB entries")
+    dtlb_assoc = Param.Unsigned(0, "DTLB associativity (0 = fully)")
+    l2tlb_entries = Param.Unsigned(0, "Unified L2 TLB entries (0 = none)")
+    l2tlb_assoc = Param.Unsigned(4, "L2 TLB associativity (0 = fully)")
+    walker_cache_entries = Param.Unsigned(
+        0, "Walker cache entries, non-leaf PTEs (0 = none)"
+    )
+    walker_cache_assoc = Param.Unsigned(0, "Walker cache assoc (0 = fully)")
+    walk_levels = Param.Unsigned(3, "Page table levels (Sv39: 3)")
+    walker_cache_latency = Param.Cycles(1, "Walker cache lookup latency")
+    walk_access_latency = Param.Cycles(
+        20, "Latency of one page table entry read"
+    )
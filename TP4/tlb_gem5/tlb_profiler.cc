@@ -0,0 +1,162 @@
+#include "mem/cache/tlb_profiler.hh"
+
+#include <algorithm>
+
+#include "base/intmath.hh"
+#include "base/logging.hh"
+#include "mem/cache/base.hh"
+
+namespace gem5
+{
+
+// Bits of virtual page number translated by each page table level (Sv39/48)
+static constexpr unsigned LevelBits = 9;
+
+TlbProfiler::Array::Array(unsigned entries, unsigned assoc)
+{
+    if (!entries)
+        return;
+    ways = assoc ? std::min(assoc, entries) : entries;
+    fatal_if(entries % ways, "TLB of %d entries is not %d-way", entries, ways);
+    sets.resize(entries / ways);
+}
+
+bool
+TlbProfiler::Array::access(Addr tag)
+{
+    auto &set = sets[tag % sets.size()];
+    auto it = where.find(tag);
+    if (it != where.end()) {
+        set.splice(set.begin(), set, it->second);
+        return true;
+    }
+    if (set.size() >= ways) {
+        where.erase(set.back());
+        set.pop_back();
+    }
+    set.push_front(tag);
+    where[tag] = set.begin();
+    return false;
+}
+
+TlbProfiler::TlbProfiler(const TlbProfilerParams &p)
+    : SimObject(p), icache(p.icache), dcache(p.dcache),
+      pageShift(floorLog2(p.page_bytes)), levels(p.walk_levels),
+      walkerCacheLatency(p.walker_cache_latency),
+      walkAccessLatency(p.walk_access_latency),
+      itlb(p.itlb_entries, p.itlb_assoc),
+      dtlb(p.dtlb_entries, p.dtlb_assoc),
+      l2tlb(p.l2tlb_entries, p.l2tlb_assoc),
+      walkerCache(p.walker_cache_entries, p.walker_cache_assoc),
+      stats(this)
+{
+    fatal_if(!isPowerOf2(p.page_bytes), "%s: page size must be a power of 2",
+             name());
+    fatal_if(levels < 1, "%s: walk_levels must be at least 1", name());
+}
+
+void
+TlbProfiler::addCache(SimObject *cache, bool inst)
+{
+    if (!cache)
+        return;
+    ProbeManager *pm = cache->getProbeManager();
+    listeners.emplace_back(new Listener(*this, pm, "Hit", inst));
+    listeners.emplace_back(new Listener(*this, pm, "Miss", inst));
+}
+
+void
+TlbProfiler::regProbeListeners()
+{
+    addCache(icache, true);
+    addCache(dcache, false);
+}
+
+void
+TlbProfiler::access(const PacketPtr &pkt, bool inst)
+{
+    const RequestPtr &req = pkt->req;
+    // Writebacks, evictions and prefetches are not translated by the core
+    if (!req || !req->hasVaddr() || req->isPrefetch() ||
+        pkt->isWriteback() || pkt->isCleanEviction())
+        return;
+
+    const Addr vpn = req->getVaddr() >> pageShift;
+    if (inst) {
+        ++stats.itlbAccesses;
+        if (itlb.access(vpn))
+            return;
+        ++stats.itlbMisses;
+    } else {
+        ++stats.dtlbAccesses;
+        if (dtlb.access(vpn))
+            return;
+        ++stats.dtlbMisses;
+    }
+
+    if (l2tlb.enabled()) {
+        ++stats.l2tlbAccesses;
+        if (l2tlb.access(vpn))
+            return;
+        ++stats.l2tlbMisses;
+    }
+    walk(vpn);
+}
+
+void
+TlbProfiler::walk(Addr vpn)
+{
+    ++stats.walks;
+    // Level l >= 1 entries point to the tables of level l - 1 (0 = leaf).
+    // The walk starts below the deepest non-leaf entry found in the
+    // walker cache; the entries it misses on are the ones the walk reads
+    // and are filled by the lookup.
+    unsigned accesses = levels;
+    uint64_t latency = 0;
+    if (walkerCache.enabled()) {
+        latency += walkerCacheLatency;
+        for (unsigned l = 1; l < levels; ++l) {
+            if (walkerCache.access(((vpn >> (LevelBits * l)) << 4) | l)) {
+                accesses = l;
+                ++stats.walkerCacheHits;
+                break;
+            }
+        }
+    }
+    latency += accesses * uint64_t(walkAccessLatency);
+    stats.walkMemAccesses += accesses;
+    stats.walkCycles += latency;
+}
+
+TlbProfiler::ProfilerStats::ProfilerStats(statistics::Group *parent)
+    : statistics::Group(parent),
+      ADD_STAT(itlbAccesses, statistics::units::Count::get(),
+               "ITLB lookups (L1I accesses)"),
+      ADD_STAT(itlbMisses, statistics::units::Count::get(), "ITLB misses"),
+      ADD_STAT(dtlbAccesses, statistics::units::Count::get(),
+               "DTLB lookups (L1D accesses)"),
+      ADD_STAT(dtlbMisses, statistics::units::Count::get(), "DTLB misses"),
+      ADD_STAT(l2tlbAccesses, statistics::units::Count::get(),
+               "L2 TLB lookups"),
+      ADD_STAT(l2tlbMisses, statistics::units::Count::get(),
+               "L2 TLB misses"),
+      ADD_STAT(walks, statistics::units::Count::get(), "Page table walks"),
+      ADD_STAT(walkMemAccesses, statistics::units::Count::get(),
+               "Page table entries read from memory by the walks"),
+      ADD_STAT(walkerCacheHits, statistics::units::Count::get(),
+               "Walks shortened by the walker cache"),
+      ADD_STAT(walkCycles, statistics::units::Cycle::get(),
+               "Estimated cycles spent walking"),
+      ADD_STAT(itlbMissRate, statistics::units::Ratio::get(),
+               "ITLB miss rate", itlbMisses / itlbAccesses),
+      ADD_STAT(dtlbMissRate, statistics::units::Ratio::get(),
+               "DTLB miss rate", dtlbMisses / dtlbAccesses),
+      ADD_STAT(l2tlbMissRate, statistics::units::Ratio::get(),
+               "L2 TLB miss rate", l2tlbMisses / l2tlbAccesses),
+      ADD_STAT(avgWalkLatency, statistics::units::Rate<
+                   statistics::units::Cycle, statistics::units::Count>::get(),
+               "Estimated cycles per walk", walkCycles / walks)
+{
+}
+
+} // namespace gem5
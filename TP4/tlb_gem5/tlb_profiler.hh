@@ -0,0 +1,113 @@
+#ifndef __MEM_CACHE_TLB_PROFILER_HH__
+#define __MEM_CACHE_TLB_PROFILER_HH__
+
+#include <list>
+#include <memory>
+#include <string>
+#include <unordered_map>
+#include <vector>
+
+#include "base/statistics.hh"
+#include "base/types.hh"
+#include "mem/packet.hh"
+#include "sim/probe/probe.hh"
+#include "sim/sim_object.hh"
+
+// Generated from TlbProfiler.py:
+#include "params/TlbProfiler.hh"
+
+namespace gem5
+{
+
+/**
+ * Functional TLB model fed by the accesses of a CPU's L1 caches (probe
+ * points "Hit"/"Miss", virtual address of the request): L1 ITLB and DTLB,
+ * optional unified L2 TLB, and a page table walker for a radix page table
+ * (Sv39: 3 levels of 512 entries) with an optional walker cache of the
+ * non-leaf entries. Every level is set associative (assoc 0 = fully
+ * associative) with LRU replacement.
+ *
+ * RISC-V SE mode translates through the process page table and never
+ * looks up the gem5 TLBs: this model estimates miss rates and walk
+ * latency (walker cache lookup + walk_access_latency per page table
+ * access) without changing the timing of the run. Contents survive a
+ * stats reset (ROI); counters are reset with the stats.
+ */
+class TlbProfiler : public SimObject
+{
+  public:
+    explicit TlbProfiler(const TlbProfilerParams &p);
+
+    void regProbeListeners() override;
+
+    void access(const PacketPtr &pkt, bool inst);
+
+  private:
+    class Listener : public ProbeListenerArgBase<PacketPtr>
+    {
+      public:
+        Listener(TlbProfiler &parent, ProbeManager *pm,
+                 const std::string &name, bool inst)
+            : ProbeListenerArgBase(pm, name), parent(parent), inst(inst)
+        {}
+        void notify(const PacketPtr &pkt) override
+        { parent.access(pkt, inst); }
+
+      private:
+        TlbProfiler &parent;
+        const bool inst;
+    };
+
+    /** Set-associative LRU array of tags (0 entries = absent). */
+    class Array
+    {
+      public:
+        Array(unsigned entries, unsigned assoc);
+
+        bool enabled() const { return !sets.empty(); }
+        /** True on a hit; on a miss the tag is inserted. */
+        bool access(Addr tag);
+
+      private:
+        std::vector<std::list<Addr>> sets;
+        std::unordered_map<Addr, std::list<Addr>::iterator> where;
+        unsigned ways = 0;
+    };
+
+    void addCache(SimObject *cache, bool inst);
+    void walk(Addr vpn);
+
+    SimObject *icache;
+    SimObject *dcache;
+    const unsigned pageShift;
+    const unsigned levels;
+    const Cycles walkerCacheLatency;
+    const Cycles walkAccessLatency;
+
+    Array itlb, dtlb, l2tlb, walkerCache;
+    std::vector<std::unique_ptr<ProbeListener>> listeners;
+
+    struct ProfilerStats : public statistics::Group
+    {
+        ProfilerStats(statistics::Group *parent);
+
+        statistics::Scalar itlbAccesses;
+        statistics::Scalar itlbMisses;
+        statistics::Scalar dtlbAccesses;
+        statistics::Scalar dtlbMisses;
+        statistics::Scalar l2tlbAccesses;
+        statistics::Scalar l2tlbMisses;
+        statistics::Scalar walks;
+        statistics::Scalar walkMemAccesses;
+        statistics::Scalar walkerCacheHits;
+        statistics::Scalar walkCycles;
+        statistics::Formula itlbMissRate;
+        statistics::Formula dtlbMissRate;
+        statistics::Formula l2tlbMissRate;
+        statistics::Formula avgWalkLatency;
+    } stats;
+};
+
+} // namespace gem5
+
+#endif // __MEM_CACHE_TLB_PROFILER_HH__
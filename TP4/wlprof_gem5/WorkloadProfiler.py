@@ -0,0 +1,14 @@
+from m5.objects.InstTracer import InstTracer
+from m5.params import *
+
+
+class WorkloadProfiler(InstTracer):
+    type = "WorkloadProfiler"
+    cxx_class = "gem5::trace::WorkloadProfiler"
+    cxx_header = "cpu/workload_profiler.hh"
+
+    line_bytes = Param.Unsigned(64, "Line size of the reuse distances")
+    page_bytes = Param.Unsigned(4096, "Page size of the working set")
+    window_insts = Param.UInt64(1000000, "Working-set window (instructions)")
+    zero_reg = Param.Int(0, "Integer register hardwired to 0 (-1: none)")
+    output = Param.String("wlprof.json", "Output file in the outdir")
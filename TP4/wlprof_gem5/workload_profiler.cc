@@ -0,0 +1,324 @@
+#include "cpu/workload_profiler.hh"
+
+#include <algorithm>
+#include <cmath>
+#include <iomanip>
+
+#include "base/intmath.hh"
+#include "base/logging.hh"
+#include "base/output.hh"
+#include "base/statistics.hh"
+#include "cpu/op_class.hh"
+#include "enums/OpClass.hh"
+
+namespace gem5
+{
+namespace trace
+{
+
+// Granularity of the memory dependencies of the ILP model
+static constexpr unsigned WordShift = 3;
+// Initial span of access times of the reuse trackers
+static constexpr uint64_t InitialSpan = 1 << 22;
+
+WorkloadProfiler::ReuseTracker::ReuseTracker()
+    : tree(InitialSpan + 1, 0)
+{
+}
+
+void
+WorkloadProfiler::ReuseTracker::add(uint64_t i, int delta)
+{
+    for (; i < tree.size(); i += i & -i)
+        tree[i] += delta;
+}
+
+int64_t
+WorkloadProfiler::ReuseTracker::prefix(uint64_t i) const
+{
+    int64_t sum = 0;
+    for (; i > 0; i -= i & -i)
+        sum += tree[i];
+    return sum;
+}
+
+void
+WorkloadProfiler::ReuseTracker::compact()
+{
+    // Renumber the last accesses 1..K in order; grow when still crowded
+    std::vector<std::pair<uint64_t, Addr>> order;
+    order.reserve(last.size());
+    for (const auto &kv : last)
+        order.emplace_back(kv.second, kv.first);
+    std::sort(order.begin(), order.end());
+
+    uint64_t span = tree.size() - 1;
+    while (order.size() > span / 2)
+        span *= 2;
+    tree.assign(span + 1, 0);
+    now = 0;
+    for (const auto &o : order) {
+        last[o.second] = ++now;
+        add(now, 1);
+    }
+}
+
+void
+WorkloadProfiler::ReuseTracker::access(Addr line)
+{
+    if (now + 1 >= tree.size())
+        compact();
+    const uint64_t t = ++now;
+    auto it = last.find(line);
+    if (it == last.end()) {
+        ++cold;
+        last.emplace(line, t);
+    } else {
+        // Distinct lines touched since the previous access to this one
+        const uint64_t d = prefix(t - 1) - prefix(it->second);
+        const size_t bucket = d ? floorLog2(d) + 1 : 0;
+        if (hist.size() <= bucket)
+            hist.resize(bucket + 1, 0);
+        ++hist[bucket];
+        add(it->second, -1);
+        it->second = t;
+    }
+    add(t, 1);
+}
+
+WorkloadProfiler::WorkloadProfiler(const Params &p)
+    : InstTracer(p), lineShift(floorLog2(p.line_bytes)),
+      pageShift(floorLog2(p.page_bytes)), windowInsts(p.window_insts),
+      zeroReg(p.zero_reg), output(p.output),
+      opClasses(enums::Num_OpClass, 0)
+{
+    fatal_if(!isPowerOf2(p.line_bytes) || !isPowerOf2(p.page_bytes),
+             "%s: line and page sizes must be powers of 2", name());
+    fatal_if(windowInsts == 0, "%s: window_insts must be > 0", name());
+    statistics::registerDumpCallback([this]() { dump(); });
+}
+
+InstRecord *
+WorkloadProfiler::getInstRecord(Tick when, ThreadContext *tc,
+                                const StaticInstPtr staticInst,
+                                const PCStateBase &pc,
+                                const StaticInstPtr macroStaticInst)
+{
+    return new Record(*this, when, tc, staticInst, pc, macroStaticInst);
+}
+
+void
+WorkloadProfiler::branchOutcome(Addr pc, bool taken)
+{
+    BranchStat &b = branches[pc];
+    ++b.count;
+    b.taken += taken;
+    if (b.last >= 0)
+        ++b.trans[b.last][taken];
+    b.last = taken;
+}
+
+void
+WorkloadProfiler::ilp(const InstRecord &rec, const StaticInstPtr &si)
+{
+    uint64_t start = 0;
+    for (int i = 0; i < si->numSrcRegs(); ++i) {
+        const RegId &reg = si->srcRegIdx(i);
+        if (reg.classValue() == InvalidRegClass ||
+            reg.classValue() == MiscRegClass)
+            continue;
+        auto it = regReady.find((reg.classValue() << 16) | reg.index());
+        if (it != regReady.end())
+            start = std::max(start, it->second);
+    }
+    const bool mem = rec.getMemValid() && rec.getSize();
+    const Addr first = rec.getAddr() >> WordShift;
+    const Addr end = (rec.getAddr() + std::max<Addr>(rec.getSize(), 1) - 1)
+        >> WordShift;
+    if (mem && si->isLoad()) {
+        for (Addr w = first; w <= end; ++w) {
+            auto it = memReady.find(w);
+            if (it != memReady.end())
+                start = std::max(start, it->second);
+        }
+    }
+
+    const uint64_t done = start + 1;
+    for (int i = 0; i < si->numDestRegs(); ++i) {
+        const RegId &reg = si->destRegIdx(i);
+        if (reg.classValue() == InvalidRegClass ||
+            reg.classValue() == MiscRegClass)
+            continue;
+        if (reg.classValue() == IntRegClass && (int)reg.index() == zeroReg)
+            continue;
+        regReady[(reg.classValue() << 16) | reg.index()] = done;
+    }
+    if (mem && (si->isStore() || si->isAtomic())) {
+        for (Addr w = first; w <= end; ++w)
+            memReady[w] = done;
+    }
+    criticalPath = std::max(criticalPath, done);
+}
+
+void
+WorkloadProfiler::closeWindow()
+{
+    wsData.push_back(winData.size());
+    wsInst.push_back(winInst.size());
+    wsPages.push_back(winPages.size());
+    winData.clear();
+    winInst.clear();
+    winPages.clear();
+    winCount = 0;
+}
+
+void
+WorkloadProfiler::record(const InstRecord &rec)
+{
+    const StaticInstPtr &si = rec.getStaticInst();
+    const Addr pc = rec.getPCState().instAddr();
+
+    // Direction of the previous conditional branch: did we fall through?
+    if (pendingCond)
+        branchOutcome(pendingPc, pc != pendingFallThrough);
+    pendingCond = si->isCondCtrl();
+    pendingPc = pc;
+    pendingFallThrough = pc + (si->size() ? si->size() : 4);
+
+    ++insts;
+    ++opClasses[si->opClass()];
+    if (si->isLoad())
+        ++kinds["loads"];
+    if (si->isStore())
+        ++kinds["stores"];
+    if (si->isAtomic())
+        ++kinds["atomics"];
+    if (si->isControl()) {
+        ++kinds["branches"];
+        if (si->isCondCtrl())
+            ++kinds["cond_branches"];
+        if (si->isIndirectCtrl())
+            ++kinds["indirect_branches"];
+        if (si->isCall())
+            ++kinds["calls"];
+        if (si->isReturn())
+            ++kinds["returns"];
+    }
+
+    const Addr iline = pc >> lineShift;
+    instReuse.access(iline);
+    winInst.insert(iline);
+    if (rec.getMemValid() && rec.getSize()) {
+        const Addr first = rec.getAddr() >> lineShift;
+        const Addr last = (rec.getAddr() + rec.getSize() - 1) >> lineShift;
+        for (Addr line = first; line <= last; ++line) {
+            dataReuse.access(line);
+            winData.insert(line);
+        }
+        winPages.insert(rec.getAddr() >> pageShift);
+    }
+
+    ilp(rec, si);
+
+    if (++winCount == windowInsts)
+        closeWindow();
+}
+
+static double
+entropy(double p)
+{
+    if (p <= 0.0 || p >= 1.0)
+        return 0.0;
+    return -p * std::log2(p) - (1 - p) * std::log2(1 - p);
+}
+
+static void
+writeList(std::ostream &out, const std::vector<uint64_t> &v)
+{
+    out << "[";
+    for (size_t i = 0; i < v.size(); ++i)
+        out << (i ? ", " : "") << v[i];
+    out << "]";
+}
+
+void
+WorkloadProfiler::dump()
+{
+    // Conditional branch predictability, weighted by executions
+    uint64_t cond = 0, taken = 0, transitions = 0, pairs = 0;
+    double takenEntropy = 0.0, transEntropy = 0.0;
+    for (const auto &kv : branches) {
+        const BranchStat &b = kv.second;
+        cond += b.count;
+        taken += b.taken;
+        takenEntropy += b.count * entropy(double(b.taken) / b.count);
+        for (int prev = 0; prev < 2; ++prev) {
+            const uint64_t n = b.trans[prev][0] + b.trans[prev][1];
+            if (n)
+                transEntropy += n * entropy(double(b.trans[prev][1]) / n);
+            transitions += b.trans[prev][!prev];
+            pairs += n;
+        }
+    }
+
+    // The window in progress is reported as a partial last window
+    std::vector<uint64_t> data(wsData), inst(wsInst), pages(wsPages);
+    if (winCount) {
+        data.push_back(winData.size());
+        inst.push_back(winInst.size());
+        pages.push_back(winPages.size());
+    }
+
+    OutputStream *os = simout.create(output);
+    std::ostream &out = *os->stream();
+    out << std::setprecision(6);
+    out << "{\n  \"insts\": " << insts
+        << ",\n  \"line_bytes\": " << (1 << lineShift)
+        << ",\n  \"page_bytes\": " << (1 << pageShift)
+        << ",\n  \"window_insts\": " << windowInsts
+        << ",\n  \"mix\": {";
+    bool first = true;
+    for (int i = 0; i < enums::Num_OpClass; ++i) {
+        if (!opClasses[i])
+            continue;
+        out << (first ? "" : ", ") << "\"" << enums::OpClassStrings[i]
+            << "\": " << opClasses[i];
+        first = false;
+    }
+    out << "},\n  \"kinds\": {";
+    first = true;
+    for (const char *k : {"loads", "stores", "atomics", "branches",
+                          "cond_branches", "indirect_branches", "calls",
+                          "returns"}) {
+        out << (first ? "" : ", ") << "\"" << k << "\": "
+            << (kinds.count(k) ? kinds.at(k) : 0);
+        first = false;
+    }
+    out << "},\n  \"reuse\": {\n    \"data\": {\"cold\": " << dataReuse.cold
+        << ", \"hist\": ";
+    writeList(out, dataReuse.hist);
+    out << "},\n    \"inst\": {\"cold\": " << instReuse.cold << ", \"hist\": ";
+    writeList(out, instReuse.hist);
+    out << "}\n  },\n  \"working_set\": {\n    \"data_lines\": ";
+    writeList(out, data);
+    out << ",\n    \"inst_lines\": ";
+    writeList(out, inst);
+    out << ",\n    \"data_pages\": ";
+    writeList(out, pages);
+    out << "\n  },\n  \"branches\": {\"cond\": " << cond
+        << ", \"taken\": " << taken
+        << ", \"static\": " << branches.size()
+        << ", \"taken_entropy\": " << (cond ? takenEntropy / cond : 0.0)
+        << ", \"transition_rate\": "
+        << (pairs ? double(transitions) / pairs : 0.0)
+        << ", \"transition_entropy\": "
+        << (pairs ? transEntropy / pairs : 0.0)
+        << "},\n  \"ilp\": {\"critical_path\": " << criticalPath
+        << ", \"ilp\": "
+        << (criticalPath ? double(insts) / criticalPath : 0.0)
+        << "}\n}\n";
+    simout.close(os);
+}
+
+} // namespace trace
+} // namespace gem5
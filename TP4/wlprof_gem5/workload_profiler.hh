@@ -0,0 +1,136 @@
+#ifndef __CPU_WORKLOAD_PROFILER_HH__
+#define __CPU_WORKLOAD_PROFILER_HH__
+
+#include <cstdint>
+#include <string>
+#include <unordered_map>
+#include <unordered_set>
+#include <vector>
+
+#include "base/types.hh"
+#include "cpu/static_inst.hh"
+#include "sim/insttracer.hh"
+
+// Generated from WorkloadProfiler.py:
+#include "params/WorkloadProfiler.hh"
+
+namespace gem5
+{
+
+class ThreadContext;
+
+namespace trace
+{
+
+/**
+ * Microarchitecture-independent profile of the instruction stream,
+ * installed as the CPU's instruction tracer (meant for one fast
+ * AtomicSimpleCPU pass):
+ *   - instruction mix per op class, loads/stores/branch kinds
+ *   - LRU reuse (stack) distance histograms of data and instruction
+ *     lines, log2 buckets, plus cold (first touch) accesses
+ *   - working set per window of `window_insts` instructions (distinct
+ *     data lines, instruction lines and data pages)
+ *   - conditional branches: taken rate, per-branch taken entropy,
+ *     transition rate and transition entropy H(outcome | previous)
+ *   - ILP of an ideal machine (infinite window and resources, perfect
+ *     prediction, unit latency, register and memory true dependencies)
+ *
+ * Written as JSON to <outdir>/<output> at every stats dump.
+ */
+class WorkloadProfiler : public InstTracer
+{
+  public:
+    using Params = WorkloadProfilerParams;
+    explicit WorkloadProfiler(const Params &p);
+
+    InstRecord *getInstRecord(Tick when, ThreadContext *tc,
+                              const StaticInstPtr staticInst,
+                              const PCStateBase &pc,
+                              const StaticInstPtr macroStaticInst) override;
+
+    void record(const InstRecord &rec);
+
+  private:
+    class Record : public InstRecord
+    {
+      public:
+        Record(WorkloadProfiler &parent, Tick when, ThreadContext *tc,
+               const StaticInstPtr &si, const PCStateBase &pc,
+               const StaticInstPtr &macro)
+            : InstRecord(when, tc, si, pc, macro), parent(parent)
+        {}
+        void dump() override
+        {
+            if (!getFaulting())
+                parent.record(*this);
+        }
+
+      private:
+        WorkloadProfiler &parent;
+    };
+
+    /** Exact LRU stack distances over a stream of line addresses. */
+    class ReuseTracker
+    {
+      public:
+        ReuseTracker();
+        void access(Addr line);
+
+        std::vector<uint64_t> hist; // bucket b: distance in [2^(b-1), 2^b)
+        uint64_t cold = 0;
+
+      private:
+        void add(uint64_t i, int delta);
+        int64_t prefix(uint64_t i) const;
+        void compact();
+
+        // Fenwick tree over access times: 1 at the last access of a line
+        std::vector<int32_t> tree;
+        std::unordered_map<Addr, uint64_t> last;
+        uint64_t now = 0;
+    };
+
+    struct BranchStat
+    {
+        uint64_t count = 0;
+        uint64_t taken = 0;
+        uint64_t trans[2][2] = {{0, 0}, {0, 0}};
+        int last = -1;
+    };
+
+    void branchOutcome(Addr pc, bool taken);
+    void ilp(const InstRecord &rec, const StaticInstPtr &si);
+    void closeWindow();
+    void dump();
+
+    const unsigned lineShift;
+    const unsigned pageShift;
+    const uint64_t windowInsts;
+    const int zeroReg;
+    const std::string output;
+
+    uint64_t insts = 0;
+    std::vector<uint64_t> opClasses;
+    std::unordered_map<std::string, uint64_t> kinds;
+
+    ReuseTracker dataReuse, instReuse;
+
+    std::unordered_set<Addr> winData, winInst, winPages;
+    std::vector<uint64_t> wsData, wsInst, wsPages;
+    uint64_t winCount = 0;
+
+    std::unordered_map<Addr, BranchStat> branches;
+    bool pendingCond = false;
+    Addr pendingPc = 0;
+    Addr pendingFallThrough = 0;
+
+    std::unordered_map<uint32_t, uint64_t> regReady;
+    std::unordered_map<Addr, uint64_t> memReady;
+    uint64_t criticalPath = 0;
+};
+
+} // namespace trace
+} // namespace gem5
+
+#endif // __CPU_WORKLOAD_PROFILER_HH__
@@ -11,12 +11,11 @@ print("PRED_SE_FU: script loaded")
 
 import argparse
 import m5
+from se_common import clocks, hierarchy, memory, mshr, occupancy, pcprof, prefetch, replacement, roi, tlb
 from m5.objects import (
     System, Root, Process, SEWorkload,
-    SrcClockDomain, VoltageDomain, AddrRange,
+    AddrRange,
     DerivO3CPU, TimingSimpleCPU, MinorCPU,
-    SystemXBar, MemCtrl, DDR3_1600_8x8,
-    Cache, L2XBar,
     FUPool, FUDesc, OpDesc,
     BiModeBP, LocalBP, TournamentBP,
 )
@@ -45,40 +44,6 @@ def resolve_bp_class(class_name: str):
 
 
 
-# ----------------------------
-# Minimal caches
-# ----------------------------
-class L1ICache(Cache):
-    size = "32kB"
-    assoc = 2
-    tag_latency = 2
-    data_latency = 2
-    response_latency = 2
-    mshrs = 4
-    tgts_per_mshr = 8
-    is_read_only = True
-
-
-class L1DCache(Cache):
-    size = "32kB"
-    assoc = 2
-    tag_latency = 2
-    data_latency = 2
-    response_latency = 2
-    mshrs = 8
-    tgts_per_mshr = 8
-
-
-class L2Cache(Cache):
-    size = "256kB"
-    assoc = 8
-    tag_latency = 10
-    data_latency = 10
-    response_latency = 10
-    mshrs = 16
-    tgts_per_mshr = 12
-
-
 # ----------------------------
 # FU pool builder
 # ----------------------------
@@ -141,6 +106,28 @@ def main():
     ap.add_argument("--fpmult", type=int, default=1)
     ap.add_argument("--memport", type=int, default=2)
 
+    # ROI: atomic outside m5_work_begin/m5_work_end, detailed CPU inside
+    roi.add_roi_args(ap)
+
+    # Hardware prefetchers / replacement policies per cache level (needs --caches)
+    prefetch.add_prefetch_args(ap)
+    replacement.add_replacement_args(ap)
+    mshr.add_mshr_args(ap)
+
+    # DRAM technology / channels / controller policy
+    memory.add_memory_args(ap)
+
+    # Separate clock/voltage domains (DVFS points)
+    clocks.add_clock_args(ap, cpu_clock=False)
+
+    # N-level cache hierarchy (preset or .toml/.json), replaces the --caches one
+    hierarchy.add_hierarchy_args(ap)
+
+    # Per-PC cache misses / branch mispredicts (PcProfiler probe listeners)
+    pcprof.add_pcprof_args(ap)
+    occupancy.add_occupancy_args(ap)
+    tlb.add_tlb_args(ap)
+
     # TP predictors only
     ap.add_argument("--bpred", choices=["nottaken", "taken", "bimod", "2lev", "tournament"], default="bimod")
 
@@ -155,7 +142,6 @@ def main():
     print("PRED_SE_FU: parsed args", args)
 
     system = System()
-    system.clk_domain = SrcClockDomain(clock=args.cpu_clock, voltage_domain=VoltageDomain())
     system.mem_mode = "timing"
     system.mem_ranges = [AddrRange(args.mem_size)]
 
@@ -194,39 +180,25 @@ def main():
     else:
         system.cpu = TimingSimpleCPU()
 
-    # Buses + memory
-    system.membus = SystemXBar()
-    system.system_port = system.membus.cpu_side_ports
-
     # Interrupts (important for many ISAs/configs)
     system.cpu.createInterruptController()
 
-    if args.caches:
-        system.cpu.icache = L1ICache()
-        system.cpu.dcache = L1DCache()
-        system.l2bus = L2XBar()
-        system.l2cache = L2Cache()
-
-        # CPU <-> L1
-        system.cpu.icache_port = system.cpu.icache.cpu_side
-        system.cpu.dcache_port = system.cpu.dcache.cpu_side
-
-        # L1 <-> L2 bus
-        system.cpu.icache.mem_side = system.l2bus.cpu_side_ports
-        system.cpu.dcache.mem_side = system.l2bus.cpu_side_ports
-
-        # L2 <-> membus
-        system.l2cache.cpu_side = system.l2bus.mem_side_ports
-        system.l2cache.mem_side = system.membus.cpu_side_ports
+    # Caches: private L1 + shared L2 (--caches) or --hierarchy spec; no caches: CPU directly to membus
+    if args.caches or args.hierarchy:
+        caches = hierarchy.build(system, [system.cpu], hierarchy.resolve(args, hierarchy.load_spec("se_fu")))
+        prefetch.configure(args, caches)
+        replacement.configure(args, caches)
     else:
-        # No caches: CPU directly to membus
-        system.cpu.icache_port = system.membus.cpu_side_ports
-        system.cpu.dcache_port = system.membus.cpu_side_ports
+        caches = hierarchy.build(system, [system.cpu], {"levels": []})
+    mshr.configure(args, caches)
+    pcprof.configure(args, system, caches)
+    occupancy.configure(args, system)
+    tlb.configure(args, system, caches)
+
+    # CPU / cache / memory clock domains (--cache-clock, --mem-clock, voltages)
+    clocks.configure(args, system, [system.cpu], caches, args.cpu_clock)
 
-    system.mem_ctrl = MemCtrl()
-    system.mem_ctrl.dram = DDR3_1600_8x8()
-    system.mem_ctrl.dram.range = system.mem_ranges[0]
-    system.mem_ctrl.port = system.membus.mem_side_ports
+    memory.configure(args, system)
 
     # Workload (SE)
     system.workload = SEWorkload.init_compatible(args.cmd)
@@ -234,19 +206,25 @@ def main():
     process.cmd = [args.cmd] + (args.args.split() if args.args else [])
     system.cpu.workload = process
     system.cpu.createThreads()
+    if args.roi:
+        roi.attach_fast_cpu(system)
 
     root = Root(full_system=False, system=system)
     print("PRED_SE_FU: instantiating")
     m5.instantiate()
 
     print("PRED_SE_FU: simulating")
-    exit_event = m5.simulate()
+    if args.roi:
+        exit_event = roi.simulate(system, args.roi_after)
+    else:
+        exit_event = m5.simulate()
     print(f"Exiting @ tick {m5.curTick()} because {exit_event.getCause()}")
 
-    try:
-        m5.stats.dump()
-    except Exception:
-        pass
+    if not args.roi:
+        try:
+            m5.stats.dump()
+        except Exception:
+            pass
 
 
 main()
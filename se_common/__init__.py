@@ -0,0 +1,7 @@
+# se_common : briques partagees par les scripts SE gem5 du depot
+# (se_cache.py, se_fu.py, pred_se_fu.py, TP4/se_A7.py, TP4/se_A15.py, RISCV_se.py).
+#
+# gem5 ajoute le dossier du script lance a sys.path : les scripts de la racine
+# importent donc directement "se_common". Les scripts de TP4/ ajoutent la racine
+# du depot a sys.path. Si un script est copie dans gem5/configs/, copier aussi
+# ce dossier a cote.
@@ -0,0 +1,74 @@
+# se_common/clocks.py
+#
+# Domaines d'horloge / tension separes : CPU, caches partages, memoire.
+#
+#   --cpu-clock 800MHz --cpu-voltage 0.95V      (coeurs + leurs L1)
+#   --cache-clock 1GHz                          (niveaux sous les L1 + leurs bus)
+#   --mem-clock 2GHz                            (membus, controleurs DRAM, system)
+#
+# Sans option, chaque domaine prend l'horloge de base du script (--clock, ou
+# --cpu-clock pour se_fu.py / pred_se_fu.py) et 1.0V : memes resultats
+# qu'avec l'ancien domaine unique system.clk_domain.
+#
+# Mode DVFS : un run par point de fonctionnement (frequence, tension) du
+# domaine CPU, balaye par l'etude "DVFS" de TP4/Projet/experiments.toml ;
+# temps, IPC, puissance et energie estimees par point :
+# TP4/Projet/dvfs_report.py (lit <outdir>/clocks.json).
+
+import json
+import os
+
+import m5
+from m5.objects import SrcClockDomain, VoltageDomain
+
+DOMAINS = ("cpu", "cache", "mem")
+
+
+def add_clock_args(ap, cpu_clock=True):
+    """cpu_clock=False : le script definit deja --cpu-clock (se_fu.py, pred_se_fu.py)."""
+    if cpu_clock:
+        ap.add_argument("--cpu-clock", default="",
+                        help="Horloge des coeurs et de leurs L1 (defaut : horloge de base)")
+    ap.add_argument("--cache-clock", default="",
+                    help="Horloge des caches sous les L1 et de leurs bus (defaut : horloge de base)")
+    ap.add_argument("--mem-clock", default="",
+                    help="Horloge du membus et des controleurs DRAM (defaut : horloge de base)")
+    for domain in DOMAINS:
+        ap.add_argument(f"--{domain}-voltage", default="1.0V",
+                        help=f"Tension du domaine {domain} (point DVFS)")
+
+
+def configure(args, system, cpus, caches, base_clock, profile=""):
+    """
+    Remplace system.clk_domain par trois domaines. caches : dict rendu par
+    hierarchy.build (les L1 restent dans le domaine de leur coeur).
+    Note le choix dans <outdir>/clocks.json (profile : "a7", "a15"... pour
+    l'estimation de puissance).
+    """
+    clock = {d: getattr(args, f"{d}_clock", "") or base_clock for d in DOMAINS}
+    voltage = {d: getattr(args, f"{d}_voltage") for d in DOMAINS}
+
+    system.clk_domain = SrcClockDomain(clock=clock["mem"],
+                                       voltage_domain=VoltageDomain(voltage=voltage["mem"]))
+    system.cpu_clk_domain = SrcClockDomain(clock=clock["cpu"],
+                                           voltage_domain=VoltageDomain(voltage=voltage["cpu"]))
+    system.cache_clk_domain = SrcClockDomain(clock=clock["cache"],
+                                             voltage_domain=VoltageDomain(voltage=voltage["cache"]))
+
+    for cpu in cpus:
+        cpu.clk_domain = system.cpu_clk_domain
+    for level, objs in caches.items():
+        if level in ("l1i", "l1d"):
+            continue
+        for cache in objs:
+            cache.clk_domain = system.cache_clk_domain
+        for parent in [system] + list(cpus):
+            bus = getattr(parent, f"{level}bus", None)
+            if bus is not None:
+                bus.clk_domain = system.cache_clk_domain
+
+    chosen = {"profile": profile, "clocks": clock, "voltages": voltage}
+    os.makedirs(m5.options.outdir, exist_ok=True)
+    with open(os.path.join(m5.options.outdir, "clocks.json"), "w") as f:
+        json.dump(chosen, f, indent=1)
+    return chosen
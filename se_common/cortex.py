@@ -0,0 +1,145 @@
+# se_common/cortex.py
+#
+# Profils de coeurs du projet TP4 (Cortex-A7 / Cortex-A15), partages par
+# TP4/se_A7.py, TP4/se_A15.py et TP4/se_bigLITTLE.py.
+#
+# se_A7.py / se_A15.py construisent leurs caches avec se_common/hierarchy.py
+# (presets "a7" / "a15", caches=False ici) ; les classes L1/L2 ci-dessous
+# servent a se_bigLITTLE.py, a brancher par l'appelant (connectCPU /
+# connectBus). La taille de ligne est celle du systeme (system.cache_line_size).
+
+from m5.objects import BiModeBP, Cache, DerivO3CPU, LocalBP
+
+
+class L1ICache(Cache):
+    tag_latency = 2
+    data_latency = 2
+    response_latency = 2
+    mshrs = 4
+    tgts_per_mshr = 8
+    is_read_only = True
+    writeback_clean = True
+    def connectCPU(self, cpu): self.cpu_side = cpu.icache_port
+    def connectBus(self, bus): self.mem_side = bus.cpu_side_ports
+
+
+class L1DCache(Cache):
+    tag_latency = 2
+    data_latency = 2
+    response_latency = 2
+    mshrs = 8
+    tgts_per_mshr = 8
+    writeback_clean = True
+    def connectCPU(self, cpu): self.cpu_side = cpu.dcache_port
+    def connectBus(self, bus): self.mem_side = bus.cpu_side_ports
+
+
+class L2Cache(Cache):
+    tag_latency = 10
+    data_latency = 10
+    response_latency = 10
+    mshrs = 16
+    tgts_per_mshr = 12
+    writeback_clean = True
+    def connectCPUSideBus(self, bus): self.cpu_side = bus.mem_side_ports
+    def connectMemSideBus(self, bus): self.mem_side = bus.cpu_side_ports
+
+
+def make_a7_cpu(l1i_size="32kB", l1d_size="32kB", caches=True):
+    # Coeur A7 : pipeline O3 + L1 privees
+    cpu = DerivO3CPU()
+
+    # IMPORTANT: O3 default fetch buffer = 64B dans certaines versions gem5.
+    # Avec des lignes de cache 32B, ca declenche le fatal "fetch buffer 64 > block 32".
+    cpu.fetchBufferSize = 32
+
+    # Fetch queue
+    cpu.fetchQueueSize = 8
+
+    # Decode / Issue / Commit : 2 / 4 / 2
+    cpu.decodeWidth  = 2
+    cpu.issueWidth   = 4
+    cpu.commitWidth  = 2
+
+    # Coherence autres largeurs
+    cpu.fetchWidth    = 2
+    cpu.renameWidth   = 4
+    cpu.dispatchWidth = 4
+    cpu.wbWidth       = 2
+
+    # RUU/LSQ : 2 / 8  (interpretation gem5: ROB=2, LQ=8, SQ=8)
+    cpu.numROBEntries = 2
+    cpu.LQEntries = 8
+    cpu.SQEntries = 8
+
+    # Branch predictor : bimodal, BTB=256
+    # BiModeBP correspond au "bimodal/bi-mode" cote gem5 classic.
+    cpu.branchPred = BiModeBP()
+    cpu.branchPred.BTBEntries = 256
+
+    # Coeur sans cache (caches=False) : coeur de rechange pour m5.switchCpus,
+    # il reprend les ports du coeur qu'il remplace.
+    if caches:
+        # -------- Caches C-A7 --------
+        # I-L1: 32KB / 32 / 2
+        cpu.icache = L1ICache()
+        cpu.icache.size = l1i_size
+        cpu.icache.assoc = 2
+
+        # D-L1: 32KB / 32 / 2
+        cpu.dcache = L1DCache()
+        cpu.dcache.size = l1d_size
+        cpu.dcache.assoc = 2
+
+    return cpu
+
+
+def make_a15_cpu(l1i_size="32kB", l1d_size="32kB", caches=True):
+    # Coeur A15 : pipeline O3 + L1 privees
+    cpu = DerivO3CPU()
+
+    # Fetch queue
+    cpu.fetchQueueSize = 15
+    
+    # Decode / Issue / Commit : 4 / 8 / 4
+    cpu.decodeWidth  = 4
+    cpu.issueWidth   = 8
+    cpu.commitWidth  = 4
+
+    # Pour coherence des autres largeurs O3
+    cpu.fetchWidth    = 4
+    cpu.renameWidth   = 8
+    cpu.dispatchWidth = 8
+    cpu.wbWidth       = 4
+
+    # RUU/LSQ : 16 / 16  (gem5: ROB=16, LQ=16, SQ=16)
+    cpu.numROBEntries = 16
+    cpu.LQEntries = 16
+    cpu.SQEntries = 16
+
+    # Branch predictor : "2 level", BTB=256
+    # En gem5 classic, LocalBP correspond a un 2-level local predictor.
+    cpu.branchPred = LocalBP()
+    cpu.branchPred.BTBEntries = 256
+
+    # Coeur sans cache (caches=False) : coeur de rechange pour m5.switchCpus,
+    # il reprend les ports du coeur qu'il remplace.
+    if caches:
+        # -------- Caches C-A15 --------
+        # I-L1: 32KB / 64 / 2
+        cpu.icache = L1ICache()
+        cpu.icache.size = l1i_size
+        cpu.icache.assoc = 2
+
+        # D-L1: 32KB / 64 / 2
+        cpu.dcache = L1DCache()
+        cpu.dcache.size = l1d_size
+        cpu.dcache.assoc = 2
+
+    return cpu
+
+
+# Taille de ligne et associativite du L2 (512KB) de chaque profil
+LINE_SIZE = {"a7": 32, "a15": 64}
+L2_ASSOC = {"a7": 8, "a15": 16}
+MAKE_CPU = {"a7": make_a7_cpu, "a15": make_a15_cpu}
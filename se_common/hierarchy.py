@@ -0,0 +1,258 @@
+# se_common/hierarchy.py
+#
+# Hierarchie de caches a N niveaux decrite par une spec declarative, commune
+# a se_cache.py, se_fu.py, pred_se_fu.py, TP4/se_A7.py et TP4/se_A15.py.
+#
+#   --hierarchy a15                      (preset : C1, C2, a7, a15, se_fu)
+#   --hierarchy ma_hierarchie.toml       (ou .json)
+#
+# Format (TOML ; meme structure en JSON) :
+#
+#   line_size = 64
+#
+#   [[levels]]                # 1er niveau : L1 separees, privees par coeur
+#   name = "l1"
+#   latency = 2               # tag/data/response (surchargeables un par un)
+#   tgts_per_mshr = 8
+#   writeback_clean = true
+#   i = { size = "32kB", assoc = 2, mshrs = 4 }
+#   d = { size = "32kB", assoc = 2, mshrs = 8 }
+#
+#   [[levels]]                # cache victime : petit, fully assoc., exclusif
+#   name = "vc"
+#   victim = true
+#   size = "4kB"
+#   latency = 1
+#
+#   [[levels]]
+#   name = "l2"
+#   shared = true             # un seul cache derriere un L2XBar (defaut : prive)
+#   size = "512kB"
+#   assoc = 8
+#   latency = 10
+#   mshrs = 16
+#   tgts_per_mshr = 12
+#   inclusion = "inclusive"   # ou "exclusive" (clusivity mostly_incl / mostly_excl)
+#
+# Toute autre cle d'un niveau est passee telle quelle au Cache gem5
+# (ex. sequential_access) ; une cle inconnue est une erreur explicite.
+# Noms des objets : cpu.icache / cpu.dcache, puis cpu.<name>cache (prive)
+# ou system.<name>cache (partage), avec leur bus <name>bus : les noms des
+# stats de la hierarchie C1/C2 (system.l2cache...) ne changent pas.
+#
+# gem5 n'a pas d'inclusion stricte : "exclusive" donne un cache mostly
+# exclusive, rempli par les evictions du niveau du dessus (writeback_clean
+# est alors force sur ce niveau, sans quoi les lignes propres seraient perdues).
+# La taille de ligne est unique (system.cache_line_size) ; fetchBufferSize
+# (O3) est ramene a la taille de ligne si besoin (sinon fatal "fetch buffer
+# > block size").
+#
+# La spec effective est ecrite dans <outdir>/hierarchy.json.
+
+import json
+import os
+
+import m5
+from m5.objects import Cache, L2XBar, SystemXBar
+from m5.util.convert import toMemorySize
+
+# Cles de structure d'un niveau (latency / inclusion sont traduites par _make_cache)
+_LEVEL_KEYS = ("name", "shared", "victim", "i", "d")
+
+_CLUSIVITY = {"inclusive": "mostly_incl", "exclusive": "mostly_excl"}
+
+
+def add_hierarchy_args(ap):
+    ap.add_argument("--hierarchy", default="",
+                    help=f"Hierarchie de caches : preset ({', '.join(PRESETS)}) ou fichier .toml/.json "
+                         "(remplace la hierarchie propre au script)")
+
+
+# ------------------ Presets ------------------
+
+def _l1(isize, iassoc, dsize, dassoc, writeback_clean):
+    return {
+        "name": "l1", "latency": 2, "tgts_per_mshr": 8, "writeback_clean": writeback_clean,
+        "i": {"size": isize, "assoc": iassoc, "mshrs": 4},
+        "d": {"size": dsize, "assoc": dassoc, "mshrs": 8},
+    }
+
+
+def _l2(size, assoc, writeback_clean):
+    return {"name": "l2", "shared": True, "size": size, "assoc": assoc, "latency": 10,
+            "mshrs": 16, "tgts_per_mshr": 12, "writeback_clean": writeback_clean}
+
+
+def simple_spec(line_size, l1i, l1d, l2, writeback_clean=True):
+    """
+    Hierarchie L1I/L1D privees + L2 partage ; l1i, l1d, l2 : (taille, assoc).
+    Latences/MSHRs des hierarchies historiques du depot.
+    """
+    return {
+        "line_size": line_size,
+        "levels": [
+            _l1(l1i[0], l1i[1], l1d[0], l1d[1], writeback_clean),
+            _l2(l2[0], l2[1], writeback_clean),
+        ],
+    }
+
+
+PRESETS = {
+    # se_cache.py --conf C1 / C2
+    "C1": lambda: simple_spec(32, ("4kB", 1), ("4kB", 1), ("32kB", 1)),
+    "C2": lambda: simple_spec(32, ("4kB", 1), ("4kB", 2), ("32kB", 4)),
+    # TP4 : Cortex-A7 / Cortex-A15 (L2 512KB)
+    "a7": lambda: simple_spec(32, ("32kB", 2), ("32kB", 2), ("512kB", 8)),
+    "a15": lambda: simple_spec(64, ("32kB", 2), ("32kB", 2), ("512kB", 16)),
+    # se_fu.py / pred_se_fu.py --caches
+    "se_fu": lambda: simple_spec(64, ("32kB", 2), ("32kB", 2), ("256kB", 8), writeback_clean=False),
+}
+
+
+def load_spec(text):
+    """Preset ou fichier .toml/.json -> spec (dict)."""
+    if text in PRESETS:
+        return PRESETS[text]()
+    if not os.path.isfile(text):
+        raise ValueError(f"hierarchie '{text}' : ni preset ({', '.join(PRESETS)}) ni fichier")
+    if text.endswith(".json"):
+        with open(text) as f:
+            return json.load(f)
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            raise ValueError(f"{text} : lecture TOML impossible (Python < 3.11 sans tomli), utiliser du JSON")
+    with open(text, "rb") as f:
+        return tomllib.load(f)
+
+
+def resolve(args, default):
+    """Spec de --hierarchy si donnee, sinon celle du script (default)."""
+    return load_spec(args.hierarchy) if getattr(args, "hierarchy", "") else default
+
+
+# ------------------ Construction ------------------
+
+def _make_cache(params, where):
+    p = dict(params)
+    latency = p.pop("latency", None)
+    if latency is not None:
+        for key in ("tag_latency", "data_latency", "response_latency"):
+            p.setdefault(key, latency)
+    inclusion = p.pop("inclusion", None)
+    if inclusion is not None:
+        if inclusion not in _CLUSIVITY:
+            raise ValueError(f"{where} : inclusion '{inclusion}' (attendu : {', '.join(_CLUSIVITY)})")
+        p["clusivity"] = _CLUSIVITY[inclusion]
+    for key in p:
+        if key not in Cache._params:
+            raise ValueError(f"{where} : parametre de cache inconnu '{key}'")
+    return Cache(**p)
+
+
+def _common(level):
+    return {k: v for k, v in level.items() if k not in _LEVEL_KEYS}
+
+
+def fit_fetch_buffer(cpu, line_size):
+    """Ramene fetchBufferSize (O3) a la taille de ligne si il la depasse."""
+    if "fetchBufferSize" in type(cpu)._params and int(cpu.fetchBufferSize) > line_size:
+        cpu.fetchBufferSize = line_size
+
+
+def build(system, cpus, spec):
+    """
+    Cree system.membus et la hierarchie de la spec entre les coeurs (cpus)
+    et le membus. Retourne {"l1i": [...], "l1d": [...], "<name>": [...]}
+    pour prefetch.configure / replacement.configure. Sans niveau ("levels"
+    vide), les coeurs sont branches directement sur le membus.
+    """
+    line_size = int(spec.get("line_size", 64))
+    levels = spec.get("levels", [])
+
+    system.cache_line_size = line_size
+    for cpu in cpus:
+        fit_fetch_buffer(cpu, line_size)
+
+    system.membus = SystemXBar()
+    system.system_port = system.membus.cpu_side_ports
+
+    caches = {}
+    if not levels:
+        for cpu in cpus:
+            cpu.icache_port = system.membus.cpu_side_ports
+            cpu.dcache_port = system.membus.cpu_side_ports
+        _write(spec)
+        return caches
+
+    # 1er niveau : L1I / L1D privees
+    first = levels[0]
+    name = first.get("name", "l1")
+    upstream = []  # par coeur (ou unique une fois partage) : caches dont mem_side reste a brancher
+    for cpu in cpus:
+        cpu.icache = _make_cache({**_common(first), **first.get("i", {}), "is_read_only": True}, f"{name}.i")
+        cpu.dcache = _make_cache({**_common(first), **first.get("d", {})}, f"{name}.d")
+        cpu.icache_port = cpu.icache.cpu_side
+        cpu.dcache_port = cpu.dcache.cpu_side
+        upstream.append([cpu.icache, cpu.dcache])
+    caches["l1i"] = [cpu.icache for cpu in cpus]
+    caches["l1d"] = [cpu.dcache for cpu in cpus]
+
+    shared = False
+    for level in levels[1:]:
+        name = level["name"]
+        params = _common(level)
+        if level.get("victim"):
+            params.setdefault("inclusion", "exclusive")
+            params.setdefault("assoc", toMemorySize(str(params["size"])) // line_size)
+        if params.get("inclusion") == "exclusive":
+            for group in upstream:
+                for cache in group:
+                    cache.writeback_clean = True
+
+        if level.get("shared"):
+            bus = L2XBar()
+            cache = _make_cache(params, name)
+            setattr(system, f"{name}bus", bus)
+            setattr(system, f"{name}cache", cache)
+            for group in upstream:
+                for up in group:
+                    up.mem_side = bus.cpu_side_ports
+            cache.cpu_side = bus.mem_side_ports
+            upstream = [[cache]]
+            caches[name] = [cache]
+            shared = True
+            continue
+
+        if shared:
+            raise ValueError(f"niveau '{name}' prive sous un niveau partage")
+        caches[name] = []
+        for i, (cpu, group) in enumerate(zip(cpus, upstream)):
+            cache = _make_cache(params, name)
+            setattr(cpu, f"{name}cache", cache)
+            if len(group) > 1:
+                bus = L2XBar()
+                setattr(cpu, f"{name}bus", bus)
+                for up in group:
+                    up.mem_side = bus.cpu_side_ports
+                cache.cpu_side = bus.mem_side_ports
+            else:
+                group[0].mem_side = cache.cpu_side
+            upstream[i] = [cache]
+            caches[name].append(cache)
+
+    for group in upstream:
+        for cache in group:
+            cache.mem_side = system.membus.cpu_side_ports
+
+    _write(spec)
+    return caches
+
+
+def _write(spec):
+    os.makedirs(m5.options.outdir, exist_ok=True)
+    with open(os.path.join(m5.options.outdir, "hierarchy.json"), "w") as f:
+        json.dump(spec, f, indent=1)
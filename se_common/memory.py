@@ -0,0 +1,148 @@
+# se_common/memory.py
+#
+# Sous-systeme DRAM configurable : technologie, canaux et politique du
+# controleur (remplace le MemCtrl + DDR3_1600_8x8 code en dur).
+#
+#   --mem-type ddr4 --mem-channels 2
+#   --mem-type lpddr3 --mem-sched fcfs --page-policy close
+#
+# Noms courts : ddr3, ddr3-2133, ddr4, ddr4-x4, lpddr2, lpddr3, lpddr5,
+# wideio, gddr5, hbm, hbm2 (ou directement le nom d'une classe gem5, ex.
+# DDR5_4400_4x8). Une classe absente de la build gem5 est une erreur explicite.
+#
+# Avec N canaux (puissance de 2), la plage memoire est entrelacee par blocs
+# de --mem-interleave octets (defaut : max(128, ligne de cache), comme
+# configs/common/MemConfig.py). Un seul canal garde le nom system.mem_ctrl
+# (stats inchangees), sinon system.mem_ctrls0..N-1. Pour la stdlib gem5
+# (RISCV_se.py) : make_stdlib_memory, un ChanneledMemory equivalent.
+#
+# Le choix est ecrit dans <outdir>/memory.json ; debit, taux de row hits,
+# latence moyenne de lecture : TP4/Projet/mem_report.py
+
+import json
+import math
+import os
+
+import m5
+import m5.objects as m5o
+from m5.objects import AddrRange, MemCtrl
+
+ALIASES = {
+    "ddr3": "DDR3_1600_8x8",
+    "ddr3-2133": "DDR3_2133_8x8",
+    "ddr4": "DDR4_2400_8x8",
+    "ddr4-x4": "DDR4_2400_16x4",
+    "lpddr2": "LPDDR2_S4_1066_1x32",
+    "lpddr3": "LPDDR3_1600_1x32",
+    "lpddr5": "LPDDR5_5500_1x16_BG_BL32",
+    "wideio": "WideIO_200_1x128",
+    "gddr5": "GDDR5_4000_2x32",
+    "hbm": "HBM_1000_4H_1x128",
+    "hbm2": "HBM_2000_4H_1x64",
+}
+
+SCHED = ("frcfs", "fcfs")
+PAGE_POLICIES = ("open", "open_adaptive", "close", "close_adaptive")
+ADDR_MAPPINGS = ("RoRaBaChCo", "RoRaBaCoCh", "RoCoRaBaCh")
+
+
+def add_memory_args(ap):
+    ap.add_argument("--mem-type", default="ddr3",
+                    help=f"Technologie DRAM : {', '.join(ALIASES)} ou classe gem5 (defaut : ddr3 = DDR3_1600_8x8)")
+    ap.add_argument("--mem-channels", type=int, default=1,
+                    help="Nombre de canaux (controleurs) entrelaces, puissance de 2")
+    ap.add_argument("--mem-interleave", type=int, default=0,
+                    help="Granularite d'entrelacement des canaux en octets (0 = max(128, ligne))")
+    ap.add_argument("--mem-sched", default="", choices=("",) + SCHED,
+                    help="Ordonnancement du controleur (defaut gem5 : frcfs)")
+    ap.add_argument("--page-policy", default="", choices=("",) + PAGE_POLICIES,
+                    help="Politique de page / row buffer (defaut gem5 : open_adaptive)")
+    ap.add_argument("--addr-mapping", default="", choices=("",) + ADDR_MAPPINGS,
+                    help="Decoupage de l'adresse en ligne/rang/banc/canal/colonne (defaut gem5 : RoRaBaCoCh)")
+
+
+def dram_class(kind):
+    cls_name = ALIASES.get(kind.lower(), kind)
+    cls = getattr(m5o, cls_name, None)
+    if cls is None:
+        raise ValueError(f"memoire '{kind}' ({cls_name}) absente de cette build gem5")
+    return cls
+
+
+def _check(args, line_size):
+    cls = dram_class(args.mem_type)
+    channels = args.mem_channels
+    if channels < 1 or channels & (channels - 1):
+        raise ValueError(f"--mem-channels={channels} : puissance de 2 attendue")
+    interleave = args.mem_interleave or max(128, line_size)
+    if interleave & (interleave - 1) or interleave < line_size:
+        raise ValueError(f"--mem-interleave={interleave} : puissance de 2 >= ligne de cache ({line_size}) attendue")
+    return cls, channels, interleave
+
+
+def _apply_policies(args, ctrl):
+    if args.page_policy:
+        ctrl.dram.page_policy = args.page_policy
+    if args.addr_mapping:
+        ctrl.dram.addr_mapping = args.addr_mapping
+    if args.mem_sched:
+        ctrl.mem_sched_policy = args.mem_sched
+
+
+def _write(args, cls, channels, interleave):
+    chosen = {
+        "mem_type": cls.__name__,
+        "channels": channels,
+        "interleave": interleave if channels > 1 else 0,
+        "mem_sched": args.mem_sched or "default",
+        "page_policy": args.page_policy or "default",
+        "addr_mapping": args.addr_mapping or "default",
+    }
+    os.makedirs(m5.options.outdir, exist_ok=True)
+    with open(os.path.join(m5.options.outdir, "memory.json"), "w") as f:
+        json.dump(chosen, f, indent=1)
+
+
+def configure(args, system):
+    """
+    Cree le(s) controleur(s) DRAM sur system.mem_ranges[0], branches sur
+    system.membus, et note le choix dans <outdir>/memory.json.
+    """
+    cls, channels, interleave = _check(args, int(system.cache_line_size))
+    rng = system.mem_ranges[0]
+    intlv_bits = int(math.log2(channels))
+    intlv_low_bit = int(math.log2(interleave))
+
+    ctrls = []
+    for i in range(channels):
+        dram = cls()
+        if channels == 1:
+            dram.range = rng
+        else:
+            dram.range = AddrRange(rng.start, size=rng.size(),
+                                   intlvHighBit=intlv_low_bit + intlv_bits - 1,
+                                   intlvBits=intlv_bits, intlvMatch=i)
+        ctrl = MemCtrl(dram=dram)
+        _apply_policies(args, ctrl)
+        ctrl.port = system.membus.mem_side_ports
+        ctrls.append(ctrl)
+
+    if channels == 1:
+        system.mem_ctrl = ctrls[0]
+    else:
+        system.mem_ctrls = ctrls
+
+    _write(args, cls, channels, interleave)
+    return ctrls
+
+
+def make_stdlib_memory(args, size, line_size=64):
+    """Equivalent pour la stdlib gem5 (RISCV_se.py) : ChanneledMemory."""
+    from gem5.components.memory.memory import ChanneledMemory
+
+    cls, channels, interleave = _check(args, line_size)
+    mem = ChanneledMemory(cls, channels, interleave, size=size)
+    for ctrl in mem.get_memory_controllers():
+        _apply_policies(args, ctrl)
+    _write(args, cls, channels, interleave)
+    return mem
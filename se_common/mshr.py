@@ -0,0 +1,72 @@
+# se_common/mshr.py
+#
+# Ressources de miss des caches (MSHR, cibles par MSHR, write buffers) et
+# profil d'occupation des MSHR (parallelisme memoire, MLP).
+#
+#   --l1d-mshrs 4 --l1d-tgts-per-mshr 16 --l2-mshrs 32 --l2-write-buffers 16
+#   --mlp-profile
+#
+# Sans option (ou 0) : valeurs de cortex.py / de la spec de hierarchie
+# (L1I 4/8, L1D 8/8, L2 16/12). --mlp-profile attache un MshrProfiler a
+# chaque cache (<cache>.mlp) : temps passe avec N MSHR occupes
+# (<cache>.mlp.occupancy::N), misses primaires / secondaires et cibles par
+# MSHR, dans stats.txt. Necessite l'objet MshrProfiler dans la build gem5
+# (TP4/mlp_gem5, voir add_gem5.txt). gem5 n'a pas de point de sonde sur les
+# write buffers : leur saturation se lit dans blockedCycles (cause 1, a cote
+# de no_mshrs / no_targets), toujours present dans stats.txt.
+#
+# Les valeurs effectives sont ecrites dans <outdir>/mshr.json. Rapport MLP
+# et recherche du plus petit nombre de MSHR a X % de l'IPC max :
+# TP4/Projet/mlp_report.py
+
+import json
+import os
+
+import m5
+import m5.objects as m5o
+
+LEVELS = ("l1i", "l1d", "l2")
+KNOBS = ("mshrs", "tgts_per_mshr", "write_buffers")
+
+
+def add_mshr_args(ap, levels=LEVELS):
+    for level in levels:
+        ap.add_argument(f"--{level}-mshrs", type=int, default=0,
+                        help=f"Nombre de MSHR du {level.upper()} (0 = defaut)")
+        ap.add_argument(f"--{level}-tgts-per-mshr", type=int, default=0,
+                        help=f"Cibles par MSHR du {level.upper()} (0 = defaut)")
+        ap.add_argument(f"--{level}-write-buffers", type=int, default=0,
+                        help=f"Write buffers du {level.upper()} (0 = defaut)")
+    ap.add_argument("--mlp-profile", action="store_true",
+                    help="Histogramme d'occupation des MSHR de chaque cache (objet MshrProfiler)")
+
+
+def configure(args, caches):
+    """
+    caches : {"l1i": [...], "l1d": [...], "l2": [...]} (listes de Cache).
+    Applique les --<niveau>-mshrs/-tgts-per-mshr/-write-buffers, attache les
+    profileurs avec --mlp-profile et note le tout dans <outdir>/mshr.json.
+    """
+    cls = None
+    if getattr(args, "mlp_profile", False):
+        cls = getattr(m5o, "MshrProfiler", None)
+        if cls is None:
+            raise ValueError("MshrProfiler absent de cette build gem5 (voir TP4/mlp_gem5/add_gem5.txt)")
+
+    chosen = {"profile": cls is not None, "levels": {}}
+    for level, objs in caches.items():
+        if not objs:
+            continue
+        for cache in objs:
+            for knob in KNOBS:
+                value = getattr(args, f"{level}_{knob}", 0)
+                if value:
+                    setattr(cache, knob, value)
+            if cls is not None:
+                cache.mlp = cls(cache=cache, mshrs=cache.mshrs, tgts_per_mshr=cache.tgts_per_mshr)
+        chosen["levels"][level] = {knob: int(getattr(objs[0], knob)) for knob in KNOBS}
+
+    os.makedirs(m5.options.outdir, exist_ok=True)
+    with open(os.path.join(m5.options.outdir, "mshr.json"), "w") as f:
+        json.dump(chosen, f, indent=1)
+    return chosen
@@ -0,0 +1,65 @@
+# se_common/multicore.py
+#
+# Mode multi-coeur des scripts SE (--num-cpus N) : un CPU par coeur avec ses
+# L1 privees, L2 partage derriere le L2XBar (coherent, snoop entre L1).
+#
+# Charges de travail (--mp-mode) :
+#   copies  : un Process par coeur (multiprogramme). --cmd peut lister
+#             plusieurs binaires separes par ';' (distribues en tourniquet) ;
+#             "{cpu}" dans --options est remplace par le numero du coeur
+#             (ex : fichiers de sortie distincts).
+#   threads : un seul Process partage par tous les coeurs ; les threads
+#             crees par le programme (pthread/clone) prennent les contextes
+#             libres.
+#
+# Avec N = 1, system.cpu reste un objet unique : noms de stats inchanges
+# (system.cpu.*). Avec N > 1 ils deviennent system.cpu0.*, system.cpu1.*...
+
+from m5.objects import Process, SEWorkload
+from m5.SimObject import SimObject
+
+
+def add_multicore_args(ap):
+    ap.add_argument("--num-cpus", type=int, default=1,
+                    help="Nombre de coeurs (L1 privees, L2 partage)")
+    ap.add_argument("--mp-mode", choices=["copies", "threads"], default="copies",
+                    help="copies : un Process par coeur ; threads : un Process multi-thread partage")
+
+
+def cpu_list(system):
+    """Les CPU du systeme, que system.cpu soit un objet ou un vecteur."""
+    cpu = system.cpu
+    if isinstance(cpu, SimObject):
+        return [cpu]
+    return list(cpu)
+
+
+def attach_cpus(system, cpus):
+    for i, cpu in enumerate(cpus):
+        cpu.cpu_id = i
+    system.cpu = cpus[0] if len(cpus) == 1 else cpus
+
+
+def make_processes(args, n):
+    cmds = [c for c in args.cmd.split(";") if c]
+    if args.mp_mode == "threads":
+        process = Process(pid=100)
+        process.cmd = [cmds[0]] + args.options
+        return [process] * n
+
+    processes = []
+    for i in range(n):
+        process = Process(pid=100 + i)
+        process.cmd = [cmds[i % len(cmds)]] + [o.replace("{cpu}", str(i)) for o in args.options]
+        processes.append(process)
+    return processes
+
+
+def bind_workloads(system, args):
+    cpus = cpu_list(system)
+    processes = make_processes(args, len(cpus))
+    system.workload = SEWorkload.init_compatible(processes[0].cmd[0])
+    for cpu, process in zip(cpus, processes):
+        cpu.workload = process
+        cpu.createThreads()
+        cpu.createInterruptController()
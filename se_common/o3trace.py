@@ -0,0 +1,240 @@
+# se_common/o3trace.py
+#
+# Trace O3PipeView par fenetres : le flag de debug O3PipeView n'est actif que
+# dans des fenetres d'instructions, au lieu de tracer tout le run.
+#
+#   --trace-window 50M:20k      fenetre explicite debut:longueur (repetable)
+#   --trace-every 10M           echantillonnage : une fenetre tous les N insts
+#   --trace-roi                 fenetre au debut de la ROI (avec --roi)
+#   --trace-pc 0x10a4c[:1000]   fenetre au N-ieme passage sur un PC
+#   --trace-len 10k             longueur des fenetres -every/-roi/-pc
+#   --trace-max-windows 64
+#
+# Les instructions sont celles commitees par le coeur detaille (system.cpu,
+# ou system.cpu0), comptees depuis le debut du programme, ou depuis le debut
+# de la ROI avec --roi. --trace-pc utilise PcCountTracker (gem5 >= 23.1).
+#
+# Le flag O3PipeView n'existe que dans gem5.opt / gem5.debug. Sans
+# --debug-file, la trace brute va dans <outdir>/o3trace.raw.gz (compressee
+# a la volee) ; les fenetres (insts, ticks, declencheur) sont notees dans
+# <outdir>/o3trace.json. Compactage binaire et export O3PipeView / Konata
+# des seules fenetres voulues : TP4/Projet/pipeview.py
+#
+# Usage dans un script SE :
+#   tracer = o3trace.configure(args, system)   # avant Root ; None sans --trace-*
+#   m5.instantiate()
+#   run = tracer.simulate if tracer else m5.simulate
+#   ... roi.simulate(system, args.roi_after, tracer) / run()
+#   if tracer:
+#       tracer.finish()
+
+import json
+import os
+
+import m5
+from m5 import trace
+
+from se_common import multicore
+
+FLAG = "O3PipeView"
+RAW_NAME = "o3trace.raw.gz"
+CAUSE = "o3trace window"
+# Cause de sortie de PcCountTrackerManager
+PC_CAUSE = "simpoint starting point found"
+
+_SUFFIXES = {"k": 10**3, "m": 10**6, "g": 10**9}
+
+
+def add_trace_args(ap):
+    ap.add_argument("--trace-window", action="append", default=[],
+                    help="Fenetre O3PipeView debut:longueur en instructions (ex: 50M:20k), repetable")
+    ap.add_argument("--trace-every", default="",
+                    help="Une fenetre de --trace-len instructions toutes les N instructions")
+    ap.add_argument("--trace-roi", action="store_true",
+                    help="Une fenetre de --trace-len instructions au debut de la ROI (--roi)")
+    ap.add_argument("--trace-pc", action="append", default=[],
+                    help="Fenetre au N-ieme passage sur un PC : 0x10a4c[:N] (N=1 par defaut), repetable")
+    ap.add_argument("--trace-len", default="10k",
+                    help="Longueur des fenetres --trace-every/--trace-roi/--trace-pc (defaut 10k)")
+    ap.add_argument("--trace-max-windows", type=int, default=64,
+                    help="Nombre maximal de fenetres (defaut 64)")
+
+
+def parse_count(text):
+    t = str(text).strip().lower()
+    if t and t[-1] in _SUFFIXES:
+        return int(float(t[:-1]) * _SUFFIXES[t[-1]])
+    return int(t)
+
+
+def _enabled(args):
+    return bool(args.trace_window or args.trace_every or args.trace_roi or args.trace_pc)
+
+
+class Tracer:
+    """Ouvre/ferme les fenetres de trace au fil de la simulation."""
+
+    def __init__(self, args, system):
+        self.cpu = multicore.cpu_list(system)[0]
+        self.length = parse_count(args.trace_len)
+        self.max_windows = args.trace_max_windows
+        self.every = parse_count(args.trace_every) if args.trace_every else 0
+        self.roi = args.trace_roi
+        self.windows = []
+        self.active = None
+        self.origin = 0
+        self.from_roi = False
+        self.running = False
+        # Sans --debug-file, la trace part dans un fichier gzip a part
+        self.raw_here = getattr(m5.options, "debug_file", "cout") in ("", "cout")
+
+        # Fenetres explicites, relatives a l'origine (debut du programme ou de la ROI)
+        self.static = []
+        for spec in args.trace_window:
+            start, _, length = spec.partition(":")
+            self.static.append((parse_count(start), parse_count(length or args.trace_len), "window"))
+        self.static.sort()
+        self.next_periodic = self.every
+
+        self.pc_targets = []
+        for spec in args.trace_pc:
+            pc, _, count = spec.partition(":")
+            self.pc_targets.append((int(pc, 0), int(count or 1)))
+        if self.pc_targets:
+            self._attach_pc_tracker(system)
+
+    def _attach_pc_tracker(self, system):
+        try:
+            from m5.objects import PcCountPair, PcCountTracker, PcCountTrackerManager
+        except ImportError:
+            raise ValueError("--trace-pc : PcCountTracker absent de cette build gem5 (gem5 >= 23.1)")
+        pairs = [PcCountPair(pc, count) for pc, count in self.pc_targets]
+        system.o3trace_pcmgr = PcCountTrackerManager(targets=pairs)
+        self.cpu.o3trace_pctracker = PcCountTracker(targets=pairs, core=self.cpu,
+                                                    ptmanager=system.o3trace_pcmgr)
+
+    # ------------------ Controle du flag ------------------
+
+    def _flag(self):
+        try:
+            return m5.debug.flags[FLAG]
+        except KeyError:
+            raise ValueError(f"flag de debug {FLAG} absent (utiliser gem5.opt, pas gem5.fast)")
+
+    def _insts(self):
+        return self.cpu.getCurrentInstCount(0) - self.origin
+
+    def _open(self, trigger, length):
+        if self.active is not None or len(self.windows) >= self.max_windows:
+            return
+        now = self._insts()
+        self.active = {
+            "id": len(self.windows),
+            "trigger": trigger,
+            "start_inst": now,
+            "end_inst": now + length,
+            "start_tick": m5.curTick(),
+        }
+        self._flag().enable()
+
+    def _close(self):
+        if self.active is None:
+            return
+        self._flag().disable()
+        self.active["end_inst"] = min(self.active["end_inst"], self._insts())
+        self.active["end_tick"] = m5.curTick()
+        self.windows.append(self.active)
+        self.active = None
+
+    def _next_static(self, now):
+        while self.static and self.static[0][0] + self.static[0][1] <= now:
+            self.static.pop(0)
+        while self.every and self.next_periodic + self.length <= now:
+            self.next_periodic += self.every
+        candidates = []
+        if self.static:
+            candidates.append(self.static[0])
+        if self.every:
+            candidates.append((self.next_periodic, self.length, "every"))
+        return min(candidates) if candidates else None
+
+    def _step(self):
+        """Ferme/ouvre la fenetre due, puis programme la prochaine frontiere."""
+        now = self._insts()
+        if self.active is not None and now >= self.active["end_inst"]:
+            self._close()
+        nxt = self._next_static(now)
+        if self.active is None and nxt is not None and nxt[0] <= now:
+            start, length, trigger = nxt
+            if trigger == "every":
+                self.next_periodic += self.every
+            else:
+                self.static.pop(0)
+            self._open(trigger, start + length - now)
+            nxt = self._next_static(now)
+
+        if len(self.windows) >= self.max_windows:
+            return
+        target = self.active["end_inst"] if self.active is not None else (nxt[0] if nxt else None)
+        if target is not None:
+            self.cpu.scheduleInstStop(0, max(1, target - now), CAUSE)
+
+    # ------------------ Points d'entree ------------------
+
+    def start(self, origin_here=False):
+        """Apres m5.instantiate() (ou au debut de la ROI avec origin_here)."""
+        self._flag().disable()
+        if origin_here:
+            self.origin = self.cpu.getCurrentInstCount(0)
+            self.from_roi = True
+        self.running = True
+        self._step()
+
+    def roi_begin(self):
+        self.start(origin_here=True)
+        if self.roi:
+            self._open("roi", self.length)
+            self._step()
+
+    def roi_end(self):
+        self._close()
+        self.running = False
+
+    def simulate(self, ticks=None):
+        """m5.simulate() qui traite lui-meme les sorties des fenetres."""
+        limit = None if ticks is None else m5.curTick() + ticks
+        while True:
+            ev = m5.simulate() if limit is None else m5.simulate(max(0, limit - m5.curTick()))
+            cause = ev.getCause()
+            if cause == CAUSE:
+                if self.running:
+                    self._step()
+                continue
+            if cause == PC_CAUSE:
+                if self.running:
+                    self._open("pc", self.length)
+                    self._step()
+                continue
+            return ev
+
+    def finish(self):
+        self._close()
+        info = {
+            "flag": FLAG,
+            "raw": RAW_NAME if self.raw_here else m5.options.debug_file,
+            "origin": "roi" if self.from_roi else "start",
+            "windows": self.windows,
+        }
+        with open(os.path.join(m5.options.outdir, "o3trace.json"), "w") as f:
+            json.dump(info, f, indent=1)
+        return info
+
+
+def configure(args, system):
+    """A appeler avant Root(...) : rend un Tracer, ou None sans option --trace-*."""
+    if not _enabled(args):
+        return None
+    tracer = Tracer(args, system)
+    if tracer.raw_here:
+        trace.output(RAW_NAME)
+    return tracer
@@ -0,0 +1,62 @@
+# se_common/occupancy.py
+#
+# Occupation des structures du coeur O3 : ROB, IQ, LQ, SQ.
+#
+#   --occupancy-profile [--occupancy-period 1]
+#
+# Un O3OccupancyProfiler par coeur O3 (<cpu>.occupancy) echantillonne
+# toutes les N cycles le nombre d'entrees utilisees de chaque structure :
+# <cpu>.occupancy.rob::K = nombre d'echantillons avec K entrees occupees
+# (idem iq, lq, sq), dans stats.txt, remis a zero avec les stats (ROI). Les
+# blocages dus a une structure pleine sont deja comptes par rename
+# (ROBFullEvents, IQFullEvents, LQFullEvents, SQFullEvents). Les coeurs non
+# O3 sont ignores.
+#
+# Necessite l'objet O3OccupancyProfiler dans la build gem5 (TP4/occ_gem5,
+# voir add_gem5.txt). Les tailles et la periode sont ecrites dans
+# <outdir>/occupancy.json. Taille a partir de laquelle l'IPC ne gagne plus :
+# TP4/Projet/occ_report.py
+
+import json
+import os
+
+import m5
+import m5.objects as m5o
+
+from se_common import multicore
+
+# Structure -> parametre gem5 de sa taille
+SIZES = {"rob": "numROBEntries", "iq": "numIQEntries", "lq": "LQEntries", "sq": "SQEntries"}
+
+
+def add_occupancy_args(ap):
+    ap.add_argument("--occupancy-profile", action="store_true",
+                    help="Occupation ROB/IQ/LQ/SQ echantillonnee (objet O3OccupancyProfiler)")
+    ap.add_argument("--occupancy-period", type=int, default=1,
+                    help="Periode d'echantillonnage en cycles CPU (defaut 1)")
+
+
+def configure(args, system):
+    """Attache un profileur a chaque coeur O3 et note les tailles dans <outdir>/occupancy.json."""
+    if not args.occupancy_profile:
+        return None
+    cls = getattr(m5o, "O3OccupancyProfiler", None)
+    if cls is None:
+        raise ValueError("O3OccupancyProfiler absent de cette build gem5 (voir TP4/occ_gem5/add_gem5.txt)")
+    if args.occupancy_period < 1:
+        raise ValueError("--occupancy-period doit etre >= 1")
+
+    chosen = {"period": args.occupancy_period, "cpus": {}}
+    cpus = multicore.cpu_list(system)
+    for i, cpu in enumerate(cpus):
+        # Seuls les coeurs O3 ont un ROB
+        if not hasattr(cpu, "numROBEntries"):
+            continue
+        cpu.occupancy = cls(cpu=cpu, period=args.occupancy_period)
+        name = "system.cpu" if len(cpus) == 1 else f"system.cpu{i}"
+        chosen["cpus"][name] = {s: int(getattr(cpu, p)) for s, p in SIZES.items()}
+
+    os.makedirs(m5.options.outdir, exist_ok=True)
+    with open(os.path.join(m5.options.outdir, "occupancy.json"), "w") as f:
+        json.dump(chosen, f, indent=1)
+    return chosen
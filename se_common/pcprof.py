@@ -0,0 +1,77 @@
+# se_common/pcprof.py
+#
+# Profil par PC : acces/misses L1I, L1D, L2 et branches mal predites, comptes
+# par des listeners sur les points de sonde des caches ("Hit", "Miss") et de
+# l'etage IEW du CPU O3 ("Mispredict"), sans trace ni flag de debug.
+#
+#   --pc-profile [--pc-profile-branches]
+#
+# Necessite l'objet PcProfiler dans la build gem5 (TP4/pcprof_gem5, voir
+# add_gem5.txt). Un profileur par coeur detaille ; seules ses propres requetes
+# sont comptees (L2 partage compris). Les compteurs suivent les stats :
+# remis a zero avec elles (m5.stats.reset, donc debut de ROI) et ecrits a
+# chaque dump dans <outdir>/pcprof_cpu<N>.<dump>.csv (meme numero que le
+# dump de stats.txt). --pc-profile-branches compte aussi les branches
+# commitees par PC (taux de mauvaise prediction, plus couteux).
+#
+# Symbolisation (ELF .riscv) et classement des points chauds :
+# TP4/Projet/hotspots.py
+
+import json
+import os
+
+import m5
+import m5.objects as m5o
+from m5.params import NULL
+
+from se_common import multicore
+
+
+def add_pcprof_args(ap):
+    ap.add_argument("--pc-profile", action="store_true",
+                    help="Misses L1I/L1D/L2 et mauvaises predictions par PC (objet PcProfiler)")
+    ap.add_argument("--pc-profile-branches", action="store_true",
+                    help="Avec --pc-profile : compte aussi les branches commitees par PC")
+
+
+def _level(caches, level, i, n):
+    objs = caches.get(level, [])
+    if len(objs) == n:
+        return objs[i]
+    # niveau partage : un seul cache pour tous les coeurs
+    return objs[0] if objs else NULL
+
+
+def configure(args, system, caches):
+    """
+    caches : dict rendu par hierarchy.build. Attache un PcProfiler par coeur
+    (system.pcprof) et note les fichiers produits dans <outdir>/pcprof.json.
+    """
+    if not args.pc_profile:
+        return None
+    cls = getattr(m5o, "PcProfiler", None)
+    if cls is None:
+        raise ValueError("PcProfiler absent de cette build gem5 (voir TP4/pcprof_gem5/add_gem5.txt)")
+
+    cpus = multicore.cpu_list(system)
+    profilers = []
+    for i, cpu in enumerate(cpus):
+        profilers.append(cls(
+            cpu=cpu,
+            icache=_level(caches, "l1i", i, len(cpus)),
+            dcache=_level(caches, "l1d", i, len(cpus)),
+            l2cache=_level(caches, "l2", i, len(cpus)),
+            count_branches=args.pc_profile_branches,
+            output=f"pcprof_cpu{i}",
+        ))
+    system.pcprof = profilers[0] if len(profilers) == 1 else profilers
+
+    chosen = {
+        "outputs": [p.output for p in profilers],
+        "levels": [lvl for lvl in ("l1i", "l1d", "l2") if caches.get(lvl)],
+        "branches": args.pc_profile_branches,
+    }
+    os.makedirs(m5.options.outdir, exist_ok=True)
+    with open(os.path.join(m5.options.outdir, "pcprof.json"), "w") as f:
+        json.dump(chosen, f, indent=1)
+    return chosen
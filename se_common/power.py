@@ -0,0 +1,133 @@
+# se_common/power.py
+#
+# Modeles de puissance gem5 (MathExprPowerModel) sur les coeurs et les
+# caches des profils A7 / A15 : puissance dynamique et statique calculees a
+# partir de l'activite simulee, dans chaque dump de stats (avec
+# --stats-period : une valeur par intervalle, donc par phase).
+#
+#   --power-model [--cacti-dir TP4/Projet/q8_cacti]
+#
+# Coeur : les mW/MHz de l'enonce (A7 0.10, A15 0.20, a 1.0V) donnent une
+# energie par cycle, repartie en une part fixe (horloge, BASE_FRAC) et une
+# part proportionnelle a l'IPC, calee pour retrouver exactement les mW/MHz
+# de l'enonce a IPC = IPC_REF :
+#   dyn = V^2 * E_cycle * (BASE_FRAC + (1 - BASE_FRAC) * ipc / IPC_REF) * f
+# Statique : STATIC_MW (a 1.0V, ~10 % de la puissance a fmax) * V.
+#
+# Caches : energies CACTI de la Q8 (result_<arch>_L1_<N>kB_32nm.txt,
+# result_<arch>_L2_512kB_32nm.txt) : lecture par acces, remplissage par miss,
+# fuite des bancs donnees + tags. Sans fichier pour la taille exacte, celui de
+# la taille la plus proche est utilise (avertissement).
+#
+# A appeler apres Root(...) (les expressions referencent le chemin des
+# objets) et avant m5.instantiate(). Bilan : TP4/Projet/power_report.py
+
+import glob
+import os
+import re
+from decimal import Decimal
+
+from m5.objects import BaseCache, MathExprPowerModel, PowerModel
+
+from se_common import multicore
+
+MW_PER_MHZ = {"a7": 0.10, "a15": 0.20}
+STATIC_MW = {"a7": 10.0, "a15": 50.0}
+IPC_REF = {"a7": 0.5, "a15": 1.0}
+BASE_FRAC = 0.4
+
+DEFAULT_CACTI_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "TP4", "Projet", "q8_cacti")
+
+_DATA_READ = re.compile(r"Data array: Total dynamic read energy/access\s*\(nJ\):\s*([0-9.eE+-]+)")
+_TAG_READ = re.compile(r"Tag array:\s*Total dynamic read energy/access\s*\(nJ\):\s*([0-9.eE+-]+)")
+_LEAK = re.compile(r"Total leakage read/write power of a bank \(mW\):\s*([0-9.eE+-]+)")
+
+
+def add_power_args(ap):
+    ap.add_argument("--power-model", action="store_true",
+                    help="Modeles de puissance gem5 sur coeurs et caches (stats power_model.*)")
+    ap.add_argument("--cacti-dir", default=DEFAULT_CACTI_DIR,
+                    help="Resultats CACTI (energies des caches), defaut : TP4/Projet/q8_cacti")
+
+
+class PowerOn(MathExprPowerModel):
+    def __init__(self, dyn, st, **kwargs):
+        super().__init__(**kwargs)
+        self.dyn = dyn
+        self.st = st
+
+
+class PowerOff(MathExprPowerModel):
+    dyn = "0"
+    st = "0"
+
+
+def make_power_model(dyn, st):
+    # Etats ON, CLK_GATED, SRAM_RETENTION, OFF
+    return PowerModel(pm=[PowerOn(dyn, st), PowerOff(), PowerOff(), PowerOff()])
+
+
+def read_cacti(path):
+    """(energie lecture nJ, fuite mW) d'un resultat CACTI 6.5."""
+    with open(path) as f:
+        text = f.read()
+    read = sum(float(m.group(1)) for m in (_DATA_READ.search(text), _TAG_READ.search(text)) if m)
+    leak = sum(float(x) for x in _LEAK.findall(text)[:2])
+    return read, leak
+
+
+def find_cacti(cacti_dir, profile, level, size_kb):
+    """Resultat CACTI pour (profil, L1/L2, taille), sinon la taille la plus proche."""
+    pattern = os.path.join(cacti_dir, f"result_{profile}_{level}_*kB_*.txt")
+    found = {}
+    for path in glob.glob(pattern):
+        m = re.search(rf"_{level}_(\d+)kB_", os.path.basename(path))
+        if m:
+            found[int(m.group(1))] = path
+    if not found:
+        raise ValueError(f"aucun resultat CACTI {pattern}")
+    best = min(found, key=lambda kb: abs(kb - size_kb))
+    if best != size_kb:
+        print(f"power: pas de CACTI {profile} {level} {size_kb}kB, utilise {best}kB")
+    return found[best]
+
+
+def _num(x):
+    # Le parseur MathExpr de gem5 ne lit pas la notation 1e-10
+    return format(Decimal(repr(x)), "f")
+
+
+def core_expressions(cpu_path, profile):
+    e_cycle = MW_PER_MHZ[profile] * 1e-9  # J/cycle (mW/MHz = nJ/cycle)
+    fixed = e_cycle * BASE_FRAC
+    per_ipc = e_cycle * (1.0 - BASE_FRAC) / IPC_REF[profile]
+    dyn = (f"voltage * voltage * ({_num(fixed)} + {_num(per_ipc)} * {cpu_path}.ipc)"
+           f" * {cpu_path}.numCycles / simSeconds")
+    st = f"{_num(STATIC_MW[profile] * 1e-3)} * voltage"
+    return dyn, st
+
+
+def cache_expressions(cache_path, read_nj, leak_mw):
+    e = read_nj * 1e-9
+    dyn = (f"voltage * voltage * {_num(e)} * ({cache_path}.overallAccesses"
+           f" + {cache_path}.overallMisses) / simSeconds")
+    st = f"{_num(leak_mw * 1e-3)} * voltage"
+    return dyn, st
+
+
+def attach(args, system, profile):
+    """Branche un PowerModel sur chaque coeur detaille et chaque cache de system."""
+    for cpu in multicore.cpu_list(system):
+        dyn, st = core_expressions(cpu.path(), profile)
+        cpu.power_state.default_state = "ON"
+        cpu.power_model = make_power_model(dyn, st)
+
+    for obj in system.descendants():
+        if not isinstance(obj, BaseCache):
+            continue
+        level = "L1" if obj.path().endswith(("icache", "dcache")) else "L2"
+        size_kb = int(obj.size.value) // 1024
+        read_nj, leak_mw = read_cacti(find_cacti(args.cacti_dir, profile, level, size_kb))
+        dyn, st = cache_expressions(obj.path(), read_nj, leak_mw)
+        obj.power_state.default_state = "ON"
+        obj.power_model = make_power_model(dyn, st)
@@ -0,0 +1,95 @@
+# se_common/prefetch.py
+#
+# Prefetchers materiels par niveau de cache (L1I, L1D, L2).
+#
+#   --l1d-prefetcher stride --l1d-pf-degree 4 --l1d-pf-distance 2
+#   --l2-prefetcher bop
+#
+# Noms courts : stride, tagged, ampm, bop (ou directement le nom d'une
+# classe gem5, ex. SignaturePathPrefetcher). Une classe absente de la build
+# gem5 est une erreur explicite. --*-pf-degree / --*-pf-distance ne sont
+# appliques que si la classe a le parametre correspondant.
+#
+# Le choix est ecrit dans <outdir>/prefetch.json ; precision, couverture,
+# ponctualite et gain d'IPC : TP4/Projet/pf_report.py
+
+import json
+import os
+
+import m5
+import m5.objects as m5o
+
+LEVELS = ("l1i", "l1d", "l2")
+
+ALIASES = {
+    "stride": "StridePrefetcher",
+    "tagged": "TaggedPrefetcher",
+    "ampm": "AMPMPrefetcher",
+    "bop": "BOPPrefetcher",
+}
+
+# Parametre de "degre" selon la classe (AMPM le range dans son sous-objet)
+_DEGREE_PARAMS = ("degree", "start_degree")
+
+
+def add_prefetch_args(ap, levels=LEVELS):
+    for level in levels:
+        name = level.upper()
+        ap.add_argument(f"--{level}-prefetcher", default="none",
+                        help=f"Prefetcher {name} : none, {', '.join(ALIASES)} ou classe gem5")
+        ap.add_argument(f"--{level}-pf-degree", type=int, default=0,
+                        help=f"Degre du prefetcher {name} (0 = defaut gem5)")
+        ap.add_argument(f"--{level}-pf-distance", type=int, default=0,
+                        help=f"Distance du prefetcher {name} (0 = defaut gem5)")
+
+
+def _has_param(obj, name):
+    return name in type(obj)._params
+
+
+def make_prefetcher(kind, degree=0, distance=0):
+    cls_name = ALIASES.get(kind.lower(), kind)
+    cls = getattr(m5o, cls_name, None)
+    if cls is None:
+        raise ValueError(f"prefetcher '{kind}' ({cls_name}) absent de cette build gem5")
+    pf = cls()
+
+    target = pf
+    if not any(_has_param(pf, p) for p in _DEGREE_PARAMS) and _has_param(pf, "ampm"):
+        target = pf.ampm
+    if degree:
+        for p in _DEGREE_PARAMS:
+            if _has_param(target, p):
+                setattr(target, p, degree)
+                break
+        else:
+            print(f"prefetch: {cls_name} n'a pas de parametre de degre, --pf-degree ignore")
+    if distance:
+        if _has_param(pf, "distance"):
+            pf.distance = distance
+        else:
+            print(f"prefetch: {cls_name} n'a pas de parametre distance, --pf-distance ignore")
+    return pf
+
+
+def configure(args, caches):
+    """
+    caches : {"l1i": [...], "l1d": [...], "l2": [...]} (listes de Cache).
+    Attache un prefetcher a chaque cache des niveaux demandes et note le
+    choix dans <outdir>/prefetch.json.
+    """
+    chosen = {}
+    for level, objs in caches.items():
+        kind = getattr(args, f"{level}_prefetcher", "none")
+        if not kind or kind == "none":
+            continue
+        degree = getattr(args, f"{level}_pf_degree", 0)
+        distance = getattr(args, f"{level}_pf_distance", 0)
+        for cache in objs:
+            cache.prefetcher = make_prefetcher(kind, degree, distance)
+        chosen[level] = {"prefetcher": ALIASES.get(kind.lower(), kind), "degree": degree, "distance": distance}
+
+    os.makedirs(m5.options.outdir, exist_ok=True)
+    with open(os.path.join(m5.options.outdir, "prefetch.json"), "w") as f:
+        json.dump(chosen, f, indent=1)
+    return chosen
@@ -0,0 +1,69 @@
+# se_common/replacement.py
+#
+# Politique de remplacement par niveau de cache (L1I, L1D, L2).
+#
+#   --l1d-replacement plru --l2-replacement brrip
+#
+# Noms courts : lru, plru (tree-PLRU), random, brrip, ship (SHiP sur PC ;
+# ship-mem = SHiP sur adresse), fifo, mru, nru, lip (ou directement le nom
+# d'une classe gem5). Sans option : politique par defaut de gem5 (LRU).
+# Une classe absente de la build gem5 est une erreur explicite.
+#
+# Le choix est ecrit dans <outdir>/replacement.json. Repartition des miss
+# compulsory / capacity / conflict : TP4/Projet/miss3c.py (trace --debug-flags=Cache).
+
+import json
+import os
+
+import m5
+import m5.objects as m5o
+
+LEVELS = ("l1i", "l1d", "l2")
+
+ALIASES = {
+    "lru": "LRURP",
+    "plru": "TreePLRURP",
+    "random": "RandomRP",
+    "brrip": "BRRIPRP",
+    "ship": "SHiPPCRP",
+    "ship-mem": "SHiPMemRP",
+    "fifo": "FIFORP",
+    "mru": "MRURP",
+    "nru": "NRURP",
+    "lip": "LIPRP",
+}
+
+
+def add_replacement_args(ap, levels=LEVELS):
+    for level in levels:
+        ap.add_argument(f"--{level}-replacement", default="",
+                        help=f"Remplacement {level.upper()} : {', '.join(ALIASES)} ou classe gem5 (defaut gem5 : LRU)")
+
+
+def make_policy(kind):
+    cls_name = ALIASES.get(kind.lower(), kind)
+    cls = getattr(m5o, cls_name, None)
+    if cls is None:
+        raise ValueError(f"politique de remplacement '{kind}' ({cls_name}) absente de cette build gem5")
+    return cls()
+
+
+def configure(args, caches):
+    """
+    caches : {"l1i": [...], "l1d": [...], "l2": [...]} (listes de Cache).
+    Fixe replacement_policy des niveaux demandes et note le choix dans
+    <outdir>/replacement.json.
+    """
+    chosen = {}
+    for level, objs in caches.items():
+        kind = getattr(args, f"{level}_replacement", "")
+        if not kind:
+            continue
+        for cache in objs:
+            cache.replacement_policy = make_policy(kind)
+        chosen[level] = ALIASES.get(kind.lower(), kind)
+
+    os.makedirs(m5.options.outdir, exist_ok=True)
+    with open(os.path.join(m5.options.outdir, "replacement.json"), "w") as f:
+        json.dump(chosen, f, indent=1)
+    return chosen
@@ -0,0 +1,147 @@
+# se_common/roi.py
+#
+# Mode ROI (region of interest) pilote par les marqueurs m5 du binaire :
+#   m5_work_begin -> m5_reset_stats -> noyau -> m5_dump_stats -> m5_work_end
+#
+#   1. tout ce qui precede m5_work_begin tourne sur un AtomicSimpleCPU (rapide,
+#      caches chauffes en mode atomique) ;
+#   2. au work_begin on bascule sur le CPU detaille (system.cpu) ;
+#   3. au work_end les stats de la ROI sont dans un dump a part, repere dans
+#      <outdir>/roi.json (numero de dump, ticks de debut/fin) ;
+#   4. ensuite, selon --roi-after : sortie immediate (exit) ou fin du
+#      programme en atomique (ff) avec un dump "post" separe.
+#
+# En multi-coeur (--num-cpus), tous les coeurs basculent ensemble : la ROI
+# commence au premier m5_work_begin et finit au premier m5_work_end.
+#
+# Usage dans un script SE (apres createThreads, avant m5.instantiate) :
+#   roi.add_roi_args(ap)
+#   ...
+#   if args.roi:
+#       roi.attach_fast_cpu(system)
+#   m5.instantiate()
+#   if args.roi:
+#       ev = roi.simulate(system, args.roi_after)
+
+import json
+import os
+
+import m5
+from m5.objects import AtomicSimpleCPU
+
+from se_common import multicore
+
+
+def add_roi_args(ap):
+    ap.add_argument("--roi", action="store_true",
+                    help="Atomique jusqu'a m5_work_begin, CPU detaille sur la ROI, stats ROI dans un dump dedie")
+    ap.add_argument("--roi-after", choices=["exit", "ff"], default="exit",
+                    help="Apres m5_work_end : sortir (exit) ou finir le programme en atomique (ff)")
+
+
+def attach_fast_cpu(system):
+    """Ajoute un CPU atomique (eteint) par coeur, pour tout ce qui est hors ROI."""
+    fast_cpus = []
+    for cpu in multicore.cpu_list(system):
+        fast = AtomicSimpleCPU(switched_out=True, cpu_id=cpu.cpu_id)
+        fast.workload = cpu.workload
+        fast.clk_domain = cpu.clk_domain
+        fast.isa = cpu.isa
+        fast.createThreads()
+        fast.createInterruptController()
+        fast_cpus.append(fast)
+    system.roi_fast_cpu = fast_cpus[0] if len(fast_cpus) == 1 else fast_cpus
+
+    # m5_work_begin / m5_work_end font sortir de m5.simulate()
+    system.exit_on_work_items = True
+    return fast_cpus
+
+
+def stats_path():
+    return os.path.join(m5.options.outdir, "stats.txt")
+
+
+def count_dumps(path=None):
+    """Nombre de blocs 'Begin Simulation Statistics' deja ecrits."""
+    path = path or stats_path()
+    try:
+        with open(path, "rb") as f:
+            return sum(1 for line in f if line.startswith(b"---------- Begin Simulation Statistics"))
+    except OSError:
+        return 0
+
+
+def write_label(info):
+    path = os.path.join(m5.options.outdir, "roi.json")
+    with open(path, "w") as f:
+        json.dump(info, f, indent=1)
+    print(f"ROI: {info}")
+
+
+def _simulate_until(causes, run=m5.simulate):
+    while True:
+        ev = run()
+        cause = ev.getCause()
+        if cause in causes:
+            return ev, True
+        if cause not in ("workbegin", "workend"):
+            return ev, False
+
+
+def simulate(system, after="exit", tracer=None):
+    """
+    Deroule la simulation en mode ROI. Gere lui-meme les dumps de stats :
+    l'appelant ne doit pas refaire m5.stats.dump(). tracer : fenetres de
+    trace O3 (se_common/o3trace.py), actives pendant la ROI seulement.
+    """
+    run = tracer.simulate if tracer else m5.simulate
+    detailed = multicore.cpu_list(system)
+    fast = list(system.roi_fast_cpu) if len(detailed) > 1 else [system.roi_fast_cpu]
+    to_fast = list(zip(detailed, fast))
+    to_detailed = list(zip(fast, detailed))
+
+    # Demarrage en atomique (le CPU detaille porte le cablage des caches,
+    # on bascule donc des le tick 0).
+    m5.switchCpus(system, to_fast)
+
+    ev, found = _simulate_until(("workbegin",))
+    if not found:
+        print("ROI: aucun m5_work_begin rencontre, programme entier simule en atomique")
+        m5.stats.dump()
+        return ev
+
+    begin = m5.curTick()
+    m5.switchCpus(system, to_detailed)
+    m5.stats.reset()
+    dumps_before = count_dumps()
+    if tracer:
+        tracer.roi_begin()
+
+    ev, found = _simulate_until(("workend",), run)
+    end = m5.curTick()
+    if tracer:
+        tracer.roi_end()
+
+    # Le binaire fait normalement m5_dump_stats juste avant m5_work_end ;
+    # sinon on dumpe nous-memes la ROI.
+    if count_dumps() == dumps_before:
+        m5.stats.dump()
+    info = {
+        "roi_dump": count_dumps() - 1,
+        "begin_tick": begin,
+        "end_tick": end,
+        "complete": found,
+        "after": after,
+    }
+
+    if not found or after == "exit":
+        write_label(info)
+        return ev
+
+    m5.switchCpus(system, to_fast)
+    m5.stats.reset()
+    ev, _ = _simulate_until(())
+    m5.stats.dump()
+    info["post_dump"] = count_dumps() - 1
+    write_label(info)
+    return ev
@@ -0,0 +1,107 @@
+# se_common/tlb.py
+#
+# TLB : ITLB / DTLB, L2 TLB unifiee et walker cache (entrees non feuilles de
+# la table des pages), par coeur.
+#
+#   --dtlb-entries 32 --dtlb-assoc 0 --l2tlb-entries 512 --l2tlb-assoc 4
+#   --walker-cache-entries 16 --tlb-walk-latency 20
+#   --tlb-profile                  (profil seul, tailles par defaut)
+#
+# Associativite 0 = totalement associative. Sans option : tailles du profil
+# (a7, a15 : ordres de grandeur des TRM Cortex) ou, hors profil, celles de
+# gem5 (64 entrees, pas de L2 TLB ni de walker cache).
+#
+# En mode SE, gem5 RISC-V traduit par la table des pages du processus sans
+# consulter les TLB : leur taille (mmu.itb/dtb.size, fixee quand meme pour
+# un usage FS) n'y change rien. Toute option TLB (ou --tlb-profile) attache
+# donc a chaque coeur un TlbProfiler (<cpu>.tlb_model), modele fonctionnel
+# alimente par les acces L1I/L1D : taux de miss ITLB/DTLB/L2 TLB, walks et
+# latence estimee des walks (walk_access_latency par lecture de PTE, Sv39 :
+# 3 niveaux) dans stats.txt, sans effet sur le temps simule. Necessite
+# l'objet TlbProfiler dans la build gem5 (TP4/tlb_gem5, voir add_gem5.txt)
+# et des caches L1.
+#
+# Les valeurs retenues sont ecrites dans <outdir>/tlb.json. Bilan :
+# TP4/Projet/tlb_report.py
+
+import json
+import os
+
+import m5
+import m5.objects as m5o
+
+from se_common import multicore
+
+KNOBS = ("itlb_entries", "itlb_assoc", "dtlb_entries", "dtlb_assoc", "l2tlb_entries", "l2tlb_assoc",
+         "walker_cache_entries")
+
+DEFAULTS = {"itlb_entries": 64, "itlb_assoc": 0, "dtlb_entries": 64, "dtlb_assoc": 0,
+            "l2tlb_entries": 0, "l2tlb_assoc": 4, "walker_cache_entries": 0}
+
+# Cortex-A7 : micro-TLB I/D 10 entrees, TLB principale 256 entrees 2 voies
+# Cortex-A15 : L1 TLB I/D 32 entrees, L2 TLB 512 entrees 4 voies
+PROFILES = {
+    "a7": {"itlb_entries": 10, "dtlb_entries": 10, "l2tlb_entries": 256, "l2tlb_assoc": 2,
+           "walker_cache_entries": 16},
+    "a15": {"itlb_entries": 32, "dtlb_entries": 32, "l2tlb_entries": 512, "l2tlb_assoc": 4,
+            "walker_cache_entries": 16},
+}
+
+
+def add_tlb_args(ap):
+    for name, what in (("itlb", "ITLB"), ("dtlb", "DTLB"), ("l2tlb", "L2 TLB unifiee")):
+        ap.add_argument(f"--{name}-entries", type=int, default=None,
+                        help=f"Entrees de la {what} (defaut : profil / gem5)")
+        ap.add_argument(f"--{name}-assoc", type=int, default=None,
+                        help=f"Associativite de la {what} (0 = totale)")
+    ap.add_argument("--walker-cache-entries", type=int, default=None,
+                    help="Entrees du walker cache (PTE non feuilles, 0 = aucun)")
+    ap.add_argument("--tlb-walk-latency", type=int, default=20,
+                    help="Latence d'une lecture de PTE par le walker, en cycles (defaut 20)")
+    ap.add_argument("--tlb-profile", action="store_true",
+                    help="Taux de miss TLB et latence des walks (objet TlbProfiler), tailles par defaut")
+
+
+def _enabled(args):
+    return args.tlb_profile or any(getattr(args, k) is not None for k in KNOBS)
+
+
+def configure(args, system, caches, profile=""):
+    """
+    caches : dict rendu par hierarchy.build. Fixe la taille des TLB gem5,
+    attache un TlbProfiler par coeur si une option TLB est donnee et note
+    les valeurs dans <outdir>/tlb.json.
+    """
+    chosen = dict(DEFAULTS)
+    chosen.update(PROFILES.get(profile, {}))
+    for knob in KNOBS:
+        value = getattr(args, knob)
+        if value is not None:
+            chosen[knob] = value
+
+    cpus = multicore.cpu_list(system)
+    for cpu in cpus:
+        mmu = getattr(cpu, "mmu", None)
+        if mmu is not None and hasattr(mmu, "itb"):
+            mmu.itb.size = chosen["itlb_entries"]
+            mmu.dtb.size = chosen["dtlb_entries"]
+
+    chosen["profile"] = profile
+    chosen["model"] = _enabled(args)
+    if chosen["model"]:
+        cls = getattr(m5o, "TlbProfiler", None)
+        if cls is None:
+            raise ValueError("TlbProfiler absent de cette build gem5 (voir TP4/tlb_gem5/add_gem5.txt)")
+        l1i, l1d = caches.get("l1i", []), caches.get("l1d", [])
+        if len(l1i) != len(cpus) or len(l1d) != len(cpus):
+            raise ValueError("modele de TLB : il faut des L1I/L1D privees (--caches ou --hierarchy)")
+        for cpu, icache, dcache in zip(cpus, l1i, l1d):
+            cpu.tlb_model = cls(icache=icache, dcache=dcache,
+                                walk_access_latency=args.tlb_walk_latency,
+                                **{k: chosen[k] for k in KNOBS})
+        chosen["walk_access_latency"] = args.tlb_walk_latency
+
+    os.makedirs(m5.options.outdir, exist_ok=True)
+    with open(os.path.join(m5.options.outdir, "tlb.json"), "w") as f:
+        json.dump(chosen, f, indent=1)
+    return chosen
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python3
+# se_profile.py : passe de profilage d'un workload, independante de la
+# microarchitecture (AtomicSimpleCPU, sans cache, memoire atomique).
+#
+# Le traceur d'instructions du CPU est remplace par un WorkloadProfiler
+# (TP4/wlprof_gem5, voir add_gem5.txt) : mix d'instructions, distances de
+# reutilisation (lignes de --line-size octets), working set par fenetre de
+# --window instructions, taux de prise et entropie de transition des
+# branches conditionnelles, ILP d'une machine ideale. Resultat :
+# <outdir>/wlprof.json (reecrit a chaque dump de stats).
+#
+# --bpred attache un predicteur de branchement au CPU atomique : taux de
+# mauvaise prediction (system.cpu.branchPred.condIncorrect) dans stats.txt,
+# sans effet sur le profil (none = pas de predicteur).
+#
+# Exemple:
+#   build/RISCV/gem5.fast -d m5out_prof_dij configs/se_profile.py \
+#     --cmd=TP4/Projet/dijkstra/dijkstra_large.riscv --args=TP4/Projet/dijkstra/input.dat
+#
+# Une passe par workload, rangee par workload : TP4/Projet/wlchar.py
+
+import argparse
+import m5
+from m5.objects import AddrRange, AtomicSimpleCPU, BiModeBP, LocalBP, Process, Root, SEWorkload, \
+    SrcClockDomain, System, TournamentBP, VoltageDomain
+from se_common import hierarchy, memory
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cmd", required=True, help="Binaire RISC-V (statique)")
+    ap.add_argument("--args", default="", help="Arguments du programme (une chaine)")
+    ap.add_argument("--mem-size", default="8GB")
+    ap.add_argument("--maxinsts", type=int, default=0, help="Arret apres N instructions (0 = fin du programme)")
+    ap.add_argument("--window", type=int, default=1000000,
+                    help="Fenetre du working set, en instructions (defaut 1M)")
+    ap.add_argument("--line-size", type=int, default=64, help="Taille de ligne des distances de reutilisation")
+    ap.add_argument("--page-size", type=int, default=4096, help="Taille de page du working set")
+    ap.add_argument("--bpred", choices=["none", "bimod", "local", "tournament"], default="none",
+                    help="Predicteur de branchement (taux de mauvaise prediction, defaut none)")
+    memory.add_memory_args(ap)
+    args = ap.parse_args()
+
+    try:
+        from m5.objects import WorkloadProfiler
+    except ImportError:
+        raise ValueError("WorkloadProfiler absent de cette build gem5 (voir TP4/wlprof_gem5/add_gem5.txt)")
+
+    system = System()
+    system.clk_domain = SrcClockDomain(clock="1GHz", voltage_domain=VoltageDomain())
+    system.mem_mode = "atomic"
+    system.mem_ranges = [AddrRange(args.mem_size)]
+
+    system.cpu = AtomicSimpleCPU()
+    system.cpu.tracer = WorkloadProfiler(line_bytes=args.line_size, page_bytes=args.page_size,
+                                         window_insts=args.window)
+    if args.bpred == "bimod":
+        system.cpu.branchPred = BiModeBP()
+    elif args.bpred == "local":
+        system.cpu.branchPred = LocalBP()
+    elif args.bpred == "tournament":
+        system.cpu.branchPred = TournamentBP()
+    if args.maxinsts > 0:
+        system.cpu.max_insts_any_thread = args.maxinsts
+    system.cpu.createInterruptController()
+
+    # Pas de cache : le profil ne depend d'aucun parametre de la hierarchie
+    hierarchy.build(system, [system.cpu], {"levels": []})
+    memory.configure(args, system)
+
+    system.workload = SEWorkload.init_compatible(args.cmd)
+    process = Process()
+    process.cmd = [args.cmd] + (args.args.split() if args.args else [])
+    system.cpu.workload = process
+    system.cpu.createThreads()
+
+    root = Root(full_system=False, system=system)
+    m5.instantiate()
+    ev = m5.simulate()
+    m5.stats.dump()
+    print(f"Exiting @ tick {m5.curTick()} because {ev.getCause()}")
+
+
+main()